@@ -121,9 +121,103 @@ def downloadAmberSuite():
         tarfh.extractall(path=dirname)
     return dirname
 
+def createReactiveWaterSystem(numReactiveAtoms, ffieldFile, controlFile, cutoff):
+    """Build a box of water on a lattice with the density of liquid water, for benchmarking ExternalPuremdForce.
+
+    If numReactiveAtoms is None, every molecule is reactive.  Otherwise the molecules closest to the center
+    of the box are reactive, enough of them to include at least numReactiveAtoms atoms, and they are surrounded
+    by enough rigid TIP3P water to fill PuReMD's nonbonded cutoff.  PuReMD computes the interactions within the
+    reactive region and its electrostatic interactions with the MM atoms, while the Lennard-Jones interactions
+    between the two regions are added with a CustomNonbondedForce.
+
+    Returns
+    -------
+    system : openmm.System
+        The test system object
+    positions : list of openmm.Vec3
+        The initial positions, in nm
+    numReactive : int
+        The number of reactive atoms
+    """
+    import math
+    spacing = 0.31
+    if numReactiveAtoms is None:
+        moleculesPerSide = 10
+    else:
+        # Make the box wide enough to hold the reactive region plus 1.2 nm of MM water on each side.
+        reactiveRadius = (3*math.ceil(numReactiveAtoms/3)*spacing**3/(4*math.pi))**(1/3)
+        moleculesPerSide = int(math.ceil(2*(reactiveRadius+1.2)/spacing))
+    boxSize = moleculesPerSide*spacing
+    system = mm.System()
+    system.setDefaultPeriodicBoxVectors(mm.Vec3(boxSize, 0, 0), mm.Vec3(0, boxSize, 0), mm.Vec3(0, 0, boxSize))
+    positions = []
+    for i in range(moleculesPerSide):
+        for j in range(moleculesPerSide):
+            for k in range(moleculesPerSide):
+                center = mm.Vec3((i+0.5)*spacing, (j+0.5)*spacing, (k+0.5)*spacing)
+                positions += [center, center+mm.Vec3(0.0957, 0, 0), center+mm.Vec3(-0.024, 0.0927, 0)]
+                system.addParticle(15.999)
+                system.addParticle(1.008)
+                system.addParticle(1.008)
+    numMolecules = moleculesPerSide**3
+    if numReactiveAtoms is None:
+        reactive = set(range(numMolecules))
+    else:
+        def distance2(molecule):
+            delta = positions[3*molecule]-mm.Vec3(0.5*boxSize, 0.5*boxSize, 0.5*boxSize)
+            return delta[0]**2 + delta[1]**2 + delta[2]**2
+        reactive = set(sorted(range(numMolecules), key=distance2)[:math.ceil(numReactiveAtoms/3)])
+    force = mm.ExternalPuremdForce(ffieldFile, controlFile)
+    for molecule in range(numMolecules):
+        isQM = molecule in reactive
+        force.addAtom(3*molecule, 'O', isQM)
+        force.addAtom(3*molecule+1, 'H', isQM)
+        force.addAtom(3*molecule+2, 'H', isQM)
+    system.addForce(force)
+    if len(reactive) < numMolecules:
+        force.setEmbeddingCutoff(1.0, 0.1)
+        nonbonded = mm.NonbondedForce()
+        nonbonded.setNonbondedMethod(mm.NonbondedForce.PME)
+        nonbonded.setCutoffDistance(cutoff)
+        lj = mm.CustomNonbondedForce('4*epsilon*((sigma/r)^12-(sigma/r)^6); sigma=0.5*(sigma1+sigma2); epsilon=sqrt(epsilon1*epsilon2)')
+        lj.addPerParticleParameter('sigma')
+        lj.addPerParticleParameter('epsilon')
+        lj.setNonbondedMethod(mm.CustomNonbondedForce.CutoffPeriodic)
+        lj.setCutoffDistance(cutoff)
+        for molecule in range(numMolecules):
+            isQM = molecule in reactive
+            for charge, sigma, epsilon in [(-0.834, 0.315061, 0.636386), (0.417, 1.0, 0.0), (0.417, 1.0, 0.0)]:
+                # PuReMD computes all interactions of the reactive atoms except Lennard-Jones with the MM atoms.
+                if isQM:
+                    nonbonded.addParticle(0.0, 1.0, 0.0)
+                else:
+                    nonbonded.addParticle(charge, sigma, epsilon)
+                lj.addParticle([sigma, epsilon])
+            first = 3*molecule
+            for atom1, atom2 in [(0, 1), (0, 2), (1, 2)]:
+                if not isQM:
+                    delta = positions[first+atom1]-positions[first+atom2]
+                    system.addConstraint(first+atom1, first+atom2, math.sqrt(delta[0]**2 + delta[1]**2 + delta[2]**2))
+                nonbonded.addException(first+atom1, first+atom2, 0.0, 1.0, 0.0)
+                lj.addExclusion(first+atom1, first+atom2)
+        qmAtoms = [3*molecule+i for molecule in reactive for i in range(3)]
+        mmAtoms = [3*molecule+i for molecule in range(numMolecules) if molecule not in reactive for i in range(3)]
+        lj.addInteractionGroup(qmAtoms, mmAtoms)
+        system.addForce(nonbonded)
+        system.addForce(lj)
+    return system, positions, 3*len(reactive)
+
+def getPuremdStatistics(context, force):
+    """Get the accumulated timing, charge solver and neighbor list statistics of an ExternalPuremdForce."""
+    times, evaluations = force.getTimingInfoInContext(context)
+    iterations, residual, preconditionerComputations = force.getChargeSolverInfoInContext(context)
+    builds, reuses = force.getNeighborListInfoInContext(context)
+    return {'time':times[mm.ExternalPuremdForce.TotalTime], 'bridge_time':sum(times[phase] for phase in PUREMD_BRIDGE_PHASES),
+            'evaluations':evaluations, 'iterations':iterations, 'builds':builds, 'reuses':reuses}
+
 import functools
 @functools.lru_cache(maxsize=None)
-def retrieveTestSystem(testName, pme_cutoff=0.9, bond_constraints='hbonds', polarization='mutual', epsilon=1e-5):
+def retrieveTestSystem(testName, pme_cutoff=0.9, bond_constraints='hbonds', polarization='mutual', epsilon=1e-5, puremd_ffield=None, puremd_control=None):
     """Retrieve a benchmark system
 
     Parameters
@@ -139,6 +233,10 @@ def retrieveTestSystem(testName, pme_cutoff=0.9, bond_constraints='hbonds', pola
         Polarization scheme for Amoeba
     epsilon : str or float, optional, default=1e-5
         mutualInducedTargetEpsilon for Amoeba
+    puremd_ffield : str, optional, default=None
+        ReaxFF force field file for the reactive tests
+    puremd_control : str, optional, default=None
+        PuReMD control file for the reactive tests
 
     Returns
     -------
@@ -154,6 +252,7 @@ def retrieveTestSystem(testName, pme_cutoff=0.9, bond_constraints='hbonds', pola
     amoeba = (testName in ('amoebagk', 'amoebapme'))
     apoa1 = testName.startswith('apoa1')
     amber = (testName.startswith('amber'))
+    reaxff = (testName.startswith('reaxff'))
     hydrogenMass = None
 
     # Create dictionary of test parameters
@@ -163,7 +262,16 @@ def retrieveTestSystem(testName, pme_cutoff=0.9, bond_constraints='hbonds', pola
     test_parameters['test'] = testName
 
     # Create the System.
-    if amoeba:
+    if reaxff:
+        numReactiveAtoms = (int(testName.split('-')[-1]) if testName.startswith('reaxff-qmmm') else None)
+        system, positions, numReactive = createReactiveWaterSystem(numReactiveAtoms, puremd_ffield, puremd_control, pme_cutoff)
+        test_parameters['reactive_atoms'] = numReactive
+        test_parameters['atoms'] = system.getNumParticles()
+        test_parameters['constraints'] = ('None' if numReactive == system.getNumParticles() else 'MM water')
+        if numReactive < system.getNumParticles():
+            test_parameters['cutoff'] = pme_cutoff
+        test_parameters['hydrogen_mass'] = '1'
+    elif amoeba:
         constraints = None
         test_parameters['epsilon'] = epsilon
         epsilon = float(epsilon)
@@ -298,7 +406,8 @@ def serializeTest(directory=None, system=None, integrator=None, state=None, core
 def runOneTest(testName, options):
     """Perform a single benchmarking simulation."""
 
-    system, positions, test_parameters = retrieveTestSystem(testName, pme_cutoff=options.pme_cutoff, bond_constraints=options.bond_constraints, polarization=options.polarization, epsilon=options.epsilon)
+    system, positions, test_parameters = retrieveTestSystem(testName, pme_cutoff=options.pme_cutoff, bond_constraints=options.bond_constraints, polarization=options.polarization, epsilon=options.epsilon,
+                                                            puremd_ffield=options.puremd_ffield, puremd_control=options.puremd_control)
 
     # Create a copy of the basic test_parameters dict (which may be cached) to report the test results
     test_result = test_parameters.copy()
@@ -309,6 +418,7 @@ def runOneTest(testName, options):
     amoeba = (testName in ('amoebagk', 'amoebapme'))
     apoa1 = testName.startswith('apoa1')
     amber = (testName.startswith('amber'))
+    reaxff = (testName.startswith('reaxff'))
     
     # Create the integrator
     temperature = 300*unit.kelvin
@@ -322,6 +432,13 @@ def runOneTest(testName, options):
             integ = mm.MTSIntegrator(dt, [(0,2), (1,1)])
         else:
             integ = mm.MTSLangevinIntegrator(temperature, friction, dt, [(0,2), (1,1)])
+    elif reaxff:
+        # Reactive water needs a short time step, since bonds to hydrogen are not constrained.
+        dt = 0.00025*unit.picoseconds
+        if options.ensemble == 'NVE':
+            integ = mm.VerletIntegrator(dt)
+        else:
+            integ = mm.LangevinMiddleIntegrator(temperature, friction, dt)
     elif amber:
         dt = 0.004*unit.picoseconds
         if options.ensemble == 'NVE':
@@ -387,8 +504,11 @@ def runOneTest(testName, options):
         state = context.getState(positions=True, velocities=True, energy=True, forces=True, parameters=True)
 
     # Time integration, ensuring we trigger kernel compilation before we start timing
+    puremdForces = [force for force in system.getForces() if isinstance(force, mm.ExternalPuremdForce)]
     steps = 20
     while True:
+        if len(puremdForces) > 0:
+            startStatistics = getPuremdStatistics(context, puremdForces[0])
         elapsed_time = timeIntegration(context, steps, initialSteps)
         if elapsed_time >= 0.5*options.seconds:
             break
@@ -402,6 +522,18 @@ def runOneTest(testName, options):
     ns_per_day = (integ.getStepSize() / time_per_step) / (unit.nanoseconds/unit.day)
     test_result['ns_per_day'] = ns_per_day
 
+    # Report the cost of each ReaxFF evaluation during the final timing run
+    if len(puremdForces) > 0:
+        endStatistics = getPuremdStatistics(context, puremdForces[0])
+        delta = {key : endStatistics[key]-startStatistics[key] for key in endStatistics}
+        evaluations = max(delta['evaluations'], 1)
+        test_result['puremd_evaluations'] = delta['evaluations']
+        test_result['ms_per_evaluation'] = 1000*delta['time']/evaluations
+        test_result['bridge_ms_per_evaluation'] = 1000*delta['bridge_time']/evaluations
+        test_result['solver_iterations_per_evaluation'] = delta['iterations']/evaluations
+        test_result['neighbor_list_builds'] = delta['builds']
+        test_result['neighbor_list_reuses'] = delta['reuses']
+
     # Serialize XML files for Folding@home benchmark if requested
     if options.serialize:
         wu_duration = 5*unit.minutes
@@ -450,11 +582,14 @@ def runOneTest(testName, options):
 platform_speeds = { mm.Platform.getPlatform(i).getName() : mm.Platform.getPlatform(i).getSpeed() for i in range(mm.Platform.getNumPlatforms()) }
 PLATFORMS = [platform for platform, speed in sorted(platform_speeds.items(), key=lambda item: item[1], reverse=True)]
 TESTS = ('gbsa', 'rf', 'pme', 'apoa1rf', 'apoa1pme', 'apoa1ljpme', 'amoebagk', 'amoebapme', 'amber20-dhfr', 'amber20-cellulose', 'amber20-stmv')
+REAXFF_TESTS = ('reaxff-qmmm-50', 'reaxff-qmmm-500', 'reaxff-qmmm-5000', 'reaxff-water')
 ENSEMBLES = ('NVE', 'NVT', 'NPT')
 BOND_CONSTRAINTS = ('hbonds', 'allbonds')
 PRECISIONS = ('single', 'mixed', 'double')
 POLARIZATION_MODES = ('direct', 'extrapolated', 'mutual')
 STYLES = ('simple', 'table')
+PUREMD_TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tests')
+PUREMD_BRIDGE_PHASES = (mm.ExternalPuremdForce.GatherTime, mm.ExternalPuremdForce.SetupTime, mm.ExternalPuremdForce.ScatterTime)
 
 parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter,
                                  description="Run one or more benchmarks of OpenMM",
@@ -469,9 +604,13 @@ Example: run the apoa1pme benchmark for the CPU platform with a reduced cutoff d
 
 Example: run the full suite in mixed precision mode, saving the results to a YAML file
 
-    python benchmark.py --platform=CUDA --precision=mixed --outfile=benchmark.yaml""")
+    python benchmark.py --platform=CUDA --precision=mixed --outfile=benchmark.yaml
+
+Example: run the QM/MM benchmarks with reactive regions of increasing size, saving the results to a JSON file
+
+    python benchmark.py --platform=CUDA --test=reaxff-qmmm-50,reaxff-qmmm-500,reaxff-qmmm-5000 --outfile=reaxff.json""")
 parser.add_argument('--platform', dest='platform', choices=PLATFORMS, help='name of the platform to benchmark')
-parser.add_argument('--test', default=','.join(TESTS), dest='test', help=f'the test to perform, or comma-separated list: {TESTS} [default: all]')
+parser.add_argument('--test', default=','.join(TESTS), dest='test', help=f'the test to perform, or comma-separated list: {TESTS + REAXFF_TESTS} [default: all except the reaxff tests, which must be named explicitly]')
 parser.add_argument('--ensemble', default='NVT', dest='ensemble', help=f'the thermodynamic ensemble to simulate: {ENSEMBLES} [default: NVT]')
 parser.add_argument('--pme-cutoff', default=0.9, dest='pme_cutoff', type=float, help='direct space cutoff for PME in nm [default: 0.9]')
 parser.add_argument('--seconds', default=60, dest='seconds', type=float, help='target simulation length in seconds [default: 60]')
@@ -483,6 +622,8 @@ parser.add_argument('--opencl-platform', default=None, dest='opencl_platform', h
 parser.add_argument('--precision', default='single', dest='precision', help=f'precision modes for CUDA or OpenCL: {PRECISIONS} [default: single]')
 parser.add_argument('--style', default='simple', dest='style', choices=STYLES, help=f'output style: {STYLES} [default: simple]')
 parser.add_argument('--outfile', default=None, dest='outfile', help='output filename for benchmark logging (must end with .yaml or .json)')
+parser.add_argument('--puremd-ffield', default=os.path.join(PUREMD_TEST_DIR, 'ffield.reaxff'), dest='puremd_ffield', help='ReaxFF force field file for the reaxff tests')
+parser.add_argument('--puremd-control', default=os.path.join(PUREMD_TEST_DIR, 'control_qmmm'), dest='puremd_control', help='PuReMD control file for the reaxff tests')
 parser.add_argument('--serialize', default=None, dest='serialize', help='if specified, output serialized test systems for Folding@home or other uses')
 parser.add_argument('--verbose', default=False, action='store_true', dest='verbose', help='if specified, print verbose output')
 args = parser.parse_args()
@@ -520,8 +661,8 @@ if args.outfile is not None:
     appendTestResult(args.outfile, system_info=system_info)
 
 tests = args.test.split(',')
-if not set(tests).issubset(TESTS):
-    parser.error(f'Available tests: {TESTS}')
+if not set(tests).issubset(TESTS + REAXFF_TESTS):
+    parser.error(f'Available tests: {TESTS + REAXFF_TESTS}')
 
 precisions = args.precision.split(',')
 if args.platform == 'Reference':
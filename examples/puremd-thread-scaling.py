@@ -0,0 +1,146 @@
+"""
+Measure how the ReaxFF evaluation of an ExternalPuremdForce scales with the number of OpenMP threads
+used by PuReMD.
+
+A box of water or of silica (beta-cristobalite) is built in which every atom is reactive, and a short
+simulation is run for each combination of thread count and bonded_reduction_type (0: atomic updates of the shared bond order
+derivatives, 1: thread-local accumulation).  For each run the script reports the average wall clock
+time per force evaluation, the time spent in the bonded interactions, and the speedup and parallel
+efficiency relative to the first thread count.
+"""
+
+from __future__ import print_function
+import openmm as mm
+import openmm.unit as unit
+import argparse
+import os
+import tempfile
+import time
+
+REDUCTION_TYPES = {0: 'atomic', 1: 'thread-local'}
+
+
+def createWaterBox(moleculesPerSide, ffieldFile, controlFile):
+    """Build a cubic box of reactive water molecules on a lattice with the density of liquid water."""
+    spacing = 0.31
+    boxSize = moleculesPerSide*spacing
+    system = mm.System()
+    system.setDefaultPeriodicBoxVectors(mm.Vec3(boxSize, 0, 0), mm.Vec3(0, boxSize, 0), mm.Vec3(0, 0, boxSize))
+    force = mm.ExternalPuremdForce(ffieldFile, controlFile)
+    positions = []
+    for i in range(moleculesPerSide):
+        for j in range(moleculesPerSide):
+            for k in range(moleculesPerSide):
+                center = mm.Vec3(i*spacing, j*spacing, k*spacing)
+                positions.append(center)
+                positions.append(center+mm.Vec3(0.0957, 0, 0))
+                positions.append(center+mm.Vec3(-0.024, 0.0927, 0))
+                first = system.getNumParticles()
+                system.addParticle(15.999)
+                system.addParticle(1.008)
+                system.addParticle(1.008)
+                force.addAtom(first, 'O', True)
+                force.addAtom(first+1, 'H', True)
+                force.addAtom(first+2, 'H', True)
+    system.addForce(force)
+    return system, force, positions
+
+
+def createSilicaBox(cellsPerSide, ffieldFile, controlFile):
+    """Build a cubic box of reactive beta-cristobalite: Si on a diamond lattice with O at the midpoints of
+    the Si-Si bonds, 8 Si and 16 O per unit cell.  Unlike water, this has many torsions."""
+    a = 0.716
+    boxSize = cellsPerSide*a
+    system = mm.System()
+    system.setDefaultPeriodicBoxVectors(mm.Vec3(boxSize, 0, 0), mm.Vec3(0, boxSize, 0), mm.Vec3(0, 0, boxSize))
+    force = mm.ExternalPuremdForce(ffieldFile, controlFile)
+    positions = []
+    fccSites = [(0, 0, 0), (0, 0.5, 0.5), (0.5, 0, 0.5), (0.5, 0.5, 0)]
+    bonds = [(1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)]
+
+    def addAtom(fraction, element, mass):
+        positions.append(mm.Vec3(*[(a*x) % boxSize for x in fraction]))
+        force.addAtom(system.addParticle(mass), element, True)
+
+    for i in range(cellsPerSide):
+        for j in range(cellsPerSide):
+            for k in range(cellsPerSide):
+                for site in fccSites:
+                    corner = (i+site[0], j+site[1], k+site[2])
+                    addAtom(corner, 'Si', 28.086)
+                    addAtom([x+0.25*d for x, d in zip(corner, bonds[0])], 'Si', 28.086)
+                    for bond in bonds:
+                        addAtom([x+0.125*d for x, d in zip(corner, bond)], 'O', 15.999)
+    system.addForce(force)
+    return system, force, positions
+
+
+def writeControlFile(template, filename, numThreads, reductionType):
+    """Copy a PuReMD control file, overriding the threading options."""
+    with open(template) as infile:
+        lines = [line for line in infile if line.split()[:1] not in (['num_threads'], ['bonded_reduction_type'])]
+    with open(filename, 'w') as outfile:
+        outfile.writelines(lines)
+        print(f'num_threads             {numThreads}', file=outfile)
+        print(f'bonded_reduction_type   {reductionType}', file=outfile)
+
+
+def runOneTest(args, controlFile):
+    """Time a simulation using the given threading options.  Returns the time per evaluation and the
+    bonded time per evaluation, both in ms."""
+    if args.system == 'silica':
+        system, force, positions = createSilicaBox(args.cells, args.ffield, controlFile)
+    else:
+        system, force, positions = createWaterBox(args.molecules, args.ffield, controlFile)
+    integrator = mm.VerletIntegrator(0.1*unit.femtoseconds)
+    platform = mm.Platform.getPlatformByName(args.platform)
+    context = mm.Context(system, integrator, platform)
+    context.setPositions(positions)
+    integrator.step(args.warmup)
+    times, evaluations = force.getTimingInfoInContext(context)
+    startBonded = times[mm.ExternalPuremdForce.BondedTime]
+    startEvaluations = evaluations
+    start = time.perf_counter()
+    integrator.step(args.steps)
+    elapsed = time.perf_counter()-start
+    times, evaluations = force.getTimingInfoInContext(context)
+    numEvaluations = max(evaluations-startEvaluations, 1)
+    bonded = times[mm.ExternalPuremdForce.BondedTime]-startBonded
+    del context, integrator
+    return 1000.0*elapsed/numEvaluations, 1000.0*bonded/numEvaluations
+
+
+testDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tests')
+parser = argparse.ArgumentParser(description='Measure the strong scaling of ExternalPuremdForce with OpenMP threads')
+parser.add_argument('--platform', default='Reference', dest='platform', help='name of the platform to benchmark [default: Reference]')
+parser.add_argument('--threads', default='1,2,4,8,16,32,64', dest='threads', help='comma separated list of thread counts [default: 1,2,4,8,16,32,64]')
+parser.add_argument('--reduction', default='0,1', dest='reduction', help='comma separated list of bonded_reduction_type values [default: 0,1]')
+parser.add_argument('--system', default='water', choices=['water', 'silica'], dest='system', help='system to simulate [default: water]')
+parser.add_argument('--molecules', default=10, type=int, dest='molecules', help='number of water molecules along each side of the box [default: 10]')
+parser.add_argument('--cells', default=4, type=int, dest='cells', help='number of silica unit cells along each side of the box [default: 4]')
+parser.add_argument('--steps', default=20, type=int, dest='steps', help='number of timed steps [default: 20]')
+parser.add_argument('--warmup', default=2, type=int, dest='warmup', help='number of untimed steps run first [default: 2]')
+parser.add_argument('--ffield', default=os.path.join(testDir, 'ffield.reaxff'), dest='ffield', help='ReaxFF force field file')
+parser.add_argument('--control', default=os.path.join(testDir, 'control_qmmm'), dest='control', help='PuReMD control file to use as a template')
+args = parser.parse_args()
+
+threads = [int(t) for t in args.threads.split(',')]
+reductionTypes = [int(r) for r in args.reduction.split(',')]
+if not set(reductionTypes).issubset(REDUCTION_TYPES):
+    parser.error(f'Available reduction types: {list(REDUCTION_TYPES)}')
+
+numAtoms = 24*args.cells**3 if args.system == 'silica' else 3*args.molecules**3
+print(f'{args.system}: {numAtoms} reactive atoms, {args.steps} steps on the {args.platform} platform')
+print()
+print('Reduction      Threads   ms/eval   Bonded ms/eval   Speedup   Efficiency')
+with tempfile.TemporaryDirectory() as tempDir:
+    controlFile = os.path.join(tempDir, 'control')
+    for reductionType in reductionTypes:
+        baseline = None
+        for numThreads in threads:
+            writeControlFile(args.control, controlFile, numThreads, reductionType)
+            msPerEval, bondedPerEval = runOneTest(args, controlFile)
+            if baseline is None:
+                baseline = msPerEval
+            speedup = baseline/msPerEval
+            print(f'{REDUCTION_TYPES[reductionType]:<15}{numThreads:>7}{msPerEval:>10.2f}{bondedPerEval:>17.2f}{speedup:>10.2f}{speedup*threads[0]/numThreads:>13.2f}')
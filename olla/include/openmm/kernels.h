@@ -377,6 +377,72 @@ class CalcExternalPuremdForceKernel: public KernelImpl{
     virtual void initialize(const System& system, const ExternalPuremdForce& force) = 0;
     virtual double execute(ContextImpl& context, bool includeForces, bool includeEnergy) = 0;
     virtual void copyParametersToContext(ContextImpl& context, const ExternalPuremdForce& force, int firstBond, int lastBond) = 0;
+    /**
+     * Get the number of times the PuReMD far neighbor list has been built and reused.
+     *
+     * @param numBuilds   the number of force evaluations for which the neighbor list was built
+     * @param numReuses   the number of force evaluations for which the neighbor list was reused
+     */
+    virtual void getNeighborListInfo(int& numBuilds, int& numReuses) const = 0;
+    /**
+     * Get which atoms are currently treated as reactive.
+     *
+     * @param qmAtoms   the indices of the reactive atoms within the ExternalPuremdForce
+     */
+    virtual void getQMAtoms(std::vector<int>& qmAtoms) const = 0;
+    /**
+     * Get the wall clock time spent in each phase of the force evaluations.
+     *
+     * @param times            the total time (in seconds) spent in each phase, indexed by ExternalPuremdForce::TimingPhase
+     * @param numEvaluations   the number of force evaluations for which PuReMD was run
+     */
+    virtual void getTimingInfo(std::vector<double>& times, int& numEvaluations) const = 0;
+    /**
+     * Get statistics on how PuReMD has solved for the atomic charges.
+     *
+     * @param numIterations                  the total number of linear solver iterations
+     * @param residual                       the largest relative residual norm of the linear solver in the most recent evaluation
+     * @param numPreconditionerComputations  the number of evaluations for which the preconditioner was recomputed
+     */
+    virtual void getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const = 0;
+    /**
+     * Get the virial of the ReaxFF forces from the most recent force evaluation.
+     *
+     * @param virialX   the first row of the virial tensor, measured in kJ/mol
+     * @param virialY   the second row of the virial tensor, measured in kJ/mol
+     * @param virialZ   the third row of the virial tensor, measured in kJ/mol
+     */
+    virtual void getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const = 0;
+    /**
+     * Get the bonds between reactive atoms from the most recent force evaluation whose bond order is at least a threshold.
+     *
+     * @param threshold    the minimum bond order of the bonds to report
+     * @param bondAtoms    the indices within the ExternalPuremdForce of the two atoms of each bond, stored consecutively
+     * @param bondOrders   the bond order of each bond
+     */
+    virtual void getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const = 0;
+    /**
+     * Get the fragments (sets of reactive atoms connected by bonds whose bond order is at least a threshold)
+     * from the most recent force evaluation.
+     *
+     * @param threshold    the minimum bond order of the bonds connecting a fragment
+     * @param fragments    the index of the fragment containing each atom of the ExternalPuremdForce, or -1 for non-reactive atoms
+     */
+    virtual void getFragments(double threshold, std::vector<int>& fragments) const = 0;
+    /**
+     * Write the state needed to continue a simulation efficiently and reproducibly to a checkpoint: the
+     * current reactive region and embedded atoms, and the history of charges PuReMD uses for the initial
+     * guesses of its charge solver.
+     *
+     * @param stream    an output stream the checkpoint data should be written to
+     */
+    virtual void createCheckpoint(std::ostream& stream) const = 0;
+    /**
+     * Load state from a checkpoint written by createCheckpoint().
+     *
+     * @param stream    an input stream the checkpoint data should be read from
+     */
+    virtual void loadCheckpoint(std::istream& stream) = 0;
 };
 
 /**
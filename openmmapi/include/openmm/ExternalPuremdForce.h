@@ -15,9 +15,60 @@ namespace OpenMM {
 
 /**
  * A class that introduces a puremd qmmm force.
+ *
+ * Evaluating this force is usually far more expensive than the rest of the System, so it is a good candidate
+ * for the outer force group of a multiple time step integrator (MTSIntegrator or MTSLangevinIntegrator).  Put it
+ * in its own force group with setForceGroup(), and PuReMD will only be run when that group is requested.
+ *
+ * Each Context caches the energy and forces from the most recent PuReMD evaluation.  If the next request has
+ * exactly the same positions, charges and periodic box (for example, an energy query right after an integration
+ * step), the cached results are returned instead of running PuReMD again.  Calling updateParametersInContext()
+ * discards the cache.
  */
     class OPENMM_EXPORT ExternalPuremdForce : public Force {
     public:
+    /**
+     * This is an enumeration of the phases of a force evaluation whose wall clock times are reported by
+     * getTimingInfoInContext().  Each value is the index of that phase in the returned vector.
+     */
+    enum TimingPhase {
+        /**
+         * Gathering the coordinates and charges of the atoms into the arrays passed to PuReMD.
+         */
+        GatherTime = 0,
+        /**
+         * Setting up, resetting or updating the PuReMD system with the new coordinates.
+         */
+        SetupTime = 1,
+        /**
+         * Building the PuReMD far neighbor list (zero for evaluations where the list is reused).
+         */
+        NeighborListTime = 2,
+        /**
+         * Building the bond, hydrogen bond and charge matrix lists.
+         */
+        InitForcesTime = 3,
+        /**
+         * Computing the bonded interactions.
+         */
+        BondedTime = 4,
+        /**
+         * Solving for the atomic charges, including computing the preconditioner.
+         */
+        ChargeTime = 5,
+        /**
+         * Computing the nonbonded (van der Waals and Coulomb) interactions.
+         */
+        NonbondedTime = 6,
+        /**
+         * Converting the forces returned by PuReMD and adding them to the System.
+         */
+        ScatterTime = 7,
+        /**
+         * The whole force evaluation.
+         */
+        TotalTime = 8
+    };
     /**
      * Create a puremd force
      */
@@ -48,6 +99,57 @@ namespace OpenMM {
         ffieldFile = ffield_file;
         controlFile = control_file;
     }
+    /**
+     * Set the contents of the force field file.  If this is not empty, it is used instead of the
+     * force field file passed to the constructor.  PuReMD parses each distinct force field only once
+     * per process, and shares the parsed parameters between all Contexts that use it.
+     *
+     * @param contents  the contents of a ReaxFF force field file
+     */
+    void setForceFieldContents(const std::string& contents);
+    /**
+     * Get the contents of the force field file, as set by setForceFieldContents().  This is empty if the
+     * force field is read from the file passed to the constructor.
+     */
+    const std::string& getForceFieldContents() const {
+        return ffieldContents;
+    }
+    /**
+     * Set the contents of the control file.  If this is not empty, it is used instead of the
+     * control file passed to the constructor.
+     *
+     * @param contents  the contents of a PuReMD control file
+     */
+    void setControlContents(const std::string& contents);
+    /**
+     * Get the contents of the control file, as set by setControlContents().  This is empty if the
+     * control parameters are read from the file passed to the constructor.
+     */
+    const std::string& getControlContents() const {
+        return controlContents;
+    }
+    /**
+     * Set the value of a single control parameter.  This overrides the value given in the control file
+     * (or by setControlContents()).  If the parameter has already been set, its value is replaced.
+     *
+     * @param keyword  the name of the parameter, as it would appear in a control file
+     * @param value    the value of the parameter, as it would appear in a control file
+     */
+    void setControlParameter(const std::string& keyword, const std::string& value);
+    /**
+     * Get the number of control parameters set with setControlParameter().
+     */
+    int getNumControlParameters() const {
+        return controlParameters.size();
+    }
+    /**
+     * Get a control parameter set with setControlParameter().
+     *
+     * @param index         the index of the parameter, between 0 and getNumControlParameters()-1
+     * @param[out] keyword  the name of the parameter
+     * @param[out] value    the value of the parameter
+     */
+    void getControlParameter(int index, std::string& keyword, std::string& value) const;
     /**
      * Add a bond term to the force field.
      *
@@ -68,17 +170,159 @@ namespace OpenMM {
      */
     void getParticleParameters(int index, int& particle, char& symbol1, char& symbol2, int& isQM) const;
     /**
-     * Update the per-bond parameters in a Context to match those stored in this Force object.  This method provides
+     * Set the parameters of an atom.
+     *
+     * @param index the index of the atom
+     * @param particle the index of the particle
+     * @param symbol symbol of the particle
+     * @param isQM is it reactive
+     */
+    void setParticleParameters(int index, int particle, char* symbol, bool isQM);
+    /**
+     * Let the reactive region follow a set of center atoms.  Every frequency force evaluations, each atom
+     * of this force is made reactive if it is within cutoff of any center atom, and is treated as a point
+     * charge otherwise.  The center atoms are always reactive.  The isQM flags passed to addAtom() only
+     * define the region until the first reassignment.
+     *
+     * @param centerAtoms  the indices (as returned by addAtom()) of the atoms the reactive region is centered on.
+     *                     If this is empty, the reactive region is fixed.
+     * @param cutoff       the distance from the center atoms within which atoms are reactive, measured in nm
+     * @param frequency    the number of force evaluations between reassignments of the reactive region
+     */
+    void setAdaptiveQMRegion(const std::vector<int>& centerAtoms, double cutoff, int frequency);
+    /**
+     * Get the parameters controlling how the reactive region follows a set of center atoms.
+     *
+     * @param[out] centerAtoms  the indices (as returned by addAtom()) of the atoms the reactive region is centered on.
+     *                          This is empty if the reactive region is fixed.
+     * @param[out] cutoff       the distance from the center atoms within which atoms are reactive, measured in nm
+     * @param[out] frequency    the number of force evaluations between reassignments of the reactive region
+     */
+    void getAdaptiveQMRegion(std::vector<int>& centerAtoms, double& cutoff, int& frequency) const;
+    /**
+     * Only pass PuReMD the MM atoms that are close to the reactive region.  The MM atoms within cutoff+skin
+     * of any QM atom are selected, and the selection is kept until some atom has moved more than skin/2,
+     * so every MM atom within cutoff of a QM atom is always included.  All other MM atoms are ignored by
+     * PuReMD.  If the cutoff is at least the nonbonded cutoff in the PuReMD control file (10 Angstroms
+     * by default), this does not change the results.
+     *
+     * @param cutoff   the embedding cutoff, measured in nm.  If this is 0, all MM atoms are passed to PuReMD.
+     * @param skin     the extra distance added to the cutoff when selecting atoms, measured in nm
+     */
+    void setEmbeddingCutoff(double cutoff, double skin);
+    /**
+     * Get the parameters used to select which MM atoms are passed to PuReMD.
+     *
+     * @param[out] cutoff   the embedding cutoff, measured in nm.  If this is 0, all MM atoms are passed to PuReMD.
+     * @param[out] skin     the extra distance added to the cutoff when selecting atoms, measured in nm
+     */
+    void getEmbeddingCutoff(double& cutoff, double& skin) const;
+    /**
+     * Update the per-atom parameters in a Context to match those stored in this Force object.  This method provides
      * an efficient method to update certain parameters in an existing Context without needing to reinitialize it.
-     * Simply call setBondParameters() to modify this object's parameters, then call updateParametersInContext()
-     * to copy them over to the Context.
+     * Simply call setParticleParameters() or setAdaptiveQMRegion() to modify this object's parameters, then call
+     * updateParametersInContext() to copy them over to the Context.
      *
-     * The only information this method updates is the values of per-bond parameters.  The set of particles involved
-     * in a bond cannot be changed, nor can new bonds be added.
+     * Atoms may be moved in or out of the reactive region, and their symbols may be changed.  The set of particles
+     * cannot be changed, nor can new atoms be added.
      *
      * @param context the context
      */
     void updateParametersInContext(Context& context);
+    /**
+     * Get which atoms are currently treated as reactive in a particular Context.  If an adaptive reactive
+     * region has been set with setAdaptiveQMRegion(), this may differ from the isQM flags stored in this object.
+     *
+     * @param context          the Context for which to get the reactive region
+     * @param[out] qmAtoms     the indices (as returned by addAtom()) of the reactive atoms
+     */
+    void getQMAtomsInContext(const Context& context, std::vector<int>& qmAtoms) const;
+    /**
+     * Get how often PuReMD has rebuilt its far neighbor list in a particular Context.  Between force
+     * evaluations the list is reused, with updated distances, until some atom has moved further than
+     * half of the Verlet list buffer (vlist_buffer in the control file) or the periodic box has changed.
+     *
+     * @param context           the Context for which to get the statistics
+     * @param[out] numBuilds    the number of force evaluations for which the neighbor list was built
+     * @param[out] numReuses    the number of force evaluations for which the neighbor list was reused
+     */
+    void getNeighborListInfoInContext(const Context& context, int& numBuilds, int& numReuses) const;
+    /**
+     * Get the wall clock time spent in each phase of the force evaluations in a particular Context.  The
+     * times are summed over all evaluations since the Context was created, so the cost of a single step can
+     * be found from the difference between two calls.  Evaluations that return cached results only contribute
+     * to GatherTime, ScatterTime and TotalTime.
+     *
+     * @param context              the Context for which to get the timing information
+     * @param[out] times           the total time (in seconds) spent in each phase, indexed by the TimingPhase values
+     * @param[out] numEvaluations  the number of force evaluations for which PuReMD was run
+     */
+    void getTimingInfoInContext(const Context& context, std::vector<double>& times, int& numEvaluations) const;
+    /**
+     * Get statistics on how PuReMD has solved for the atomic charges in a particular Context.  This is useful
+     * for choosing the solver and preconditioner settings in the control file.
+     *
+     * @param context                             the Context for which to get the statistics
+     * @param[out] numIterations                  the total number of linear solver iterations, summed over all evaluations
+     * @param[out] residual                       the largest relative residual norm at exit of the linear solver in the most recent evaluation
+     * @param[out] numPreconditionerComputations  the number of evaluations for which the preconditioner was recomputed
+     */
+    void getChargeSolverInfoInContext(const Context& context, int& numIterations, double& residual, int& numPreconditionerComputations) const;
+    /**
+     * Set whether PuReMD computes the virial of the ReaxFF forces, so it can be retrieved with getVirialInContext().
+     * This makes each force evaluation slightly more expensive.  The virial gives the ReaxFF contribution to the
+     * pressure without any additional energy evaluations, which makes it much cheaper to combine with pressure
+     * coupling than a Monte Carlo barostat, which must run PuReMD again for every trial move.
+     *
+     * @param compute  true if the virial should be computed
+     */
+    void setComputeVirial(bool compute);
+    /**
+     * Get whether PuReMD computes the virial of the ReaxFF forces.
+     */
+    bool getComputeVirial() const {
+        return computeVirial;
+    }
+    /**
+     * Get the virial of the ReaxFF forces from the most recent force evaluation in a particular Context: the sum
+     * over all atoms seen by PuReMD of the outer product of the force on the atom and its position, with periodic
+     * images taken into account.  The contribution of the ReaxFF forces to the pressure is the trace of the virial
+     * divided by three times the box volume.  This requires that setComputeVirial(true) was called before the
+     * Context was created.
+     *
+     * @param context          the Context for which to get the virial
+     * @param[out] virialX     the first row of the virial tensor, measured in kJ/mol
+     * @param[out] virialY     the second row of the virial tensor, measured in kJ/mol
+     * @param[out] virialZ     the third row of the virial tensor, measured in kJ/mol
+     */
+    void getVirialInContext(const Context& context, Vec3& virialX, Vec3& virialY, Vec3& virialZ) const;
+    /**
+     * Get the bonds between reactive atoms from the most recent force evaluation in a particular Context, as
+     * computed by ReaxFF.  Only bonds whose bond order is at least a threshold are reported, each of them once.
+     * Nothing is returned if no force evaluation has been done since the Context was created or its parameters
+     * were last updated.
+     *
+     * @param context           the Context for which to get the bonds
+     * @param threshold         the minimum bond order of the bonds to report.  PuReMD uses 0.3 for its own
+     *                          molecule analysis (bg_cut in the control file).
+     * @param[out] bondAtoms    the indices (as returned by addAtom()) of the two atoms of each bond, stored
+     *                          consecutively, so bond i is between atoms bondAtoms[2*i] and bondAtoms[2*i+1]
+     * @param[out] bondOrders   the bond order of each bond
+     */
+    void getBondsInContext(const Context& context, double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const;
+    /**
+     * Get the fragments of the reactive region from the most recent force evaluation in a particular Context.
+     * A fragment is a set of reactive atoms connected by bonds whose bond order is at least a threshold, such
+     * as a molecule or a reaction intermediate.  Fragments are numbered in order of their lowest atom index.
+     * Nothing is returned if no force evaluation has been done since the Context was created or its parameters
+     * were last updated.
+     *
+     * @param context           the Context for which to get the fragments
+     * @param threshold         the minimum bond order of the bonds connecting a fragment
+     * @param[out] fragments    the index of the fragment containing each atom (indexed as returned by addAtom()),
+     *                          or -1 for atoms that are not reactive
+     */
+    void getFragmentsInContext(const Context& context, double threshold, std::vector<int>& fragments) const;
     protected:
     ForceImpl* createImpl() const;
     private:
@@ -88,6 +332,15 @@ namespace OpenMM {
     //params for puremd
     std::string ffield_file;
     std::string control_file;
+    std::string ffieldContents, controlContents;
+    std::vector<std::pair<std::string, std::string> > controlParameters;
+    //adaptive reactive region
+    std::vector<int> centerAtoms;
+    double adaptiveCutoff;
+    int adaptiveFrequency;
+    //MM atoms passed to puremd
+    double embeddingCutoff, embeddingSkin;
+    bool computeVirial;
     //unused
     bool usePeriodic;
     mutable int numContexts, firstChangedBond, lastChangedBond;
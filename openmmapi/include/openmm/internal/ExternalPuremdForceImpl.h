@@ -34,6 +34,15 @@ namespace OpenMM {
         std::vector<std::string> getKernelNames();
         std::vector<int> getSimulatedParticles() const;
         void updateParametersInContext(ContextImpl& context, int firstBond, int lastBond);
+        void getNeighborListInfo(int& numBuilds, int& numReuses) const;
+        void getQMAtoms(std::vector<int>& qmAtoms) const;
+        void getTimingInfo(std::vector<double>& times, int& numEvaluations) const;
+        void getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const;
+        void getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const;
+        void getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const;
+        void getFragments(double threshold, std::vector<int>& fragments) const;
+        void createCheckpoint(ContextImpl& context, std::ostream& stream) const;
+        void loadCheckpoint(ContextImpl& context, std::istream& stream);
     private:
         const ExternalPuremdForce & owner;
         Kernel kernel;
@@ -34,6 +34,7 @@
 
 #include "openmm/Context.h"
 #include "openmm/internal/windowsExport.h"
+#include <iosfwd>
 #include <map>
 #include <string>
 #include <utility>
@@ -112,6 +113,25 @@ public:
     virtual std::vector<std::pair<int, int> > getBondedParticles() const {
         return std::vector<std::pair<int, int> >(0);
     }
+    /**
+     * Write any internal state of this ForceImpl that is not determined by the Force and the state of the
+     * Context, but should be restored when a checkpoint is loaded.  This is called by createCheckpoint()
+     * on the Context.  The default implementation writes nothing.
+     *
+     * @param context   the context in which the system is being simulated
+     * @param stream    an output stream the checkpoint data should be written to
+     */
+    virtual void createCheckpoint(ContextImpl& context, std::ostream& stream) const {
+    }
+    /**
+     * Restore internal state written by createCheckpoint().  This is called by loadCheckpoint() on the Context.
+     * The default implementation reads nothing.
+     *
+     * @param context   the context in which the system is being simulated
+     * @param stream    an input stream containing exactly the data written by createCheckpoint()
+     */
+    virtual void loadCheckpoint(ContextImpl& context, std::istream& stream) {
+    }
 protected:
     /**
      * Get the ContextImpl corresponding to a Context.
@@ -0,0 +1,197 @@
+//
+// Created by babaid on 05.10.24.
+//
+
+
+#ifndef OPENMM_PUREMDINTERFACE_H
+#define OPENMM_PUREMDINTERFACE_H
+#define QMMM
+
+#include "openmm/Vec3.h"
+#include "openmm/internal/windowsExport.h"
+#include<iosfwd>
+#include<vector>
+#include<string>
+
+namespace OpenMM {
+
+class ExternalPuremdForce;
+
+/**
+ * This class wraps a sPuReMD QM/MM handle.  It is shared by the platform specific
+ * implementations of CalcExternalPuremdForceKernel, which are responsible for
+ * gathering the coordinates in PuReMD units (Angstroms) and for converting the
+ * returned forces back to OpenMM units.
+ */
+class OPENMM_EXPORT PuremdInterface
+{
+private:
+  bool firstCall, atomsChanged;
+  // if only the MM atoms have changed since the last evaluation, the index of each MM atom among those of the
+  // last evaluation (or -1 if it was not included), so the charge history can be kept
+  bool onlyMMAtomsChanged;
+  std::vector<int> previousMMAtoms;
+  int lastNumQM, lastNumMM;
+  void* handlePuremd;
+  int retPuremd;
+  const std::vector<double>  sim_box_info;
+  std::string ffield_filename;
+  std::string control_filename;
+  // in-memory input files, used instead of the files if the force field is not empty
+  std::string ffield_contents;
+  std::string control_contents;
+  // inputs and results of the last evaluation, returned again if the next request is identical
+  bool hasCachedResults;
+  std::vector<char> cachedQmSymbols, cachedMmSymbols;
+  std::vector<double> cachedQmPos, cachedMmPosQ, cachedSimBoxInfo, cachedQmForces, cachedMmForces, cachedQmCharges;
+  double cachedEnergy;
+  // accumulated timing and charge solver statistics
+  std::vector<double> times;
+  int numEvaluations, solverIterations, numPreconditionerComputations;
+  double solverResidual;
+  // virial of the ReaxFF forces from the last evaluation (in kcal/mol), if PuReMD computes it
+  bool computeVirial;
+  std::vector<double> virial;
+  // charge solver history loaded from a checkpoint, passed to PuReMD before the next evaluation
+  bool hasLoadedHistory;
+  int loadedHistorySize, loadedHistoryLength;
+  std::vector<double> loadedHistoryS, loadedHistoryT;
+  void remapChargeHistory(int num_mm_atoms, const std::vector<double>& mm_pos_q, int& historySize, int& historyLength,
+                          std::vector<double>& historyS, std::vector<double>& historyT) const;
+public:
+  PuremdInterface();
+  ~PuremdInterface();
+  void setInputFileNames(const std::string &ffield_filename, const std::string &control_filename);
+  /**
+   * Set the force field and control parameters from an ExternalPuremdForce.  If the force defines any of them
+   * in memory, PuReMD parses the force field and control parameters from memory, so the parsed force field can
+   * be shared with other Contexts.  Otherwise, it reads them from the files named by the force.
+   */
+  void setInputParameters(const ExternalPuremdForce& force);
+  /**
+   * Compute the ReaxFF forces and energy with PuReMD.  If the atoms, coordinates, charges and box are all
+   * identical to those of the previous call, the results of that call are returned without running PuReMD.
+   */
+  void getReaxffPuremdForces(int num_qm_atoms, const std::vector<char> &qm_symbols, const std::vector<double> & qm_pos,
+                             int num_mm_atoms, const std::vector<char> &mm_symbols, const std::vector<double> & mm_pos_q,
+                             const std::vector<double> & sim_box_info,
+                             std::vector<double>& new_qm_pos, std::vector<double>& new_mm_pos,
+                             std::vector<double>& qm_forces, std::vector<double>& mm_forces, std::vector<double>& qm_q, double& totalEnergy);
+  /**
+   * Get the number of force evaluations for which the PuReMD far neighbor list was built,
+   * and for which the list from the previous evaluation was reused.
+   */
+  void getNeighborListInfo(int& numBuilds, int& numReuses) const;
+  /**
+   * Get the total time spent in each phase of the force evaluations, indexed by ExternalPuremdForce::TimingPhase,
+   * and the number of evaluations for which PuReMD was run.
+   */
+  void getTimingInfo(std::vector<double>& times, int& numEvaluations) const;
+  /**
+   * Get the total number of charge solver iterations, the largest relative residual norm of the solver in the
+   * most recent evaluation, and the number of evaluations for which the preconditioner was recomputed.
+   */
+  void getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const;
+  /**
+   * Get the virial of the ReaxFF forces from the most recent evaluation (in kJ/mol), one row of the tensor
+   * at a time.  This throws an exception unless the ExternalPuremdForce passed to setInputParameters()
+   * requested the virial.
+   */
+  void getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const;
+  /**
+   * Get the bonds between QM atoms from the most recent evaluation whose bond order is at least a threshold.
+   * Each bond is reported once.  Atoms are identified by their index among the QM atoms passed to
+   * getReaxffPuremdForces().  Nothing is returned if the cache has been invalidated since that evaluation.
+   *
+   * @param threshold   the minimum bond order of the bonds to report
+   * @param bondAtoms   on exit, the indices of the two atoms of each bond, stored consecutively
+   * @param bondOrders  on exit, the bond order of each bond
+   */
+  void getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const;
+  /**
+   * Split the QM atoms of the most recent evaluation into fragments: sets of atoms connected by bonds
+   * whose bond order is at least a threshold.  Fragments are numbered in order of their lowest atom index.
+   * Nothing is returned if the cache has been invalidated since that evaluation.
+   *
+   * @param threshold   the minimum bond order of the bonds connecting a fragment
+   * @param fragments   on exit, the index of the fragment containing each QM atom
+   */
+  void getFragments(double threshold, std::vector<int>& fragments) const;
+  /**
+   * Write the history of charge solutions PuReMD extrapolates to get the initial guess of each charge solve,
+   * so a simulation continued from a checkpoint solves for the charges as efficiently as before.
+   */
+  void createCheckpoint(std::ostream& stream) const;
+  /**
+   * Load the charge solution history written by createCheckpoint().  It is passed to PuReMD before the next
+   * evaluation, which always runs PuReMD rather than returning cached results.  PuReMD discards it if the
+   * atoms have changed in the meantime.  An exception is thrown if the data is incomplete or does not fit
+   * a system of numAtoms atoms, in which case nothing is changed.
+   */
+  void loadCheckpoint(std::istream& stream, int numAtoms);
+  /**
+   * Add to the time spent in one phase of the force evaluations.  This is used by the kernels for the phases
+   * they perform themselves, such as gathering the coordinates.
+   *
+   * @param phase   the phase, as an ExternalPuremdForce::TimingPhase
+   * @param time    the time to add (in seconds)
+   */
+  void addTime(int phase, double time);
+  /**
+   * Get the current wall clock time (in seconds), for measuring the phases passed to addTime().
+   */
+  static double getTime();
+  /**
+   * Discard the cached results of the last evaluation, so the next call to getReaxffPuremdForces() runs PuReMD.
+   */
+  void invalidateCache();
+  /**
+   * Notify the interface that the atoms have been split differently into the QM and MM regions (or their
+   * symbols have changed), so the next call to getReaxffPuremdForces() must set up the PuReMD system again.
+   */
+  void setAtomsChanged();
+  /**
+   * Notify the interface that the MM atoms passed to getReaxffPuremdForces() have changed, while the QM atoms
+   * have not.  The PuReMD system must be set up again, but the history of charge solutions is kept for the QM
+   * atoms and for the MM atoms that were included before, so the charge solver still starts from a good guess.
+   *
+   * @param previousIndex  for each MM atom, its index among the MM atoms of the previous call, or -1 if it was
+   *                       not included
+   */
+  void setMMAtomsChanged(const std::vector<int>& previousIndex);
+  /**
+   * Select the atoms of an adaptive QM region: those within a cutoff distance of any of a set of center atoms.
+   * The center atoms are always included.  A cell list is used when the periodic box is rectangular and large
+   * enough compared to the cutoff.
+   *
+   * @param positions    the position of each atom (in nm)
+   * @param centerAtoms  the indices of the center atoms
+   * @param cutoff       the cutoff distance (in nm)
+   * @param boxVectors   the periodic box vectors (in nm), used to find the nearest periodic image of each center
+   * @param isQM         on exit, isQM[i] is 1 if atom i is in the QM region and 0 otherwise
+   * @return true if isQM has been changed
+   */
+  static bool selectQMAtoms(const std::vector<Vec3>& positions, const std::vector<int>& centerAtoms, double cutoff,
+                            const Vec3* boxVectors, std::vector<int>& isQM);
+  /**
+   * Select the MM atoms that are within a cutoff distance of any QM atom.  A cell list is used when the
+   * periodic box is rectangular and large enough compared to the cutoff.
+   *
+   * @param qmPositions  the position of each QM atom (in nm)
+   * @param mmPositions  the position of each MM atom (in nm)
+   * @param cutoff       the cutoff distance (in nm)
+   * @param boxVectors   the periodic box vectors (in nm)
+   * @param embedded     on exit, the indices of the selected MM atoms in increasing order
+   */
+  static void selectEmbeddedAtoms(const std::vector<Vec3>& qmPositions, const std::vector<Vec3>& mmPositions, double cutoff,
+                                  const Vec3* boxVectors, std::vector<int>& embedded);
+  /**
+   * Convert a set of periodic box vectors (in nm) to the box description expected by PuReMD:
+   * three lengths (in Angstroms) followed by the angles alpha, beta, gamma (in degrees).
+   */
+  static void getSimBoxInfo(const Vec3& a, const Vec3& b, const Vec3& c, std::vector<double>& sim_box_info);
+};
+
+} // namespace OpenMM
+
+#endif // OPENMM_PUREMDINTERFACE_H
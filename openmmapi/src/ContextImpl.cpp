@@ -44,6 +44,7 @@
 #include <cstdlib>
 #include <iostream>
 #include <map>
+#include <sstream>
 #include <utility>
 #include <vector>
 #include <string.h>
@@ -51,6 +52,11 @@
 using namespace OpenMM;
 using namespace std;
 const static char CHECKPOINT_MAGIC_BYTES[] = "OpenMM Binary Checkpoint\n";
+// Version 2 checkpoints end with the number of forces and a section of data from each ForceImpl.  They are only
+// written when some ForceImpl has data to save.  The header has the same length as in version 1, so the version
+// can be identified before reading anything else.
+const static char CHECKPOINT_MAGIC_BYTES_V2[] = "OpenMM Binary Chkpoint 2\n";
+static_assert(sizeof(CHECKPOINT_MAGIC_BYTES) == sizeof(CHECKPOINT_MAGIC_BYTES_V2), "Checkpoint headers must have the same length");
 
 
 ContextImpl::ContextImpl(Context& owner, const System& system, Integrator& integrator, Platform* platform, const map<string, string>& properties, ContextImpl* originalContext) :
@@ -456,7 +462,22 @@ static string readString(istream& stream) {
 }
 
 void ContextImpl::createCheckpoint(ostream& stream) {
-    stream.write(CHECKPOINT_MAGIC_BYTES, sizeof(CHECKPOINT_MAGIC_BYTES)/sizeof(CHECKPOINT_MAGIC_BYTES[0]));
+    // Only write a version 2 checkpoint if some ForceImpl has state to save, so other checkpoints can still
+    // be read by anything that understands version 1.
+
+    vector<string> forceData(forceImpls.size());
+    bool hasForceData = false;
+    for (int i = 0; i < forceImpls.size(); i++) {
+        stringstream forceStream;
+        forceImpls[i]->createCheckpoint(*this, forceStream);
+        forceData[i] = forceStream.str();
+        if (forceData[i].size() > 0)
+            hasForceData = true;
+    }
+    if (hasForceData)
+        stream.write(CHECKPOINT_MAGIC_BYTES_V2, sizeof(CHECKPOINT_MAGIC_BYTES_V2)/sizeof(CHECKPOINT_MAGIC_BYTES_V2[0]));
+    else
+        stream.write(CHECKPOINT_MAGIC_BYTES, sizeof(CHECKPOINT_MAGIC_BYTES)/sizeof(CHECKPOINT_MAGIC_BYTES[0]));
     writeString(stream, getPlatform().getName());
     int numParticles = getSystem().getNumParticles();
     stream.write((char*) &numParticles, sizeof(int));
@@ -468,6 +489,12 @@ void ContextImpl::createCheckpoint(ostream& stream) {
     }
     updateStateDataKernel.getAs<UpdateStateDataKernel>().createCheckpoint(*this, stream);
     integrator.createCheckpoint(stream);
+    if (hasForceData) {
+        int numForces = forceImpls.size();
+        stream.write((char*) &numForces, sizeof(int));
+        for (int i = 0; i < numForces; i++)
+            writeString(stream, forceData[i]);
+    }
     stream.flush();
 }
 
@@ -475,7 +502,8 @@ void ContextImpl::loadCheckpoint(istream& stream) {
     static const int magiclength = sizeof(CHECKPOINT_MAGIC_BYTES)/sizeof(CHECKPOINT_MAGIC_BYTES[0]);
     char magicbytes[magiclength];
     stream.read(magicbytes, magiclength);
-    if (memcmp(magicbytes, CHECKPOINT_MAGIC_BYTES, magiclength) != 0)
+    bool hasForceData = (memcmp(magicbytes, CHECKPOINT_MAGIC_BYTES_V2, magiclength) == 0);
+    if (!hasForceData && memcmp(magicbytes, CHECKPOINT_MAGIC_BYTES, magiclength) != 0)
         throw OpenMMException("loadCheckpoint: Checkpoint header was not correct");
 
     string platformName = readString(stream);
@@ -495,6 +523,21 @@ void ContextImpl::loadCheckpoint(istream& stream) {
     }
     updateStateDataKernel.getAs<UpdateStateDataKernel>().loadCheckpoint(*this, stream);
     integrator.loadCheckpoint(stream);
+    if (hasForceData) {
+        int numForces;
+        stream.read((char*) &numForces, sizeof(int));
+        if (stream.fail() || numForces != forceImpls.size())
+            throw OpenMMException("loadCheckpoint: Checkpoint contains the wrong number of forces");
+        for (auto impl : forceImpls) {
+            string forceData = readString(stream);
+            if (stream.fail())
+                throw OpenMMException("loadCheckpoint: Checkpoint is incomplete");
+            if (forceData.size() > 0) {
+                istringstream forceStream(forceData);
+                impl->loadCheckpoint(*this, forceStream);
+            }
+        }
+    }
     hasSetPositions = true;
     integrator.stateChanged(State::Positions);
     integrator.stateChanged(State::Velocities);
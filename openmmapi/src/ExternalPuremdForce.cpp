@@ -11,9 +11,36 @@
 using namespace OpenMM;
 using namespace std;
 
-ExternalPuremdForce::ExternalPuremdForce() {}
+ExternalPuremdForce::ExternalPuremdForce() : adaptiveCutoff(0.0), adaptiveFrequency(1), embeddingCutoff(0.0), embeddingSkin(0.0), computeVirial(false), usePeriodic(false), numContexts(0) {}
 
-ExternalPuremdForce::ExternalPuremdForce(const std::string& ffieldFile, const std::string& controlFile) :usePeriodic(false), numContexts(0), ffield_file(ffieldFile), control_file(controlFile) {
+ExternalPuremdForce::ExternalPuremdForce(const std::string& ffieldFile, const std::string& controlFile) :adaptiveCutoff(0.0), adaptiveFrequency(1), embeddingCutoff(0.0), embeddingSkin(0.0), computeVirial(false), usePeriodic(false), numContexts(0), ffield_file(ffieldFile), control_file(controlFile) {
+}
+
+void ExternalPuremdForce::setForceFieldContents(const std::string& contents) {
+    ffieldContents = contents;
+}
+
+void ExternalPuremdForce::setControlContents(const std::string& contents) {
+    controlContents = contents;
+}
+
+void ExternalPuremdForce::setControlParameter(const std::string& keyword, const std::string& value) {
+    if (keyword.empty() || keyword.find_first_of(" \t\r\n") != string::npos)
+        throw OpenMMException("ExternalPuremdForce: invalid control parameter name '"+keyword+"'");
+    if (value.empty() || value.find_first_of("\r\n") != string::npos)
+        throw OpenMMException("ExternalPuremdForce: invalid value for control parameter '"+keyword+"'");
+    for (auto& param : controlParameters)
+        if (param.first == keyword) {
+            param.second = value;
+            return;
+        }
+    controlParameters.push_back(make_pair(keyword, value));
+}
+
+void ExternalPuremdForce::getControlParameter(int index, std::string& keyword, std::string& value) const {
+    ASSERT_VALID_INDEX(index, controlParameters)
+    keyword = controlParameters[index].first;
+    value = controlParameters[index].second;
 }
 
 int ExternalPuremdForce::addAtom(int particle, char* symbol, bool isQM) {
@@ -29,6 +56,51 @@ void ExternalPuremdForce::getParticleParameters(int index, int &particle, char&
     isQM = static_cast<int>(atoms[index].isQM);
 }
 
+void ExternalPuremdForce::setParticleParameters(int index, int particle, char* symbol, bool isQM) {
+    ASSERT_VALID_INDEX(index, atoms)
+    atoms[index] = AtomInfo(particle, std::string(symbol), isQM);
+    if (numContexts > 0) {
+        firstChangedBond = min(index, firstChangedBond);
+        lastChangedBond = max(index, lastChangedBond);
+    }
+}
+
+void ExternalPuremdForce::setAdaptiveQMRegion(const std::vector<int>& centerAtoms, double cutoff, int frequency) {
+    for (int atom : centerAtoms)
+        ASSERT_VALID_INDEX(atom, atoms)
+    if (frequency < 1)
+        throw OpenMMException("ExternalPuremdForce: the frequency for reassigning the reactive region must be positive");
+    this->centerAtoms = centerAtoms;
+    adaptiveCutoff = cutoff;
+    adaptiveFrequency = frequency;
+}
+
+void ExternalPuremdForce::getAdaptiveQMRegion(std::vector<int>& centerAtoms, double& cutoff, int& frequency) const {
+    centerAtoms = this->centerAtoms;
+    cutoff = adaptiveCutoff;
+    frequency = adaptiveFrequency;
+}
+
+void ExternalPuremdForce::setEmbeddingCutoff(double cutoff, double skin) {
+    if (cutoff < 0 || skin < 0)
+        throw OpenMMException("ExternalPuremdForce: the embedding cutoff and skin cannot be negative");
+    embeddingCutoff = cutoff;
+    embeddingSkin = skin;
+}
+
+void ExternalPuremdForce::getEmbeddingCutoff(double& cutoff, double& skin) const {
+    cutoff = embeddingCutoff;
+    skin = embeddingSkin;
+}
+
+void ExternalPuremdForce::setComputeVirial(bool compute) {
+    computeVirial = compute;
+}
+
+void ExternalPuremdForce::getQMAtomsInContext(const Context& context, std::vector<int>& qmAtoms) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getQMAtoms(qmAtoms);
+}
+
 ForceImpl*ExternalPuremdForce::createImpl() const {
     if (numContexts == 0) {
         // Begin tracking changes to atoms.
@@ -39,6 +111,30 @@ ForceImpl*ExternalPuremdForce::createImpl() const {
     return new ExternalPuremdForceImpl(*this);
 }
 
+void ExternalPuremdForce::getNeighborListInfoInContext(const Context& context, int& numBuilds, int& numReuses) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getNeighborListInfo(numBuilds, numReuses);
+}
+
+void ExternalPuremdForce::getTimingInfoInContext(const Context& context, std::vector<double>& times, int& numEvaluations) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getTimingInfo(times, numEvaluations);
+}
+
+void ExternalPuremdForce::getChargeSolverInfoInContext(const Context& context, int& numIterations, double& residual, int& numPreconditionerComputations) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getChargeSolverInfo(numIterations, residual, numPreconditionerComputations);
+}
+
+void ExternalPuremdForce::getVirialInContext(const Context& context, Vec3& virialX, Vec3& virialY, Vec3& virialZ) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getVirial(virialX, virialY, virialZ);
+}
+
+void ExternalPuremdForce::getBondsInContext(const Context& context, double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getBonds(threshold, bondAtoms, bondOrders);
+}
+
+void ExternalPuremdForce::getFragmentsInContext(const Context& context, double threshold, std::vector<int>& fragments) const {
+    dynamic_cast<const ExternalPuremdForceImpl&>(getImplInContext(context)).getFragments(threshold, fragments);
+}
+
 void ExternalPuremdForce::updateParametersInContext(Context& context) {
     dynamic_cast<ExternalPuremdForceImpl &>(getImplInContext(context)).updateParametersInContext(getContextImpl(context), firstChangedBond, lastChangedBond);
     if (numContexts == 1) {
@@ -47,7 +47,7 @@ double ExternalPuremdForceImpl::calcForcesAndEnergy(ContextImpl& context, bool i
 
 std::vector<std::string> ExternalPuremdForceImpl::getKernelNames() {
     std::vector<std::string> names;
-    names.push_back(CalcHarmonicBondForceKernel::Name());
+    names.push_back(CalcExternalPuremdForceKernel::Name());
     return names;
 }
 
@@ -66,3 +66,39 @@ void ExternalPuremdForceImpl::updateParametersInContext(ContextImpl& context, in
     kernel.getAs<CalcExternalPuremdForceKernel>().copyParametersToContext(context, owner, firstBond, lastBond);
     context.systemChanged();
 }
+
+void ExternalPuremdForceImpl::getNeighborListInfo(int& numBuilds, int& numReuses) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getNeighborListInfo(numBuilds, numReuses);
+}
+
+void ExternalPuremdForceImpl::getQMAtoms(std::vector<int>& qmAtoms) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getQMAtoms(qmAtoms);
+}
+
+void ExternalPuremdForceImpl::getTimingInfo(std::vector<double>& times, int& numEvaluations) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getTimingInfo(times, numEvaluations);
+}
+
+void ExternalPuremdForceImpl::getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getChargeSolverInfo(numIterations, residual, numPreconditionerComputations);
+}
+
+void ExternalPuremdForceImpl::getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getVirial(virialX, virialY, virialZ);
+}
+
+void ExternalPuremdForceImpl::getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getBonds(threshold, bondAtoms, bondOrders);
+}
+
+void ExternalPuremdForceImpl::getFragments(double threshold, std::vector<int>& fragments) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().getFragments(threshold, fragments);
+}
+
+void ExternalPuremdForceImpl::createCheckpoint(ContextImpl& context, std::ostream& stream) const {
+    kernel.getAs<CalcExternalPuremdForceKernel>().createCheckpoint(stream);
+}
+
+void ExternalPuremdForceImpl::loadCheckpoint(ContextImpl& context, std::istream& stream) {
+    kernel.getAs<CalcExternalPuremdForceKernel>().loadCheckpoint(stream);
+}
@@ -0,0 +1,499 @@
+//
+// Created by babaid on 05.10.24.
+//
+
+#include "openmm/internal/PuremdInterface.h"
+#include "openmm/ExternalPuremdForce.h"
+#include "openmm/OpenMMException.h"
+#include "openmm/Units.h"
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <fstream>
+#include <sstream>
+
+#include "spuremd.h"
+
+using namespace OpenMM;
+PuremdInterface::PuremdInterface(): firstCall(true), atomsChanged(false), onlyMMAtomsChanged(false), lastNumQM(0), lastNumMM(0),
+    handlePuremd(NULL), hasCachedResults(false),
+    times(ExternalPuremdForce::TotalTime+1, 0.0), numEvaluations(0), solverIterations(0), numPreconditionerComputations(0),
+    solverResidual(0.0), computeVirial(false), virial(9, 0.0), hasLoadedHistory(false) {}
+
+PuremdInterface::~PuremdInterface() {
+  if (handlePuremd != NULL)
+    cleanup(handlePuremd);
+}
+
+
+void PuremdInterface::setInputFileNames(const std::string &ffieldFilename, const std::string &controlFilename) {
+
+  ffield_filename = ffieldFilename;
+  control_filename = controlFilename;
+}
+
+static std::string readInputFile(const std::string& filename) {
+  std::ifstream file(filename);
+  if (!file.is_open())
+    throw OpenMMException("ExternalPuremdForce: could not open file "+filename);
+  std::stringstream contents;
+  contents << file.rdbuf();
+  return contents.str();
+}
+
+void PuremdInterface::setInputParameters(const ExternalPuremdForce& force) {
+  force.getFileNames(ffield_filename, control_filename);
+  ffield_contents = force.getForceFieldContents();
+  control_contents = force.getControlContents();
+  computeVirial = force.getComputeVirial();
+  if (ffield_contents.empty() && control_contents.empty() && force.getNumControlParameters() == 0 && !computeVirial)
+    return;
+
+  // Pass everything to PuReMD in memory, reading the parts that only exist as files.  The individual
+  // control parameters are appended to the control file, so they override its values.
+
+  if (ffield_contents.empty())
+    ffield_contents = readInputFile(ffield_filename);
+  if (control_contents.empty() && !control_filename.empty())
+    control_contents = readInputFile(control_filename);
+  for (int i = 0; i < force.getNumControlParameters(); i++)
+  {
+    std::string keyword, value;
+    force.getControlParameter(i, keyword, value);
+    if (!control_contents.empty() && control_contents.back() != '\n')
+      control_contents += '\n';
+    control_contents += keyword+" "+value+"\n";
+  }
+  if (computeVirial)
+  {
+    // PuReMD only accumulates the virial when it computes the pressure.
+
+    if (!control_contents.empty() && control_contents.back() != '\n')
+      control_contents += '\n';
+    control_contents += "compute_pressure 1\n";
+  }
+}
+
+void PuremdInterface::getReaxffPuremdForces(int num_qm_atoms,  const std::vector<char> &qm_symbols, const std::vector<double> & qm_pos,
+                                            int num_mm_atoms, const  std::vector<char> &mm_symbols, const std::vector<double> & mm_pos_q,
+                                            const std::vector<double> & sim_box_info,
+                                            std::vector<double>& new_qm_pos, std::vector<double>& new_mm_pos,
+                                            std::vector<double>& qm_forces, std::vector<double>& mm_forces, std::vector<double>& qm_q, double& totalEnergy) {
+
+  if(hasCachedResults && qm_pos == cachedQmPos && mm_pos_q == cachedMmPosQ && sim_box_info == cachedSimBoxInfo
+     && qm_symbols == cachedQmSymbols && mm_symbols == cachedMmSymbols)
+  {
+    qm_forces = cachedQmForces;
+    mm_forces = cachedMmForces;
+    qm_q = cachedQmCharges;
+    totalEnergy = cachedEnergy;
+    return;
+  }
+
+  double startTime = getTime();
+  if(firstCall)
+  {
+    if (!ffield_contents.empty()) {
+      handlePuremd = setup_qmmm_from_strings(
+          num_qm_atoms, qm_symbols.data(), qm_pos.data(), num_mm_atoms,
+          mm_symbols.data(), mm_pos_q.data(), sim_box_info.data(),
+          ffield_contents.c_str(), control_contents.empty() ? NULL : control_contents.c_str());
+    }
+    else if (!control_filename.empty()) {
+      handlePuremd = setup_qmmm(
+          num_qm_atoms, qm_symbols.data(), qm_pos.data(), num_mm_atoms,
+          mm_symbols.data(), mm_pos_q.data(), sim_box_info.data(),
+          ffield_filename.c_str(), control_filename.c_str());
+    }
+    else
+    {
+      handlePuremd = setup_qmmm(
+          num_qm_atoms, qm_symbols.data(), qm_pos.data(), num_mm_atoms,
+          mm_symbols.data(), mm_pos_q.data(), sim_box_info.data(),
+          ffield_filename.c_str(), NULL);
+    }
+    firstCall = false;
+  }
+  else if(atomsChanged)
+  {
+      // The QM and MM regions have been reassigned, so the handle must be reset.  The force field
+      // and control parameters parsed by setup_qmmm are still valid and are kept.  Resetting discards
+      // the charge history, so if only the MM atoms have changed, save it first and pass it back.
+      int historySize = 0, historyLength = 0;
+      std::vector<double> historyS, historyT;
+      if(onlyMMAtomsChanged && !hasLoadedHistory && num_qm_atoms == lastNumQM)
+        remapChargeHistory(num_mm_atoms, mm_pos_q, historySize, historyLength, historyS, historyT);
+      retPuremd = reset_qmmm(handlePuremd, num_qm_atoms, qm_symbols.data(),  qm_pos.data(),
+                     num_mm_atoms, mm_symbols.data(), mm_pos_q.data(),
+                     sim_box_info.data(), NULL, NULL);
+      if(0 != retPuremd) throw OpenMMException("Issue with PuReMD function reset_qmmm.");
+      if(historySize > 0)
+      {
+        retPuremd = set_charge_history(handlePuremd, historySize, historyLength, historyS.data(), historyT.data());
+        if(0 != retPuremd) throw OpenMMException("Error passing the charge history to PuReMD.");
+      }
+  }
+  else
+  {
+      // Only the coordinates, MM charges and box change between steps, so reuse the
+      // parsed force field, lookup tables and allocations held by the existing handle.
+      retPuremd = update_qmmm(handlePuremd, num_qm_atoms, qm_pos.data(),
+                     num_mm_atoms, mm_pos_q.data(), sim_box_info.data());
+      if(0 != retPuremd)
+      {
+        // The number of atoms has changed, so the handle must be reset.  The force field
+        // and control parameters parsed by setup_qmmm are still valid and are kept.
+        retPuremd = reset_qmmm(handlePuremd, num_qm_atoms, qm_symbols.data(),  qm_pos.data(),
+                       num_mm_atoms, mm_symbols.data(), mm_pos_q.data(),
+                       sim_box_info.data(), NULL, NULL);
+        if(0 != retPuremd) throw OpenMMException("Issue with PuReMD function reset_qmmm.");
+      }
+  }
+
+  atomsChanged = false;
+  onlyMMAtomsChanged = false;
+  lastNumQM = num_qm_atoms;
+  lastNumMM = num_mm_atoms;
+  times[ExternalPuremdForce::SetupTime] += getTime()-startTime;
+
+  if(hasLoadedHistory)
+  {
+    retPuremd = set_charge_history(handlePuremd, loadedHistorySize, loadedHistoryLength, loadedHistoryS.data(), loadedHistoryT.data());
+    if(0 != retPuremd) throw OpenMMException("Error passing the charge history to PuReMD.");
+    hasLoadedHistory = false;
+  }
+  retPuremd = simulate(handlePuremd);
+  if (0 != retPuremd) throw OpenMMException("Error at PuReMD simulation.");
+  double nbrs, initForces, bonded, cm, nonb;
+  int iterations, preconditionerComputations;
+  get_timing_info(handlePuremd, &nbrs, &initForces, &bonded, &cm, &nonb, &iterations, &solverResidual, &preconditionerComputations);
+  times[ExternalPuremdForce::NeighborListTime] += nbrs;
+  times[ExternalPuremdForce::InitForcesTime] += initForces;
+  times[ExternalPuremdForce::BondedTime] += bonded;
+  times[ExternalPuremdForce::ChargeTime] += cm;
+  times[ExternalPuremdForce::NonbondedTime] += nonb;
+  solverIterations += iterations;
+  numPreconditionerComputations += preconditionerComputations;
+  numEvaluations++;
+  qm_forces.resize(3*num_qm_atoms);
+  mm_forces.resize(3*num_mm_atoms);
+  qm_q.resize(num_qm_atoms);
+  retPuremd = get_atom_forces_qmmm(handlePuremd, qm_forces.data(), mm_forces.data());
+  if(0!=retPuremd) throw OpenMMException("Error getting the forces from PuReMD.");
+  retPuremd = get_atom_charges_qmmm(handlePuremd, qm_q.data(), NULL);
+  if(0!=retPuremd) throw OpenMMException("Error getting the charges from PuReMD.");
+  retPuremd = get_system_info(handlePuremd, NULL, NULL, &totalEnergy, NULL, NULL, NULL);
+  if(0!=retPuremd) throw OpenMMException("Error getting the energy from PuReMD.");
+  if (computeVirial && get_system_virial(handlePuremd, virial.data()) != 0)
+    throw OpenMMException("Error getting the virial from PuReMD.");
+  //retPuremd = get_atom_positions_qmmm(handlePuremd, new_qm_pos.data(), new_mm_pos.data());
+
+  cachedQmSymbols = qm_symbols;
+  cachedMmSymbols = mm_symbols;
+  cachedQmPos = qm_pos;
+  cachedMmPosQ = mm_pos_q;
+  cachedSimBoxInfo = sim_box_info;
+  cachedQmForces = qm_forces;
+  cachedMmForces = mm_forces;
+  cachedQmCharges = qm_q;
+  cachedEnergy = totalEnergy;
+  hasCachedResults = true;
+}
+
+void PuremdInterface::invalidateCache() {
+  hasCachedResults = false;
+}
+
+void PuremdInterface::setAtomsChanged() {
+  atomsChanged = true;
+  onlyMMAtomsChanged = false;
+}
+
+void PuremdInterface::setMMAtomsChanged(const std::vector<int>& previousIndex) {
+  if(!atomsChanged)
+  {
+    onlyMMAtomsChanged = true;
+    previousMMAtoms = previousIndex;
+  }
+  else if(onlyMMAtomsChanged)
+  {
+    // The MM atoms have changed again before PuReMD was run, so refer to the atoms of the last evaluation.
+    std::vector<int> index(previousIndex.size(), -1);
+    for(int i = 0; i < (int) previousIndex.size(); i++)
+      if(previousIndex[i] != -1)
+        index[i] = previousMMAtoms[previousIndex[i]];
+    previousMMAtoms.swap(index);
+  }
+  atomsChanged = true;
+}
+
+void PuremdInterface::remapChargeHistory(int num_mm_atoms, const std::vector<double>& mm_pos_q, int& historySize, int& historyLength,
+                                         std::vector<double>& historyS, std::vector<double>& historyT) const {
+  // The history holds one entry per QM atom, then one per MM atom, then one per charge constraint.  Keep the
+  // entries of the QM atoms, the constraints and the MM atoms that are still present.  MM atoms that are new
+  // start from their own charge, as PuReMD does when there is no history.
+  historySize = 0;
+  int oldSize, oldLength;
+  if(get_charge_history(handlePuremd, &oldSize, &oldLength, NULL, NULL) != 0)
+    return;
+  int numConstraints = oldLength-lastNumQM-lastNumMM;
+  if(oldSize == 0 || numConstraints < 0 || (int) previousMMAtoms.size() != num_mm_atoms)
+    return;
+  std::vector<double> oldS(oldSize*oldLength), oldT(oldSize*oldLength);
+  get_charge_history(handlePuremd, &oldSize, &oldLength, oldS.data(), oldT.data());
+  historySize = oldSize;
+  historyLength = lastNumQM+num_mm_atoms+numConstraints;
+  historyS.resize(historySize*historyLength);
+  historyT.resize(historySize*historyLength);
+  for(int j = 0; j < historySize; j++)
+  {
+    const double* s = &oldS[j*oldLength];
+    const double* t = &oldT[j*oldLength];
+    double* newS = &historyS[j*historyLength];
+    double* newT = &historyT[j*historyLength];
+    for(int i = 0; i < lastNumQM; i++)
+    {
+      newS[i] = s[i];
+      newT[i] = t[i];
+    }
+    for(int i = 0; i < num_mm_atoms; i++)
+    {
+      int previous = previousMMAtoms[i];
+      newS[lastNumQM+i] = (previous == -1 ? mm_pos_q[4*i+3] : s[lastNumQM+previous]);
+      newT[lastNumQM+i] = (previous == -1 ? 0.0 : t[lastNumQM+previous]);
+    }
+    for(int i = 0; i < numConstraints; i++)
+    {
+      newS[lastNumQM+num_mm_atoms+i] = s[lastNumQM+lastNumMM+i];
+      newT[lastNumQM+num_mm_atoms+i] = t[lastNumQM+lastNumMM+i];
+    }
+  }
+}
+
+static Vec3 getPeriodicDelta(const Vec3& pos1, const Vec3& pos2, const Vec3* boxVectors) {
+  Vec3 delta = pos1-pos2;
+  delta -= boxVectors[2]*std::floor(delta[2]/boxVectors[2][2]+0.5);
+  delta -= boxVectors[1]*std::floor(delta[1]/boxVectors[1][1]+0.5);
+  delta -= boxVectors[0]*std::floor(delta[0]/boxVectors[0][0]+0.5);
+  return delta;
+}
+
+/**
+ * Set inside[i] to 1 for every atom that is within a cutoff distance of any of a set of sites, and to 0 for
+ * all others.  A cell list is used when the periodic box is rectangular and large enough compared to the cutoff.
+ */
+static void findAtomsNearSites(const std::vector<Vec3>& sites, const std::vector<Vec3>& positions, double cutoff,
+                               const Vec3* boxVectors, std::vector<int>& inside) {
+  inside.assign(positions.size(), 0);
+  double cutoff2 = cutoff*cutoff;
+  bool rectangular = (boxVectors[0][1] == 0 && boxVectors[0][2] == 0 && boxVectors[1][0] == 0 &&
+                      boxVectors[1][2] == 0 && boxVectors[2][0] == 0 && boxVectors[2][1] == 0);
+  int numCells[3];
+  for (int i = 0; i < 3; i++)
+    numCells[i] = (int) std::floor(boxVectors[i][i]/cutoff);
+  if (!rectangular || numCells[0] < 3 || numCells[1] < 3 || numCells[2] < 3)
+  {
+    // The box is too small (or not rectangular) for a cell list to help, so just check every pair.
+
+    for (int i = 0; i < (int) positions.size(); i++)
+      for (const Vec3& site : sites)
+      {
+        Vec3 delta = getPeriodicDelta(positions[i], site, boxVectors);
+        if (delta.dot(delta) <= cutoff2)
+        {
+          inside[i] = 1;
+          break;
+        }
+      }
+    return;
+  }
+
+  // Sort the sites into cells at least as large as the cutoff, so each atom only needs to
+  // be compared to the sites in its own and the 26 neighboring cells.
+
+  auto getCell = [&] (const Vec3& pos, int* cell) {
+    for (int j = 0; j < 3; j++)
+    {
+      double f = pos[j]/boxVectors[j][j];
+      f -= std::floor(f);
+      cell[j] = std::min((int) (f*numCells[j]), numCells[j]-1);
+    }
+  };
+  std::vector<std::vector<int> > cells(numCells[0]*numCells[1]*numCells[2]);
+  for (int i = 0; i < (int) sites.size(); i++)
+  {
+    int cell[3];
+    getCell(sites[i], cell);
+    cells[(cell[0]*numCells[1]+cell[1])*numCells[2]+cell[2]].push_back(i);
+  }
+  for (int i = 0; i < (int) positions.size(); i++)
+  {
+    int cell[3];
+    getCell(positions[i], cell);
+    for (int dx = -1; dx <= 1 && !inside[i]; dx++)
+      for (int dy = -1; dy <= 1 && !inside[i]; dy++)
+        for (int dz = -1; dz <= 1 && !inside[i]; dz++)
+        {
+          int x = (cell[0]+dx+numCells[0])%numCells[0];
+          int y = (cell[1]+dy+numCells[1])%numCells[1];
+          int z = (cell[2]+dz+numCells[2])%numCells[2];
+          for (int site : cells[(x*numCells[1]+y)*numCells[2]+z])
+          {
+            Vec3 delta = getPeriodicDelta(positions[i], sites[site], boxVectors);
+            if (delta.dot(delta) <= cutoff2)
+            {
+              inside[i] = 1;
+              break;
+            }
+          }
+        }
+  }
+}
+
+bool PuremdInterface::selectQMAtoms(const std::vector<Vec3>& positions, const std::vector<int>& centerAtoms, double cutoff,
+                                    const Vec3* boxVectors, std::vector<int>& isQM) {
+  std::vector<Vec3> centerPositions;
+  for (int center : centerAtoms)
+    centerPositions.push_back(positions[center]);
+  std::vector<int> inside;
+  findAtomsNearSites(centerPositions, positions, cutoff, boxVectors, inside);
+  for (int center : centerAtoms)
+    inside[center] = 1;
+  bool changed = false;
+  for (int i = 0; i < (int) positions.size(); i++)
+  {
+    if (isQM[i] != inside[i])
+    {
+      isQM[i] = inside[i];
+      changed = true;
+    }
+  }
+  return changed;
+}
+
+
+void PuremdInterface::getNeighborListInfo(int& numBuilds, int& numReuses) const {
+  numBuilds = 0;
+  numReuses = 0;
+  if(!firstCall)
+  {
+    get_nbr_list_info(handlePuremd, &numBuilds, &numReuses);
+  }
+}
+
+void PuremdInterface::getTimingInfo(std::vector<double>& times, int& numEvaluations) const {
+  times = this->times;
+  numEvaluations = this->numEvaluations;
+}
+
+void PuremdInterface::getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const {
+  numIterations = solverIterations;
+  residual = solverResidual;
+  numPreconditionerComputations = this->numPreconditionerComputations;
+}
+
+void PuremdInterface::getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const {
+  if (!computeVirial)
+    throw OpenMMException("getVirialInContext: The virial is only computed if setComputeVirial(true) was called before creating the Context");
+  virialX = Vec3(virial[0], virial[1], virial[2])*KJPerKcal;
+  virialY = Vec3(virial[3], virial[4], virial[5])*KJPerKcal;
+  virialZ = Vec3(virial[6], virial[7], virial[8])*KJPerKcal;
+}
+
+void PuremdInterface::getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const {
+  bondAtoms.clear();
+  bondOrders.clear();
+  if(!hasCachedResults)
+    return;
+  int numBonds;
+  if (get_bonds_qmmm(handlePuremd, threshold, &numBonds, NULL, NULL) != 0)
+    throw OpenMMException("Error getting the bonds from PuReMD.");
+  bondAtoms.resize(2*numBonds);
+  bondOrders.resize(numBonds);
+  if (numBonds > 0 && get_bonds_qmmm(handlePuremd, threshold, &numBonds, bondAtoms.data(), bondOrders.data()) != 0)
+    throw OpenMMException("Error getting the bonds from PuReMD.");
+}
+
+void PuremdInterface::getFragments(double threshold, std::vector<int>& fragments) const {
+  fragments.clear();
+  if(!hasCachedResults)
+    return;
+  fragments.resize(cachedQmSymbols.size()/2);
+  if (get_fragments_qmmm(handlePuremd, threshold, NULL, fragments.data()) != 0)
+    throw OpenMMException("Error getting the fragments from PuReMD.");
+}
+
+void PuremdInterface::createCheckpoint(std::ostream& stream) const {
+  int historySize = 0, historyLength = 0;
+  std::vector<double> historyS, historyT;
+  if(hasLoadedHistory)
+  {
+    // No evaluation has been done since a checkpoint was loaded, so save the same history again.
+    historySize = loadedHistorySize;
+    historyLength = loadedHistoryLength;
+    historyS = loadedHistoryS;
+    historyT = loadedHistoryT;
+  }
+  else if(!firstCall)
+  {
+    get_charge_history(handlePuremd, &historySize, &historyLength, NULL, NULL);
+    historyS.resize(historySize*historyLength);
+    historyT.resize(historySize*historyLength);
+    get_charge_history(handlePuremd, &historySize, &historyLength, historyS.data(), historyT.data());
+  }
+  stream.write((char*) &historySize, sizeof(int));
+  stream.write((char*) &historyLength, sizeof(int));
+  stream.write((char*) historyS.data(), sizeof(double)*historyS.size());
+  stream.write((char*) historyT.data(), sizeof(double)*historyT.size());
+}
+
+void PuremdInterface::loadCheckpoint(std::istream& stream, int numAtoms) {
+  // PuReMD keeps at most 5 previous solutions, each with one entry per atom plus one for the EEM constraint.
+  int historySize, historyLength;
+  stream.read((char*) &historySize, sizeof(int));
+  stream.read((char*) &historyLength, sizeof(int));
+  if(stream.fail() || historySize < 0 || historySize > 5 || historyLength < 0 || historyLength > numAtoms+1)
+    throw OpenMMException("loadCheckpoint: The checkpoint contains an invalid charge history for ExternalPuremdForce");
+  std::vector<double> historyS(historySize*historyLength), historyT(historySize*historyLength);
+  stream.read((char*) historyS.data(), sizeof(double)*historyS.size());
+  stream.read((char*) historyT.data(), sizeof(double)*historyT.size());
+  if(stream.fail())
+    throw OpenMMException("loadCheckpoint: The checkpoint contains an invalid charge history for ExternalPuremdForce");
+  loadedHistorySize = historySize;
+  loadedHistoryLength = historyLength;
+  loadedHistoryS.swap(historyS);
+  loadedHistoryT.swap(historyT);
+  hasLoadedHistory = true;
+  invalidateCache();
+}
+
+void PuremdInterface::addTime(int phase, double time) {
+  times[phase] += time;
+}
+
+double PuremdInterface::getTime() {
+  return std::chrono::duration<double>(std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+void PuremdInterface::getSimBoxInfo(const Vec3& a, const Vec3& b, const Vec3& c, std::vector<double>& sim_box_info) {
+  double lengthA = std::sqrt(a.dot(a));
+  double lengthB = std::sqrt(b.dot(b));
+  double lengthC = std::sqrt(c.dot(c));
+  sim_box_info.resize(6);
+  sim_box_info[0] = lengthA*AngstromsPerNm;
+  sim_box_info[1] = lengthB*AngstromsPerNm;
+  sim_box_info[2] = lengthC*AngstromsPerNm;
+  sim_box_info[3] = std::acos(b.dot(c)/(lengthB*lengthC))*DegreesPerRadian;
+  sim_box_info[4] = std::acos(a.dot(c)/(lengthA*lengthC))*DegreesPerRadian;
+  sim_box_info[5] = std::acos(a.dot(b)/(lengthA*lengthB))*DegreesPerRadian;
+}
+
+void PuremdInterface::selectEmbeddedAtoms(const std::vector<Vec3>& qmPositions, const std::vector<Vec3>& mmPositions, double cutoff,
+                                          const Vec3* boxVectors, std::vector<int>& embedded) {
+  std::vector<int> inside;
+  findAtomsNearSites(qmPositions, mmPositions, cutoff, boxVectors, inside);
+  embedded.clear();
+  for (int i = 0; i < (int) mmPositions.size(); i++)
+    if (inside[i])
+      embedded.push_back(i);
+}
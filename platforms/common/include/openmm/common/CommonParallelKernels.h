@@ -29,7 +29,7 @@
 
 #include "openmm/common/ComputeContext.h"
 #include "openmm/common/CommonKernels.h"
-#include "openmm/common/PuremdInterface.h"
+#include "openmm/internal/PuremdInterface.h"
 
 namespace OpenMM {
 
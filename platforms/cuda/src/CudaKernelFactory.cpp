@@ -143,6 +143,6 @@ KernelImpl* CudaKernelFactory::createKernelImpl(std::string name, const Platform
     if (name == RemoveCMMotionKernel::Name())
         return new CommonRemoveCMMotionKernel(name, platform, cu);
     if(name==CalcExternalPuremdForceKernel::Name())
-        return new CudaCalcExternalPuremdForceKernel(name, platform, data, context.getSystem());
+        return new CudaCalcExternalPuremdForceKernel(name, platform, cu, context.getSystem());
     throw OpenMMException((std::string("Tried to create kernel with illegal kernel name '")+name+"'").c_str());
 }
@@ -28,6 +28,8 @@
 #include "CudaKernelSources.h"
 #include "openmm/common/ContextSelector.h"
 #include "openmm/internal/timer.h"
+#include "openmm/NonbondedForce.h"
+#include "openmm/Units.h"
 #include<numeric>
 #include<algorithm>
 
@@ -322,141 +324,466 @@ void CudaParallelCalcNonbondedForceKernel::getLJPMEParameters(double& alpha, int
     dynamic_cast<const CudaCalcNonbondedForceKernel&>(kernels[0].getImpl()).getLJPMEParameters(alpha, nx, ny, nz);
 }
 
-CudaCalcExternalPuremdForceKernel::CudaCalcExternalPuremdForceKernel(std::string name, const Platform& platform, CudaPlatform::PlatformData& data, const System& system) :
-                                                                                                                                                                           CalcExternalPuremdForceKernel(name, platform), data(data) {
+class CudaCalcExternalPuremdForceKernel::StartCalculationPreComputation : public CudaContext::ForcePreComputation {
+public:
+    StartCalculationPreComputation(CudaCalcExternalPuremdForceKernel& owner) : owner(owner) {
+    }
+    void computeForceAndEnergy(bool includeForces, bool includeEnergy, int groups) {
+        owner.beginComputation(includeForces, includeEnergy, groups);
+    }
+    CudaCalcExternalPuremdForceKernel& owner;
+};
+
+class CudaCalcExternalPuremdForceKernel::ExecuteTask : public CudaContext::WorkTask {
+public:
+    ExecuteTask(CudaCalcExternalPuremdForceKernel& owner, bool includeForces) : owner(owner), includeForces(includeForces) {
+    }
+    void execute() {
+        owner.executeOnWorkerThread(includeForces);
+    }
+    CudaCalcExternalPuremdForceKernel& owner;
+    bool includeForces;
+};
+
+class CudaCalcExternalPuremdForceKernel::AddForcesPostComputation : public CudaContext::ForcePostComputation {
+public:
+    AddForcesPostComputation(CudaCalcExternalPuremdForceKernel& owner) : owner(owner) {
+    }
+    double computeForceAndEnergy(bool includeForces, bool includeEnergy, int groups) {
+        return owner.addForces(includeForces, includeEnergy, groups);
+    }
+    CudaCalcExternalPuremdForceKernel& owner;
+};
+
+CudaCalcExternalPuremdForceKernel::CudaCalcExternalPuremdForceKernel(std::string name, const Platform& platform, CudaContext& cu, const System& system) :
+        CalcExternalPuremdForceKernel(name, platform), cu(cu), orderChanged(false), pinnedBuffer(NULL) {
 }
 
-void CudaCalcExternalPuremdForceKernel::initialize(const System& system, const ExternalPuremdForce& force) {
-    Interface = new PuremdInterface();
-    std::string ffieldFile, controlFile;
-    force.getFileNames(ffieldFile, controlFile);
-    Interface->setInputFileNames(ffieldFile, controlFile);
-
-    //load atom parameters that wont change over time
-    atoms.resize(force.getNumAtoms());
-    symbols.resize(force.getNumAtoms()*2);
-    isQM.resize(force.getNumAtoms());
-    char temp;
-    int j = 0;
-    for(int i=0; i<force.getNumAtoms(); i++)
-    {
-        force.getParticleParameters(i, atoms[i], symbols[j], symbols[j+1], isQM[i]);
-        j+=2;
-    };
-    numQMAtoms = std::accumulate(isQM.begin(), isQM.end(), 0);
-    numMMAtoms = force.getNumAtoms()-numQMAtoms;
-    // simulation box info format change
-    simBoxInfo.resize(6);
-    std::vector<Vec3> pVecs(3);
-    system.getDefaultPeriodicBoxVectors(pVecs[0], pVecs[1], pVecs[2]);
-    for (int i=0; i<3; i++)
-    {
-        //AA
-        simBoxInfo[i] = std::sqrt(pVecs[i].dot(pVecs[i]))*10;
-    }
-    simBoxInfo[3] = std::acos(pVecs[1].dot(pVecs[2])/(simBoxInfo[1]*simBoxInfo[2]))*180.0/M_PI;
-    simBoxInfo[4] =  std::acos(pVecs[0].dot(pVecs[2])/(simBoxInfo[0]*simBoxInfo[2]))*180.0/M_PI;
-    simBoxInfo[5] =  std::acos(pVecs[0].dot(pVecs[1])/(simBoxInfo[0]*simBoxInfo[1]))*180.0/M_PI;
+CudaCalcExternalPuremdForceKernel::~CudaCalcExternalPuremdForceKernel() {
+    if (pinnedBuffer != NULL) {
+        ContextSelector selector(cu);
+        cuMemFreeHost(pinnedBuffer);
+    }
 }
 
-double CudaCalcExternalPuremdForceKernel::execute(ContextImpl& context, bool includeForces, bool includeEnergy) {
-    CudaContext& cu = *data.contexts[0];
+void CudaCalcExternalPuremdForceKernel::initialize(const System& system, const ExternalPuremdForce& force) {
     ContextSelector selector(cu);
+    puremd.setInputParameters(force);
+
+    // MM atoms are seen by PuReMD as point charges.  Take their charges from the NonbondedForce, if there is one.
 
-    //atoms have an order
-    std::vector<int> order = cu.getAtomIndex();
-    //get positins, charges, etc.
-    std::vector<mm_float4> posqBuff(cu.getPaddedNumAtoms());
-    cu.getPosq().download(posqBuff);
-
-    // openmm saves positions in nm, puremd needs AA
-    std::transform(posqBuff.begin(), posqBuff.end(), posqBuff.begin(),
-                   [&](mm_float4 elem) {
-                        mm_float4 temp;
-                        temp.x = elem.x*10;
-                        temp.y = elem.y*10;
-                        temp.z = elem.z*10;
-                        temp.w = elem.w;
-                        return temp;
-                   });
-    //flattened vectors
-    std::vector<double> qm_pos(numQMAtoms*3);
-    std::vector<double> mm_pos_q(numMMAtoms*4);
-    std::vector<char> mmSymbols(numMMAtoms*2), qmSymbols(numQMAtoms*2);
-    int j =0;
-    int qm_j=0, mm_j=0;
-    int qm_index = 0, mm_index = 0;
-    for(int i=0; i<atoms.size();i++)
-    {
-        if (0 != isQM[i])
-        {
-            qm_pos[qm_index] = posqBuff[order[i]].x;
-            qm_pos[qm_index+1] = posqBuff[order[i]].y;
-            qm_pos[qm_index+2] = posqBuff[order[i]].z;
-            qmSymbols[qm_j] = symbols[j];
-            qmSymbols[qm_j+1] = symbols[j+1];
-            qm_index+=3;
-            qm_j+=2;
+    vector<double> charges(system.getNumParticles(), 0.0);
+    for (int i = 0; i < system.getNumForces(); i++) {
+        const NonbondedForce* nonbonded = dynamic_cast<const NonbondedForce*>(&system.getForce(i));
+        if (nonbonded != NULL) {
+            for (int j = 0; j < nonbonded->getNumParticles(); j++) {
+                double sigma, epsilon;
+                nonbonded->getParticleParameters(j, charges[j], sigma, epsilon);
+            }
+            break;
         }
-        else
-        {
-            mm_pos_q[mm_index] = posqBuff[order[i]].x;
-            mm_pos_q[mm_index+1] = posqBuff[order[i]].y;
-            mm_pos_q[mm_index+2] = posqBuff[order[i]].z;
-            mm_pos_q[mm_index+3] = posqBuff[order[i]].w;
-            mmSymbols[mm_j] = symbols[j];
-            mmSymbols[mm_j+1] = symbols[j+1];
-            mm_index+=4;
-            mm_j+=2;
+    }
+    int numAtoms = force.getNumAtoms();
+    atomParticles.resize(numAtoms);
+    atomSymbols.resize(2*numAtoms);
+    atomIsQM.resize(numAtoms);
+    atomCharges.resize(numAtoms);
+    for (int i = 0; i < numAtoms; i++) {
+        force.getParticleParameters(i, atomParticles[i], atomSymbols[2*i], atomSymbols[2*i+1], atomIsQM[i]);
+        atomCharges[i] = charges[atomParticles[i]];
+    }
+    force.getAdaptiveQMRegion(centerAtoms, adaptiveCutoff, adaptiveFrequency);
+    force.getEmbeddingCutoff(embeddingCutoff, embeddingSkin);
+    numEvaluations = 0;
+    puremdIndex.initialize<int>(cu, cu.getPaddedNumAtoms(), "puremdIndex");
+    puremdCharges.initialize<double>(cu, max(numAtoms, 1), "puremdCharges");
+    puremdPosq.initialize<double4>(cu, max(numAtoms, 1), "puremdPosq");
+    puremdForces.initialize<double>(cu, max(3*numAtoms, 1), "puremdForces");
+    CHECK_RESULT(cuMemHostAlloc((void**) &pinnedBuffer, 4*max(numAtoms, 1)*sizeof(double), 0), "Error allocating pinned memory");
+    splitAtoms();
+
+    map<string, string> defines;
+    defines["NUM_ATOMS"] = cu.intToString(cu.getNumAtoms());
+    defines["PADDED_NUM_ATOMS"] = cu.intToString(cu.getPaddedNumAtoms());
+    defines["ANGSTROMS_PER_NM"] = cu.doubleToString(AngstromsPerNm, true);
+    CUmodule module = cu.createModule(CudaKernelSources::puremd, defines);
+    gatherPositionsKernel = cu.getKernel(module, "gatherPuremdPositions");
+    scatterForcesKernel = cu.getKernel(module, "scatterPuremdForces");
+
+    // The kernel is only created for the first device, so its results are only added once even when
+    // using multiple GPUs.
+
+    forceGroupFlag = (1<<force.getForceGroup());
+    cu.addPreComputation(new StartCalculationPreComputation(*this));
+    cu.addPostComputation(new AddForcesPostComputation(*this));
+}
+
+void CudaCalcExternalPuremdForceKernel::splitAtoms() {
+    // PuReMD expects the QM atoms first, followed by the MM atoms.  This may be called on the worker thread,
+    // so the new order is only uploaded to the device by the next pre- or post-computation.
+
+    int numAtoms = atomParticles.size();
+    order.clear();
+    qmSymbols.clear();
+    for (int i = 0; i < numAtoms; i++)
+        if (atomIsQM[i]) {
+            order.push_back(i);
+            qmSymbols.push_back(atomSymbols[2*i]);
+            qmSymbols.push_back(atomSymbols[2*i+1]);
         }
-       j+=2;
-    }
-
-    std::vector<double> qmForces(numQMAtoms*3), mmForces(numMMAtoms*3), qm_q(numQMAtoms), new_qm_pos(numQMAtoms*3), new_mm_pos(numMMAtoms*3);
-
-    double energy;
-
-    Interface->getReaxffPuremdForces(numQMAtoms, qmSymbols, qm_pos,
-                                    numMMAtoms, mmSymbols, mm_pos_q,
-                                    simBoxInfo,
-                                     new_qm_pos, new_mm_pos,
-                                    qmForces, mmForces, qm_q, energy);
-
-    double conversionFactor = 1.66053906660e-21; // Convert forces to atomic units
-    // now we need to add the results to the forces in the context
-    long long* force= (long long*) cu.getPinnedBuffer();
-    long long scale =   0x100000000LL;
-    int numPaddedParticles = cu.getPaddedNumAtoms();
-    cu.getLongForceBuffer().download(force);
-
-    // set forces
-    int qmIndex = 0;
-    int mmIndex = 0;
-    for(int i=0; i<atoms.size(); i++)
-    {
-        if(1==isQM[i]){
-            //convert force representations
-            force[order[i]] += scale*static_cast<long long>(conversionFactor*qmForces[qmIndex]);
-            force[order[i] + numPaddedParticles] += scale*static_cast<long long>(conversionFactor*qmForces[qmIndex+1]);
-            force[order[i] + numPaddedParticles*2] += scale*static_cast<long long>(conversionFactor*qmForces[qmIndex+2]);
-            posqBuff[order[i]].w = qm_q[qmIndex];
-            qmIndex+=3;
+    numQMAtoms = order.size();
+    for (int i = 0; i < numAtoms; i++)
+        if (!atomIsQM[i])
+            order.push_back(i);
+    numMMAtoms = numAtoms-numQMAtoms;
+    orderChanged = true;
+    qmPos.resize(3*numQMAtoms);
+    qmForces.resize(3*numQMAtoms);
+    qmCharges.resize(numQMAtoms);
+    embeddingPositions.clear();
+    vector<int> slots(numMMAtoms);
+    for (int i = 0; i < numMMAtoms; i++)
+        slots[i] = numQMAtoms+i;
+    setEmbeddedSlots(slots);
+
+    // The QM atoms may have changed, so none of PuReMD's charge history can be kept.
+
+    puremd.setAtomsChanged();
+}
+
+void CudaCalcExternalPuremdForceKernel::uploadOrder() {
+    if (!orderChanged)
+        return;
+
+    // Record where each particle goes in PuReMD's ordering (or -1 if PuReMD does not see it) so the positions
+    // and forces can be gathered and scattered on the device.
+
+    int numAtoms = atomParticles.size();
+    vector<int> index(cu.getPaddedNumAtoms(), -1);
+    vector<double> charges(numAtoms, 0.0);
+    for (int i = 0; i < numAtoms; i++) {
+        index[atomParticles[order[i]]] = i;
+        if (i >= numQMAtoms)
+            charges[i] = atomCharges[order[i]];
+    }
+    puremdIndex.upload(index);
+    if (numAtoms > 0)
+        puremdCharges.upload(charges);
+    orderChanged = false;
+}
+
+double CudaCalcExternalPuremdForceKernel::execute(ContextImpl& context, bool includeForces, bool includeEnergy) {
+    // This method does nothing.  The actual calculation is started by the pre-computation, continued on
+    // the worker thread, and finished by the post-computation.
+
+    return 0.0;
+}
+
+void CudaCalcExternalPuremdForceKernel::gatherPositions() {
+    ContextSelector selector(cu);
+    uploadOrder();
+
+    // Gather the positions of the atoms PuReMD needs, and download only those.
+
+    if (cu.getUseMixedPrecision()) {
+        void* args[] = {&cu.getPosq().getDevicePointer(), &cu.getPosqCorrection().getDevicePointer(), &cu.getAtomIndexArray().getDevicePointer(),
+                &puremdIndex.getDevicePointer(), &puremdCharges.getDevicePointer(), &puremdPosq.getDevicePointer()};
+        cu.executeKernel(gatherPositionsKernel, args, cu.getNumAtoms());
+    }
+    else {
+        void* args[] = {&cu.getPosq().getDevicePointer(), &cu.getAtomIndexArray().getDevicePointer(),
+                &puremdIndex.getDevicePointer(), &puremdCharges.getDevicePointer(), &puremdPosq.getDevicePointer()};
+        cu.executeKernel(gatherPositionsKernel, args, cu.getNumAtoms());
+    }
+    puremdPosq.download(pinnedBuffer);
+
+    // Use the current periodic box, which may have been changed by a barostat since the last step.
+
+    cu.getPeriodicBoxVectors(boxVectors[0], boxVectors[1], boxVectors[2]);
+    PuremdInterface::getSimBoxInfo(boxVectors[0], boxVectors[1], boxVectors[2], simBoxInfo);
+    puremd.addTime(ExternalPuremdForce::GatherTime, PuremdInterface::getTime()-startTime);
+}
+
+void CudaCalcExternalPuremdForceKernel::beginComputation(bool includeForces, bool includeEnergy, int groups) {
+    if ((groups&forceGroupFlag) == 0)
+        return;
+    startTime = PuremdInterface::getTime();
+    gatherPositions();
+
+    // The actual force computation will be done on a different thread.  With multiple GPUs, this is already
+    // running on the first device's worker thread, so it is done by the post-computation instead, while
+    // that device computes the other forces.
+
+    if (cu.getNumContexts() == 1)
+        cu.getWorkThread().addTask(new ExecuteTask(*this, includeForces));
+}
+
+void CudaCalcExternalPuremdForceKernel::executeOnWorkerThread(bool includeForces) {
+    double gatherTime = PuremdInterface::getTime();
+    int numAtoms = numQMAtoms+numMMAtoms;
+
+    // Reassign the reactive region if it follows a set of center atoms.  Only evaluations at new positions
+    // count toward the frequency: repeating one just returns PuReMD's cached results, which must be for
+    // the same region.  The positions were gathered in the old order, so put them back in the new one.
+
+    if (!centerAtoms.empty()) {
+        vector<Vec3> atomPos(numAtoms);
+        for (int i = 0; i < numAtoms; i++)
+            atomPos[order[i]] = Vec3(pinnedBuffer[4*i], pinnedBuffer[4*i+1], pinnedBuffer[4*i+2])/AngstromsPerNm;
+        bool newPositions = (atomPos != adaptivePositions);
+        for (int i = 0; i < 3; i++)
+            newPositions |= (boxVectors[i] != adaptiveBoxVectors[i]);
+        if (newPositions) {
+            bool reselect = (numEvaluations++%adaptiveFrequency == 0);
+            if (reselect && PuremdInterface::selectQMAtoms(atomPos, centerAtoms, adaptiveCutoff, boxVectors, atomIsQM)) {
+                splitAtoms();
+                for (int i = 0; i < numAtoms; i++) {
+                    Vec3 pos = atomPos[order[i]]*AngstromsPerNm;
+                    pinnedBuffer[4*i] = pos[0];
+                    pinnedBuffer[4*i+1] = pos[1];
+                    pinnedBuffer[4*i+2] = pos[2];
+                    pinnedBuffer[4*i+3] = (i < numQMAtoms ? 0.0 : atomCharges[order[i]]);
+                }
+            }
+            adaptivePositions.swap(atomPos);
+            for (int i = 0; i < 3; i++)
+                adaptiveBoxVectors[i] = boxVectors[i];
         }
-        else
-        {
-            force[order[i]] += scale*static_cast<long long>(conversionFactor*mmForces[mmIndex]);
-            force[order[i] + numPaddedParticles] += scale*static_cast<long long>(conversionFactor*mmForces[mmIndex+1]);
-            force[order[i] + numPaddedParticles*2] += scale*static_cast<long long>(conversionFactor*mmForces[mmIndex+2]);
-            mmIndex+=3;
+    }
+    if (embeddingCutoff > 0)
+        updateEmbeddedAtoms();
+    for (int i = 0; i < numQMAtoms; i++)
+        for (int j = 0; j < 3; j++)
+            qmPos[3*i+j] = pinnedBuffer[4*i+j];
+    int numEmbedded = embeddedSlots.size();
+    for (int i = 0; i < numEmbedded; i++)
+        for (int j = 0; j < 4; j++)
+            mmPosQ[4*i+j] = pinnedBuffer[4*embeddedSlots[i]+j];
+    vector<double> newQmPos, newMmPos;
+    puremd.addTime(ExternalPuremdForce::GatherTime, PuremdInterface::getTime()-gatherTime);
+    puremd.getReaxffPuremdForces(numQMAtoms, qmSymbols, qmPos, numEmbedded, mmSymbols, mmPosQ, simBoxInfo,
+                                 newQmPos, newMmPos, qmForces, mmForces, qmCharges, energy);
+
+    // PuReMD reports energy gradients in kcal/mol/A and energies in kcal/mol.  The forces are left in the
+    // pinned buffer, to be uploaded by the post-computation.
+
+    double scatterTime = PuremdInterface::getTime();
+    energy *= KJPerKcal;
+    if (includeForces) {
+        const double forceScale = -KJPerKcal*AngstromsPerNm;
+        fill(pinnedBuffer, pinnedBuffer+3*numAtoms, 0.0);
+        for (int i = 0; i < 3*numQMAtoms; i++)
+            pinnedBuffer[i] = qmForces[i]*forceScale;
+        for (int i = 0; i < numEmbedded; i++)
+            for (int j = 0; j < 3; j++)
+                pinnedBuffer[3*embeddedSlots[i]+j] = mmForces[3*i+j]*forceScale;
+    }
+    puremd.addTime(ExternalPuremdForce::ScatterTime, PuremdInterface::getTime()-scatterTime);
+}
+
+void CudaCalcExternalPuremdForceKernel::setEmbeddedSlots(const vector<int>& slots) {
+    // Find where each atom was among the previously embedded atoms, so PuReMD can keep its charge history.
+
+    vector<int> previousPosition(order.size(), -1), previousIndex(slots.size());
+    for (int i = 0; i < embeddedSlots.size(); i++)
+        previousPosition[embeddedSlots[i]] = i;
+    for (int i = 0; i < slots.size(); i++)
+        previousIndex[i] = previousPosition[slots[i]];
+    embeddedSlots = slots;
+    mmSymbols.clear();
+    for (int slot : slots) {
+        mmSymbols.push_back(atomSymbols[2*order[slot]]);
+        mmSymbols.push_back(atomSymbols[2*order[slot]+1]);
+    }
+    mmPosQ.resize(4*slots.size());
+    mmForces.resize(3*slots.size());
+    puremd.setMMAtomsChanged(previousIndex);
+}
+
+void CudaCalcExternalPuremdForceKernel::updateEmbeddedAtoms() {
+    // Only select the MM atoms again once some atom has moved more than half the skin since the last selection.
+
+    int numAtoms = numQMAtoms+numMMAtoms;
+    vector<Vec3> slotPos(numAtoms);
+    for (int i = 0; i < numAtoms; i++)
+        slotPos[i] = Vec3(pinnedBuffer[4*i], pinnedBuffer[4*i+1], pinnedBuffer[4*i+2])/AngstromsPerNm;
+    if (!embeddingPositions.empty()) {
+        double maxDisplacement2 = 0.25*embeddingSkin*embeddingSkin;
+        bool moved = false;
+        for (int i = 0; i < numAtoms && !moved; i++) {
+            Vec3 delta = slotPos[i]-embeddingPositions[order[i]];
+            moved = (delta.dot(delta) > maxDisplacement2);
         }
+        if (!moved)
+            return;
     }
-     //update everything. it should work now.
-    cu.getLongForceBuffer().upload(force);
-    cu.getPosq().upload(posqBuff);
+    embeddingPositions.resize(numAtoms);
+    for (int i = 0; i < numAtoms; i++)
+        embeddingPositions[order[i]] = slotPos[i];
+    vector<Vec3> qmPositions(slotPos.begin(), slotPos.begin()+numQMAtoms);
+    vector<Vec3> mmPositions(slotPos.begin()+numQMAtoms, slotPos.end());
+    vector<int> embedded;
+    PuremdInterface::selectEmbeddedAtoms(qmPositions, mmPositions, embeddingCutoff+embeddingSkin, boxVectors, embedded);
+    for (int& i : embedded)
+        i += numQMAtoms;
+    if (embedded != embeddedSlots)
+        setEmbeddedSlots(embedded);
+}
+
+double CudaCalcExternalPuremdForceKernel::addForces(bool includeForces, bool includeEnergy, int groups) {
+    if ((groups&forceGroupFlag) == 0)
+        return 0.0;
+
+    // Wait until executeOnWorkerThread() is finished, or run it now if using multiple GPUs.
+
+    if (cu.getNumContexts() == 1)
+        cu.getWorkThread().flush();
+    else
+        executeOnWorkerThread(includeForces);
 
+    // Upload the forces and add them in.  The region may have been reassigned on the worker thread,
+    // so first make sure the device has the order they were computed in.
+
+    if (includeForces) {
+        double scatterTime = PuremdInterface::getTime();
+        ContextSelector selector(cu);
+        uploadOrder();
+        puremdForces.upload(pinnedBuffer);
+        void* args[] = {&cu.getLongForceBuffer().getDevicePointer(), &cu.getAtomIndexArray().getDevicePointer(),
+                &puremdIndex.getDevicePointer(), &puremdForces.getDevicePointer()};
+        cu.executeKernel(scatterForcesKernel, args, cu.getNumAtoms());
+        puremd.addTime(ExternalPuremdForce::ScatterTime, PuremdInterface::getTime()-scatterTime);
+    }
+    puremd.addTime(ExternalPuremdForce::TotalTime, PuremdInterface::getTime()-startTime);
     return energy;
 }
 
-void CudaCalcExternalPuremdForceKernel::copyParametersToContext(ContextImpl& context, const ExternalPuremdForce& force, int firstParticle, int lastParticle) {
- // for now leave this empty.
+void CudaCalcExternalPuremdForceKernel::copyParametersToContext(ContextImpl& context, const ExternalPuremdForce& force, int firstAtom, int lastAtom) {
+    if (force.getNumAtoms() != atomParticles.size())
+        throw OpenMMException("updateParametersInContext: The number of atoms has changed");
+    for (int i = 0; i < force.getNumAtoms(); i++) {
+        int particle;
+        force.getParticleParameters(i, particle, atomSymbols[2*i], atomSymbols[2*i+1], atomIsQM[i]);
+        if (particle != atomParticles[i])
+            throw OpenMMException("updateParametersInContext: The set of particles has changed");
+    }
+    force.getAdaptiveQMRegion(centerAtoms, adaptiveCutoff, adaptiveFrequency);
+    force.getEmbeddingCutoff(embeddingCutoff, embeddingSkin);
+    numEvaluations = 0;
+    adaptivePositions.clear();
+    splitAtoms();
+    puremd.invalidateCache();
+}
+
+void CudaCalcExternalPuremdForceKernel::getQMAtoms(vector<int>& qmAtoms) const {
+    qmAtoms.clear();
+    for (int i = 0; i < atomIsQM.size(); i++)
+        if (atomIsQM[i])
+            qmAtoms.push_back(i);
+}
+
+void CudaCalcExternalPuremdForceKernel::getNeighborListInfo(int& numBuilds, int& numReuses) const {
+    puremd.getNeighborListInfo(numBuilds, numReuses);
+}
+
+void CudaCalcExternalPuremdForceKernel::getTimingInfo(vector<double>& times, int& numEvaluations) const {
+    puremd.getTimingInfo(times, numEvaluations);
+}
+
+void CudaCalcExternalPuremdForceKernel::getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const {
+    puremd.getChargeSolverInfo(numIterations, residual, numPreconditionerComputations);
+}
+
+void CudaCalcExternalPuremdForceKernel::getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const {
+    puremd.getVirial(virialX, virialY, virialZ);
+}
+
+void CudaCalcExternalPuremdForceKernel::getBonds(double threshold, vector<int>& bondAtoms, vector<double>& bondOrders) const {
+    vector<int> qmAtoms;
+    getQMAtoms(qmAtoms);
+    puremd.getBonds(threshold, bondAtoms, bondOrders);
+    for (int& atom : bondAtoms)
+        atom = qmAtoms[atom];
+}
+
+void CudaCalcExternalPuremdForceKernel::getFragments(double threshold, vector<int>& fragments) const {
+    vector<int> qmAtoms, qmFragments;
+    getQMAtoms(qmAtoms);
+    puremd.getFragments(threshold, qmFragments);
+    fragments.clear();
+    if (qmFragments.empty())
+        return;
+    fragments.resize(atomIsQM.size(), -1);
+    for (int i = 0; i < qmFragments.size(); i++)
+        fragments[qmAtoms[i]] = qmFragments[i];
+}
+
+void CudaCalcExternalPuremdForceKernel::createCheckpoint(ostream& stream) const {
+    stream.write((char*) &numEvaluations, sizeof(int));
+    stream.write((char*) atomIsQM.data(), sizeof(int)*atomIsQM.size());
+    int numEmbedded = embeddedSlots.size();
+    stream.write((char*) &numEmbedded, sizeof(int));
+    for (int slot : embeddedSlots)
+        stream.write((char*) &order[slot], sizeof(int));
+    int numPositions = embeddingPositions.size();
+    stream.write((char*) &numPositions, sizeof(int));
+    stream.write((char*) embeddingPositions.data(), sizeof(Vec3)*numPositions);
+    numPositions = adaptivePositions.size();
+    stream.write((char*) &numPositions, sizeof(int));
+    stream.write((char*) adaptivePositions.data(), sizeof(Vec3)*numPositions);
+    stream.write((char*) adaptiveBoxVectors, sizeof(Vec3)*3);
+    puremd.createCheckpoint(stream);
+}
+
+void CudaCalcExternalPuremdForceKernel::loadCheckpoint(istream& stream) {
+    // Read and check all the data before changing anything, so an invalid checkpoint leaves the kernel unchanged.
+
+    const string error = "loadCheckpoint: The checkpoint data for ExternalPuremdForce is invalid";
+    int numAtoms = atomParticles.size();
+    int evaluations, numEmbedded, numPositions, numAdaptivePositions;
+    vector<int> isQM(numAtoms);
+    stream.read((char*) &evaluations, sizeof(int));
+    stream.read((char*) isQM.data(), sizeof(int)*numAtoms);
+    stream.read((char*) &numEmbedded, sizeof(int));
+    if (stream.fail() || numEmbedded < 0 || numEmbedded > numAtoms)
+        throw OpenMMException(error);
+    vector<int> atoms(numEmbedded);
+    stream.read((char*) atoms.data(), sizeof(int)*numEmbedded);
+    if (stream.fail())
+        throw OpenMMException(error);
+    for (int atom : atoms)
+        if (atom < 0 || atom >= numAtoms || isQM[atom])
+            throw OpenMMException(error);
+    stream.read((char*) &numPositions, sizeof(int));
+    if (stream.fail() || (numPositions != 0 && numPositions != numAtoms))
+        throw OpenMMException(error);
+    vector<Vec3> positions(numPositions);
+    stream.read((char*) positions.data(), sizeof(Vec3)*numPositions);
+    stream.read((char*) &numAdaptivePositions, sizeof(int));
+    if (stream.fail() || (numAdaptivePositions != 0 && numAdaptivePositions != numAtoms))
+        throw OpenMMException(error);
+    vector<Vec3> atomPos(numAdaptivePositions);
+    Vec3 boxVectors[3];
+    stream.read((char*) atomPos.data(), sizeof(Vec3)*numAdaptivePositions);
+    stream.read((char*) boxVectors, sizeof(Vec3)*3);
+    if (stream.fail())
+        throw OpenMMException(error);
+    puremd.loadCheckpoint(stream, numAtoms);
+    numEvaluations = evaluations;
+    atomIsQM.swap(isQM);
+    splitAtoms();
+
+    // The checkpoint records the embedded atoms by index, so find which slot each of them is in.
+
+    vector<int> slot(order.size());
+    for (int i = 0; i < order.size(); i++)
+        slot[order[i]] = i;
+    vector<int> slots(numEmbedded);
+    for (int i = 0; i < numEmbedded; i++)
+        slots[i] = slot[atoms[i]];
+    setEmbeddedSlots(slots);
+    embeddingPositions.swap(positions);
+    adaptivePositions.swap(atomPos);
+    for (int i = 0; i < 3; i++)
+        adaptiveBoxVectors[i] = boxVectors[i];
 }
\ No newline at end of file
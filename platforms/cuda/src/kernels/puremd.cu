@@ -0,0 +1,41 @@
+/**
+ * Gather the positions of the atoms handled by PuReMD into a compact array, in the order expected by
+ * PuReMD (QM atoms first, then MM atoms), converting them to Angstroms.  The w component holds the
+ * charge of each atom.
+ */
+extern "C" __global__ void gatherPuremdPositions(const real4* __restrict__ posq,
+#ifdef USE_MIXED_PRECISION
+        const real4* __restrict__ posqCorrection,
+#endif
+        const int* __restrict__ atomIndex, const int* __restrict__ puremdIndex,
+        const double* __restrict__ puremdCharges, double4* __restrict__ puremdPosq) {
+    for (int i = blockIdx.x*blockDim.x+threadIdx.x; i < NUM_ATOMS; i += blockDim.x*gridDim.x) {
+        int index = puremdIndex[atomIndex[i]];
+        if (index != -1) {
+#ifdef USE_MIXED_PRECISION
+            real4 pos1 = posq[i];
+            real4 pos2 = posqCorrection[i];
+            double3 pos = make_double3(pos1.x+(double) pos2.x, pos1.y+(double) pos2.y, pos1.z+(double) pos2.z);
+#else
+            real4 pos = posq[i];
+#endif
+            puremdPosq[index] = make_double4(ANGSTROMS_PER_NM*pos.x, ANGSTROMS_PER_NM*pos.y, ANGSTROMS_PER_NM*pos.z, puremdCharges[index]);
+        }
+    }
+}
+
+/**
+ * Add the forces computed by PuReMD to the force buffer.  The forces are stored in the same order as the
+ * positions produced by gatherPuremdPositions(), and have already been converted to kJ/mol/nm.
+ */
+extern "C" __global__ void scatterPuremdForces(unsigned long long* __restrict__ forceBuffers, const int* __restrict__ atomIndex,
+        const int* __restrict__ puremdIndex, const double* __restrict__ puremdForces) {
+    for (int i = blockIdx.x*blockDim.x+threadIdx.x; i < NUM_ATOMS; i += blockDim.x*gridDim.x) {
+        int index = puremdIndex[atomIndex[i]];
+        if (index != -1) {
+            forceBuffers[i] += (unsigned long long) ((long long) (puremdForces[3*index]*0x100000000));
+            forceBuffers[i+PADDED_NUM_ATOMS] += (unsigned long long) ((long long) (puremdForces[3*index+1]*0x100000000));
+            forceBuffers[i+2*PADDED_NUM_ATOMS] += (unsigned long long) ((long long) (puremdForces[3*index+2]*0x100000000));
+        }
+    }
+}
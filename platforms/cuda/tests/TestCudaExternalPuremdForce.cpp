@@ -0,0 +1,134 @@
+/* -------------------------------------------------------------------------- *
+ *                                   OpenMM                                   *
+ * -------------------------------------------------------------------------- *
+ * This is part of the OpenMM molecular simulation toolkit originating from   *
+ * Simbios, the NIH National Center for Physics-Based Simulation of           *
+ * Biological Structures at Stanford, funded under the NIH Roadmap for        *
+ * Medical Research, grant U54 GM072970. See https://simtk.org.               *
+ *                                                                            *
+ * Portions copyright (c) 2026 Stanford University and the Authors.           *
+ * Authors: Peter Eastman                                                     *
+ * Contributors:                                                              *
+ *                                                                            *
+ * Permission is hereby granted, free of charge, to any person obtaining a    *
+ * copy of this software and associated documentation files (the "Software"), *
+ * to deal in the Software without restriction, including without limitation  *
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,   *
+ * and/or sell copies of the Software, and to permit persons to whom the      *
+ * Software is furnished to do so, subject to the following conditions:       *
+ *                                                                            *
+ * The above copyright notice and this permission notice shall be included in *
+ * all copies or substantial portions of the Software.                        *
+ *                                                                            *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR *
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,   *
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL    *
+ * THE AUTHORS, CONTRIBUTORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,    *
+ * DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR      *
+ * OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE  *
+ * USE OR OTHER DEALINGS IN THE SOFTWARE.                                     *
+ * -------------------------------------------------------------------------- */
+
+#include "CudaTests.h"
+#include "TestExternalPuremdForce.h"
+
+void testCompareToReference() {
+    // The CUDA kernel gathers positions and scatters forces on the device, in the order
+    // the atoms are currently stored in.  Make sure the results match the Reference platform.
+
+    System system;
+    vector<Vec3> positions;
+    createWaterSystem(system, positions, 2);
+    VerletIntegrator integrator1(0.001);
+    VerletIntegrator integrator2(0.001);
+    Context context1(system, integrator1, platform);
+    Context context2(system, integrator2, Platform::getPlatformByName("Reference"));
+    context1.setPositions(positions);
+    context2.setPositions(positions);
+    for (int step = 0; step < 2; step++) {
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-4);
+        for (int i = 0; i < system.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-3);
+        for (int i = 0; i < (int) positions.size(); i++)
+            positions[i][0] += 0.01*(i%3);
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+    }
+}
+
+void testReassignedRegionMatchesReference() {
+    // Reassigning the reactive region on the worker thread changes the order of the atoms PuReMD sees.
+    // The new order must reach the device before the forces are scattered, and the positions for the
+    // next step must be gathered in it.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 0);
+    force->setAdaptiveQMRegion({0}, 0.4, 1);
+    force->setEmbeddingCutoff(0.25, 0.05);
+    VerletIntegrator integrator1(0.001);
+    VerletIntegrator integrator2(0.001);
+    Context context1(system, integrator1, platform);
+    Context context2(system, integrator2, Platform::getPlatformByName("Reference"));
+    context1.setPositions(positions);
+    context2.setPositions(positions);
+    vector<int> qmAtoms1, qmAtoms2, firstRegion;
+    for (int step = 0; step < 3; step++) {
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        force->getQMAtomsInContext(context1, qmAtoms1);
+        force->getQMAtomsInContext(context2, qmAtoms2);
+        ASSERT_EQUAL_CONTAINERS(qmAtoms2, qmAtoms1);
+        if (step == 0)
+            firstRegion = qmAtoms1;
+        ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-4);
+        for (int i = 0; i < system.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-3);
+        for (int i = 0; i < 3; i++)
+            positions[i] -= Vec3(0.1, 0, 0);
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+    }
+    ASSERT(qmAtoms1 != firstRegion);
+}
+
+void testMultipleDevices() {
+    // With multiple devices (here two contexts on the same one), PuReMD should be run once per evaluation
+    // and its forces and energy added only once.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 2);
+    VerletIntegrator integrator1(0.001);
+    VerletIntegrator integrator2(0.001);
+    Context context1(system, integrator1, platform);
+    string deviceIndex = platform.getPropertyValue(context1, "DeviceIndex");
+    map<string, string> props;
+    props["DeviceIndex"] = deviceIndex+","+deviceIndex;
+    Context context2(system, integrator2, platform, props);
+    VerletIntegrator integrator3(0.001);
+    Context context3(system, integrator3, Platform::getPlatformByName("Reference"));
+    for (int step = 0; step < 2; step++) {
+        context2.setPositions(positions);
+        context3.setPositions(positions);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        State state3 = context3.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state3.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-4);
+        for (int i = 0; i < system.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state3.getForces()[i], state2.getForces()[i], 1e-3);
+        for (int i = 0; i < (int) positions.size(); i++)
+            positions[i][0] += 0.01*(i%3);
+    }
+    vector<double> times;
+    int numEvaluations;
+    force->getTimingInfoInContext(context2, times, numEvaluations);
+    ASSERT_EQUAL(2, numEvaluations);
+}
+
+void runPlatformTests() {
+    testCompareToReference();
+    testReassignedRegionMatchesReference();
+    testMultipleDevices();
+}
@@ -36,6 +36,7 @@
 #include "openmm/kernels.h"
 #include "openmm/internal/CustomCPPForceImpl.h"
 #include "openmm/internal/CustomNonbondedForceImpl.h"
+#include "openmm/internal/PuremdInterface.h"
 #include "SimTKOpenMMRealType.h"
 #include "ReferenceNeighborList.h"
 #include "lepton/CompiledExpression.h"
@@ -1685,6 +1686,124 @@ private:
     std::vector<Vec3> forces;
 };
 
+/**
+ * This kernel is invoked by ExternalPuremdForce to calculate the forces acting on the system and the energy of the system.
+ * The Reference and CPU platforms both store positions and forces in double precision, so the coordinates are handed
+ * to PuReMD and the ReaxFF forces added back without any intermediate conversion.
+ */
+class ReferenceCalcExternalPuremdForceKernel : public CalcExternalPuremdForceKernel {
+public:
+    ReferenceCalcExternalPuremdForceKernel(std::string name, const Platform& platform) : CalcExternalPuremdForceKernel(name, platform) {
+    }
+    /**
+     * Initialize the kernel.
+     *
+     * @param system     the System this kernel will be applied to
+     * @param force      the ExternalPuremdForce this kernel will be used for
+     */
+    void initialize(const System& system, const ExternalPuremdForce& force);
+    /**
+     * Execute the kernel to calculate the forces and/or energy.
+     *
+     * @param context        the context in which to execute this kernel
+     * @param includeForces  true if forces should be calculated
+     * @param includeEnergy  true if the energy should be calculated
+     * @return the potential energy due to the force
+     */
+    double execute(ContextImpl& context, bool includeForces, bool includeEnergy);
+    /**
+     * Copy changed parameters over to a context.
+     *
+     * @param context    the context to copy parameters to
+     * @param force      the ExternalPuremdForce to copy the parameters from
+     * @param firstAtom  the index of the first atom whose parameters might have changed
+     * @param lastAtom   the index of the last atom whose parameters might have changed
+     */
+    void copyParametersToContext(ContextImpl& context, const ExternalPuremdForce& force, int firstAtom, int lastAtom);
+    /**
+     * Get the number of times the PuReMD far neighbor list has been built and reused.
+     *
+     * @param numBuilds   the number of force evaluations for which the neighbor list was built
+     * @param numReuses   the number of force evaluations for which the neighbor list was reused
+     */
+    void getNeighborListInfo(int& numBuilds, int& numReuses) const;
+    /**
+     * Get which atoms are currently treated as reactive.
+     *
+     * @param qmAtoms   the indices of the reactive atoms within the ExternalPuremdForce
+     */
+    void getQMAtoms(std::vector<int>& qmAtoms) const;
+    /**
+     * Get the wall clock time spent in each phase of the force evaluations.
+     *
+     * @param times            the total time (in seconds) spent in each phase, indexed by ExternalPuremdForce::TimingPhase
+     * @param numEvaluations   the number of force evaluations for which PuReMD was run
+     */
+    void getTimingInfo(std::vector<double>& times, int& numEvaluations) const;
+    /**
+     * Get statistics on how PuReMD has solved for the atomic charges.
+     *
+     * @param numIterations                  the total number of linear solver iterations
+     * @param residual                       the largest relative residual norm of the linear solver in the most recent evaluation
+     * @param numPreconditionerComputations  the number of evaluations for which the preconditioner was recomputed
+     */
+    void getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const;
+    /**
+     * Get the virial of the ReaxFF forces from the most recent force evaluation.
+     *
+     * @param virialX   the first row of the virial tensor, measured in kJ/mol
+     * @param virialY   the second row of the virial tensor, measured in kJ/mol
+     * @param virialZ   the third row of the virial tensor, measured in kJ/mol
+     */
+    void getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const;
+    /**
+     * Get the bonds between reactive atoms from the most recent force evaluation whose bond order is at least a threshold.
+     *
+     * @param threshold    the minimum bond order of the bonds to report
+     * @param bondAtoms    the indices within the ExternalPuremdForce of the two atoms of each bond, stored consecutively
+     * @param bondOrders   the bond order of each bond
+     */
+    void getBonds(double threshold, std::vector<int>& bondAtoms, std::vector<double>& bondOrders) const;
+    /**
+     * Get the fragments (sets of reactive atoms connected by bonds whose bond order is at least a threshold)
+     * from the most recent force evaluation.
+     *
+     * @param threshold    the minimum bond order of the bonds connecting a fragment
+     * @param fragments    the index of the fragment containing each atom of the ExternalPuremdForce, or -1 for non-reactive atoms
+     */
+    void getFragments(double threshold, std::vector<int>& fragments) const;
+    /**
+     * Write the state needed to continue a simulation efficiently and reproducibly to a checkpoint: the
+     * current reactive region and embedded atoms, and the history of charges PuReMD uses for the initial
+     * guesses of its charge solver.
+     *
+     * @param stream    an output stream the checkpoint data should be written to
+     */
+    void createCheckpoint(std::ostream& stream) const;
+    /**
+     * Load state from a checkpoint written by createCheckpoint().
+     *
+     * @param stream    an input stream the checkpoint data should be read from
+     */
+    void loadCheckpoint(std::istream& stream);
+private:
+    void splitAtoms();
+    void setEmbeddedAtoms(const std::vector<int>& atoms);
+    void updateEmbeddedAtoms(const std::vector<Vec3>& posData, const Vec3* boxVectors);
+    PuremdInterface puremd;
+    std::vector<int> atomParticles, atomIsQM, centerAtoms, mmAtoms, embeddedAtoms;
+    std::vector<char> atomSymbols;
+    std::vector<double> atomCharges;
+    std::vector<Vec3> embeddingPositions, adaptivePositions;
+    Vec3 adaptiveBoxVectors[3];
+    double adaptiveCutoff, embeddingCutoff, embeddingSkin;
+    int adaptiveFrequency, numEvaluations;
+    std::vector<int> qmParticles, mmParticles;
+    std::vector<char> qmSymbols, mmSymbols;
+    std::vector<double> mmCharges;
+    std::vector<double> qmPos, mmPosQ, qmForces, mmForces, qmCharges, simBoxInfo;
+};
+
 } // namespace OpenMM
 
 #endif /*OPENMM_REFERENCEKERNELS_H_*/
@@ -78,6 +78,7 @@
 #include "openmm/internal/NonbondedForceImpl.h"
 #include "openmm/Integrator.h"
 #include "openmm/OpenMMException.h"
+#include "openmm/Units.h"
 #include "SimTKOpenMMUtilities.h"
 #include "lepton/CustomFunction.h"
 #include "lepton/Operation.h"
@@ -3012,3 +3013,297 @@ double ReferenceCalcCustomCPPForceKernel::execute(ContextImpl& context, bool inc
             forceData[i] += forces[i];
     return energy;
 }
+
+void ReferenceCalcExternalPuremdForceKernel::initialize(const System& system, const ExternalPuremdForce& force) {
+    puremd.setInputParameters(force);
+
+    // MM atoms are seen by PuReMD as point charges.  Take their charges from the NonbondedForce, if there is one.
+
+    vector<double> charges(system.getNumParticles(), 0.0);
+    for (int i = 0; i < system.getNumForces(); i++) {
+        const NonbondedForce* nonbonded = dynamic_cast<const NonbondedForce*>(&system.getForce(i));
+        if (nonbonded != NULL) {
+            for (int j = 0; j < nonbonded->getNumParticles(); j++) {
+                double sigma, epsilon;
+                nonbonded->getParticleParameters(j, charges[j], sigma, epsilon);
+            }
+            break;
+        }
+    }
+    int numAtoms = force.getNumAtoms();
+    atomParticles.resize(numAtoms);
+    atomSymbols.resize(2*numAtoms);
+    atomIsQM.resize(numAtoms);
+    atomCharges.resize(numAtoms);
+    for (int i = 0; i < numAtoms; i++) {
+        force.getParticleParameters(i, atomParticles[i], atomSymbols[2*i], atomSymbols[2*i+1], atomIsQM[i]);
+        atomCharges[i] = charges[atomParticles[i]];
+    }
+    force.getAdaptiveQMRegion(centerAtoms, adaptiveCutoff, adaptiveFrequency);
+    force.getEmbeddingCutoff(embeddingCutoff, embeddingSkin);
+    numEvaluations = 0;
+    splitAtoms();
+}
+
+void ReferenceCalcExternalPuremdForceKernel::splitAtoms() {
+    qmParticles.clear();
+    qmSymbols.clear();
+    mmAtoms.clear();
+    for (int i = 0; i < atomParticles.size(); i++) {
+        if (atomIsQM[i]) {
+            qmParticles.push_back(atomParticles[i]);
+            qmSymbols.push_back(atomSymbols[2*i]);
+            qmSymbols.push_back(atomSymbols[2*i+1]);
+        }
+        else
+            mmAtoms.push_back(i);
+    }
+    qmPos.resize(3*qmParticles.size());
+    qmForces.resize(3*qmParticles.size());
+    qmCharges.resize(qmParticles.size());
+    embeddingPositions.clear();
+    setEmbeddedAtoms(mmAtoms);
+
+    // The QM atoms may have changed, so none of PuReMD's charge history can be kept.
+
+    puremd.setAtomsChanged();
+}
+
+void ReferenceCalcExternalPuremdForceKernel::setEmbeddedAtoms(const vector<int>& atoms) {
+    // Find where each atom was among the previously embedded atoms, so PuReMD can keep its charge history.
+
+    vector<int> previousPosition(atomParticles.size(), -1), previousIndex(atoms.size());
+    for (int i = 0; i < embeddedAtoms.size(); i++)
+        previousPosition[embeddedAtoms[i]] = i;
+    for (int i = 0; i < atoms.size(); i++)
+        previousIndex[i] = previousPosition[atoms[i]];
+    embeddedAtoms = atoms;
+    mmParticles.clear();
+    mmSymbols.clear();
+    mmCharges.clear();
+    for (int atom : atoms) {
+        mmParticles.push_back(atomParticles[atom]);
+        mmSymbols.push_back(atomSymbols[2*atom]);
+        mmSymbols.push_back(atomSymbols[2*atom+1]);
+        mmCharges.push_back(atomCharges[atom]);
+    }
+    mmPosQ.resize(4*mmParticles.size());
+    mmForces.resize(3*mmParticles.size());
+    puremd.setMMAtomsChanged(previousIndex);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::updateEmbeddedAtoms(const vector<Vec3>& posData, const Vec3* boxVectors) {
+    // Only select the MM atoms again once some atom has moved more than half the skin since the last selection.
+
+    int numAtoms = atomParticles.size();
+    if (!embeddingPositions.empty()) {
+        double maxDisplacement2 = 0.25*embeddingSkin*embeddingSkin;
+        bool moved = false;
+        for (int i = 0; i < numAtoms && !moved; i++) {
+            Vec3 delta = posData[atomParticles[i]]-embeddingPositions[i];
+            moved = (delta.dot(delta) > maxDisplacement2);
+        }
+        if (!moved)
+            return;
+    }
+    embeddingPositions.resize(numAtoms);
+    for (int i = 0; i < numAtoms; i++)
+        embeddingPositions[i] = posData[atomParticles[i]];
+    vector<Vec3> qmPositions, mmPositions;
+    for (int particle : qmParticles)
+        qmPositions.push_back(posData[particle]);
+    for (int atom : mmAtoms)
+        mmPositions.push_back(posData[atomParticles[atom]]);
+    vector<int> embedded;
+    PuremdInterface::selectEmbeddedAtoms(qmPositions, mmPositions, embeddingCutoff+embeddingSkin, boxVectors, embedded);
+    vector<int> atoms;
+    for (int i : embedded)
+        atoms.push_back(mmAtoms[i]);
+    if (atoms != embeddedAtoms)
+        setEmbeddedAtoms(atoms);
+}
+
+double ReferenceCalcExternalPuremdForceKernel::execute(ContextImpl& context, bool includeForces, bool includeEnergy) {
+    double startTime = PuremdInterface::getTime();
+    vector<Vec3>& posData = extractPositions(context);
+    vector<Vec3>& forceData = extractForces(context);
+    Vec3* boxVectors = extractBoxVectors(context);
+    PuremdInterface::getSimBoxInfo(boxVectors[0], boxVectors[1], boxVectors[2], simBoxInfo);
+
+    // Reassign the reactive region if it follows a set of center atoms.  Only evaluations at new positions
+    // count toward the frequency: repeating one just returns PuReMD's cached results, which must be for
+    // the same region.
+
+    if (!centerAtoms.empty()) {
+        vector<Vec3> atomPos(atomParticles.size());
+        for (int i = 0; i < atomParticles.size(); i++)
+            atomPos[i] = posData[atomParticles[i]];
+        bool newPositions = (atomPos != adaptivePositions);
+        for (int i = 0; i < 3; i++)
+            newPositions |= (boxVectors[i] != adaptiveBoxVectors[i]);
+        if (newPositions) {
+            bool reselect = (numEvaluations++%adaptiveFrequency == 0);
+            if (reselect && PuremdInterface::selectQMAtoms(atomPos, centerAtoms, adaptiveCutoff, boxVectors, atomIsQM))
+                splitAtoms();
+            adaptivePositions.swap(atomPos);
+            for (int i = 0; i < 3; i++)
+                adaptiveBoxVectors[i] = boxVectors[i];
+        }
+    }
+    if (embeddingCutoff > 0)
+        updateEmbeddedAtoms(posData, boxVectors);
+
+    // PuReMD works in Angstroms.
+
+    int numQM = qmParticles.size();
+    int numMM = mmParticles.size();
+    for (int i = 0; i < numQM; i++)
+        for (int j = 0; j < 3; j++)
+            qmPos[3*i+j] = posData[qmParticles[i]][j]*AngstromsPerNm;
+    for (int i = 0; i < numMM; i++) {
+        for (int j = 0; j < 3; j++)
+            mmPosQ[4*i+j] = posData[mmParticles[i]][j]*AngstromsPerNm;
+        mmPosQ[4*i+3] = mmCharges[i];
+    }
+    vector<double> newQmPos, newMmPos;
+    double energy;
+    double puremdTime = PuremdInterface::getTime();
+    puremd.addTime(ExternalPuremdForce::GatherTime, puremdTime-startTime);
+    puremd.getReaxffPuremdForces(numQM, qmSymbols, qmPos, numMM, mmSymbols, mmPosQ, simBoxInfo,
+                                 newQmPos, newMmPos, qmForces, mmForces, qmCharges, energy);
+
+    // PuReMD reports energy gradients in kcal/mol/A and energies in kcal/mol.
+
+    double scatterTime = PuremdInterface::getTime();
+    if (includeForces) {
+        const double forceScale = -KJPerKcal*AngstromsPerNm;
+        for (int i = 0; i < numQM; i++)
+            forceData[qmParticles[i]] += Vec3(qmForces[3*i], qmForces[3*i+1], qmForces[3*i+2])*forceScale;
+        for (int i = 0; i < numMM; i++)
+            forceData[mmParticles[i]] += Vec3(mmForces[3*i], mmForces[3*i+1], mmForces[3*i+2])*forceScale;
+    }
+    double endTime = PuremdInterface::getTime();
+    puremd.addTime(ExternalPuremdForce::ScatterTime, endTime-scatterTime);
+    puremd.addTime(ExternalPuremdForce::TotalTime, endTime-startTime);
+    return energy*KJPerKcal;
+}
+
+void ReferenceCalcExternalPuremdForceKernel::copyParametersToContext(ContextImpl& context, const ExternalPuremdForce& force, int firstAtom, int lastAtom) {
+    if (force.getNumAtoms() != atomParticles.size())
+        throw OpenMMException("updateParametersInContext: The number of atoms has changed");
+    for (int i = 0; i < force.getNumAtoms(); i++) {
+        int particle;
+        force.getParticleParameters(i, particle, atomSymbols[2*i], atomSymbols[2*i+1], atomIsQM[i]);
+        if (particle != atomParticles[i])
+            throw OpenMMException("updateParametersInContext: The set of particles has changed");
+    }
+    force.getAdaptiveQMRegion(centerAtoms, adaptiveCutoff, adaptiveFrequency);
+    force.getEmbeddingCutoff(embeddingCutoff, embeddingSkin);
+    numEvaluations = 0;
+    adaptivePositions.clear();
+    splitAtoms();
+    puremd.invalidateCache();
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getQMAtoms(vector<int>& qmAtoms) const {
+    qmAtoms.clear();
+    for (int i = 0; i < atomIsQM.size(); i++)
+        if (atomIsQM[i])
+            qmAtoms.push_back(i);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getNeighborListInfo(int& numBuilds, int& numReuses) const {
+    puremd.getNeighborListInfo(numBuilds, numReuses);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getTimingInfo(vector<double>& times, int& numEvaluations) const {
+    puremd.getTimingInfo(times, numEvaluations);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getChargeSolverInfo(int& numIterations, double& residual, int& numPreconditionerComputations) const {
+    puremd.getChargeSolverInfo(numIterations, residual, numPreconditionerComputations);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getVirial(Vec3& virialX, Vec3& virialY, Vec3& virialZ) const {
+    puremd.getVirial(virialX, virialY, virialZ);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getBonds(double threshold, vector<int>& bondAtoms, vector<double>& bondOrders) const {
+    vector<int> qmAtoms;
+    getQMAtoms(qmAtoms);
+    puremd.getBonds(threshold, bondAtoms, bondOrders);
+    for (int& atom : bondAtoms)
+        atom = qmAtoms[atom];
+}
+
+void ReferenceCalcExternalPuremdForceKernel::getFragments(double threshold, vector<int>& fragments) const {
+    vector<int> qmAtoms, qmFragments;
+    getQMAtoms(qmAtoms);
+    puremd.getFragments(threshold, qmFragments);
+    fragments.clear();
+    if (qmFragments.empty())
+        return;
+    fragments.resize(atomIsQM.size(), -1);
+    for (int i = 0; i < qmFragments.size(); i++)
+        fragments[qmAtoms[i]] = qmFragments[i];
+}
+
+void ReferenceCalcExternalPuremdForceKernel::createCheckpoint(ostream& stream) const {
+    stream.write((char*) &numEvaluations, sizeof(int));
+    stream.write((char*) atomIsQM.data(), sizeof(int)*atomIsQM.size());
+    int numEmbedded = embeddedAtoms.size();
+    stream.write((char*) &numEmbedded, sizeof(int));
+    stream.write((char*) embeddedAtoms.data(), sizeof(int)*numEmbedded);
+    int numPositions = embeddingPositions.size();
+    stream.write((char*) &numPositions, sizeof(int));
+    stream.write((char*) embeddingPositions.data(), sizeof(Vec3)*numPositions);
+    numPositions = adaptivePositions.size();
+    stream.write((char*) &numPositions, sizeof(int));
+    stream.write((char*) adaptivePositions.data(), sizeof(Vec3)*numPositions);
+    stream.write((char*) adaptiveBoxVectors, sizeof(Vec3)*3);
+    puremd.createCheckpoint(stream);
+}
+
+void ReferenceCalcExternalPuremdForceKernel::loadCheckpoint(istream& stream) {
+    // Read and check all the data before changing anything, so an invalid checkpoint leaves the kernel unchanged.
+
+    const string error = "loadCheckpoint: The checkpoint data for ExternalPuremdForce is invalid";
+    int numAtoms = atomParticles.size();
+    int evaluations, numEmbedded, numPositions, numAdaptivePositions;
+    vector<int> isQM(numAtoms);
+    stream.read((char*) &evaluations, sizeof(int));
+    stream.read((char*) isQM.data(), sizeof(int)*numAtoms);
+    stream.read((char*) &numEmbedded, sizeof(int));
+    if (stream.fail() || numEmbedded < 0 || numEmbedded > numAtoms)
+        throw OpenMMException(error);
+    vector<int> atoms(numEmbedded);
+    stream.read((char*) atoms.data(), sizeof(int)*numEmbedded);
+    if (stream.fail())
+        throw OpenMMException(error);
+    for (int atom : atoms)
+        if (atom < 0 || atom >= numAtoms || isQM[atom])
+            throw OpenMMException(error);
+    stream.read((char*) &numPositions, sizeof(int));
+    if (stream.fail() || (numPositions != 0 && numPositions != numAtoms))
+        throw OpenMMException(error);
+    vector<Vec3> positions(numPositions);
+    stream.read((char*) positions.data(), sizeof(Vec3)*numPositions);
+    stream.read((char*) &numAdaptivePositions, sizeof(int));
+    if (stream.fail() || (numAdaptivePositions != 0 && numAdaptivePositions != numAtoms))
+        throw OpenMMException(error);
+    vector<Vec3> atomPos(numAdaptivePositions);
+    Vec3 boxVectors[3];
+    stream.read((char*) atomPos.data(), sizeof(Vec3)*numAdaptivePositions);
+    stream.read((char*) boxVectors, sizeof(Vec3)*3);
+    if (stream.fail())
+        throw OpenMMException(error);
+    puremd.loadCheckpoint(stream, numAtoms);
+    numEvaluations = evaluations;
+    atomIsQM.swap(isQM);
+    splitAtoms();
+    setEmbeddedAtoms(atoms);
+    embeddingPositions.swap(positions);
+    adaptivePositions.swap(atomPos);
+    for (int i = 0; i < 3; i++)
+        adaptiveBoxVectors[i] = boxVectors[i];
+}
@@ -38,6 +38,9 @@ void PreAllocate_Space( reax_system * const system,
         system->prealloc_allocated = TRUE;
 
         system->atoms = scalloc( n, sizeof(reax_atom), __FILE__, __LINE__ );
+        system->x = scalloc( n, sizeof(rvec), __FILE__, __LINE__ );
+        system->q = scalloc( n, sizeof(real), __FILE__, __LINE__ );
+        system->type = scalloc( n, sizeof(int), __FILE__, __LINE__ );
         workspace->orig_id = scalloc( n, sizeof(int), __FILE__, __LINE__ );
 
         /* bond restriction info */
@@ -64,6 +67,9 @@ void PreAllocate_Space( reax_system * const system,
     else
     {
         sfree( system->atoms, __FILE__, __LINE__ );
+        sfree( system->x, __FILE__, __LINE__ );
+        sfree( system->q, __FILE__, __LINE__ );
+        sfree( system->type, __FILE__, __LINE__ );
         sfree( workspace->orig_id, __FILE__, __LINE__ );
 
         /* bond restriction info */
@@ -80,6 +86,9 @@ void PreAllocate_Space( reax_system * const system,
         }
 
         system->atoms = scalloc( n, sizeof(reax_atom), __FILE__, __LINE__ );
+        system->x = scalloc( n, sizeof(rvec), __FILE__, __LINE__ );
+        system->q = scalloc( n, sizeof(real), __FILE__, __LINE__ );
+        system->type = scalloc( n, sizeof(int), __FILE__, __LINE__ );
         workspace->orig_id = scalloc( n, sizeof(int), __FILE__, __LINE__ );
 
         /* bond restriction info */
@@ -128,6 +137,10 @@ void Allocate_Matrix( sparse_matrix * const H, int n, int n_max, int m )
     H->start = smalloc( sizeof(unsigned int) * (n_max + 1), __FILE__, __LINE__ );
     H->j = smalloc( sizeof(unsigned int) * m, __FILE__, __LINE__ );
     H->val = smalloc( sizeof(real) * m, __FILE__, __LINE__ );
+    H->val_float = NULL;
+    H->compressed = FALSE;
+    H->j_escape = NULL;
+    H->escape_start = NULL;
 }
 
 
@@ -142,6 +155,19 @@ void Deallocate_Matrix( sparse_matrix * const H )
     sfree( H->start, __FILE__, __LINE__ );
     sfree( H->j, __FILE__, __LINE__ );
     sfree( H->val, __FILE__, __LINE__ );
+    if ( H->val_float != NULL )
+    {
+        sfree( H->val_float, __FILE__, __LINE__ );
+        H->val_float = NULL;
+    }
+    if ( H->escape_start != NULL )
+    {
+        sfree( H->j_escape, __FILE__, __LINE__ );
+        sfree( H->escape_start, __FILE__, __LINE__ );
+        H->j_escape = NULL;
+        H->escape_start = NULL;
+    }
+    H->compressed = FALSE;
 }
 
 
@@ -1061,6 +1061,115 @@ static void Calculate_Density_Slice( reax_system *system, simulation_data *data,
 #endif
 
 
+/* Collect the bonds among the first num_atoms atoms whose bond order is
+ * at least bo_cut, reporting each pair once (i < j)
+ *
+ * bonds: bond list
+ * num_atoms: atoms [0, num_atoms) are considered
+ * bo_cut: bond order cutoff
+ * bond_atoms: atom index pairs of the bonds found, 2 * (return value) entries;
+ *   if NULL, only the bonds are counted
+ * bond_orders: bond orders of the bonds found, (return value) entries;
+ *   if NULL, bond orders are not reported
+ *
+ * returns: number of bonds found */
+int Get_Bonds( reax_list *bonds, int num_atoms, real bo_cut,
+        int *bond_atoms, real *bond_orders )
+{
+    int i, pj, j, num_bonds;
+
+    num_bonds = 0;
+
+    for ( i = 0; i < num_atoms; ++i )
+    {
+        for ( pj = Start_Index( i, bonds ); pj < End_Index( i, bonds ); ++pj )
+        {
+            j = bonds->bond_list[pj].nbr;
+
+            if ( i < j && j < num_atoms
+                    && bonds->bond_list[pj].bo_data.BO >= bo_cut )
+            {
+                if ( bond_atoms != NULL )
+                {
+                    bond_atoms[2 * num_bonds] = i;
+                    bond_atoms[2 * num_bonds + 1] = j;
+                }
+                if ( bond_orders != NULL )
+                {
+                    bond_orders[num_bonds] = bonds->bond_list[pj].bo_data.BO;
+                }
+                ++num_bonds;
+            }
+        }
+    }
+
+    return num_bonds;
+}
+
+
+/* Partition the first num_atoms atoms into fragments, i.e., the connected
+ * components of the bond graph using bonds with bond order at least bo_cut
+ * (see Analyze_Fragments); fragments are numbered in order of their
+ * lowest atom index
+ *
+ * bonds: bond list
+ * num_atoms: atoms [0, num_atoms) are considered
+ * bo_cut: bond order cutoff
+ * fragment: fragment index of each atom, num_atoms entries
+ *
+ * returns: number of fragments found */
+int Get_Fragments( reax_list *bonds, int num_atoms, real bo_cut,
+        int *fragment )
+{
+    int i, pj, j, atom, top, num_fragments;
+    int *stack;
+
+    /* iterative depth-first search, as bonded clusters
+     * can be arbitrarily large for condensed phase systems */
+    stack = smalloc( sizeof(int) * MAX( num_atoms, 1 ), __FILE__, __LINE__ );
+    num_fragments = 0;
+
+    for ( i = 0; i < num_atoms; ++i )
+    {
+        fragment[i] = -1;
+    }
+
+    for ( i = 0; i < num_atoms; ++i )
+    {
+        if ( fragment[i] == -1 )
+        {
+            /* discover a new fragment */
+            fragment[i] = num_fragments;
+            stack[0] = i;
+            top = 1;
+
+            while ( top > 0 )
+            {
+                atom = stack[--top];
+
+                for ( pj = Start_Index( atom, bonds ); pj < End_Index( atom, bonds ); ++pj )
+                {
+                    j = bonds->bond_list[pj].nbr;
+
+                    if ( j < num_atoms && fragment[j] == -1
+                            && bonds->bond_list[pj].bo_data.BO >= bo_cut )
+                    {
+                        fragment[j] = num_fragments;
+                        stack[top++] = j;
+                    }
+                }
+            }
+
+            ++num_fragments;
+        }
+    }
+
+    sfree( stack, __FILE__, __LINE__ );
+
+    return num_fragments;
+}
+
+
 void Analysis( reax_system *system, control_params *control,
         simulation_data *data, static_storage *workspace,
         reax_list **lists, output_controls *out_control )
@@ -28,6 +28,10 @@
 void Analysis( reax_system*, control_params*, simulation_data*,
                static_storage*, reax_list**, output_controls* );
 
+int Get_Bonds( reax_list*, int, real, int*, real* );
+
+int Get_Fragments( reax_list*, int, real, int* );
+
 //void Copy_Bond_List( reax_system*, control_params*, reax_list** );
 
 //void Analyze_Molecules( reax_system*, control_params*, simulation_data*,
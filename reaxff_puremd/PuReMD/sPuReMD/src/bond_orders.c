@@ -310,7 +310,7 @@ void Add_dBond_to_Forces_NPT( int i, int pj, reax_system *system,
     bond_data *nbr_j, *nbr_k;
     bond_order_data *bo_ij, *bo_ji;
     dbond_coefficients coef;
-    rvec force, dvec_jk;
+    rvec force, dvec_ik;
     rtensor press;
     int pk, k, j;
     rvec *f_i, *f_j, *f_k;
@@ -375,24 +375,14 @@ void Add_dBond_to_Forces_NPT( int i, int pj, reax_system *system,
         /* force */
         rvec_Add( *f_k, force );
 
-        /* pressure */
-        rvec_Scale( force, -1.0, force );
-        rvec_OuterProduct( press, force, nbr_k->dvec  );
+        /* pressure, with positions relative to atom i */
+        rvec_OuterProduct( press, force, nbr_k->dvec );
 #if !defined(_OPENMP)
         rtensor_Add( data->press, press );
 #else
         rtensor_Add( data->press_local[tid], press );
 #endif
 //        fprintf( stderr, "[BO3, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", i, k, force[0], force[1], force[2], nbr_k->dvec[0], nbr_k->dvec[1], nbr_k->dvec[2] ); fflush( stderr ); 
-
-        rvec_ScaledSum( dvec_jk, 1.0, nbr_k->dvec, -1.0, nbr_j->dvec );
-        rvec_OuterProduct( press, dvec_jk, force );
-#if !defined(_OPENMP)
-        rtensor_Add( data->press, press );
-#else
-        rtensor_Add( data->press_local[tid], press );
-#endif
-//        fprintf( stderr, "[BO4, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", j, k, force[0], force[1], force[2], dvec_jk[0], dvec_jk[1], dvec_jk[2] ); fflush( stderr ); 
     }
 
     /* then atom i itself */
@@ -420,18 +410,9 @@ void Add_dBond_to_Forces_NPT( int i, int pj, reax_system *system,
     /* 3rd, dBO_pi2 */
     rvec_ScaledAdd( force, coef.C3dbopi2, workspace->dDeltap_self[i] );
 
-    /* force */
+    /* force (atom i is the origin for the pressure, so it does not contribute) */
     rvec_Add( *f_i, force );
 
-    /* pressure */
-    rvec_OuterProduct( press, force, nbr_j->dvec );
-#if !defined(_OPENMP)
-    rtensor_Add( data->press, press );
-#else
-    rtensor_Add( data->press_local[tid], press );
-#endif
-//    fprintf( stderr, "[BO1, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", i, j, force[0], force[1], force[2], nbr_j->dvec[0], nbr_j->dvec[1], nbr_j->dvec[2] ); fflush( stderr ); 
-
     /****************************************************************************
      * forces and pressure related to atom j                                    *
      * first neighbors of atom j                                                *
@@ -458,24 +439,15 @@ void Add_dBond_to_Forces_NPT( int i, int pj, reax_system *system,
         /* force */
         rvec_Add( *f_k, force );
 
-        /* pressure */
-        rvec_Scale( force, -1.0, force );
-        rvec_Sum( dvec_jk, nbr_k->dvec, nbr_j->dvec );
-        rvec_OuterProduct( press, force, dvec_jk );
-#if !defined(_OPENMP)
-        rtensor_Add( data->press, press );
-#else
-        rtensor_Add( data->press_local[tid], press );
-#endif
-//        fprintf( stderr, "[BO5, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", i, k, force[0], force[1], force[2], dvec_jk[0], dvec_jk[1], dvec_jk[2] ); fflush( stderr ); 
-
-        rvec_OuterProduct( press, force, nbr_k->dvec );
+        /* pressure, with positions relative to atom i */
+        rvec_Sum( dvec_ik, nbr_j->dvec, nbr_k->dvec );
+        rvec_OuterProduct( press, force, dvec_ik );
 #if !defined(_OPENMP)
         rtensor_Add( data->press, press );
 #else
         rtensor_Add( data->press_local[tid], press );
 #endif
-//        fprintf( stderr, "[BO6, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", j, k, force[0], force[1], force[2], nbr_k->dvec[0], nbr_k->dvec[1], nbr_k->dvec[2] ); fflush( stderr ); 
+//        fprintf( stderr, "[BO5, i = %5d, j = %5d], %8.3f %8.3f %8.3f %8.3f %8.3f %8.3f\n", i, k, force[0], force[1], force[2], dvec_ik[0], dvec_ik[1], dvec_ik[2] ); fflush( stderr ); 
     }
 
     /* then atom j itself */
@@ -506,8 +478,7 @@ void Add_dBond_to_Forces_NPT( int i, int pj, reax_system *system,
     /* force */
     rvec_Add( *f_j, force );
 
-    /* pressure */
-    rvec_Scale( force, -1.0, force );
+    /* pressure, with positions relative to atom i */
     rvec_OuterProduct( press, force, nbr_j->dvec );
 #if !defined(_OPENMP)
     rtensor_Add( data->press, press );
@@ -734,7 +705,7 @@ void BO( reax_system *system, control_params *control,
 #endif
         for ( i = 0; i < system->N; ++i )
         {
-            type_i = system->atoms[i].type;
+            type_i = system->type[i];
             sbp_i = &system->reax_param.sbp[type_i];
             workspace->Deltap[i] = workspace->total_bond_order[i] - sbp_i->valency;
             workspace->Deltap_boc[i] =
@@ -753,7 +724,7 @@ void BO( reax_system *system, control_params *control,
 #endif
         for ( i = 0; i < system->N; ++i )
         {
-            type_i = system->atoms[i].type;
+            type_i = system->type[i];
             sbp_i = &system->reax_param.sbp[type_i];
             val_i = sbp_i->valency;
             Deltap_i = workspace->Deltap[i];
@@ -764,7 +735,7 @@ void BO( reax_system *system, control_params *control,
             for ( pj = start_i; pj < end_i; ++pj )
             {
                 j = bond_list->bond_list[pj].nbr;
-                type_j = system->atoms[j].type;
+                type_j = system->type[j];
                 bo_ij = &bond_list->bond_list[pj].bo_data;
 
                 if ( i < j )
@@ -1002,7 +973,7 @@ void BO( reax_system *system, control_params *control,
 #endif
         for ( i = 0; i < system->N; ++i )
         {
-            type_i = system->atoms[i].type;
+            type_i = system->type[i];
 
             if ( type_i < 0 )
             {
@@ -1015,7 +986,7 @@ void BO( reax_system *system, control_params *control,
             for ( pj = start_i; pj < end_i; ++pj )
             {
                 j = bond_list->bond_list[pj].nbr;
-                type_j = system->atoms[j].type;
+                type_j = system->type[j];
 
                 if ( type_j < 0 )
                 {
@@ -1062,7 +1033,7 @@ void BO( reax_system *system, control_params *control,
 #endif
         for ( j = 0; j < system->N; ++j )
         {
-            type_j = system->atoms[j].type;
+            type_j = system->type[j];
             sbp_j = &system->reax_param.sbp[ type_j ];
 
             workspace->Delta[j] = workspace->total_bond_order[j] - sbp_j->valency;
@@ -66,15 +66,33 @@ struct tensor_shape
 #endif
 
 
+/* Decide whether the preconditioner must be recomputed before the next charge solve.
+ *
+ * The preconditioner and the age counters live in the workspace, so they persist
+ * across calls to simulate (e.g., see update_qmmm in spuremd.c) and a preconditioner
+ * is reused until it is due to be recomputed, rather than being recomputed
+ * at the first step of every call */
 int is_refactoring_step( control_params * const control,
-        simulation_data * const data )
+        simulation_data * const data, static_storage * const workspace )
 {
     int ret;
 
-    if ( control->cm_solver_pre_comp_refactor != -1 )
+    /* no preconditioner has been computed for the current atoms */
+    if ( workspace->cm_pre_comp_age == 0 )
+    {
+        ret = TRUE;
+    }
+    /* the solver needs significantly more iterations than with the fresh preconditioner */
+    else if ( control->cm_solver_pre_comp_iters_thres > 0.0
+            && workspace->cm_last_solver_iters
+            > control->cm_solver_pre_comp_iters_thres * workspace->cm_pre_comp_iters )
+    {
+        ret = TRUE;
+    }
+    else if ( control->cm_solver_pre_comp_refactor != -1 )
     {
         if ( control->cm_solver_pre_comp_refactor > 0
-                && ((data->step - data->prev_steps) % control->cm_solver_pre_comp_refactor == 0) )
+                && workspace->cm_pre_comp_age >= (int) control->cm_solver_pre_comp_refactor )
         {
             ret = TRUE;
         }
@@ -85,12 +103,8 @@ int is_refactoring_step( control_params * const control,
     }
     else
     {
-        /* cases:
-         *  - first overall MD step for non-restarted OR restarted MD run
-         *  - total losses from degradation of prec. outweight costs of recomputing prec.
-         *  */
-        if ( data->step - data->prev_steps == 0
-                || data->timing.cm_total_loss > data->timing.cm_last_pre_comp )
+        /* total losses from degradation of prec. outweight costs of recomputing prec. */
+        if ( data->timing.cm_total_loss > data->timing.cm_last_pre_comp )
         {
             ret = TRUE;
         }
@@ -104,6 +118,43 @@ int is_refactoring_step( control_params * const control,
 }
 
 
+/* Record the outcome of a charge solve for the refactoring decisions
+ * made by is_refactoring_step */
+static void Update_Preconditioner_Age( static_storage * const workspace,
+        int refactor, int iters )
+{
+    if ( refactor == TRUE )
+    {
+        workspace->cm_pre_comp_age = 0;
+        workspace->cm_pre_comp_iters = iters;
+    }
+
+    ++workspace->cm_pre_comp_age;
+    workspace->cm_last_solver_iters = iters;
+}
+
+
+/* Refresh the single precision copies of the charge matrix and, after they
+ * are recomputed, of the incomplete factors used by the mixed precision solver */
+static void Update_Mixed_Precision_Matrices( const control_params * const control,
+        static_storage * const workspace, int refactor )
+{
+    Copy_Matrix_Values_Float( &workspace->H );
+
+    if ( refactor == TRUE
+            && (control->cm_solver_pre_app_type == TRI_SOLVE_PA
+                || control->cm_solver_pre_app_type == JACOBI_ITER_PA)
+            && (control->cm_solver_pre_comp_type == ICHOLT_PC
+                || control->cm_solver_pre_comp_type == ILUT_PC
+                || control->cm_solver_pre_comp_type == ILUTP_PC
+                || control->cm_solver_pre_comp_type == FG_ILUT_PC) )
+    {
+        Copy_Matrix_Values_Float( &workspace->L );
+        Copy_Matrix_Values_Float( &workspace->U );
+    }
+}
+
+
 #if defined(HAVE_TENSORFLOW)
 static void TF_Tensor_Deallocator( void* data, size_t length, void* arg )
 {
@@ -346,40 +397,45 @@ static void Spline_Extrapolate_Charges_QEq( const reax_system * const system,
         const control_params * const control,
         simulation_data * const data, static_storage * const workspace )
 {
-    int i;
+    int i, extrap1, extrap2;
     real s_tmp, t_tmp;
 
+    /* limit the order of extrapolation by the num. of previous solutions available
+     * (-1 if none, which results in a zero initial guess) */
+    extrap1 = MIN( (int) control->cm_init_guess_extrap1, workspace->cm_hist_size - 1 );
+    extrap2 = MIN( (int) control->cm_init_guess_extrap2, workspace->cm_hist_size - 1 );
+
     /* spline extrapolation for s & t */
     //TODO: good candidate for vectorization, avoid moving data with head pointer and circular buffer
 #if defined(_OPENMP)
     #pragma omp parallel for schedule(static) \
-        default(none) private(i, s_tmp, t_tmp) firstprivate(system, control, workspace)
+        default(none) private(i, s_tmp, t_tmp) firstprivate(system, workspace, extrap1, extrap2)
 #endif
     for ( i = 0; i < system->N_cm; ++i )
     {
         /* no extrapolation, previous solution as initial guess */
-        if ( control->cm_init_guess_extrap1 == 0 )
+        if ( extrap1 == 0 )
         {
             s_tmp = workspace->s[0][i];
         }
         /* linear */
-        else if ( control->cm_init_guess_extrap1 == 1 )
+        else if ( extrap1 == 1 )
         {
             s_tmp = 2.0 * workspace->s[0][i] - workspace->s[1][i];
         }
         /* quadratic */
-        else if ( control->cm_init_guess_extrap1 == 2 )
+        else if ( extrap1 == 2 )
         {
             s_tmp = workspace->s[2][i] + 3.0 * (workspace->s[0][i] - workspace->s[1][i]);
         }
         /* cubic */
-        else if ( control->cm_init_guess_extrap1 == 3 )
+        else if ( extrap1 == 3 )
         {
             s_tmp = 4.0 * (workspace->s[0][i] + workspace->s[2][i])
                 - (6.0 * workspace->s[1][i] + workspace->s[3][i]);
         }
         /* 4th order */
-        else if ( control->cm_init_guess_extrap1 == 4 )
+        else if ( extrap1 == 4 )
         {
             s_tmp = 5.0 * (workspace->s[0][i] - workspace->s[3][i])
                 + 10.0 * (-1.0 * workspace->s[1][i] + workspace->s[2][i]) + workspace->s[4][i];
@@ -390,28 +446,28 @@ static void Spline_Extrapolate_Charges_QEq( const reax_system * const system,
         }
 
         /* no extrapolation, previous solution as initial guess */
-        if ( control->cm_init_guess_extrap2 == 0 )
+        if ( extrap2 == 0 )
         {
             t_tmp = workspace->t[0][i];
         }
         /* linear */
-        else if ( control->cm_init_guess_extrap2 == 1 )
+        else if ( extrap2 == 1 )
         {
             t_tmp = 2.0 * workspace->t[0][i] - workspace->t[1][i];
         }
         /* quadratic */
-        else if ( control->cm_init_guess_extrap2 == 2 )
+        else if ( extrap2 == 2 )
         {
             t_tmp = workspace->t[2][i] + 3.0 * (workspace->t[0][i] - workspace->t[1][i]);
         }
         /* cubic */
-        else if ( control->cm_init_guess_extrap2 == 3 )
+        else if ( extrap2 == 3 )
         {
             t_tmp = 4.0 * (workspace->t[0][i] + workspace->t[2][i]) -
                 (6.0 * workspace->t[1][i] + workspace->t[3][i]);
         }
         /* 4th order */
-        else if ( control->cm_init_guess_extrap2 == 4 )
+        else if ( extrap2 == 4 )
         {
             t_tmp = 5.0 * (workspace->t[0][i] - workspace->t[3][i]) +
                 10.0 * (-1.0 * workspace->t[1][i] + workspace->t[2][i]) + workspace->t[4][i];
@@ -440,40 +496,44 @@ static void Spline_Extrapolate_Charges_EE( const reax_system * const system,
         const control_params * const control,
         simulation_data * const data, static_storage * const workspace )
 {
-    int i;
+    int i, extrap1;
     real s_tmp;
 
+    /* limit the order of extrapolation by the num. of previous solutions available
+     * (-1 if none, which results in a zero initial guess) */
+    extrap1 = MIN( (int) control->cm_init_guess_extrap1, workspace->cm_hist_size - 1 );
+
     /* spline extrapolation for s */
     //TODO: good candidate for vectorization, avoid moving data with head pointer and circular buffer
 #if defined(_OPENMP)
     #pragma omp parallel for schedule(static) \
-        default(none) private(i, s_tmp) firstprivate(system, control, workspace)
+        default(none) private(i, s_tmp) firstprivate(system, workspace, extrap1)
 #endif
     for ( i = 0; i < system->N_cm; ++i )
     {
         /* no extrapolation */
-        if ( control->cm_init_guess_extrap1 == 0 )
+        if ( extrap1 == 0 )
         {
             s_tmp = workspace->s[0][i];
         }
         /* linear */
-        else if ( control->cm_init_guess_extrap1 == 1 )
+        else if ( extrap1 == 1 )
         {
             s_tmp = 2.0 * workspace->s[0][i] - workspace->s[1][i];
         }
         /* quadratic */
-        else if ( control->cm_init_guess_extrap1 == 2 )
+        else if ( extrap1 == 2 )
         {
             s_tmp = workspace->s[2][i] + 3.0 * (workspace->s[0][i]-workspace->s[1][i]);
         }
         /* cubic */
-        else if ( control->cm_init_guess_extrap1 == 3 )
+        else if ( extrap1 == 3 )
         {
             s_tmp = 4.0 * (workspace->s[0][i] + workspace->s[2][i]) -
                     (6.0 * workspace->s[1][i] + workspace->s[3][i] );
         }
         /* 4th order */
-        else if ( control->cm_init_guess_extrap1 == 4 )
+        else if ( extrap1 == 4 )
         {
             s_tmp = 5.0 * (workspace->s[0][i] - workspace->s[3][i]) +
                 10.0 * (-workspace->s[1][i] + workspace->s[2][i] ) + workspace->s[4][i];
@@ -1300,6 +1360,7 @@ static void Calculate_Charges_QEq( const reax_system * const system,
     for ( i = 0; i < system->N_cm; ++i )
     {
         system->atoms[i].q = workspace->s[0][i] - u * workspace->t[0][i];
+        system->q[i] = system->atoms[i].q;
 
 #if defined(DEBUG_FOCUS)
         printf("atom %4d: %f\n", i, system->atoms[i].q);
@@ -1320,6 +1381,7 @@ static void Calculate_Charges_EE( const reax_system * const system,
     for ( i = 0; i < system->N; ++i )
     {
         system->atoms[i].q = workspace->s[0][i];
+        system->q[i] = system->atoms[i].q;
 
 #if defined(DEBUG_FOCUS)
         printf( "atom %4d: %f\n", i, system->atoms[i].q );
@@ -1340,6 +1402,7 @@ static void Calculate_Charges_ACKS2( const reax_system * const system,
     for ( i = 0; i < system->N; ++i )
     {
         system->atoms[i].q = workspace->s[0][i];
+        system->q[i] = system->atoms[i].q;
 
 #if defined(DEBUG_FOCUS)
         printf( "atom %4d: %f\n", i, system->atoms[i].q );
@@ -1363,13 +1426,25 @@ static void QEq( reax_system * const system, control_params * const control,
 {
     int iters, refactor;
 
-    refactor = is_refactoring_step( control, data );
+    refactor = is_refactoring_step( control, data, workspace );
 
     if ( refactor == TRUE )    
     {
         Setup_Preconditioner_QEq( system, control, data, workspace, realloc );
 
         Compute_Preconditioner_QEq( system, control, data, workspace, realloc );
+
+        ++data->timing.cm_num_pre_comps;
+    }
+
+    if ( control->cm_solver_mixed_precision == TRUE )
+    {
+        Update_Mixed_Precision_Matrices( control, workspace, refactor );
+    }
+
+    if ( control->cm_solver_compressed_matrix == TRUE )
+    {
+        Compress_Matrix_Columns( &workspace->H );
     }
 
     switch ( control->cm_init_guess_type )
@@ -1423,10 +1498,26 @@ static void QEq( reax_system * const system, control_params * const control,
         break;
 
     case CG_S:
-        iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
-                workspace->s[0], refactor ) + 1;
-        iters += CG( workspace, control, data, &workspace->H, workspace->b_t, control->cm_solver_q_err,
-                workspace->t[0], FALSE ) + 1;
+        if ( control->cm_solver_mixed_precision == TRUE )
+        {
+            iters = mixed_CG( workspace, control, data, &workspace->H, workspace->b_s,
+                    control->cm_solver_q_err, workspace->s[0], refactor ) + 1;
+            iters += mixed_CG( workspace, control, data, &workspace->H, workspace->b_t,
+                    control->cm_solver_q_err, workspace->t[0], FALSE ) + 1;
+        }
+        else
+        {
+            iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
+                    workspace->s[0], refactor ) + 1;
+            iters += CG( workspace, control, data, &workspace->H, workspace->b_t, control->cm_solver_q_err,
+                    workspace->t[0], FALSE ) + 1;
+        }
+        break;
+
+    /* only reachable in non-QM/MM builds, see above */
+    case DUAL_CG_S:
+        iters = dual_CG( workspace, control, data, &workspace->H, workspace->b_s, workspace->b_t,
+                control->cm_solver_q_err, workspace->s[0], workspace->t[0], refactor ) + 2;
         break;
 
     case SDM_S:
@@ -1451,6 +1542,7 @@ static void QEq( reax_system * const system, control_params * const control,
     }
 
     data->timing.cm_solver_iters += iters;
+    Update_Preconditioner_Age( workspace, refactor, iters );
     
     Calculate_Charges_QEq( system, workspace );
 
@@ -1480,13 +1572,25 @@ static void EE( reax_system * const system, control_params * const control,
 {
     int iters, refactor;
 
-    refactor = is_refactoring_step( control, data );
+    refactor = is_refactoring_step( control, data, workspace );
 
     if ( refactor == TRUE )
     {
         Setup_Preconditioner_EE( system, control, data, workspace, realloc );
 
         Compute_Preconditioner_EE( system, control, data, workspace, realloc );
+
+        ++data->timing.cm_num_pre_comps;
+    }
+
+    if ( control->cm_solver_mixed_precision == TRUE )
+    {
+        Update_Mixed_Precision_Matrices( control, workspace, refactor );
+    }
+
+    if ( control->cm_solver_compressed_matrix == TRUE )
+    {
+        Compress_Matrix_Columns( &workspace->H );
     }
 
     switch ( control->cm_init_guess_type )
@@ -1519,9 +1623,14 @@ static void EE( reax_system * const system, control_params * const control,
     }
 
 #if defined(QMMM)
-    for ( int i = system->N_qm; i < system->N; ++i )
+    /* MM charges only seed the solver when no previous solution is available,
+     * as the extrapolated solution is a better initial guess */
+    if ( workspace->cm_hist_size == 0 )
     {
-        workspace->s[0][i] = system->atoms[i].q_init;
+        for ( int i = system->N_qm; i < system->N; ++i )
+        {
+            workspace->s[0][i] = system->atoms[i].q_init;
+        }
     }
 #endif
 
@@ -1537,9 +1646,19 @@ static void EE( reax_system * const system, control_params * const control,
                 workspace->b_s, control->cm_solver_q_err, workspace->s[0], refactor );
         break;
 
+    /* single right-hand side, so the dual solver reduces to CG */
     case CG_S:
-        iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
-                workspace->s[0], refactor ) + 1;
+    case DUAL_CG_S:
+        if ( control->cm_solver_mixed_precision == TRUE )
+        {
+            iters = mixed_CG( workspace, control, data, &workspace->H, workspace->b_s,
+                    control->cm_solver_q_err, workspace->s[0], refactor ) + 1;
+        }
+        else
+        {
+            iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
+                    workspace->s[0], refactor ) + 1;
+        }
         break;
 
     case SDM_S:
@@ -1560,6 +1679,7 @@ static void EE( reax_system * const system, control_params * const control,
     }
 
     data->timing.cm_solver_iters += iters;
+    Update_Preconditioner_Age( workspace, refactor, iters );
 
     Calculate_Charges_EE( system, workspace );
 
@@ -1581,13 +1701,25 @@ static void ACKS2( reax_system * const system, control_params * const control,
 {
     int iters, refactor;
 
-    refactor = is_refactoring_step( control, data );
+    refactor = is_refactoring_step( control, data, workspace );
 
     if ( refactor == TRUE )
     {
         Setup_Preconditioner_ACKS2( system, control, data, workspace, realloc );
 
         Compute_Preconditioner_ACKS2( system, control, data, workspace, realloc );
+
+        ++data->timing.cm_num_pre_comps;
+    }
+
+    if ( control->cm_solver_mixed_precision == TRUE )
+    {
+        Update_Mixed_Precision_Matrices( control, workspace, refactor );
+    }
+
+    if ( control->cm_solver_compressed_matrix == TRUE )
+    {
+        Compress_Matrix_Columns( &workspace->H );
     }
 
 //   Print_Linear_System( system, control, workspace, data->step );
@@ -1638,9 +1770,12 @@ static void ACKS2( reax_system * const system, control_params * const control,
 
 #if defined(QMMM)
     /* TODO: further testing needed for QM/MM mode with ACKS2 */
-    for ( int i = system->N_qm; i < system->N; ++i )
+    if ( workspace->cm_hist_size == 0 )
     {
-        workspace->s[0][i] = system->atoms[i].q_init;
+        for ( int i = system->N_qm; i < system->N; ++i )
+        {
+            workspace->s[0][i] = system->atoms[i].q_init;
+        }
     }
 #endif
 
@@ -1656,9 +1791,19 @@ static void ACKS2( reax_system * const system, control_params * const control,
                 workspace->b_s, control->cm_solver_q_err, workspace->s[0], refactor );
         break;
 
+    /* single right-hand side, so the dual solver reduces to CG */
     case CG_S:
-        iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
-                workspace->s[0], refactor ) + 1;
+    case DUAL_CG_S:
+        if ( control->cm_solver_mixed_precision == TRUE )
+        {
+            iters = mixed_CG( workspace, control, data, &workspace->H, workspace->b_s,
+                    control->cm_solver_q_err, workspace->s[0], refactor ) + 1;
+        }
+        else
+        {
+            iters = CG( workspace, control, data, &workspace->H, workspace->b_s, control->cm_solver_q_err,
+                    workspace->s[0], refactor ) + 1;
+        }
         break;
 
     case SDM_S:
@@ -1679,6 +1824,7 @@ static void ACKS2( reax_system * const system, control_params * const control,
     }
 
     data->timing.cm_solver_iters += iters;
+    Update_Preconditioner_Age( workspace, refactor, iters );
 
     Calculate_Charges_ACKS2( system, workspace );
 }
@@ -1731,4 +1877,11 @@ void Compute_Charges( reax_system * const system, control_params * const control
         exit( UNKNOWN_OPTION );
         break;
     }
+
+    /* solutions are retained across simulations (e.g., see update_qmmm in spuremd.c),
+     * so the history is only invalidated when the atoms change */
+    if ( workspace->cm_hist_size < 5 )
+    {
+        ++workspace->cm_hist_size;
+    }
 }
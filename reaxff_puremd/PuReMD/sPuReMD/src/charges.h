@@ -29,6 +29,7 @@ void Compute_Charges( reax_system * const, control_params * const,
         simulation_data * const, static_storage * const,
         const output_controls * const, int );
 
-int is_refactoring_step( control_params * const, simulation_data * const );
+int is_refactoring_step( control_params * const, simulation_data * const,
+        static_storage * const );
 
 #endif
@@ -83,6 +83,10 @@ int Set_Control_Parameter( const char * const keyword,
         control->num_threads = sstrtol( values[0], __FILE__, __LINE__ );
         control->num_threads_set = TRUE;
     }
+    else if ( strncmp(keyword, "bonded_reduction_type", MAX_LINE) == 0 )
+    {
+        control->bonded_reduction_type = sstrtol( values[0], __FILE__, __LINE__ );
+    }
     else if ( strncmp(keyword, "gpus_per_node", MAX_LINE) == 0 )
     {
         // skip since not applicable to shared memory code
@@ -114,6 +118,11 @@ int Set_Control_Parameter( const char * const keyword,
     {
         control->tabulate = sstrtol( values[0], __FILE__, __LINE__ );
     }
+    else if ( strncmp(keyword, "tabulate_long_range_cache_dir", MAX_LINE) == 0 )
+    {
+        strncpy( control->tabulate_cache_dir, values[0], sizeof(control->tabulate_cache_dir) - 1 );
+        control->tabulate_cache_dir[sizeof(control->tabulate_cache_dir) - 1] = '\0';
+    }
     else if ( strncmp(keyword, "reneighbor", MAX_LINE) == 0 )
     {
         control->reneighbor = sstrtol( values[0], __FILE__, __LINE__ );
@@ -168,6 +177,14 @@ int Set_Control_Parameter( const char * const keyword,
         val = sstrtod( values[0], __FILE__, __LINE__ );
         control->cm_solver_q_err = val;
     }
+    else if ( strncmp(keyword, "cm_solver_mixed_precision", MAX_LINE) == 0 )
+    {
+        control->cm_solver_mixed_precision = sstrtol( values[0], __FILE__, __LINE__ );
+    }
+    else if ( strncmp(keyword, "cm_solver_compressed_matrix", MAX_LINE) == 0 )
+    {
+        control->cm_solver_compressed_matrix = sstrtol( values[0], __FILE__, __LINE__ );
+    }
     else if ( strncmp(keyword, "cm_domain_sparsity", MAX_LINE) == 0 )
     {
         val = sstrtod( values[0], __FILE__, __LINE__ );
@@ -206,6 +223,11 @@ int Set_Control_Parameter( const char * const keyword,
     {
         control->cm_solver_pre_comp_refactor = sstrtol( values[0], __FILE__, __LINE__ );
     }
+    else if ( strncmp(keyword, "cm_solver_pre_comp_iters_thres", MAX_LINE) == 0 )
+    {
+        val = sstrtod( values[0], __FILE__, __LINE__ );
+        control->cm_solver_pre_comp_iters_thres = val;
+    }
     else if ( strncmp(keyword, "cm_solver_pre_comp_droptol", MAX_LINE) == 0 )
     {
         val = sstrtod( values[0], __FILE__, __LINE__ );
@@ -482,8 +504,10 @@ void Set_Control_Defaults( reax_system * const system,
     control->periodic_boundaries = TRUE;
     control->restrict_bonds = FALSE;
     control->tabulate = 0;
+    control->tabulate_cache_dir[0] = '\0';
     control->dt = 0.25;
     control->num_threads_set = FALSE;
+    control->bonded_reduction_type = ATOMIC_REDUCTION;
     control->reneighbor = 1;
 
     /* defaults values for other cutoffs */
@@ -527,6 +551,8 @@ void Set_Control_Defaults( reax_system * const system,
     control->cm_solver_max_iters = 100;
     control->cm_solver_restart = 50;
     control->cm_solver_q_err = 0.000001;
+    control->cm_solver_mixed_precision = FALSE;
+    control->cm_solver_compressed_matrix = FALSE;
     control->cm_domain_sparsify_enabled = FALSE;
     control->cm_domain_sparsity = 1.0;
     control->cm_init_guess_type = SPLINE;
@@ -541,6 +567,7 @@ void Set_Control_Defaults( reax_system * const system,
     control->cm_solver_pre_comp_sweeps = 3;
     control->cm_solver_pre_comp_sai_thres = 0.1;
     control->cm_solver_pre_comp_refactor = 1;
+    control->cm_solver_pre_comp_iters_thres = 0.0;
     control->cm_solver_pre_comp_droptol = 0.01;
     control->cm_solver_pre_app_type = TRI_SOLVE_PA;
     control->cm_solver_pre_app_jacobi_iters = 50;
@@ -570,14 +597,17 @@ void Set_Control_Defaults( reax_system * const system,
 }
 
 
-void Read_Control_File( const char * const control_file, reax_system * const system,
-        control_params * const  control, output_controls * const out_control )
+/* Parse control parameters from an open stream
+ *
+ * fp: stream containing the control file
+ * control: control parameters
+ * out_control: output control parameters
+ */
+static void Parse_Control_File( FILE * const fp, control_params * const  control,
+        output_controls * const out_control )
 {
     char *s, **tmp;
     int c, i, ret;
-    FILE *fp;
-
-    fp = sfopen( control_file, "r", __FILE__, __LINE__ );
 
     assert( fp != NULL );
 
@@ -621,6 +651,34 @@ void Read_Control_File( const char * const control_file, reax_system * const sys
         sfree( tmp, __FILE__, __LINE__ );
         sfree( s, __FILE__, __LINE__ );
     }
+}
+
+
+void Read_Control_File( const char * const control_file, reax_system * const system,
+        control_params * const  control, output_controls * const out_control )
+{
+    FILE *fp;
+
+    fp = sfopen( control_file, "r", __FILE__, __LINE__ );
+
+    Parse_Control_File( fp, control, out_control );
+
+    sfclose( fp, __FILE__, __LINE__ );
+}
+
+
+/* Read control parameters from the in-memory contents of a control file
+ *
+ * control_str: null-terminated contents of the control file
+ */
+void Read_Control_String( const char * const control_str, reax_system * const system,
+        control_params * const  control, output_controls * const out_control )
+{
+    FILE *fp;
+
+    fp = sfmemopen( control_str, __FILE__, __LINE__ );
+
+    Parse_Control_File( fp, control, out_control );
 
     sfclose( fp, __FILE__, __LINE__ );
 }
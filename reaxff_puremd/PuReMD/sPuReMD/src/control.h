@@ -33,6 +33,9 @@ void Set_Control_Defaults( reax_system * const, control_params * const,
 void Read_Control_File( const char * const, reax_system * const, control_params * const,
         output_controls * const );
 
+void Read_Control_String( const char * const, reax_system * const, control_params * const,
+        output_controls * const );
+
 void Set_Control_Derived_Values( reax_system * const, control_params * const );
 
 #endif
@@ -26,17 +26,40 @@
 #include "tool_box.h"
 
 
-void Read_Force_Field( const char * const ffield_file,
-        reax_system * const system, reax_interaction * const reax )
+/* Force field parameters parsed from in-memory strings,
+ * shared by all systems using identical force field contents */
+typedef struct ffield_cache_entry ffield_cache_entry;
+
+struct ffield_cache_entry
+{
+    /* contents of the force field file */
+    char *ffield_str;
+    /* parsed force field parameters */
+    reax_interaction reax;
+    /* num. systems using the parameters */
+    int ref_count;
+    ffield_cache_entry *next;
+};
+
+
+static ffield_cache_entry *ffield_cache = NULL;
+
+
+/* Parse force field parameters from an open stream
+ *
+ * fp: stream containing the force field file
+ * reax: force field parameters
+ * allocated: TRUE if the members of reax are already allocated, FALSE otherwise
+ *  (set to TRUE on return)
+ */
+static void Parse_Force_Field( FILE * const fp, reax_interaction * const reax,
+        int * const allocated )
 {
     char *s;
     char **tmp;
     char ****tor_flag;
     int i, j, k, l, m, n, o, p, cnt;
     real val;
-    FILE *fp;
-
-    fp = sfopen( ffield_file, "r", __FILE__, __LINE__ );
 
     assert( fp != NULL );
 
@@ -74,7 +97,7 @@ void Read_Force_Field( const char * const ffield_file,
             return;
         }
 
-        if ( system->ffield_params_allocated == FALSE )
+        if ( *allocated == FALSE )
         {
             reax->gp.l = (real*) smalloc( sizeof(real) * n, __FILE__, __LINE__ );
 
@@ -124,9 +147,9 @@ void Read_Force_Field( const char * const ffield_file,
             exit( INVALID_INPUT );
         }
 
-        if ( system->ffield_params_allocated == FALSE )
+        if ( *allocated == FALSE )
         {
-            system->ffield_params_allocated = TRUE;
+            *allocated = TRUE;
 
             /* Allocating structures in reax_interaction */
             reax->sbp = scalloc( n, sizeof(single_body_parameters), __FILE__, __LINE__ );
@@ -957,6 +980,164 @@ void Read_Force_Field( const char * const ffield_file,
 
         sfree( tor_flag, __FILE__, __LINE__ );
     }
+}
+
+
+/* Free the members of a set of force field parameters */
+void Deallocate_Force_Field( reax_interaction * const reax )
+{
+    int i, j, k;
+
+    sfree( reax->gp.l, __FILE__, __LINE__ );
+
+    for ( i = 0; i < reax->max_num_atom_types; i++ )
+    {
+        for ( j = 0; j < reax->max_num_atom_types; j++ )
+        {
+            for ( k = 0; k < reax->max_num_atom_types; k++ )
+            {
+                sfree( reax->fbp[i][j][k], __FILE__, __LINE__ );
+            }
+
+            sfree( reax->thbp[i][j], __FILE__, __LINE__ );
+            sfree( reax->hbp[i][j], __FILE__, __LINE__ );
+            sfree( reax->fbp[i][j], __FILE__, __LINE__ );
+        }
+
+        sfree( reax->tbp[i], __FILE__, __LINE__ );
+        sfree( reax->thbp[i], __FILE__, __LINE__ );
+        sfree( reax->hbp[i], __FILE__, __LINE__ );
+        sfree( reax->fbp[i], __FILE__, __LINE__ );
+    }
+
+    sfree( reax->sbp, __FILE__, __LINE__ );
+    sfree( reax->tbp, __FILE__, __LINE__ );
+    sfree( reax->thbp, __FILE__, __LINE__ );
+    sfree( reax->hbp, __FILE__, __LINE__ );
+    sfree( reax->fbp, __FILE__, __LINE__ );
+}
+
+
+/* Read force field parameters from a file into the parameters owned by a system
+ *
+ * ffield_file: name of the force field file
+ * system: system which owns the parameters
+ * reax: force field parameters of the system
+ */
+void Read_Force_Field( const char * const ffield_file,
+        reax_system * const system, reax_interaction * const reax )
+{
+    FILE *fp;
+
+    if ( system->ffield_params_shared == TRUE )
+    {
+        Release_Force_Field( system, reax );
+    }
+
+    fp = sfopen( ffield_file, "r", __FILE__, __LINE__ );
+
+    Parse_Force_Field( fp, reax, &system->ffield_params_allocated );
 
     sfclose( fp, __FILE__, __LINE__ );
 }
+
+
+/* Set the force field parameters of a system from the in-memory contents
+ * of a force field file.  The parameters are parsed once per process and
+ * shared (read-only) between all systems using identical contents.
+ *
+ * ffield_str: null-terminated contents of the force field file
+ * system: system which will use the parameters
+ * reax: force field parameters of the system
+ */
+void Read_Force_Field_String( const char * const ffield_str,
+        reax_system * const system, reax_interaction * const reax )
+{
+    int allocated;
+    FILE *fp;
+    ffield_cache_entry *entry;
+
+    if ( system->ffield_params_shared == TRUE )
+    {
+        Release_Force_Field( system, reax );
+    }
+    else if ( system->ffield_params_allocated == TRUE )
+    {
+        Deallocate_Force_Field( reax );
+        system->ffield_params_allocated = FALSE;
+    }
+
+#if defined(_OPENMP)
+    #pragma omp critical (ffield_cache)
+#endif
+    {
+        for ( entry = ffield_cache; entry != NULL; entry = entry->next )
+        {
+            if ( strcmp( entry->ffield_str, ffield_str ) == 0 )
+            {
+                break;
+            }
+        }
+
+        if ( entry == NULL )
+        {
+            entry = smalloc( sizeof(ffield_cache_entry), __FILE__, __LINE__ );
+            entry->ffield_str = smalloc( sizeof(char) * (strlen( ffield_str ) + 1),
+                    __FILE__, __LINE__ );
+            strcpy( entry->ffield_str, ffield_str );
+            entry->ref_count = 0;
+
+            allocated = FALSE;
+            fp = sfmemopen( ffield_str, __FILE__, __LINE__ );
+            Parse_Force_Field( fp, &entry->reax, &allocated );
+            sfclose( fp, __FILE__, __LINE__ );
+
+            entry->next = ffield_cache;
+            ffield_cache = entry;
+        }
+
+        entry->ref_count++;
+        *reax = entry->reax;
+    }
+
+    system->ffield_params_allocated = TRUE;
+    system->ffield_params_shared = TRUE;
+}
+
+
+/* Stop using force field parameters set by Read_Force_Field_String,
+ * freeing them if no other system uses them
+ *
+ * system: system using the parameters
+ * reax: force field parameters of the system
+ */
+void Release_Force_Field( reax_system * const system, reax_interaction * const reax )
+{
+    ffield_cache_entry *entry, **prev;
+
+#if defined(_OPENMP)
+    #pragma omp critical (ffield_cache)
+#endif
+    {
+        for ( prev = &ffield_cache; *prev != NULL; prev = &(*prev)->next )
+        {
+            if ( (*prev)->reax.sbp == reax->sbp )
+            {
+                entry = *prev;
+                entry->ref_count--;
+
+                if ( entry->ref_count == 0 )
+                {
+                    *prev = entry->next;
+                    Deallocate_Force_Field( &entry->reax );
+                    sfree( entry->ffield_str, __FILE__, __LINE__ );
+                    sfree( entry, __FILE__, __LINE__ );
+                }
+                break;
+            }
+        }
+    }
+
+    system->ffield_params_allocated = FALSE;
+    system->ffield_params_shared = FALSE;
+}
@@ -28,5 +28,12 @@
 void Read_Force_Field( const char * const, reax_system * const,
         reax_interaction * const );
 
+void Read_Force_Field_String( const char * const, reax_system * const,
+        reax_interaction * const );
+
+void Release_Force_Field( reax_system * const, reax_interaction * const );
+
+void Deallocate_Force_Field( reax_interaction * const );
+
 
 #endif
@@ -253,8 +253,8 @@ static inline real Init_Charge_Matrix_Entry_Tab( reax_system const * const syste
         switch ( pos )
         {
             case OFF_DIAGONAL:
-                t = &LR[MIN( system->atoms[i].type, system->atoms[j].type )]
-                       [MAX( system->atoms[i].type, system->atoms[j].type )];
+                t = &LR[MIN( system->type[i], system->type[j] )]
+                       [MAX( system->type[i], system->type[j] )];
 
                 /* cubic spline interpolation */
                 r = (int)(r_ij * t->inv_dx);
@@ -272,7 +272,7 @@ static inline real Init_Charge_Matrix_Entry_Tab( reax_system const * const syste
             break;
 
             case DIAGONAL:
-                ret = system->reax_param.sbp[system->atoms[i].type].eta;
+                ret = system->reax_param.sbp[system->type[i]].eta;
             break;
 
             default:
@@ -318,7 +318,7 @@ static inline real Init_Charge_Matrix_Entry( reax_system const * const system,
 
                 /* shielding */
                 dr3gamij_1 = r_ij * r_ij * r_ij
-                        + POW( system->reax_param.tbp[system->atoms[i].type][system->atoms[j].type].gamma, -3.0 );
+                        + POW( system->reax_param.tbp[system->type[i]][system->type[j]].gamma, -3.0 );
                 dr3gamij_3 = POW( dr3gamij_1 , 1.0 / 3.0 );
 
                 /* i == j: periodic self-interaction term
@@ -327,7 +327,7 @@ static inline real Init_Charge_Matrix_Entry( reax_system const * const system,
             break;
 
             case DIAGONAL:
-                ret = system->reax_param.sbp[system->atoms[i].type].eta;
+                ret = system->reax_param.sbp[system->type[i]].eta;
             break;
 
             default:
@@ -591,8 +591,8 @@ static int Init_Charge_Matrix_Remaining_Entries( reax_system const * const syste
                         {
                             j = far_nbr_list->far_nbr_list[pj].nbr;
 
-                            xcut = 0.5 * ( system->reax_param.sbp[ system->atoms[i].type ].b_s_acks2
-                                    + system->reax_param.sbp[ system->atoms[j].type ].b_s_acks2 );
+                            xcut = 0.5 * ( system->reax_param.sbp[ system->type[i] ].b_s_acks2
+                                    + system->reax_param.sbp[ system->type[j] ].b_s_acks2 );
 
                             if ( far_nbr_list->far_nbr_list[pj].d < xcut )
                             {
@@ -832,7 +832,7 @@ static int Init_Charge_Matrix_Remaining_Entries( reax_system const * const syste
 
 /* Compute the distances and displacement vectors for entries
  * in the far neighbors list if it's a NOT re-neighboring step */
-static void Init_Distance( reax_system const * const system,
+void Init_Distance( reax_system const * const system,
         control_params const * const control, reax_list ** const lists )
 {
     int i, j, pj;
@@ -883,6 +883,7 @@ static void Init_CM_Half( reax_system const * const system,
     Htop = 0;
     H_sp_top = 0;
     flag_oom = FALSE;
+    H->compressed = FALSE;
 
     for ( i = 0; i < far_nbrs->n; ++i )
     {
@@ -1037,6 +1038,7 @@ static void Init_CM_Tab_Half( reax_system const * const system,
     Htop = 0;
     H_sp_top = 0;
     flag_oom = FALSE;
+    H->compressed = FALSE;
 
     for ( i = 0; i < far_nbrs->n; ++i )
     {
@@ -1205,7 +1207,7 @@ static void Init_Bond_Full( reax_system const * const system,
 
     for ( i = 0; i < far_nbrs->n; ++i )
     {
-        type_i = system->atoms[i].type;
+        type_i = system->type[i];
         start_i = Start_Index( i, far_nbrs );
         end_i = End_Index( i, far_nbrs );
         btop_i = End_Index( i, bonds );
@@ -1242,7 +1244,7 @@ static void Init_Bond_Full( reax_system const * const system,
 #endif	
             if ( nbr_pj->d <= control->nonb_cut )
             {
-                type_j = system->atoms[j].type;
+                type_j = system->type[j];
                 sbp_j = &system->reax_param.sbp[type_j];
                 twbp = &system->reax_param.tbp[type_i][type_j];
                 r_ij = nbr_pj->d;
@@ -1460,6 +1462,10 @@ static int Init_Forces( reax_system * const system,
 {
     int i, renbr, ret;
     static int dist_done = FALSE, cm_done = FALSE, bonds_done = FALSE;
+#if defined(_OPENMP)
+    /* separate flags for independent simulations run by different threads */
+    #pragma omp threadprivate(dist_done, cm_done, bonds_done)
+#endif
 
     renbr = ((data->step - data->prev_steps) % control->reneighbor) == 0 ? TRUE : FALSE;
 
@@ -1565,12 +1571,14 @@ static void Estimate_Storages_CM( reax_system const * const system,
         control_params const * const control, static_storage * const workspace,
         reax_list ** const lists )
 {
-    int i, pj;
+    int i, j, pj;
     int start_i, end_i;
-    int Htop;
+    int Htop, Xtop;
+    real xcut;
     reax_list *far_nbrs;
 
     Htop = 0;
+    Xtop = 0;
     far_nbrs = lists[FAR_NBRS];
 
     for ( i = 0; i < far_nbrs->n; ++i )
@@ -1584,6 +1592,19 @@ static void Estimate_Storages_CM( reax_system const * const system,
             if ( far_nbrs->far_nbr_list[pj].d <= control->nonb_cut )
             {
                 ++Htop;
+
+                /* kinetic energy (X) block entry, see Init_Charge_Matrix_Remaining_Entries */
+                if ( control->charge_method == ACKS2_CM )
+                {
+                    j = far_nbrs->far_nbr_list[pj].nbr;
+                    xcut = 0.5 * ( system->reax_param.sbp[ system->type[i] ].b_s_acks2
+                            + system->reax_param.sbp[ system->type[j] ].b_s_acks2 );
+
+                    if ( far_nbrs->far_nbr_list[pj].d < xcut )
+                    {
+                        ++Xtop;
+                    }
+                }
             }
         }
 
@@ -1619,7 +1640,9 @@ static void Estimate_Storages_CM( reax_system const * const system,
             break;
 
         case ACKS2_CM:
-            Htop = 2 * Htop + 3 * system->N + 2;
+            /* X block rows (coupling, kinetic energy terms, diagonal)
+             * and the two constraint rows (N atoms plus diagonal each) */
+            Htop += 2 * system->N + Xtop + 2 * (system->N + 1);
             break;
 
         default:
@@ -1843,9 +1866,11 @@ int Compute_Forces( reax_system * const system, control_params * const control,
             
         if ( control->cm_solver_pre_comp_refactor == -1 )
         {
-            if ( data->step <= 4 || is_refactoring_step( control, data ) )
+            /* the first few solves using a newly computed preconditioner
+             * establish the optimum solve time */
+            if ( workspace->cm_pre_comp_age <= 5 )
             {
-                if ( is_refactoring_step( control, data ) )
+                if ( workspace->cm_pre_comp_age == 1 )
                 {
                     data->timing.cm_last_pre_comp = data->timing.cm_solver_pre_comp;
                 }
@@ -27,6 +27,9 @@
 
 void Init_Bonded_Force_Functions( control_params * const );
 
+void Init_Distance( reax_system const * const, control_params const * const,
+        reax_list ** const );
+
 void Estimate_Storages( reax_system const * const, control_params const * const,
         static_storage * const, reax_list ** const, int, int );
 
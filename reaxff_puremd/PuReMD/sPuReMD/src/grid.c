@@ -631,11 +631,79 @@ void Bin_Atoms( reax_system * const system, static_storage * const workspace )
     int i, j, k, l;
     int max_atoms;
     grid *g;
+#if defined(_OPENMP)
+    int c, num_cells, *cell, *offset;
+#endif
 
     g = &system->g;
 
     Reset_Grid( g );
 
+#if defined(_OPENMP)
+    /* counting sort of the atoms into the grid cells: each thread bins a contiguous
+     * block of atoms, so the atoms of each cell are kept in increasing order
+     * exactly as with the serial version */
+    num_cells = g->ncell[0] * g->ncell[1] * g->ncell[2];
+    cell = smalloc( sizeof(int) * system->N, __FILE__, __LINE__ );
+    offset = scalloc( (size_t) num_cells * omp_get_max_threads( ), sizeof(int),
+            __FILE__, __LINE__ );
+
+    #pragma omp parallel default(shared) private(i, j, k, l, c)
+    {
+        int tid, t, top;
+
+        tid = omp_get_thread_num( );
+
+        /* num. of atoms binned to each cell by each thread */
+        #pragma omp for schedule(static)
+        for ( l = 0; l < system->N; l++ )
+        {
+            assert( system->atoms[l].x[0] >= 0.0 && system->atoms[l].x[0] < system->box.box_norms[0] );
+            assert( system->atoms[l].x[1] >= 0.0 && system->atoms[l].x[1] < system->box.box_norms[1] );
+            assert( system->atoms[l].x[2] >= 0.0 && system->atoms[l].x[2] < system->box.box_norms[2] );
+
+            i = (int) (system->atoms[l].x[0] * g->inv_len[0]);
+            j = (int) (system->atoms[l].x[1] * g->inv_len[1]);
+            k = (int) (system->atoms[l].x[2] * g->inv_len[2]);
+            cell[l] = (i * g->ncell[1] + j) * g->ncell[2] + k;
+            ++offset[tid * num_cells + cell[l]];
+        }
+
+        /* per-thread offsets within each cell, and the count of atoms in each cell */
+        #pragma omp for schedule(static)
+        for ( c = 0; c < num_cells; c++ )
+        {
+            top = 0;
+
+            for ( t = 0; t < omp_get_num_threads( ); ++t )
+            {
+                l = offset[t * num_cells + c];
+                offset[t * num_cells + c] = top;
+                top += l;
+            }
+
+            i = c / (g->ncell[1] * g->ncell[2]);
+            j = (c / g->ncell[2]) % g->ncell[1];
+            k = c % g->ncell[2];
+            g->top[i][j][k] = top;
+        }
+
+        /* same static schedule as above, so each thread sees the same block of atoms */
+        #pragma omp for schedule(static)
+        for ( l = 0; l < system->N; l++ )
+        {
+            c = cell[l];
+            i = c / (g->ncell[1] * g->ncell[2]);
+            j = (c / g->ncell[2]) % g->ncell[1];
+            k = c % g->ncell[2];
+            /* atom index in grid cell => atom number */
+            g->atoms[i][j][k][offset[tid * num_cells + c]++] = l;
+        }
+    }
+
+    sfree( offset, __FILE__, __LINE__ );
+    sfree( cell, __FILE__, __LINE__ );
+#else
     for ( l = 0; l < system->N; l++ )
     {
         assert( system->atoms[l].x[0] >= 0.0 && system->atoms[l].x[0] < system->box.box_norms[0] );
@@ -656,6 +724,7 @@ void Bin_Atoms( reax_system * const system, static_storage * const workspace )
                 i, j, k );
 #endif
     }
+#endif
 
     /* find max number of atoms per cell across all cells */
     max_atoms = 0;
@@ -709,20 +778,21 @@ static void reax_atom_Copy( reax_atom * const dest, reax_atom * const src )
 
 static void Copy_Storage( reax_system const * const system,static_storage * const workspace,
         control_params const * const control, int top, int old_id, int old_type,
-        real ** const v, real ** const s, real ** const t, int * const orig_id,
-        rvec * const f_old )
+        real ** const s, real ** const t, int * const orig_id, rvec * const f_old )
 {
     int i;
 
-    for ( i = 0; i < control->cm_solver_restart + 1; ++i )
-    {
-        v[i][top] = workspace->v[i][old_id];
-    }
-
     for ( i = 0; i < 5; ++i )
     {
         s[i][top] = workspace->s[i][old_id];
         t[i][top] = workspace->t[i][old_id];
+
+        /* ACKS2 has a second row per atom */
+        if ( control->charge_method == ACKS2_CM )
+        {
+            s[i][system->N + top] = workspace->s[i][system->N + old_id];
+            t[i][system->N + top] = workspace->t[i][system->N + old_id];
+        }
     }
 
     orig_id[top] = workspace->orig_id[old_id];
@@ -734,18 +804,11 @@ static void Copy_Storage( reax_system const * const system,static_storage * cons
 }
 
 
-static void Free_Storage( static_storage * const workspace,
-        control_params const * const control )
+static void Free_Storage( static_storage * const workspace )
 {
     int i;
 
-    for ( i = 0; i < control->cm_solver_restart + 1; ++i )
-    {
-        sfree( workspace->v[i], __FILE__, __LINE__ );
-    }
-    sfree( workspace->v, __FILE__, __LINE__ );
-
-    for ( i = 0; i < 3; ++i )
+    for ( i = 0; i < 5; ++i )
     {
         sfree( workspace->s[i], __FILE__, __LINE__ );
         sfree( workspace->t[i], __FILE__, __LINE__ );
@@ -754,13 +817,13 @@ static void Free_Storage( static_storage * const workspace,
     sfree( workspace->t, __FILE__, __LINE__ );
 
     sfree( workspace->orig_id, __FILE__, __LINE__ );
+    sfree( workspace->f_old, __FILE__, __LINE__ );
 }
 
 
 static void Assign_New_Storage( static_storage *workspace,
-        real **v, real **s, real **t, int *orig_id, rvec *f_old )
+        real **s, real **t, int *orig_id, rvec *f_old )
 {
-    workspace->v = v;
     workspace->s = s;
     workspace->t = t;
     workspace->orig_id = orig_id;
@@ -768,7 +831,11 @@ static void Assign_New_Storage( static_storage *workspace,
 }
 
 
-/* Reorder atom list to improve cache performance */
+/* Reorder atom list to improve cache performance
+ *
+ * Atoms are stored in the order of the grid cells binned by Bin_Atoms,
+ * and the cells are updated to refer to the new atom indices, along
+ * with the per-atom workspace storage (requires Init_Workspace) */
 void Reorder_Atoms( reax_system * const system, static_storage * const workspace,
         control_params const * const control )
 {
@@ -776,60 +843,85 @@ void Reorder_Atoms( reax_system * const system, static_storage * const workspace
     reax_atom *old_atom, *new_atoms;
     grid *g;
     int *orig_id;
-    real **v;
     real **s, **t;
     rvec *f_old;
 
     top = 0;
     g = &system->g;
 
-    new_atoms = scalloc( system->N, sizeof(reax_atom), __FILE__, __LINE__ );
-    orig_id = scalloc( system->N, sizeof(int), __FILE__, __LINE__ );
-    f_old = scalloc( system->N, sizeof(rvec), __FILE__, __LINE__ );
+    /* same capacities as the arrays being replaced */
+    new_atoms = scalloc( system->N_max, sizeof(reax_atom), __FILE__, __LINE__ );
+    orig_id = scalloc( system->N_max, sizeof(int), __FILE__, __LINE__ );
+    f_old = scalloc( system->N_max, sizeof(rvec), __FILE__, __LINE__ );
 
+    /* solution history, where the rows after the per-atom rows
+     * (charge constraints of EE and ACKS2) keep their positions */
     s = scalloc( 5, sizeof(real *), __FILE__, __LINE__ );
     t = scalloc( 5, sizeof(real *), __FILE__, __LINE__ );
     for ( i = 0; i < 5; ++i )
     {
-        s[i] = scalloc( system->N_cm, sizeof(real), __FILE__, __LINE__ );
-        t[i] = scalloc( system->N_cm, sizeof(real), __FILE__, __LINE__ );
+        s[i] = scalloc( system->N_cm_max, sizeof(real), __FILE__, __LINE__ );
+        t[i] = scalloc( system->N_cm_max, sizeof(real), __FILE__, __LINE__ );
+
+        for ( j = (control->charge_method == ACKS2_CM ? 2 : 1) * system->N;
+                j < system->N_cm; ++j )
+        {
+            s[i][j] = workspace->s[i][j];
+            t[i][j] = workspace->t[i][j];
+        }
     }
 
-    v = scalloc( control->cm_solver_restart + 1, sizeof(real *),
-            __FILE__, __LINE__ );
-    for ( i = 0; i < control->cm_solver_restart + 1; ++i )
+    for ( i = 0; i < g->ncell[0]; i++ )
     {
-        v[i] = scalloc( system->N_cm, sizeof(real), __FILE__, __LINE__ );
+        for ( j = 0; j < g->ncell[1]; j++ )
+        {
+            for ( k = 0; k < g->ncell[2]; k++ )
+            {
+                g->start[i][j][k] = top;
+                top += g->top[i][j][k];
+                g->end[i][j][k] = top;
+            }
+        }
     }
 
+    /* the cells own disjoint ranges of the new atom list, so they can be copied in parallel */
+#if defined(_OPENMP)
+    #pragma omp parallel for collapse(3) default(shared) \
+        private(i, j, k, l, top, old_id, old_atom) schedule(dynamic)
+#endif
     for ( i = 0; i < g->ncell[0]; i++ )
     {
         for ( j = 0; j < g->ncell[1]; j++ )
         {
             for ( k = 0; k < g->ncell[2]; k++ )
             {
-                g->start[i][j][k] = top;
+                top = g->start[i][j][k];
 
                 for ( l = 0; l < g->top[i][j][k]; ++l )
                 {
                     old_id = g->atoms[i][j][k][l];
                     old_atom = &system->atoms[old_id];
+                    g->atoms[i][j][k][l] = top;
 
                     reax_atom_Copy( &new_atoms[top], old_atom );
+                    rvec_Copy( system->x[top], old_atom->x );
+                    system->q[top] = old_atom->q;
+                    system->type[top] = old_atom->type;
                     Copy_Storage( system, workspace, control, top, old_id, old_atom->type,
-                            v, s, t, orig_id, f_old );
+                            s, t, orig_id, f_old );
 
                     ++top;
                 }
-
-                g->end[i][j][k] = top;
             }
         }
     }
 
     sfree( system->atoms, __FILE__, __LINE__ );
-    Free_Storage( workspace, control );
+    Free_Storage( workspace );
 
     system->atoms = new_atoms;
-    Assign_New_Storage( workspace, v, s, t, orig_id, f_old );
+    Assign_New_Storage( workspace, s, t, orig_id, f_old );
+
+    /* rows of the preconditioner no longer match the atom order */
+    workspace->cm_pre_comp_age = 0;
 }
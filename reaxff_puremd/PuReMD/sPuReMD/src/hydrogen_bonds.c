@@ -207,9 +207,18 @@ void Hydrogen_Bonds( reax_system *system, control_params *control,
                              * to the bond_order_data struct inside atom j's list,
                              * and threads are partitioned across all j's */
 #if defined(_OPENMP)
-                            #pragma omp atomic
-#endif
+                            if ( control->bonded_reduction_type == THREAD_LOCAL_REDUCTION )
+                            {
+                                bo_ij->Cdbo += CEhb1;
+                            }
+                            else
+                            {
+                                #pragma omp atomic
+                                bo_ij->Cdbo += CEhb1;
+                            }
+#else
                             bo_ij->Cdbo += CEhb1;
+#endif
 
                             if ( control->compute_pressure == FALSE &&
                                     (control->ensemble == NVE || control->ensemble == nhNVT
@@ -260,7 +269,7 @@ void Hydrogen_Bonds( reax_system *system, control_params *control,
                                 rtensor_Add( data->press_local[tid], press );
 #endif
 
-                                rvec_Sum( x_k, x_j, nbr_jk->dvec );
+                                rvec_Sum( x_k, x_j, dvec_jk );
                                 rvec_OuterProduct( press, force_k, x_k );
 #if !defined(_OPENMP)
                                 rtensor_Add( data->press, press );
@@ -23,6 +23,7 @@
 
 #include "allocate.h"
 #include "box.h"
+#include "ffield.h"
 #include "forces.h"
 #include "grid.h"
 #include "integrate.h"
@@ -160,10 +161,6 @@ static void Init_System( reax_system * const system, control_params * const cont
 
     Bin_Atoms( system, workspace );
 
-#if defined(REORDER_ATOMS)
-    Reorder_Atoms( system, workspace, control );
-#endif
-
     if ( realloc == TRUE )
     {
         /* list management */
@@ -284,13 +281,21 @@ static void Init_Simulation_Data( reax_system * const system,
     data->timing.cm_solver_pre_comp = 0.0;
     data->timing.cm_solver_pre_app = 0.0;
     data->timing.cm_solver_iters = 0;
+    data->timing.cm_solver_residual = 0.0;
+    data->timing.cm_num_pre_comps = 0;
     data->timing.cm_solver_spmv = 0.0;
     data->timing.cm_solver_vector_ops = 0.0;
     data->timing.cm_solver_orthog = 0.0;
     data->timing.cm_solver_tri_solve = 0.0;
-    data->timing.cm_last_pre_comp = 0.0;
-    data->timing.cm_total_loss = 0.0;
-    data->timing.cm_optimum = 0.0;
+
+    /* the preconditioner may be reused across simulations,
+     * so only reset its cost model along with the preconditioner */
+    if ( realloc == TRUE )
+    {
+        data->timing.cm_last_pre_comp = 0.0;
+        data->timing.cm_total_loss = 0.0;
+        data->timing.cm_optimum = 0.0;
+    }
 }
 
 
@@ -453,6 +458,7 @@ static void Init_Workspace( reax_system * const system,
             workspace->t[i] = scalloc( system->N_cm_max, sizeof( real ),
                     __FILE__, __LINE__ );
         }
+        workspace->cm_hist_size = 0;
     }
 
     switch ( control->charge_method )
@@ -524,6 +530,13 @@ static void Init_Workspace( reax_system * const system,
 
     if ( realloc == TRUE )
     {
+        if ( control->cm_solver_mixed_precision == TRUE
+                && control->cm_solver_type != CG_S )
+        {
+            fprintf( stderr, "[ERROR] Mixed precision charge solver is only supported with CG. Terminating...\n" );
+            exit( INVALID_INPUT );
+        }
+
         switch ( control->cm_solver_type )
         {
             case GMRES_S:
@@ -574,6 +587,30 @@ static void Init_Workspace( reax_system * const system,
                         __FILE__, __LINE__ );
                 workspace->p = scalloc( system->N_cm_max, sizeof( real ),
                         __FILE__, __LINE__ );
+                if ( control->cm_solver_mixed_precision == TRUE )
+                {
+                    workspace->e = scalloc( system->N_cm_max, sizeof( real ),
+                            __FILE__, __LINE__ );
+                }
+                break;
+
+            case DUAL_CG_S:
+                workspace->r = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->d = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->q = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->p = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->r2 = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->d2 = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->q2 = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
+                workspace->p2 = scalloc( system->N_cm_max, sizeof( real ),
+                        __FILE__, __LINE__ );
                 break;
 
             case SDM_S:
@@ -613,8 +650,9 @@ static void Init_Workspace( reax_system * const system,
         }
 
 #if defined(_OPENMP)
-        /* SpMV related */
-        workspace->b_local = smalloc( control->num_threads * system->N_cm_max * sizeof(real),
+        /* SpMV related (the dual CG solver accumulates two products per pass) */
+        workspace->b_local = smalloc( (control->cm_solver_type == DUAL_CG_S ? 2 : 1)
+                * control->num_threads * system->N_cm_max * sizeof(real),
                 __FILE__, __LINE__ );
 #endif
     }
@@ -743,12 +781,30 @@ static void Init_Workspace( reax_system * const system,
                __FILE__, __LINE__ );
         workspace->v_const = smalloc( system->N_max * sizeof( rvec ),
                __FILE__, __LINE__ );
+        workspace->x_vlist = smalloc( system->N_max * sizeof( rvec ),
+               __FILE__, __LINE__ );
 
 #if defined(_OPENMP)
         workspace->f_local = smalloc( control->num_threads * system->N_max * sizeof( rvec ),
                __FILE__, __LINE__ );
+        workspace->CdDelta_local = smalloc( control->num_threads * system->N_max * sizeof( real ),
+               __FILE__, __LINE__ );
+        /* sized by the bond list, so allocated on demand by the bonded interactions */
+        workspace->Cdbo_local = NULL;
+        workspace->Cdbo_local_size = 0;
 #endif
 
+        /* sized by the far neighbor list, so allocated on demand
+         * by the tabulated nonbonded interactions */
+        workspace->LR_nbr = NULL;
+        workspace->LR_idx = NULL;
+        workspace->LR_dif = NULL;
+        workspace->LR_s_vdW = NULL;
+        workspace->LR_s_ele = NULL;
+        workspace->LR_CEvd = NULL;
+        workspace->LR_CEclmb = NULL;
+        workspace->LR_nbr_size = 0;
+
         /* storage for analysis */
         if ( control->molec_anal || control->diffusion_coef )
         {
@@ -821,6 +877,8 @@ static void Init_Lists( reax_system * const system,
 {
     int i, ret;
 
+    Reset_Atom_Arrays( system );
+
     if ( realloc == TRUE )
     {
         Estimate_Num_Neighbors( system, control, workspace, lists );
@@ -1289,6 +1347,8 @@ void Initialize( reax_system * const system, control_params * const control,
         reax_list ** const lists, output_controls * const out_control,
         evolve_function * const Evolve, int output_enabled, int realloc )
 {
+    int i;
+
 #if defined(_OPENMP)
     #pragma omp parallel default(none) shared(control)
     {
@@ -1316,8 +1376,22 @@ void Initialize( reax_system * const system, control_params * const control,
 
     Init_Workspace( system, control, workspace, realloc );
 
+#if defined(REORDER_ATOMS)
+    /* after Init_Workspace, as the per-atom storage is reordered as well */
+    Reorder_Atoms( system, workspace, control );
+#endif
+
+    /* atoms may differ from the previous simulation,
+     * so a previously computed preconditioner cannot be reused */
+    workspace->cm_pre_comp_age = 0;
+
     Init_Lists( system, control, data, workspace, lists, realloc );
 
+    for ( i = 0; i < system->N; ++i )
+    {
+        rvec_Copy( workspace->x_vlist[i], system->atoms[i].x );
+    }
+
     Init_Out_Controls( system, control, workspace, out_control, output_enabled );
 
     /* These are done in forces.c, only forces.c can see all those functions */
@@ -1334,10 +1408,112 @@ void Initialize( reax_system * const system, control_params * const control,
 }
 
 
+/* Lightweight re-initialization for a subsequent simulation which differs from
+ * the previous one only in atom positions, (fixed) atom charges, and simulation box
+ * (e.g., successive force evaluations for a QM/MM driver)
+ *
+ * Parsed force field and control parameters, lookup tables, and allocations
+ * for the grid, workspace, and interaction lists are all retained.
+ * Input file parsing, output file setup, and interaction function
+ * setup are skipped.
+ *
+ * The far neighbor list from the previous simulation is also reused
+ * (with updated distances) unless an atom has moved further than half of
+ * the Verlet list buffer (vlist_cut - nonb_cut) since the list was generated.
+ * As such, atom positions must be updated consistently with rel_map
+ * (see update_atom_position in control_params).
+ *
+ * box_changed: TRUE if the simulation box has changed since the last simulation,
+ *  which requires updating the grid cell dimensions and regenerating the
+ *  far neighbor list
+ *
+ * returns: TRUE if the far neighbor list was regenerated, FALSE otherwise
+ */
+int Reinitialize( reax_system * const system, control_params * const control,
+        simulation_data * const data, static_storage * const workspace,
+        reax_list ** const lists, evolve_function * const Evolve, int box_changed )
+{
+    int i, d, renbr;
+    real disp, max_disp2;
+
+#if defined(_OPENMP)
+    omp_set_num_threads( control->num_threads );
+#endif
+
+    Reset_Atomic_Forces( system );
+
+    Compute_Total_Mass( system, data );
+    Compute_Center_of_Mass( system, data );
+
+    renbr = box_changed;
+
+    if ( renbr == FALSE )
+    {
+        max_disp2 = 0.0;
+
+        for ( i = 0; i < system->N; ++i )
+        {
+            disp = 0.0;
+            for ( d = 0; d < 3; ++d )
+            {
+                disp += SQR( system->atoms[i].x[d]
+                        + system->atoms[i].rel_map[d] * system->box.box_norms[d]
+                        - workspace->x_vlist[i][d] );
+            }
+
+            max_disp2 = MAX( max_disp2, disp );
+        }
+
+        if ( 4.0 * max_disp2 > SQR( control->vlist_cut - control->nonb_cut ) )
+        {
+            renbr = TRUE;
+        }
+    }
+
+    if ( renbr == TRUE )
+    {
+        for ( i = 0; i < system->N; ++i )
+        {
+            ivec_MakeZero( system->atoms[i].rel_map );
+        }
+
+        if ( box_changed == TRUE )
+        {
+            Update_Grid( system );
+        }
+
+        Bin_Atoms( system, workspace );
+
+#if defined(REORDER_ATOMS)
+        Reorder_Atoms( system, workspace, control );
+#endif
+    }
+
+    Init_Simulation_Data( system, control, data, Evolve, FALSE );
+
+    Init_Workspace( system, control, workspace, FALSE );
+
+    if ( renbr == TRUE )
+    {
+        Init_Lists( system, control, data, workspace, lists, FALSE );
+
+        for ( i = 0; i < system->N; ++i )
+        {
+            rvec_Copy( workspace->x_vlist[i], system->atoms[i].x );
+        }
+    }
+    else
+    {
+        Init_Distance( system, control, lists );
+    }
+
+    return renbr;
+}
+
+
 static void Finalize_System( reax_system *system, control_params *control,
         simulation_data *data, int reset )
 {
-    int i, j, k;
     reax_interaction *reax;
 
     system->prealloc_allocated = FALSE;
@@ -1375,35 +1551,19 @@ static void Finalize_System( reax_system *system, control_params *control,
 
     if ( reset == FALSE )
     {
-        sfree( reax->gp.l, __FILE__, __LINE__ );
-
-        for ( i = 0; i < reax->max_num_atom_types; i++ )
+        if ( system->ffield_params_shared == TRUE )
         {
-            for ( j = 0; j < reax->max_num_atom_types; j++ )
-            {
-                for ( k = 0; k < reax->max_num_atom_types; k++ )
-                {
-                    sfree( reax->fbp[i][j][k], __FILE__, __LINE__ );
-                }
-
-                sfree( reax->thbp[i][j], __FILE__, __LINE__ );
-                sfree( reax->hbp[i][j], __FILE__, __LINE__ );
-                sfree( reax->fbp[i][j], __FILE__, __LINE__ );
-            }
-
-            sfree( reax->tbp[i], __FILE__, __LINE__ );
-            sfree( reax->thbp[i], __FILE__, __LINE__ );
-            sfree( reax->hbp[i], __FILE__, __LINE__ );
-            sfree( reax->fbp[i], __FILE__, __LINE__ );
+            Release_Force_Field( system, reax );
+        }
+        else
+        {
+            Deallocate_Force_Field( reax );
         }
-
-        sfree( reax->sbp, __FILE__, __LINE__ );
-        sfree( reax->tbp, __FILE__, __LINE__ );
-        sfree( reax->thbp, __FILE__, __LINE__ );
-        sfree( reax->hbp, __FILE__, __LINE__ );
-        sfree( reax->fbp, __FILE__, __LINE__ );
 
         sfree( system->atoms, __FILE__, __LINE__ );
+        sfree( system->x, __FILE__, __LINE__ );
+        sfree( system->q, __FILE__, __LINE__ );
+        sfree( system->type, __FILE__, __LINE__ );
     }
 
     if ( system->allocated == TRUE )
@@ -1545,6 +1705,21 @@ static void Finalize_Workspace( reax_system *system, control_params *control,
                 sfree( workspace->d, __FILE__, __LINE__ );
                 sfree( workspace->q, __FILE__, __LINE__ );
                 sfree( workspace->p, __FILE__, __LINE__ );
+                if ( control->cm_solver_mixed_precision == TRUE )
+                {
+                    sfree( workspace->e, __FILE__, __LINE__ );
+                }
+                break;
+
+            case DUAL_CG_S:
+                sfree( workspace->r, __FILE__, __LINE__ );
+                sfree( workspace->d, __FILE__, __LINE__ );
+                sfree( workspace->q, __FILE__, __LINE__ );
+                sfree( workspace->p, __FILE__, __LINE__ );
+                sfree( workspace->r2, __FILE__, __LINE__ );
+                sfree( workspace->d2, __FILE__, __LINE__ );
+                sfree( workspace->q2, __FILE__, __LINE__ );
+                sfree( workspace->p2, __FILE__, __LINE__ );
                 break;
 
             case SDM_S:
@@ -1630,11 +1805,28 @@ static void Finalize_Workspace( reax_system *system, control_params *control,
         sfree( workspace->a, __FILE__, __LINE__ );
         sfree( workspace->f_old, __FILE__, __LINE__ );
         sfree( workspace->v_const, __FILE__, __LINE__ );
+        sfree( workspace->x_vlist, __FILE__, __LINE__ );
 
 #if defined(_OPENMP)
         sfree( workspace->f_local, __FILE__, __LINE__ );
+        sfree( workspace->CdDelta_local, __FILE__, __LINE__ );
+        if ( workspace->Cdbo_local != NULL )
+        {
+            sfree( workspace->Cdbo_local, __FILE__, __LINE__ );
+        }
 #endif
 
+        if ( workspace->LR_nbr != NULL )
+        {
+            sfree( workspace->LR_nbr, __FILE__, __LINE__ );
+            sfree( workspace->LR_idx, __FILE__, __LINE__ );
+            sfree( workspace->LR_dif, __FILE__, __LINE__ );
+            sfree( workspace->LR_s_vdW, __FILE__, __LINE__ );
+            sfree( workspace->LR_s_ele, __FILE__, __LINE__ );
+            sfree( workspace->LR_CEvd, __FILE__, __LINE__ );
+            sfree( workspace->LR_CEclmb, __FILE__, __LINE__ );
+        }
+
         /* storage for analysis */
         if ( control->molec_anal || control->diffusion_coef )
         {
@@ -1813,7 +2005,7 @@ void Finalize( reax_system *system, control_params *control,
         simulation_data *data, static_storage *workspace, reax_list **lists,
         output_controls *out_control, int output_enabled, int reset )
 {
-    if ( control->tabulate )
+    if ( workspace->LR != NULL )
     {
         Finalize_LR_Lookup_Table( system, control, workspace );
     }
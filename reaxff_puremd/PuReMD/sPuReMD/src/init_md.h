@@ -29,6 +29,10 @@ void Initialize( reax_system*, control_params*, simulation_data*,
         static_storage*, reax_list**, output_controls*, evolve_function*,
         int, int );
 
+int Reinitialize( reax_system * const, control_params * const,
+        simulation_data * const, static_storage * const, reax_list ** const,
+        evolve_function * const, int );
+
 void Finalize_Out_Controls( reax_system *, control_params *,
         static_storage *, output_controls * );
 
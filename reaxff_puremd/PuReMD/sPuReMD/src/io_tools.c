@@ -662,6 +662,8 @@ void Output_Results( reax_system *system, control_params *control,
         data->timing.cm_solver_pre_comp = 0.0;
         data->timing.cm_solver_pre_app = 0.0;
         data->timing.cm_solver_iters = 0;
+        data->timing.cm_solver_residual = 0.0;
+        data->timing.cm_num_pre_comps = 0;
         data->timing.cm_solver_spmv = 0.0;
         data->timing.cm_solver_vector_ops = 0.0;
         data->timing.cm_solver_orthog = 0.0;
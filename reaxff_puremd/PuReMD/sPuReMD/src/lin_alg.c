@@ -35,6 +35,14 @@
 
 /* for DBL_EPSILON */
 //#include <float.h>
+/* for SHRT_MIN, SHRT_MAX */
+#include <limits.h>
+
+/* reduction of the residual norm requested from each inner solve
+ * of the mixed precision CG solver before refining the solution */
+#define MIXED_CG_INNER_TOL (1.0e-6)
+/* marker for a compressed column index which does not fit in 16 bits */
+#define CM_DELTA_ESCAPE (SHRT_MIN)
 
 
 typedef struct
@@ -405,7 +413,7 @@ void Calculate_Droptol( const sparse_matrix * const A,
     int i, j, k;
     real val;
 #if defined(_OPENMP)
-    static real *droptol_local;
+    real *droptol_local;
     unsigned int tid;
 #endif
 
@@ -419,11 +427,8 @@ void Calculate_Droptol( const sparse_matrix * const A,
 
         #pragma omp master
         {
-            if ( droptol_local == NULL )
-            {
-                droptol_local = smalloc( omp_get_num_threads() * A->n * sizeof(real),
-                        __FILE__, __LINE__ );
-            }
+            droptol_local = smalloc( omp_get_num_threads() * A->n * sizeof(real),
+                    __FILE__, __LINE__ );
         }
 
         #pragma omp barrier
@@ -761,16 +766,17 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
 {
     unsigned int i, pj, pk, pl, Ltop, Utop;
     real start;
-    sparse_matrix *A_full = NULL;
+    sparse_matrix A_full;
 
     start = Get_Time( );
 
-    compute_full_sparse_matrix( A, A_full, FALSE );
+    A_full.allocated = FALSE;
+    compute_full_sparse_matrix( A, &A_full, FALSE );
 
     Ltop = 0;
     Utop = 0;
 
-    for ( i = 0; i < A_full->n; ++i )
+    for ( i = 0; i < A_full.n; ++i )
     {
         /* mark the start of new row i in L and U */
         L->start[i] = Ltop;
@@ -778,20 +784,20 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
 
         /* for each non-zero in i-th row to the left of the diagonal:
          * for k = 0, ..., i - 1 */
-        for ( pj = A_full->start[i]; pj < A_full->start[i + 1]; ++pj )
+        for ( pj = A_full.start[i]; pj < A_full.start[i + 1]; ++pj )
         {
-            if ( A_full->j[pj] >= i )
+            if ( A_full.j[pj] >= i )
             {
                 break;
             }
 
-            /* scan k-th row (A_full->j[pj]) to find a_{kk},
+            /* scan k-th row (A_full.j[pj]) to find a_{kk},
              * and compute a_{ik} = a_{ik} / a_{kk} */
-            for ( pk = A_full->start[A_full->j[pj]]; pk < A_full->start[A_full->j[pj] + 1]; ++pk )
+            for ( pk = A_full.start[A_full.j[pj]]; pk < A_full.start[A_full.j[pj] + 1]; ++pk )
             {
-                if ( A_full->j[pk] == A_full->j[pj] )
+                if ( A_full.j[pk] == A_full.j[pj] )
                 {
-                    A_full->val[pj] /= A_full->val[pk];
+                    A_full.val[pj] /= A_full.val[pk];
                     break;
                 }
             }
@@ -805,15 +811,15 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
              * pk: points to a_{kj}
              * */
             ++pk;
-            for ( pl = pj + 1; pl < A_full->start[i + 1] && pk < A_full->start[A_full->j[pj] + 1]; )
+            for ( pl = pj + 1; pl < A_full.start[i + 1] && pk < A_full.start[A_full.j[pj] + 1]; )
             {
-                if ( A_full->j[pl] == A_full->j[pk] )
+                if ( A_full.j[pl] == A_full.j[pk] )
                 {
-                    A_full->val[pl] -= A_full->val[pj] * A_full->val[pk];
+                    A_full.val[pl] -= A_full.val[pj] * A_full.val[pk];
                     ++pl;
                     ++pk;
                 }
-                else if ( A_full->j[pl] < A_full->j[pk] )
+                else if ( A_full.j[pl] < A_full.j[pk] )
                 {
                     ++pl;
                 }
@@ -825,15 +831,15 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
         }
 
         /* copy A_full[0:i-1] to row i of L */
-        for ( pj = A_full->start[i]; pj < A_full->start[i + 1]; ++pj )
+        for ( pj = A_full.start[i]; pj < A_full.start[i + 1]; ++pj )
         {
-            if ( A_full->j[pj] >= i )
+            if ( A_full.j[pj] >= i )
             {
                 break;
             }
 
-            L->j[Ltop] = A_full->j[pj];
-            L->val[Ltop] = A_full->val[pj];
+            L->j[Ltop] = A_full.j[pj];
+            L->val[Ltop] = A_full.val[pj];
             ++Ltop;
         }
 
@@ -843,10 +849,10 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
         ++Ltop;
 
         /* copy A_full[i:n-1] to row i of U */
-        for ( ; pj < A_full->start[i + 1]; ++pj )
+        for ( ; pj < A_full.start[i + 1]; ++pj )
         {
-            U->j[Utop] = A_full->j[pj];
-            U->val[Utop] = A_full->val[pj];
+            U->j[Utop] = A_full.j[pj];
+            U->val[Utop] = A_full.val[pj];
             ++Utop;
         }
     }
@@ -855,7 +861,7 @@ real ILU( const sparse_matrix * const A, sparse_matrix * const L,
     L->start[L->n] = Ltop;
     U->start[U->n] = Utop;
 
-    Deallocate_Matrix( A_full );
+    Deallocate_Matrix( &A_full );
 
     return Get_Timing_Info( start );
 }
@@ -875,7 +881,7 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
 {
     unsigned int i, k, pj, Ltop, Utop, *nz_mask;
     real *w, start;
-    sparse_matrix *A_full = NULL;
+    sparse_matrix A_full;
     unsigned int nz_cnt;
 
     start = Get_Time( );
@@ -884,7 +890,8 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
     w = smalloc( sizeof(real) * A->n, __FILE__, __LINE__ );
     nz_mask = smalloc( sizeof(unsigned int) * A->n, __FILE__, __LINE__ );
 
-    compute_full_sparse_matrix( A, A_full, FALSE );
+    A_full.allocated = FALSE;
+    compute_full_sparse_matrix( A, &A_full, FALSE );
 
     Ltop = 0;
     Utop = 0;
@@ -893,32 +900,32 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
     for ( i = 0; i < U->n + 1; ++i )
         U->start[i] = 0;
 
-    for ( i = 0; i < A_full->n; ++i )
+    for ( i = 0; i < A_full.n; ++i )
     {
         /* mark the start of new row i in L and U */
         L->start[i] = Ltop;
         U->start[i] = Utop;
 
-        for ( k = 0; k < A_full->n; ++k )
+        for ( k = 0; k < A_full.n; ++k )
         {
             nz_mask[k] = 0;
             w[k] = 0.0;
         }
 
         /* copy i-th row of A_full into w */
-        for ( pj = A_full->start[i]; pj < A_full->start[i + 1]; ++pj )
+        for ( pj = A_full.start[i]; pj < A_full.start[i + 1]; ++pj )
         {
+            k = A_full.j[pj];
             nz_mask[k] = 1;
-            k = A_full->j[pj];
-            w[k] = A_full->val[pj];
+            w[k] = A_full.val[pj];
         }
 
         for ( k = 0; k < i; ++k )
         {
             if ( nz_mask[k] == 1 )
             {
-                /* A symmetric, lower triangular portion stored */
-                w[k] /= A->val[A->start[k + 1] - 1];
+                /* divide by the pivot u_{kk}, stored first in row k of U */
+                w[k] /= U->val[U->start[k]];
 
                 /* apply dropping rule to w[k] */
                 if ( FABS( w[k] ) <= droptol[k] )
@@ -926,10 +933,10 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
                     nz_mask[k] = 0;
                 }
 
-                /* subtract scaled k-th row of U from w */
+                /* subtract scaled k-th row of U (past its diagonal) from w */
                 if ( nz_mask[k] == 1 )
                 {
-                    for ( pj = U->start[k]; pj < U->start[k + 1]; ++pj )
+                    for ( pj = U->start[k] + 1; pj < U->start[k + 1]; ++pj )
                     {
                         nz_mask[U->j[pj]] = 1;
                         w[U->j[pj]] -= w[k] * U->val[pj];
@@ -941,7 +948,7 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
         /* apply dropping rule to w, but keep the diagonal regardless;
          * note: this is different than Saad's suggested approach
          * as we do not limit the NNZ per row */
-        for ( k = 0; k < A_full->n; ++k )
+        for ( k = 0; k < A_full.n; ++k )
         {
             if ( FABS( w[k] ) <= droptol[i] )
             {
@@ -949,8 +956,9 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
             }
         }
 
-        nz_cnt = 0;
-        for ( k = i + 1; k < A_full->n; ++k )
+        /* strictly lower entries plus the unit diagonal */
+        nz_cnt = 1;
+        for ( k = 0; k < i; ++k )
             if ( nz_mask[k] == 1 )
                 ++nz_cnt;
 
@@ -977,8 +985,9 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
         L->val[Ltop] = 1.0;
         ++Ltop;
 
-        nz_cnt = 0;
-        for ( k = i + 1; k < A_full->n; ++k )
+        /* strictly upper entries plus the diagonal */
+        nz_cnt = 1;
+        for ( k = i + 1; k < A_full.n; ++k )
             if ( nz_mask[k] == 1 )
                 ++nz_cnt;
 
@@ -995,7 +1004,7 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
         ++Utop;
 
         /* copy w[i+1:n-1] to row i of U */
-        for ( k = i + 1; k < A_full->n; ++k )
+        for ( k = i + 1; k < A_full.n; ++k )
         {
             if ( nz_mask[k] == 1 )
             {
@@ -1010,7 +1019,7 @@ real ILUT( const sparse_matrix * const A, const real * const droptol,
     L->start[L->n] = Ltop;
     U->start[U->n] = Utop;
 
-    Deallocate_Matrix( A_full );
+    Deallocate_Matrix( &A_full );
     sfree( nz_mask, __FILE__, __LINE__ );
     sfree( w, __FILE__, __LINE__ );
 
@@ -1032,7 +1041,7 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
 {
     unsigned int i, k, pj, Ltop, Utop, *nz_mask, *perm, *perm_inv, pivot_j;
     real *w, start, pivot_val;
-    sparse_matrix *A_full = NULL;
+    sparse_matrix A_full;
 
     start = Get_Time( );
 
@@ -1042,7 +1051,8 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
     perm = smalloc( sizeof(int) * A->n, __FILE__, __LINE__ );
     perm_inv = smalloc( sizeof(int) * A->n, __FILE__, __LINE__ );
 
-    compute_full_sparse_matrix( A, A_full, FALSE );
+    A_full.allocated = FALSE;
+    compute_full_sparse_matrix( A, &A_full, FALSE );
 
     Ltop = 0;
     Utop = 0;
@@ -1052,31 +1062,31 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
     for ( i = 0; i < A->n; ++i )
         perm_inv[perm[i]] = i;
 
-    for ( i = 0; i < A_full->n; ++i )
+    for ( i = 0; i < A_full.n; ++i )
     {
         /* mark the start of new row i in L and U */
         L->start[i] = Ltop;
         U->start[i] = Utop;
 
-        for ( k = 0; k < A_full->n; ++k )
+        for ( k = 0; k < A_full.n; ++k )
         {
             nz_mask[k] = 0;
             w[k] = 0.0;
         }
 
         /* copy i-th row of A_full into w */
-        for ( pj = A_full->start[i]; pj < A_full->start[i + 1]; ++pj )
+        for ( pj = A_full.start[i]; pj < A_full.start[i + 1]; ++pj )
         {
+            k = A_full.j[pj];
             nz_mask[k] = 1;
-            k = A_full->j[pj];
-            w[k] = A_full->val[pj];
+            w[k] = A_full.val[pj];
         }
 
         /* partial pivoting by columns:
          * find largest element in w, and make it the pivot */
         pivot_val = FABS( w[0] );
         pivot_j = 0;
-        for ( k = 1; k < A_full->n; ++k )
+        for ( k = 1; k < A_full.n; ++k )
         {
             if ( FABS( w[k] ) > pivot_val )
             {
@@ -1123,7 +1133,7 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
         /* apply dropping rule to w, but keep the diagonal regardless;
          * note: this is different than Saad's suggested approach
          * as we do not limit the NNZ per row */
-        for ( k = 0; k < A_full->n; ++k )
+        for ( k = 0; k < A_full.n; ++k )
         {
             if ( perm_inv[k] != i && nz_mask[k] == 1 && FABS( w[k] ) < droptol[i] )
             {
@@ -1153,7 +1163,7 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
         ++Utop;
 
         /* copy w[i-1:n] to row i of U */
-        for ( k = i + 1; k < A_full->n; ++k )
+        for ( k = i + 1; k < A_full.n; ++k )
         {
             if ( nz_mask[perm_inv[k]] == 1 )
             {
@@ -1168,7 +1178,7 @@ real ILUTP( const sparse_matrix * const A, const real * const droptol,
     L->start[L->n] = Ltop;
     U->start[U->n] = Utop;
 
-    Deallocate_Matrix( A_full );
+    Deallocate_Matrix( &A_full );
     sfree( perm_inv, __FILE__, __LINE__ );
     sfree( perm, __FILE__, __LINE__ );
     sfree( nz_mask, __FILE__, __LINE__ );
@@ -1901,6 +1911,32 @@ real sparse_approx_inverse( const sparse_matrix * const A,
 #endif
 
 
+/* column index of the k-th nonzero of a matrix with compressed
+ * column indices (see Compress_Matrix_Columns)
+ *
+ * A: sparse matrix, stored in CSR format
+ * k: position of the nonzero in A
+ * j: column index of the previous nonzero in the same row
+ *    (the row index for the first nonzero of a row)
+ * e (input/output): position of the next escaped column index of the row in
+ *    A->j_escape, advanced past the k-th nonzero if it is escaped */
+static inline int next_column( const sparse_matrix * const A, unsigned int k,
+        int j, unsigned int * const e )
+{
+    short delta;
+
+    /* through memcpy, as the unsigned int and short views of the column indices alias */
+    memcpy( &delta, (const short *) A->j + k, sizeof(short) );
+
+    if ( delta == CM_DELTA_ESCAPE )
+    {
+        return A->j_escape[(*e)++];
+    }
+
+    return j + delta;
+}
+
+
 /* sparse matrix, dense vector multiplication Ax = b
  *
  * workspace: storage container for workspace structures
@@ -1912,6 +1948,7 @@ static void sparse_matvec( const static_storage * const workspace,
         const sparse_matrix * const A, const real * const x, real * const b )
 {
     int i, j, k, n, si, ei;
+    unsigned int e;
     real H;
 #if defined(_OPENMP)
     unsigned int tid;
@@ -1931,10 +1968,12 @@ static void sparse_matvec( const static_storage * const workspace,
     {
         si = A->start[i];
         ei = A->start[i + 1] - 1;
+        j = i;
+        e = A->compressed == TRUE ? A->escape_start[i] : 0;
 
         for ( k = si; k < ei; ++k )
         {
-            j = A->j[k];
+            j = A->compressed == TRUE ? next_column( A, k, j, &e ) : (int) A->j[k];
             H = A->val[k];
 #if defined(_OPENMP)
             workspace->b_local[tid * n + j] += H * x[i];
@@ -1966,6 +2005,156 @@ static void sparse_matvec( const static_storage * const workspace,
 }
 
 
+/* sparse matrix, dense vector multiplication Ax = b using the single
+ * precision copy of the matrix entries (see Copy_Matrix_Values_Float)
+ *
+ * workspace: storage container for workspace structures
+ * A: symmetric (lower triangular portion only stored), square matrix,
+ *    stored in CSR format
+ * x: dense vector, size equal to num. columns in A
+ * b (output): dense vector, size equal to num. columns in A */
+static void sparse_matvec_float( const static_storage * const workspace,
+        const sparse_matrix * const A, const real * const x, real * const b )
+{
+    int i, j, k, n, si, ei;
+    unsigned int e;
+    real H;
+#if defined(_OPENMP)
+    unsigned int tid;
+#endif
+
+    n = A->n;
+    Vector_MakeZero( b, n );
+
+#if defined(_OPENMP)
+    tid = omp_get_thread_num( );
+
+    Vector_MakeZero( workspace->b_local, omp_get_num_threads() * n );
+
+    #pragma omp for schedule(guided)
+#endif
+    for ( i = 0; i < n; ++i )
+    {
+        si = A->start[i];
+        ei = A->start[i + 1] - 1;
+        j = i;
+        e = A->compressed == TRUE ? A->escape_start[i] : 0;
+
+        for ( k = si; k < ei; ++k )
+        {
+            j = A->compressed == TRUE ? next_column( A, k, j, &e ) : (int) A->j[k];
+            H = A->val_float[k];
+#if defined(_OPENMP)
+            workspace->b_local[tid * n + j] += H * x[i];
+            workspace->b_local[tid * n + i] += H * x[j];
+#else
+            b[j] += H * x[i];
+            b[i] += H * x[j];
+#endif
+        }
+
+        // the diagonal entry is the last one in
+#if defined(_OPENMP)
+        workspace->b_local[tid * n + i] += A->val_float[k] * x[i];
+#else
+        b[i] += A->val_float[k] * x[i];
+#endif
+    }
+
+#if defined(_OPENMP)
+    #pragma omp for schedule(dynamic,256)
+    for ( i = 0; i < n; ++i )
+    {
+        for ( j = 0; j < omp_get_num_threads(); ++j )
+        {
+            b[i] += workspace->b_local[j * n + i];
+        }
+    }
+#endif
+}
+
+
+/* sparse matrix, dense vector multiplication with two right-hand sides,
+ * Ax1 = b1 and Ax2 = b2, computed in a single pass over the matrix
+ *
+ * workspace: storage container for workspace structures
+ * A: symmetric (lower triangular portion only stored), square matrix,
+ *    stored in CSR format
+ * x1, x2: dense vectors, size equal to num. columns in A
+ * b1, b2 (output): dense vectors, size equal to num. columns in A */
+static void dual_sparse_matvec( const static_storage * const workspace,
+        const sparse_matrix * const A, const real * const x1, const real * const x2,
+        real * const b1, real * const b2 )
+{
+    int i, j, k, n, si, ei;
+    unsigned int e;
+    real H;
+#if defined(_OPENMP)
+    unsigned int tid;
+    real *b1_local, *b2_local;
+#endif
+
+    n = A->n;
+    Vector_MakeZero( b1, n );
+    Vector_MakeZero( b2, n );
+
+#if defined(_OPENMP)
+    tid = omp_get_thread_num( );
+    b1_local = &workspace->b_local[2 * tid * n];
+    b2_local = &workspace->b_local[(2 * tid + 1) * n];
+
+    Vector_MakeZero( workspace->b_local, 2 * omp_get_num_threads() * n );
+
+    #pragma omp for schedule(guided)
+#endif
+    for ( i = 0; i < n; ++i )
+    {
+        si = A->start[i];
+        ei = A->start[i + 1] - 1;
+        j = i;
+        e = A->compressed == TRUE ? A->escape_start[i] : 0;
+
+        for ( k = si; k < ei; ++k )
+        {
+            j = A->compressed == TRUE ? next_column( A, k, j, &e ) : (int) A->j[k];
+            H = A->val[k];
+#if defined(_OPENMP)
+            b1_local[j] += H * x1[i];
+            b1_local[i] += H * x1[j];
+            b2_local[j] += H * x2[i];
+            b2_local[i] += H * x2[j];
+#else
+            b1[j] += H * x1[i];
+            b1[i] += H * x1[j];
+            b2[j] += H * x2[i];
+            b2[i] += H * x2[j];
+#endif
+        }
+
+        // the diagonal entry is the last one in
+#if defined(_OPENMP)
+        b1_local[i] += A->val[k] * x1[i];
+        b2_local[i] += A->val[k] * x2[i];
+#else
+        b1[i] += A->val[k] * x1[i];
+        b2[i] += A->val[k] * x2[i];
+#endif
+    }
+
+#if defined(_OPENMP)
+    #pragma omp for schedule(dynamic,256)
+    for ( i = 0; i < n; ++i )
+    {
+        for ( j = 0; j < omp_get_num_threads(); ++j )
+        {
+            b1[i] += workspace->b_local[2 * j * n + i];
+            b2[i] += workspace->b_local[(2 * j + 1) * n + i];
+        }
+    }
+#endif
+}
+
+
 /* sparse matrix, dense vector multiplication Ax = b
  *
  * A: square matrix, stored in CSR format
@@ -1991,6 +2180,126 @@ static void sparse_matvec_full( const sparse_matrix * const A,
 }
 
 
+/* Copy the entries of A into its single precision storage, which is
+ * (re)allocated to match the number of nonzeros allocated for A
+ *
+ * A: stored in CSR
+ */
+void Copy_Matrix_Values_Float( sparse_matrix * const A )
+{
+    unsigned int i, nnz;
+
+    A->val_float = srealloc( A->val_float, sizeof(float) * A->m, __FILE__, __LINE__ );
+    nnz = A->start[A->n];
+
+#if defined(_OPENMP)
+    #pragma omp parallel for schedule(static) default(none) shared(A, nnz)
+#endif
+    for ( i = 0; i < nnz; ++i )
+    {
+        A->val_float[i] = (float) A->val[i];
+    }
+}
+
+
+/* Encode the column indices of A in place as 16-bit deltas between
+ * consecutive entries of each row, which halves the index traffic of
+ * the matrix-vector products in the charge solvers. The deltas are small
+ * when the atoms (and hence the rows) are in spatial (cell) order, see
+ * REORDER_ATOMS, and always fit for matrices with at most 32768 rows.
+ * Entries whose delta does not fit are escaped and keep their full column
+ * index in a separate array, which is sized exactly after a counting pass.
+ * The saving is in memory bandwidth only: A->j keeps its allocation of one
+ * unsigned int per nonzero, as the next rebuild writes full column indices.
+ *
+ * A matrix is encoded once after each rebuild (further calls return
+ * immediately), and its column indices must not be read directly afterwards.
+ *
+ * A: stored in CSR
+ */
+void Compress_Matrix_Columns( sparse_matrix * const A )
+{
+    unsigned int i, k, e, col;
+    int prev, delta;
+    short d;
+
+    if ( A->compressed == TRUE )
+    {
+        return;
+    }
+
+    A->escape_start = srealloc( A->escape_start, sizeof(unsigned int) * (A->n_max + 1),
+            __FILE__, __LINE__ );
+
+    /* counting pass */
+#if defined(_OPENMP)
+    #pragma omp parallel for schedule(guided) default(none) \
+        shared(A) private(k, e, prev, delta)
+#endif
+    for ( i = 0; i < A->n; ++i )
+    {
+        prev = i;
+        e = 0;
+
+        for ( k = A->start[i]; k < A->start[i + 1]; ++k )
+        {
+            delta = (int) A->j[k] - prev;
+
+            if ( delta < -SHRT_MAX || delta > SHRT_MAX )
+            {
+                ++e;
+            }
+
+            prev = A->j[k];
+        }
+
+        A->escape_start[i + 1] = e;
+    }
+
+    A->escape_start[0] = 0;
+    for ( i = 0; i < A->n; ++i )
+    {
+        A->escape_start[i + 1] += A->escape_start[i];
+    }
+
+    A->j_escape = srealloc( A->j_escape,
+            sizeof(unsigned int) * MAX( A->escape_start[A->n], 1 ),
+            __FILE__, __LINE__ );
+
+    /* encoding pass: the delta of the k-th entry overwrites the bytes of the
+     * (k / 2)-th column index, which has already been read, so the entries are
+     * visited in order by a single thread (through memcpy, as the unsigned int
+     * and short views of the column indices alias) */
+    e = 0;
+    for ( i = 0; i < A->n; ++i )
+    {
+        prev = i;
+
+        for ( k = A->start[i]; k < A->start[i + 1]; ++k )
+        {
+            col = A->j[k];
+            delta = (int) col - prev;
+
+            if ( delta < -SHRT_MAX || delta > SHRT_MAX )
+            {
+                A->j_escape[e] = col;
+                ++e;
+                d = CM_DELTA_ESCAPE;
+            }
+            else
+            {
+                d = (short) delta;
+            }
+
+            memcpy( (short *) A->j + k, &d, sizeof(short) );
+            prev = col;
+        }
+    }
+
+    A->compressed = TRUE;
+}
+
+
 /* Transpose A and copy into A^T
  *
  * A: stored in CSR
@@ -2138,6 +2447,63 @@ void tri_solve( const sparse_matrix * const LU, const real * const y,
 }
 
 
+/* Solve triangular system LU*x = y using forward/backward substitution
+ * with the single precision copy of the entries of LU
+ *
+ * LU: lower/upper triangular, stored in CSR
+ * y: constants in linear system (RHS)
+ * x: solution
+ * tri: triangularity of LU (lower/upper)
+ *
+ * Assumptions:
+ *   LU has non-zero diagonals
+ *   Each row of LU has at least one non-zero (i.e., no rows with all zeros) */
+static void tri_solve_float( const sparse_matrix * const LU, const real * const y,
+        real * const x, const TRIANGULARITY tri )
+{
+    int i, pj, j, si, ei;
+    real val;
+
+#if defined(_OPENMP)
+    #pragma omp single
+#endif
+    {
+        if ( tri == LOWER )
+        {
+            for ( i = 0; i < LU->n; ++i )
+            {
+                x[i] = y[i];
+                si = LU->start[i];
+                ei = LU->start[i + 1];
+                for ( pj = si; pj < ei - 1; ++pj )
+                {
+                    j = LU->j[pj];
+                    val = LU->val_float[pj];
+                    x[i] -= val * x[j];
+                }
+                x[i] /= LU->val_float[pj];
+            }
+        }
+        else
+        {
+            for ( i = LU->n - 1; i >= 0; --i )
+            {
+                x[i] = y[i];
+                si = LU->start[i];
+                ei = LU->start[i + 1];
+                for ( pj = si + 1; pj < ei; ++pj )
+                {
+                    j = LU->j[pj];
+                    val = LU->val_float[pj];
+                    x[i] -= val * x[j];
+                }
+                x[i] /= LU->val_float[si];
+            }
+        }
+    }
+}
+
+
 /* Solve triangular system LU*x = y using level scheduling
  *
  * workspace: storage container for workspace structures
@@ -2801,23 +3167,102 @@ void jacobi_iter( const static_storage * const workspace,
 }
 
 
-/* Apply left-sided preconditioning while solving M^{-1}Ax = M^{-1}b
- *
- * workspace: data struct containing matrices, stored in CSR
- * control: data struct containing parameters
- * y: vector to which to apply preconditioning,
- *  specific to internals of iterative solver being used
- * x (output): preconditioned vector
- * fresh_pre: parameter indicating if this is a newly computed (fresh) preconditioner
- * side: used in determining how to apply preconditioner if the preconditioner is
- *  factorized as M = M_{1}M_{2} (e.g., incomplete LU, A \approx LU)
+/* Jacobi iteration using truncated Neumann series (see jacobi_iter)
+ * with the single precision copy of the entries of R
  *
- * Assumptions:
- *   Matrices have non-zero diagonals
- *   Each row of a matrix has at least one non-zero (i.e., no rows with all zeros) */
-static void apply_preconditioner( const static_storage * const workspace,
-        const control_params * const control, const real * const y, real * const x,
-        int fresh_pre, int side )
+ * workspace: storage container for workspace structures
+ * R: triangular matrix, stored in CSR
+ * Dinv: inverse of the diagonal of R
+ * b: constants in linear system (RHS)
+ * x (output): approximate solution
+ * tri: triangularity of R (lower/upper)
+ * maxiter: num. of Jacobi iterations
+ * */
+static void jacobi_iter_float( const static_storage * const workspace,
+        const sparse_matrix * const R, const real * const Dinv,
+        const real * const b, real * const x, const TRIANGULARITY tri,
+        const unsigned int maxiter )
+{
+    unsigned int i, k, si, ei, iter;
+    real *p1, *p2, *p3;
+
+    si = 0;
+    ei = 0;
+    iter = 0;
+    p1 = workspace->rp;
+    p2 = workspace->rp2;
+
+    Vector_MakeZero( p1, R->n );
+
+    /* precompute and cache, as invariant in loop below */
+#if defined(_OPENMP)
+    #pragma omp for schedule(static)
+#endif
+    for ( i = 0; i < R->n; ++i )
+    {
+        workspace->Dinv_b[i] = Dinv[i] * b[i];
+    }
+
+    do
+    {
+        /* x_{k+1} = G*x_{k} + Dinv*b */
+#if defined(_OPENMP)
+        #pragma omp for schedule(guided)
+#endif
+        for ( i = 0; i < R->n; ++i )
+        {
+            if (tri == LOWER)
+            {
+                si = R->start[i];
+                ei = R->start[i + 1] - 1;
+            }
+            else
+            {
+
+                si = R->start[i] + 1;
+                ei = R->start[i + 1];
+            }
+
+            p2[i] = 0.;
+
+            for ( k = si; k < ei; ++k )
+            {
+                p2[i] += R->val_float[k] * p1[R->j[k]];
+            }
+
+            p2[i] *= -Dinv[i];
+            p2[i] += workspace->Dinv_b[i];
+        }
+
+        p3 = p1;
+        p1 = p2;
+        p2 = p3;
+
+        ++iter;
+    }
+    while ( iter < maxiter );
+
+    Vector_Copy( x, p1, R->n );
+}
+
+
+/* Apply left-sided preconditioning while solving M^{-1}Ax = M^{-1}b
+ *
+ * workspace: data struct containing matrices, stored in CSR
+ * control: data struct containing parameters
+ * y: vector to which to apply preconditioning,
+ *  specific to internals of iterative solver being used
+ * x (output): preconditioned vector
+ * fresh_pre: parameter indicating if this is a newly computed (fresh) preconditioner
+ * side: used in determining how to apply preconditioner if the preconditioner is
+ *  factorized as M = M_{1}M_{2} (e.g., incomplete LU, A \approx LU)
+ *
+ * Assumptions:
+ *   Matrices have non-zero diagonals
+ *   Each row of a matrix has at least one non-zero (i.e., no rows with all zeros) */
+static void apply_preconditioner( const static_storage * const workspace,
+        const control_params * const control, const real * const y, real * const x,
+        int fresh_pre, int side )
 {
     int i, si;
 
@@ -2845,11 +3290,25 @@ static void apply_preconditioner( const static_storage * const workspace,
                 case ICHOLT_PC:
                 case ILUT_PC:
                 case FG_ILUT_PC:
-                    tri_solve( &workspace->L, y, x, LOWER );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        tri_solve_float( &workspace->L, y, x, LOWER );
+                    }
+                    else
+                    {
+                        tri_solve( &workspace->L, y, x, LOWER );
+                    }
                     break;
                 case ILUTP_PC:
                     permute_vector( workspace->y_p, y, workspace->perm_ilutp, workspace->H.n );
-                    tri_solve( &workspace->L, workspace->y_p, x, LOWER );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        tri_solve_float( &workspace->L, workspace->y_p, x, LOWER );
+                    }
+                    else
+                    {
+                        tri_solve( &workspace->L, workspace->y_p, x, LOWER );
+                    }
                     break;
                 case SAI_PC:
                     sparse_matvec_full( &workspace->H_app_inv, y, x );
@@ -2937,8 +3396,16 @@ static void apply_preconditioner( const static_storage * const workspace,
                         }
                     }
 
-                    jacobi_iter( workspace, &workspace->L, workspace->Dinv_L,
-                            y, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        jacobi_iter_float( workspace, &workspace->L, workspace->Dinv_L,
+                                y, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    }
+                    else
+                    {
+                        jacobi_iter( workspace, &workspace->L, workspace->Dinv_L,
+                                y, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    }
                     break;
                 case ILUTP_PC:
                     permute_vector( workspace->y_p, y, workspace->perm_ilutp, workspace->H.n );
@@ -2956,8 +3423,16 @@ static void apply_preconditioner( const static_storage * const workspace,
                         }
                     }
 
-                    jacobi_iter( workspace, &workspace->L, workspace->Dinv_L,
-                            workspace->y_p, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        jacobi_iter_float( workspace, &workspace->L, workspace->Dinv_L,
+                                workspace->y_p, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    }
+                    else
+                    {
+                        jacobi_iter( workspace, &workspace->L, workspace->Dinv_L,
+                                workspace->y_p, x, LOWER, control->cm_solver_pre_app_jacobi_iters );
+                    }
                     break;
                 default:
                     fprintf( stderr, "[ERROR] Unrecognized preconditioner application method. Terminating...\n" );
@@ -2990,7 +3465,14 @@ static void apply_preconditioner( const static_storage * const workspace,
                 case ILUT_PC:
                 case ILUTP_PC:
                 case FG_ILUT_PC:
-                    tri_solve( &workspace->U, y, x, UPPER );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        tri_solve_float( &workspace->U, y, x, UPPER );
+                    }
+                    else
+                    {
+                        tri_solve( &workspace->U, y, x, UPPER );
+                    }
                     break;
                 default:
                     fprintf( stderr, "[ERROR] Unrecognized preconditioner application method. Terminating...\n" );
@@ -3069,8 +3551,16 @@ static void apply_preconditioner( const static_storage * const workspace,
                         }
                     }
 
-                    jacobi_iter( workspace, &workspace->U, workspace->Dinv_U,
-                            y, x, UPPER, control->cm_solver_pre_app_jacobi_iters );
+                    if ( control->cm_solver_mixed_precision == TRUE )
+                    {
+                        jacobi_iter_float( workspace, &workspace->U, workspace->Dinv_U,
+                                y, x, UPPER, control->cm_solver_pre_app_jacobi_iters );
+                    }
+                    else
+                    {
+                        jacobi_iter( workspace, &workspace->U, workspace->Dinv_U,
+                                y, x, UPPER, control->cm_solver_pre_app_jacobi_iters );
+                    }
                     break;
                 default:
                     fprintf( stderr, "[ERROR] Unrecognized preconditioner application method. Terminating...\n" );
@@ -3294,6 +3784,9 @@ int GMRES( const static_storage * const workspace, const control_params * const
     data->timing.cm_solver_tri_solve += t_ts / control->num_threads;
     data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
 
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            FABS(workspace->g[g_j]) / g_bnorm );
+
     if ( g_itr >= control->cm_solver_max_iters )
     {
         fprintf( stderr, "[WARNING] GMRES convergence failed (%d outer iters)\n", g_itr );
@@ -3538,6 +4031,9 @@ int GMRES_HouseHolder( const static_storage * const workspace,
     data->timing.cm_solver_tri_solve += t_ts / control->num_threads;
     data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
 
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            FABS(w[g_j]) / g_bnorm );
+
     if ( g_itr >= control->cm_solver_max_iters )
     {
         fprintf( stderr, "[WARNING] GMRES convergence failed (%d outer iters)\n", g_itr );
@@ -3645,6 +4141,9 @@ int CG( const static_storage * const workspace, const control_params * const con
     data->timing.cm_solver_spmv += t_spmv / control->num_threads;
     data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
 
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            g_rnorm / g_bnorm );
+
     if ( g_itr >= control->cm_solver_max_iters )
     {
         fprintf( stderr, "[WARNING] CG convergence failed (%d iters)\n", g_itr );
@@ -3656,6 +4155,352 @@ int CG( const static_storage * const workspace, const control_params * const con
 }
 
 
+/* Conjugate Gradient with mixed precision iterative refinement
+ *
+ * The sparse matrix-vector products and preconditioner applications of
+ * the inner CG iterations read the single precision copies of the entries
+ * of H and of the incomplete factors (see Copy_Matrix_Values_Float), which
+ * halves the memory traffic of these kernels. The vectors are kept in double
+ * precision, and the residual checked against tol is recomputed in double
+ * precision after each inner solve.
+ *
+ * workspace: struct containing storage for workspace for the linear solver
+ * control: struct containing parameters governing the simulation and numeric methods
+ * data: struct containing simulation data (e.g., atom info)
+ * H: sparse, symmetric matrix, lower half stored in CSR format
+ * b: right-hand side of the linear system
+ * tol: tolerence compared against the relative residual for determining convergence
+ * x: inital guess
+ * fresh_pre: flag for determining if preconditioners should be recomputed
+ *
+ * returns: the total number of inner iterations */
+int mixed_CG( const static_storage * const workspace, const control_params * const control,
+        simulation_data * const data, const sparse_matrix * const H, const real * const b,
+        const real tol, real * const x, const int fresh_pre )
+{
+    int i, pre, g_itr, N;
+    real tmp, alpha, beta, bnorm, g_bnorm, rnorm, g_rnorm, rnorm_ref;
+    real *d, *r, *p, *z, *e;
+    real sig_old, sig_new;
+    real t_start, t_pa, t_spmv, t_vops;
+
+    N = H->n;
+    d = workspace->d;
+    r = workspace->r;
+    p = workspace->q;
+    z = workspace->p;
+    e = workspace->e;
+    t_pa = 0.0;
+    t_spmv = 0.0;
+    t_vops = 0.0;
+
+#if defined(_OPENMP)
+    #pragma omp parallel default(none) \
+    private(i, pre, tmp, alpha, beta, bnorm, rnorm, rnorm_ref, sig_old, sig_new, t_start) \
+    firstprivate(control, workspace, H, b, tol, x, fresh_pre) \
+    reduction(+: t_pa, t_spmv, t_vops) \
+    shared(g_itr, g_bnorm, g_rnorm, N, d, r, p, z, e)
+#endif
+    {
+        t_pa = 0.0;
+        t_spmv = 0.0;
+        t_vops = 0.0;
+        pre = fresh_pre;
+        i = 0;
+
+        t_start = Get_Time( );
+        bnorm = Norm( b, N );
+        t_vops += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        sparse_matvec( workspace, H, x, d );
+        t_spmv += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        Vector_Sum( r, 1.0,  b, -1.0, d, N );
+        rnorm = Norm( r, N );
+        t_vops += Get_Timing_Info( t_start );
+
+        while ( i < control->cm_solver_max_iters && rnorm / bnorm > tol )
+        {
+            /* solve He = r in single precision storage */
+            rnorm_ref = rnorm;
+
+            t_start = Get_Time( );
+            apply_preconditioner( workspace, control, r, d, pre, LEFT );
+            apply_preconditioner( workspace, control, d, z, pre, RIGHT );
+            t_pa += Get_Timing_Info( t_start );
+            pre = FALSE;
+
+            t_start = Get_Time( );
+            Vector_MakeZero( e, N );
+            Vector_Copy( p, z, N );
+            sig_new = Dot( r, p, N );
+            t_vops += Get_Timing_Info( t_start );
+
+            for ( ; i < control->cm_solver_max_iters && rnorm / bnorm > tol
+                    && rnorm / rnorm_ref > MIXED_CG_INNER_TOL; ++i )
+            {
+                t_start = Get_Time( );
+                sparse_matvec_float( workspace, H, p, d );
+                t_spmv += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                tmp = Dot( d, p, N );
+                alpha = sig_new / tmp;
+                Vector_Add( e, alpha, p, N );
+                Vector_Add( r, -1.0 * alpha, d, N );
+                rnorm = Norm( r, N );
+                t_vops += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                apply_preconditioner( workspace, control, r, d, FALSE, LEFT );
+                apply_preconditioner( workspace, control, d, z, FALSE, RIGHT );
+                t_pa += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                sig_old = sig_new;
+                sig_new = Dot( r, z, N );
+                beta = sig_new / sig_old;
+                Vector_Sum( p, 1.0, z, beta, p, N );
+                t_vops += Get_Timing_Info( t_start );
+            }
+
+            /* refine the solution and recompute the residual in double precision */
+            t_start = Get_Time( );
+            Vector_Add( x, 1.0, e, N );
+            t_vops += Get_Timing_Info( t_start );
+
+            t_start = Get_Time( );
+            sparse_matvec( workspace, H, x, d );
+            t_spmv += Get_Timing_Info( t_start );
+
+            t_start = Get_Time( );
+            Vector_Sum( r, 1.0,  b, -1.0, d, N );
+            rnorm = Norm( r, N );
+            t_vops += Get_Timing_Info( t_start );
+        }
+
+#if defined(_OPENMP)
+        #pragma omp single
+#endif
+        {
+            g_itr = i;
+            g_bnorm = bnorm;
+            g_rnorm = rnorm;
+        }
+    }
+
+    data->timing.cm_solver_pre_app += t_pa / control->num_threads;
+    data->timing.cm_solver_spmv += t_spmv / control->num_threads;
+    data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
+
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            g_rnorm / g_bnorm );
+
+    if ( g_itr >= control->cm_solver_max_iters )
+    {
+        fprintf( stderr, "[WARNING] mixed precision CG convergence failed (%d iters)\n", g_itr );
+        fprintf( stderr, "  [INFO] Rel. residual error: %f\n", g_rnorm / g_bnorm );
+        return g_itr;
+    }
+
+    return g_itr;
+}
+
+
+/* Conjugate Gradient for two linear systems sharing the same matrix,
+ * Hx1 = b1 and Hx2 = b2 (e.g., the s and t systems of QEq)
+ *
+ * Both systems are iterated together so that each pass over the matrix
+ * in the sparse matrix-vector products serves two vectors. Once one
+ * of the systems has converged, the other continues on its own.
+ *
+ * workspace: struct containing storage for workspace for the linear solver
+ * control: struct containing parameters governing the simulation and numeric methods
+ * data: struct containing simulation data (e.g., atom info)
+ * H: sparse, symmetric matrix, lower half stored in CSR format
+ * b1, b2: right-hand sides of the linear systems
+ * tol: tolerence compared against the relative residual for determining convergence
+ * x1, x2: inital guesses
+ * fresh_pre: flag for determining if preconditioners should be recomputed
+ *
+ * returns: the sum of the iteration counts of the two systems */
+int dual_CG( const static_storage * const workspace, const control_params * const control,
+        simulation_data * const data, const sparse_matrix * const H, const real * const b1,
+        const real * const b2, const real tol, real * const x1, real * const x2,
+        const int fresh_pre )
+{
+    int i, itr1, itr2, g_itr1, g_itr2, N;
+    real tmp, alpha, beta, bnorm1, bnorm2, g_bnorm1, g_bnorm2,
+         rnorm1, rnorm2, g_rnorm1, g_rnorm2;
+    real *d1, *r1, *p1, *z1, *d2, *r2, *p2, *z2;
+    real sig_old, sig_new1, sig_new2;
+    real t_start, t_pa, t_spmv, t_vops;
+
+    N = H->n;
+    d1 = workspace->d;
+    r1 = workspace->r;
+    p1 = workspace->q;
+    z1 = workspace->p;
+    d2 = workspace->d2;
+    r2 = workspace->r2;
+    p2 = workspace->q2;
+    z2 = workspace->p2;
+    t_pa = 0.0;
+    t_spmv = 0.0;
+    t_vops = 0.0;
+
+#if defined(_OPENMP)
+    #pragma omp parallel default(none) \
+    private(i, itr1, itr2, tmp, alpha, beta, bnorm1, bnorm2, rnorm1, rnorm2, \
+            sig_old, sig_new1, sig_new2, t_start) \
+    firstprivate(control, workspace, H, b1, b2, tol, x1, x2, fresh_pre) \
+    reduction(+: t_pa, t_spmv, t_vops) \
+    shared(g_itr1, g_itr2, g_bnorm1, g_bnorm2, g_rnorm1, g_rnorm2, N, \
+            d1, r1, p1, z1, d2, r2, p2, z2)
+#endif
+    {
+        t_pa = 0.0;
+        t_spmv = 0.0;
+        t_vops = 0.0;
+        itr1 = 0;
+        itr2 = 0;
+
+        t_start = Get_Time( );
+        bnorm1 = Norm( b1, N );
+#if defined(_OPENMP)
+        /* all threads must read the shared result of Norm before it is reused */
+        #pragma omp barrier
+#endif
+        bnorm2 = Norm( b2, N );
+        t_vops += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        dual_sparse_matvec( workspace, H, x1, x2, d1, d2 );
+        t_spmv += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        Vector_Sum( r1, 1.0,  b1, -1.0, d1, N );
+        rnorm1 = Norm( r1, N );
+        Vector_Sum( r2, 1.0,  b2, -1.0, d2, N );
+        rnorm2 = Norm( r2, N );
+        t_vops += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        apply_preconditioner( workspace, control, r1, d1, fresh_pre, LEFT );
+        apply_preconditioner( workspace, control, d1, z1, fresh_pre, RIGHT );
+        apply_preconditioner( workspace, control, r2, d2, FALSE, LEFT );
+        apply_preconditioner( workspace, control, d2, z2, FALSE, RIGHT );
+        t_pa += Get_Timing_Info( t_start );
+
+        t_start = Get_Time( );
+        Vector_Copy( p1, z1, N );
+        sig_new1 = Dot( r1, p1, N );
+        Vector_Copy( p2, z2, N );
+        sig_new2 = Dot( r2, p2, N );
+        t_vops += Get_Timing_Info( t_start );
+
+        for ( i = 0; i < control->cm_solver_max_iters
+                && (rnorm1 / bnorm1 > tol || rnorm2 / bnorm2 > tol); ++i )
+        {
+            t_start = Get_Time( );
+            if ( rnorm1 / bnorm1 > tol && rnorm2 / bnorm2 > tol )
+            {
+                dual_sparse_matvec( workspace, H, p1, p2, d1, d2 );
+            }
+            else if ( rnorm1 / bnorm1 > tol )
+            {
+                sparse_matvec( workspace, H, p1, d1 );
+            }
+            else
+            {
+                sparse_matvec( workspace, H, p2, d2 );
+            }
+            t_spmv += Get_Timing_Info( t_start );
+
+            if ( rnorm1 / bnorm1 > tol )
+            {
+                t_start = Get_Time( );
+                tmp = Dot( d1, p1, N );
+                alpha = sig_new1 / tmp;
+                Vector_Add( x1, alpha, p1, N );
+                Vector_Add( r1, -1.0 * alpha, d1, N );
+                rnorm1 = Norm( r1, N );
+                t_vops += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                apply_preconditioner( workspace, control, r1, d1, FALSE, LEFT );
+                apply_preconditioner( workspace, control, d1, z1, FALSE, RIGHT );
+                t_pa += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                sig_old = sig_new1;
+                sig_new1 = Dot( r1, z1, N );
+                beta = sig_new1 / sig_old;
+                Vector_Sum( p1, 1.0, z1, beta, p1, N );
+                t_vops += Get_Timing_Info( t_start );
+
+                ++itr1;
+            }
+
+            if ( rnorm2 / bnorm2 > tol )
+            {
+                t_start = Get_Time( );
+                tmp = Dot( d2, p2, N );
+                alpha = sig_new2 / tmp;
+                Vector_Add( x2, alpha, p2, N );
+                Vector_Add( r2, -1.0 * alpha, d2, N );
+                rnorm2 = Norm( r2, N );
+                t_vops += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                apply_preconditioner( workspace, control, r2, d2, FALSE, LEFT );
+                apply_preconditioner( workspace, control, d2, z2, FALSE, RIGHT );
+                t_pa += Get_Timing_Info( t_start );
+
+                t_start = Get_Time( );
+                sig_old = sig_new2;
+                sig_new2 = Dot( r2, z2, N );
+                beta = sig_new2 / sig_old;
+                Vector_Sum( p2, 1.0, z2, beta, p2, N );
+                t_vops += Get_Timing_Info( t_start );
+
+                ++itr2;
+            }
+        }
+
+#if defined(_OPENMP)
+        #pragma omp single
+#endif
+        {
+            g_itr1 = itr1;
+            g_itr2 = itr2;
+            g_bnorm1 = bnorm1;
+            g_bnorm2 = bnorm2;
+            g_rnorm1 = rnorm1;
+            g_rnorm2 = rnorm2;
+        }
+    }
+
+    data->timing.cm_solver_pre_app += t_pa / control->num_threads;
+    data->timing.cm_solver_spmv += t_spmv / control->num_threads;
+    data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
+
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            MAX( g_rnorm1 / g_bnorm1, g_rnorm2 / g_bnorm2 ) );
+
+    if ( g_itr1 >= control->cm_solver_max_iters || g_itr2 >= control->cm_solver_max_iters )
+    {
+        fprintf( stderr, "[WARNING] dual CG convergence failed (%d, %d iters)\n", g_itr1, g_itr2 );
+        fprintf( stderr, "  [INFO] Rel. residual errors: %f, %f\n",
+                g_rnorm1 / g_bnorm1, g_rnorm2 / g_bnorm2 );
+    }
+
+    return g_itr1 + g_itr2;
+}
+
+
 /* Bi-conjugate gradient stabalized method with left preconditioning for
  * solving nonsymmetric linear systems
  *
@@ -3830,6 +4675,9 @@ int BiCGStab( const static_storage * const workspace, const control_params * con
     data->timing.cm_solver_spmv += t_spmv / control->num_threads;
     data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
 
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            g_rnorm / g_bnorm );
+
 //    if ( FABS( g_omega ) < DBL_EPSILON )
     if ( g_omega == 0.0 )
     {
@@ -3944,6 +4792,9 @@ int SDM( const static_storage * const workspace, const control_params * const co
     data->timing.cm_solver_spmv += t_spmv / control->num_threads;
     data->timing.cm_solver_vector_ops += t_vops / control->num_threads;
 
+    data->timing.cm_solver_residual = MAX( data->timing.cm_solver_residual,
+            SQRT(g_sig) / g_bnorm );
+
     if ( g_itr >= control->cm_solver_max_iters  )
     {
         fprintf( stderr, "[WARNING] SDM convergence failed (%d iters)\n", g_itr );
@@ -65,6 +65,10 @@ real sparse_approx_inverse( const sparse_matrix * const, const sparse_matrix * c
         sparse_matrix * );
 #endif
 
+void Copy_Matrix_Values_Float( sparse_matrix * const );
+
+void Compress_Matrix_Columns( sparse_matrix * const );
+
 void Transpose( const sparse_matrix * const, sparse_matrix * const );
 
 void Transpose_I( sparse_matrix * const );
@@ -100,6 +104,14 @@ int CG( const static_storage * const, const control_params * const,
         simulation_data * const, const sparse_matrix * const, const real * const,
         const real, real * const, const int );
 
+int mixed_CG( const static_storage * const, const control_params * const,
+        simulation_data * const, const sparse_matrix * const, const real * const,
+        const real, real * const, const int );
+
+int dual_CG( const static_storage * const, const control_params * const,
+        simulation_data * const, const sparse_matrix * const, const real * const,
+        const real * const, const real, real * const, real * const, const int );
+
 int BiCGStab( const static_storage * const, const control_params * const,
         simulation_data * const, const sparse_matrix * const, const real * const,
         const real, real * const, const int );
@@ -216,153 +216,591 @@ static void LR_Lookup( LR_lookup_table *t, real r, LR_data *y )
 #endif
 
 
-void Make_LR_Lookup_Table( reax_system *system, control_params *control,
-       static_storage *workspace )
+/* Long-range lookup tables shared by all simulations in this process
+ * which use identical force field parameters, cutoffs, and table sizes */
+typedef struct LR_lookup_cache_entry LR_lookup_cache_entry;
+
+struct LR_lookup_cache_entry
 {
-    int i, j, r;
+    /* parameters from which the tables were built (see Make_LR_Lookup_Key) */
+    real *key;
+    /* num. entries in key */
+    int key_len;
     int num_atom_types;
+    /* atom types for which tables exist */
     int existing_types[MAX_ATOM_TYPES];
-    real dr;
-    real *h, *fh, *fvdw, *fele, *fCEvd, *fCEclmb;
-    real v0_vdw, v0_ele, vlast_vdw, vlast_ele;
-    /* real rand_dist;
-       real evdw_abserr, evdw_relerr, fvdw_abserr, fvdw_relerr;
-       real eele_abserr, eele_relerr, fele_abserr, fele_relerr;
-       real evdw_maxerr, eele_maxerr;
-       LR_data y, y_spline; */
-
-    /* initializations */
-    vlast_ele = 0;
-    vlast_vdw = 0;
-    v0_ele = 0;
-    v0_vdw = 0;
+    LR_lookup_table **LR;
+    LR_lookup_table_packed packed;
+    /* num. simulations using the tables */
+    int ref_count;
+    LR_lookup_cache_entry *next;
+};
+
+
+static LR_lookup_cache_entry *LR_cache = NULL;
+
+
+/* Pack the spline coefficients of the lookup tables of all existing atom
+ * type pairs into contiguous arrays, so that the tabulated nonbonded kernel
+ * reads the coefficients of one spline interval from a single cache line
+ * and can evaluate the splines of many pairs at once */
+static void Make_LR_Lookup_Table_Packed( LR_lookup_cache_entry * const entry,
+        int n )
+{
+    int i, j, r, offset;
+    real *CE, *e;
+    LR_lookup_table *t;
+    LR_lookup_table_packed *packed;
+
+    packed = &entry->packed;
+
+    offset = 0;
+    for ( i = 0; i < entry->num_atom_types; ++i )
+    {
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    entry->LR[i][j].offset = offset;
+                    offset += n;
+                }
+            }
+        }
+    }
+    packed->n = offset;
+
+    /* entry 0 of each table is never used, so leave it zeroed */
+    packed->CE = scalloc( 8 * packed->n, sizeof(real), __FILE__, __LINE__ );
+    packed->e = scalloc( 8 * packed->n, sizeof(real), __FILE__, __LINE__ );
+
+    for ( i = 0; i < entry->num_atom_types; ++i )
+    {
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    t = &entry->LR[i][j];
+
+                    for ( r = 1; r < n; ++r )
+                    {
+                        CE = &packed->CE[8 * (t->offset + r)];
+                        CE[0] = t->CEvd[r].a;
+                        CE[1] = t->CEvd[r].b;
+                        CE[2] = t->CEvd[r].c;
+                        CE[3] = t->CEvd[r].d;
+                        CE[4] = t->CEclmb[r].a;
+                        CE[5] = t->CEclmb[r].b;
+                        CE[6] = t->CEclmb[r].c;
+                        CE[7] = t->CEclmb[r].d;
+
+                        e = &packed->e[8 * (t->offset + r)];
+                        e[0] = t->vdW[r].a;
+                        e[1] = t->vdW[r].b;
+                        e[2] = t->vdW[r].c;
+                        e[3] = t->vdW[r].d;
+                        e[4] = t->ele[r].a;
+                        e[5] = t->ele[r].b;
+                        e[6] = t->ele[r].c;
+                        e[7] = t->ele[r].d;
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+/* Collect all parameters which determine the lookup tables: the table size,
+ * nonbonded cutoff and taper coefficients, the global and two-body force field
+ * parameters used by LR_vdW_Coulomb, and the atom types present
+ *
+ * returns: num. entries in key */
+static int Make_LR_Lookup_Key( reax_system *system, control_params *control,
+        static_storage *workspace, const int * const existing_types, real ** const key )
+{
+    int i, j, k, num_atom_types, num_types;
+    two_body_parameters *twbp;
 
     num_atom_types = system->reax_param.num_atom_types;
-    dr = control->nonb_cut / control->tabulate;
-    h = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
-    fh = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
-    fvdw = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
-    fCEvd = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
-    fele = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
-    fCEclmb = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+    num_types = 0;
+    for ( i = 0; i < num_atom_types; ++i )
+    {
+        if ( existing_types[i] )
+        {
+            ++num_types;
+        }
+    }
+
+    *key = smalloc( sizeof(real) * (13 + num_atom_types
+                + 8 * num_types * (num_types + 1) / 2), __FILE__, __LINE__ );
+
+    k = 0;
+    (*key)[k++] = control->tabulate;
+    (*key)[k++] = control->nonb_cut;
+    for ( i = 0; i < 8; ++i )
+    {
+        (*key)[k++] = workspace->Tap[i];
+    }
+    (*key)[k++] = system->reax_param.gp.l[28];
+    (*key)[k++] = system->reax_param.gp.vdw_type;
+    (*key)[k++] = num_atom_types;
+    for ( i = 0; i < num_atom_types; ++i )
+    {
+        (*key)[k++] = existing_types[i];
+    }
+
+    for ( i = 0; i < num_atom_types; ++i )
+    {
+        if ( existing_types[i] )
+        {
+            for ( j = i; j < num_atom_types; ++j )
+            {
+                if ( existing_types[j] )
+                {
+                    twbp = &system->reax_param.tbp[i][j];
+                    (*key)[k++] = twbp->gamma_w;
+                    (*key)[k++] = twbp->alpha;
+                    (*key)[k++] = twbp->r_vdW;
+                    (*key)[k++] = twbp->D;
+                    (*key)[k++] = twbp->ecore;
+                    (*key)[k++] = twbp->acore;
+                    (*key)[k++] = twbp->rcore;
+                    (*key)[k++] = twbp->gamma;
+                }
+            }
+        }
+    }
+
+    return k;
+}
+
+
+static void Allocate_LR_Lookup_Table( LR_lookup_cache_entry * const entry,
+        int n )
+{
+    int i, j;
 
     /* allocate Long-Range LookUp Table space based on
        number of atom types in the ffield file */
-    workspace->LR = smalloc( num_atom_types * sizeof(LR_lookup_table*),
+    entry->LR = smalloc( entry->num_atom_types * sizeof(LR_lookup_table*),
            __FILE__, __LINE__ );
-    for ( i = 0; i < num_atom_types; ++i )
+    for ( i = 0; i < entry->num_atom_types; ++i )
     {
-        workspace->LR[i] = smalloc( num_atom_types * sizeof(LR_lookup_table),
+        entry->LR[i] = smalloc( entry->num_atom_types * sizeof(LR_lookup_table),
                 __FILE__, __LINE__ );
+
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    entry->LR[i][j].n = n;
+                    entry->LR[i][j].y = smalloc( n * sizeof(LR_data),
+                            __FILE__, __LINE__ );
+                    entry->LR[i][j].H = smalloc( n * sizeof(cubic_spline_coef),
+                            __FILE__, __LINE__ );
+                    entry->LR[i][j].vdW = smalloc( n * sizeof(cubic_spline_coef),
+                            __FILE__, __LINE__ );
+                    entry->LR[i][j].CEvd = smalloc( n * sizeof(cubic_spline_coef),
+                            __FILE__, __LINE__ );
+                    entry->LR[i][j].ele = smalloc( n * sizeof(cubic_spline_coef),
+                            __FILE__, __LINE__ );
+                    entry->LR[i][j].CEclmb = smalloc( n * sizeof(cubic_spline_coef),
+                            __FILE__, __LINE__ );
+                }
+            }
+        }
     }
+}
 
-    /* most atom types in ffield file will not exist in the current
-       simulation. to avoid unnecessary lookup table space, determine
-       the atom types that exist in the current simulation */
-    for ( i = 0; i < MAX_ATOM_TYPES; ++i )
+
+static void Deallocate_LR_Lookup_Table( LR_lookup_cache_entry * const entry )
+{
+    int i, j;
+
+    for ( i = 0; i < entry->num_atom_types; ++i )
     {
-        existing_types[i] = 0;
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    sfree( entry->LR[i][j].y, __FILE__, __LINE__ );
+                    sfree( entry->LR[i][j].H, __FILE__, __LINE__ );
+                    sfree( entry->LR[i][j].vdW, __FILE__, __LINE__ );
+                    sfree( entry->LR[i][j].CEvd, __FILE__, __LINE__ );
+                    sfree( entry->LR[i][j].ele, __FILE__, __LINE__ );
+                    sfree( entry->LR[i][j].CEclmb, __FILE__, __LINE__ );
+                }
+            }
+        }
+
+        sfree( entry->LR[i], __FILE__, __LINE__ );
     }
-    for ( i = 0; i < system->N; ++i )
+
+    sfree( entry->LR, __FILE__, __LINE__ );
+
+    sfree( entry->packed.CE, __FILE__, __LINE__ );
+    sfree( entry->packed.e, __FILE__, __LINE__ );
+}
+
+
+/* Compute the splines of the lookup tables of all existing atom type pairs,
+ * in parallel over the pairs */
+static void Build_LR_Lookup_Table( reax_system *system, control_params *control,
+       static_storage *workspace, LR_lookup_cache_entry * const entry )
+{
+    int i, j, p, r, num_pairs;
+    int *pairs;
+    real dr;
+
+    dr = control->nonb_cut / control->tabulate;
+
+    num_pairs = 0;
+    pairs = smalloc( sizeof(int) * entry->num_atom_types * entry->num_atom_types,
+            __FILE__, __LINE__ );
+    for ( i = 0; i < entry->num_atom_types; ++i )
     {
-        existing_types[ system->atoms[i].type ] = 1;
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    pairs[num_pairs++] = i * entry->num_atom_types + j;
+                }
+            }
+        }
     }
 
     /* fill in the lookup table entries for existing atom types.
        only lower half should be enough. */
-    for ( i = 0; i < num_atom_types; ++i )
+#if defined(_OPENMP)
+    #pragma omp parallel default(shared) private(i, j, p, r)
+#endif
     {
-        if ( existing_types[i] )
+        real *h, *fh, *fvdw, *fele, *fCEvd, *fCEclmb;
+        real v0_vdw, v0_ele, vlast_vdw, vlast_ele;
+        LR_lookup_table *t;
+
+        /* initializations */
+        vlast_ele = 0;
+        vlast_vdw = 0;
+        v0_ele = 0;
+        v0_vdw = 0;
+
+        h = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+        fh = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+        fvdw = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+        fCEvd = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+        fele = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+        fCEclmb = scalloc( control->tabulate + 2, sizeof(real), __FILE__, __LINE__ );
+
+#if defined(_OPENMP)
+        #pragma omp for schedule(dynamic)
+#endif
+        for ( p = 0; p < num_pairs; ++p )
         {
-            for ( j = i; j < num_atom_types; ++j )
+            i = pairs[p] / entry->num_atom_types;
+            j = pairs[p] % entry->num_atom_types;
+            t = &entry->LR[i][j];
+
+            for ( r = 1; r <= control->tabulate; ++r )
             {
-                if ( existing_types[j] )
+                LR_vdW_Coulomb( system, control, workspace, i, j, r * dr, &t->y[r] );
+                h[r] = t->dx;
+                fh[r] = t->y[r].H;
+                fvdw[r] = t->y[r].e_vdW;
+                fCEvd[r] = t->y[r].CEvd;
+                fele[r] = t->y[r].e_ele;
+                fCEclmb[r] = t->y[r].CEclmb;
+
+                if ( r == 1 )
+                {
+                    v0_vdw = t->y[r].CEvd;
+                    v0_ele = t->y[r].CEclmb;
+                }
+                else if ( r == control->tabulate )
                 {
-                    workspace->LR[i][j].xmin = 0;
-                    workspace->LR[i][j].xmax = control->nonb_cut;
-                    workspace->LR[i][j].n = control->tabulate + 1;
-                    workspace->LR[i][j].dx = dr;
-                    workspace->LR[i][j].inv_dx = control->tabulate / control->nonb_cut;
-                    workspace->LR[i][j].y = 
-                        smalloc( workspace->LR[i][j].n * sizeof(LR_data),
-                              __FILE__, __LINE__ );
-                    workspace->LR[i][j].H = 
-                        smalloc( workspace->LR[i][j].n * sizeof(cubic_spline_coef),
-                              __FILE__, __LINE__ );
-                    workspace->LR[i][j].vdW = 
-                        smalloc( workspace->LR[i][j].n * sizeof(cubic_spline_coef),
-                              __FILE__, __LINE__ );
-                    workspace->LR[i][j].CEvd = 
-                        smalloc( workspace->LR[i][j].n * sizeof(cubic_spline_coef),
-                              __FILE__, __LINE__ );
-                    workspace->LR[i][j].ele = 
-                        smalloc( workspace->LR[i][j].n * sizeof(cubic_spline_coef),
-                              __FILE__, __LINE__ );
-                    workspace->LR[i][j].CEclmb = 
-                        smalloc( workspace->LR[i][j].n * sizeof(cubic_spline_coef),
-                              __FILE__, __LINE__ );
-
-                    for ( r = 1; r <= control->tabulate; ++r )
+                    vlast_vdw = t->y[r].CEvd;
+                    vlast_ele = t->y[r].CEclmb;
+                }
+            }
+
+            Natural_Cubic_Spline( &h[1], &fh[1], &t->H[1], control->tabulate + 1 );
+
+            Complete_Cubic_Spline( &h[1], &fvdw[1], v0_vdw, vlast_vdw,
+                    &t->vdW[1], control->tabulate + 1 );
+
+            Natural_Cubic_Spline( &h[1], &fCEvd[1], &t->CEvd[1], control->tabulate + 1 );
+
+            Complete_Cubic_Spline( &h[1], &fele[1], v0_ele, vlast_ele,
+                    &t->ele[1], control->tabulate + 1 );
+
+            Natural_Cubic_Spline( &h[1], &fCEclmb[1], &t->CEclmb[1], control->tabulate + 1 );
+        }
+
+        sfree( h, __FILE__, __LINE__ );
+        sfree( fh, __FILE__, __LINE__ );
+        sfree( fvdw, __FILE__, __LINE__ );
+        sfree( fCEvd, __FILE__, __LINE__ );
+        sfree( fele, __FILE__, __LINE__ );
+        sfree( fCEclmb, __FILE__, __LINE__ );
+    }
+
+    sfree( pairs, __FILE__, __LINE__ );
+}
+
+
+/* Name of the file in which lookup tables with a given key are stored,
+ * derived from a (64-bit FNV-1a) hash of the key */
+static void Get_LR_Lookup_Table_File_Name( const control_params * const control,
+        const LR_lookup_cache_entry * const entry, char * const fname, size_t n )
+{
+    size_t i;
+    unsigned long long hash;
+    const unsigned char *bytes;
+
+    hash = 14695981039346656037ULL;
+    bytes = (const unsigned char *) entry->key;
+    for ( i = 0; i < sizeof(real) * entry->key_len; ++i )
+    {
+        hash ^= bytes[i];
+        hash *= 1099511628211ULL;
+    }
+
+    snprintf( fname, n, "%s/lr_lookup_%016llx.bin", control->tabulate_cache_dir, hash );
+}
+
+
+/* Read the splines of the lookup tables from the cache directory
+ *
+ * returns: SUCCESS if the file exists and was built from the same key, FAILURE otherwise */
+static int Read_LR_Lookup_Table_File( const control_params * const control,
+        LR_lookup_cache_entry * const entry, int n )
+{
+    int i, j, ret, key_len, file_n;
+    char fname[MAX_STR + 64];
+    real *key;
+    FILE *fp;
+
+    Get_LR_Lookup_Table_File_Name( control, entry, fname, sizeof(fname) );
+
+    fp = fopen( fname, "rb" );
+    if ( fp == NULL )
+    {
+        return FAILURE;
+    }
+
+    ret = FAILURE;
+    key = NULL;
+
+    if ( fread( &key_len, sizeof(int), 1, fp ) == 1 && key_len == entry->key_len
+            && fread( &file_n, sizeof(int), 1, fp ) == 1 && file_n == n )
+    {
+        key = smalloc( sizeof(real) * key_len, __FILE__, __LINE__ );
+
+        if ( fread( key, sizeof(real), key_len, fp ) == (size_t) key_len
+                && memcmp( key, entry->key, sizeof(real) * key_len ) == 0 )
+        {
+            ret = SUCCESS;
+
+            for ( i = 0; i < entry->num_atom_types && ret == SUCCESS; ++i )
+            {
+                if ( entry->existing_types[i] )
+                {
+                    for ( j = i; j < entry->num_atom_types && ret == SUCCESS; ++j )
                     {
-                        LR_vdW_Coulomb( system, control, workspace,
-                                i, j, r * dr, &workspace->LR[i][j].y[r] );
-                        h[r] = workspace->LR[i][j].dx;
-                        fh[r] = workspace->LR[i][j].y[r].H;
-                        fvdw[r] = workspace->LR[i][j].y[r].e_vdW;
-                        fCEvd[r] = workspace->LR[i][j].y[r].CEvd;
-                        fele[r] = workspace->LR[i][j].y[r].e_ele;
-                        fCEclmb[r] = workspace->LR[i][j].y[r].CEclmb;
-
-                        if ( r == 1 )
+                        if ( entry->existing_types[j] )
                         {
-                            v0_vdw = workspace->LR[i][j].y[r].CEvd;
-                            v0_ele = workspace->LR[i][j].y[r].CEclmb;
-                        }
-                        else if ( r == control->tabulate )
-                        {
-                            vlast_vdw = workspace->LR[i][j].y[r].CEvd;
-                            vlast_ele = workspace->LR[i][j].y[r].CEclmb;
+                            if ( fread( entry->LR[i][j].y, sizeof(LR_data), n, fp ) != (size_t) n
+                                    || fread( entry->LR[i][j].H, sizeof(cubic_spline_coef), n, fp ) != (size_t) n
+                                    || fread( entry->LR[i][j].vdW, sizeof(cubic_spline_coef), n, fp ) != (size_t) n
+                                    || fread( entry->LR[i][j].CEvd, sizeof(cubic_spline_coef), n, fp ) != (size_t) n
+                                    || fread( entry->LR[i][j].ele, sizeof(cubic_spline_coef), n, fp ) != (size_t) n
+                                    || fread( entry->LR[i][j].CEclmb, sizeof(cubic_spline_coef), n, fp ) != (size_t) n )
+                            {
+                                ret = FAILURE;
+                            }
                         }
                     }
+                }
+            }
+        }
+    }
+
+    if ( key != NULL )
+    {
+        sfree( key, __FILE__, __LINE__ );
+    }
+    fclose( fp );
+
+    return ret;
+}
+
 
-                    Natural_Cubic_Spline( &h[1], &fh[1],
-                            &workspace->LR[i][j].H[1], control->tabulate + 1 );
+/* Store the splines of the lookup tables in the cache directory,
+ * so later processes can read them instead of building them */
+static void Write_LR_Lookup_Table_File( const control_params * const control,
+        const LR_lookup_cache_entry * const entry, int n )
+{
+    int i, j;
+    char fname[MAX_STR + 64];
+    FILE *fp;
 
-//                    fprintf( stderr, "%-6s  %-6s  %-6s\n", "r", "h", "fh" );
-//                    for( r = 1; r <= control->tabulate; ++r )
-//                        fprintf( stderr, "%f  %f  %f\n", r * dr, h[r], fh[r] );
+    Get_LR_Lookup_Table_File_Name( control, entry, fname, sizeof(fname) );
+
+    fp = fopen( fname, "wb" );
+    if ( fp == NULL )
+    {
+        fprintf( stderr, "[WARNING] failed to write lookup table file %s\n", fname );
+        return;
+    }
 
-                    Complete_Cubic_Spline( &h[1], &fvdw[1], v0_vdw, vlast_vdw,
-                            &workspace->LR[i][j].vdW[1], control->tabulate + 1 );
+    fwrite( &entry->key_len, sizeof(int), 1, fp );
+    fwrite( &n, sizeof(int), 1, fp );
+    fwrite( entry->key, sizeof(real), entry->key_len, fp );
 
-//                    fprintf( stderr, "%-6s  %-6s  %-6s\n", "r", "h", "fvdw" );
-//                    for( r = 1; r <= control->tabulate; ++r )
-//                        fprintf( stderr, "%f  %f  %f\n", r * dr, h[r], fvdw[r] );
-//                    fprintf( stderr, "v0_vdw: %f, vlast_vdw: %f\n", v0_vdw, vlast_vdw );
+    for ( i = 0; i < entry->num_atom_types; ++i )
+    {
+        if ( entry->existing_types[i] )
+        {
+            for ( j = i; j < entry->num_atom_types; ++j )
+            {
+                if ( entry->existing_types[j] )
+                {
+                    fwrite( entry->LR[i][j].y, sizeof(LR_data), n, fp );
+                    fwrite( entry->LR[i][j].H, sizeof(cubic_spline_coef), n, fp );
+                    fwrite( entry->LR[i][j].vdW, sizeof(cubic_spline_coef), n, fp );
+                    fwrite( entry->LR[i][j].CEvd, sizeof(cubic_spline_coef), n, fp );
+                    fwrite( entry->LR[i][j].ele, sizeof(cubic_spline_coef), n, fp );
+                    fwrite( entry->LR[i][j].CEclmb, sizeof(cubic_spline_coef), n, fp );
+                }
+            }
+        }
+    }
 
-                    Natural_Cubic_Spline( &h[1], &fCEvd[1],
-                            &workspace->LR[i][j].CEvd[1], control->tabulate + 1 );
+    fclose( fp );
+}
 
-//                    fprintf( stderr, "%-6s  %-6s  %-6s\n", "r", "h", "fele" );
-//                    for( r = 1; r <= control->tabulate; ++r )
-//                        fprintf( stderr, "%f  %f  %f\n", r * dr, h[r], fele[r] );
-//                    fprintf( stderr, "v0_ele: %f, vlast_ele: %f\n", v0_ele, vlast_ele );
 
-                    Complete_Cubic_Spline( &h[1], &fele[1], v0_ele, vlast_ele,
-                            &workspace->LR[i][j].ele[1], control->tabulate + 1 );
+/* Set the long-range lookup tables of a simulation.  Tables are shared
+ * by all simulations in this process with identical force field parameters,
+ * cutoffs, table sizes, and atom types, and are only built (in parallel over
+ * the atom type pairs) for the first of them.  If control->tabulate_cache_dir
+ * is set, the tables are also read from (or stored in) files in that directory. */
+void Make_LR_Lookup_Table( reax_system *system, control_params *control,
+       static_storage *workspace )
+{
+    int i, j, n, key_len;
+    int existing_types[MAX_ATOM_TYPES];
+    real *key;
+    LR_lookup_table **LR_prev;
+    LR_lookup_cache_entry *entry;
 
-//                    fprintf( stderr, "%-6s  %-6s  %-6s\n", "r", "h", "fele" );
-//                    for( r = 1; r <= control->tabulate; ++r )
-//                        fprintf( stderr, "%f  %f  %f\n", r * dr, h[r], fele[r] );
-//                    fprintf( stderr, "v0_ele: %f, vlast_ele: %f\n", v0_ele, vlast_ele );
+    n = control->tabulate + 1;
+    LR_prev = workspace->LR;
 
-                    Natural_Cubic_Spline( &h[1], &fCEclmb[1],
-                            &workspace->LR[i][j].CEclmb[1], control->tabulate + 1 );
+    /* most atom types in ffield file will not exist in the current
+       simulation. to avoid unnecessary lookup table space, determine
+       the atom types that exist in the current simulation */
+    for ( i = 0; i < MAX_ATOM_TYPES; ++i )
+    {
+        existing_types[i] = 0;
+    }
+    for ( i = 0; i < system->N; ++i )
+    {
+        existing_types[ system->atoms[i].type ] = 1;
+    }
+
+    key_len = Make_LR_Lookup_Key( system, control, workspace, existing_types, &key );
+
+#if defined(_OPENMP)
+    #pragma omp critical (LR_cache)
+#endif
+    {
+        for ( entry = LR_cache; entry != NULL; entry = entry->next )
+        {
+            if ( entry->key_len == key_len
+                    && memcmp( entry->key, key, sizeof(real) * key_len ) == 0 )
+            {
+                break;
+            }
+        }
+
+        if ( entry == NULL )
+        {
+            entry = smalloc( sizeof(LR_lookup_cache_entry), __FILE__, __LINE__ );
+            entry->key = key;
+            entry->key_len = key_len;
+            key = NULL;
+            entry->num_atom_types = system->reax_param.num_atom_types;
+            for ( i = 0; i < MAX_ATOM_TYPES; ++i )
+            {
+                entry->existing_types[i] = existing_types[i];
+            }
+            entry->ref_count = 0;
+
+            Allocate_LR_Lookup_Table( entry, n );
+
+            for ( i = 0; i < entry->num_atom_types; ++i )
+            {
+                if ( existing_types[i] )
+                {
+                    for ( j = i; j < entry->num_atom_types; ++j )
+                    {
+                        if ( existing_types[j] )
+                        {
+                            entry->LR[i][j].xmin = 0;
+                            entry->LR[i][j].xmax = control->nonb_cut;
+                            entry->LR[i][j].dx = control->nonb_cut / control->tabulate;
+                            entry->LR[i][j].inv_dx = control->tabulate / control->nonb_cut;
+                        }
+                    }
+                }
+            }
+
+            if ( control->tabulate_cache_dir[0] == '\0'
+                    || Read_LR_Lookup_Table_File( control, entry, n ) != SUCCESS )
+            {
+                Build_LR_Lookup_Table( system, control, workspace, entry );
+
+                if ( control->tabulate_cache_dir[0] != '\0' )
+                {
+                    Write_LR_Lookup_Table_File( control, entry, n );
                 }
             }
+
+            Make_LR_Lookup_Table_Packed( entry, n );
+
+            entry->next = LR_cache;
+            LR_cache = entry;
         }
+
+        entry->ref_count++;
+    }
+
+    if ( key != NULL )
+    {
+        sfree( key, __FILE__, __LINE__ );
+    }
+
+    /* release the tables of the previous simulation (if any) only after
+     * acquiring the new ones, so unchanged tables are not rebuilt */
+    if ( LR_prev != NULL )
+    {
+        Finalize_LR_Lookup_Table( system, control, workspace );
     }
 
+    workspace->LR = entry->LR;
+    workspace->LR_packed = entry->packed;
+
     /***** //test LR-Lookup table
      evdw_maxerr = 0;
      eele_maxerr = 0;
@@ -410,54 +848,38 @@ void Make_LR_Lookup_Table( reax_system *system, control_params *control,
              fprintf( stderr, "evdw_maxerr: %24.15e\n", evdw_maxerr );
              fprintf( stderr, "eele_maxerr: %24.15e\n", eele_maxerr );
     *******/
-
-    sfree( h, __FILE__, __LINE__ );
-    sfree( fh, __FILE__, __LINE__ );
-    sfree( fvdw, __FILE__, __LINE__ );
-    sfree( fCEvd, __FILE__, __LINE__ );
-    sfree( fele, __FILE__, __LINE__ );
-    sfree( fCEclmb, __FILE__, __LINE__ );
 }
 
 
+/* Stop using the long-range lookup tables of a simulation,
+ * freeing them if no other simulation uses them */
 void Finalize_LR_Lookup_Table( reax_system *system, control_params *control,
        static_storage *workspace )
 {
-    int i, j;
-    int num_atom_types;
-    int existing_types[MAX_ATOM_TYPES];
-
-    num_atom_types = system->reax_param.num_atom_types;
+    LR_lookup_cache_entry *entry, **prev;
 
-    for ( i = 0; i < MAX_ATOM_TYPES; ++i )
-    {
-        existing_types[i] = 0;
-    }
-    for ( i = 0; i < system->N; ++i )
-    {
-        existing_types[ system->atoms[i].type ] = 1;
-    }
-
-    for ( i = 0; i < num_atom_types; ++i )
+#if defined(_OPENMP)
+    #pragma omp critical (LR_cache)
+#endif
     {
-        if ( existing_types[i] )
+        for ( prev = &LR_cache; *prev != NULL; prev = &(*prev)->next )
         {
-            for ( j = i; j < num_atom_types; ++j )
+            if ( (*prev)->LR == workspace->LR )
             {
-                if ( existing_types[j] )
+                entry = *prev;
+                entry->ref_count--;
+
+                if ( entry->ref_count == 0 )
                 {
-                    sfree( workspace->LR[i][j].y, __FILE__, __LINE__ );
-                    sfree( workspace->LR[i][j].H, __FILE__, __LINE__ );
-                    sfree( workspace->LR[i][j].vdW, __FILE__, __LINE__ );
-                    sfree( workspace->LR[i][j].CEvd, __FILE__, __LINE__ );
-                    sfree( workspace->LR[i][j].ele, __FILE__, __LINE__ );
-                    sfree( workspace->LR[i][j].CEclmb, __FILE__, __LINE__ );
+                    *prev = entry->next;
+                    Deallocate_LR_Lookup_Table( entry );
+                    sfree( entry->key, __FILE__, __LINE__ );
+                    sfree( entry, __FILE__, __LINE__ );
                 }
+                break;
             }
         }
-
-        sfree( workspace->LR[i], __FILE__, __LINE__ );
     }
 
-    sfree( workspace->LR, __FILE__, __LINE__ );
+    workspace->LR = NULL;
 }
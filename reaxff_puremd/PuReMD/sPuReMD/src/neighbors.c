@@ -152,6 +152,11 @@ void Estimate_Num_Neighbors( reax_system const * const system,
 
     /* for each cell in the grid along the 3
      * Cartesian directions: (i, j, k) => (x, y, z) */
+#if defined(_OPENMP)
+    #pragma omp parallel for collapse(3) default(shared) \
+        private(i, j, k, l, m, itr, x, y, z, atom1, atom2, max, count, nbr_atoms, nbrs, nbrs_cp) \
+        reduction(+: num_far) schedule(dynamic)
+#endif
     for ( i = 0; i < g->ncell[0]; i++ )
     {
         for ( j = 0; j < g->ncell[1]; j++ )
@@ -173,7 +178,7 @@ void Estimate_Num_Neighbors( reax_system const * const system,
                     {
                         /* if the Verlet list cutoff covers the closest point
                          * in the neighboring grid cell, then search through the cell's atoms */
-                        if ( DistSqr_to_CP(nbrs_cp[itr], system->atoms[atom1].x )
+                        if ( DistSqr_to_CP(nbrs_cp[itr], system->x[atom1] )
                                 <= SQR(control->vlist_cut) )
                         {
                             x = nbrs[itr][0];
@@ -192,8 +197,8 @@ void Estimate_Num_Neighbors( reax_system const * const system,
 
                                 if ( atom1 >= atom2 )
                                 {
-                                    count = Count_Far_Neighbors( system->atoms[atom1].x,
-                                                system->atoms[atom2].x, atom1, atom2, 
+                                    count = Count_Far_Neighbors( system->x[atom1],
+                                                system->x[atom2], atom1, atom2, 
                                                 &system->box, control->vlist_cut );
 
                                     num_far += count;
@@ -212,19 +217,83 @@ void Estimate_Num_Neighbors( reax_system const * const system,
 }
 
 
-/* Generate the far neighbor list */
-int Generate_Neighbor_Lists( reax_system * const system,
-        control_params const * const control, simulation_data * const data,
-        static_storage * const workspace, reax_list ** const lists )
+/* Find the far neighbors of one atom, which is binned to grid cell (i, j, k)
+ *
+ * far_nbr_list: where to write the far neighbors of the atom
+ * max_far: max. num. of far neighbors to write (0 to only count them)
+ *
+ * returns: num. of far neighbors of the atom (which may exceed max_far) */
+static int Find_Atom_Far_Neighbors( reax_system const * const system,
+        control_params const * const control,
+        find_far_neighbors_function Find_Far_Neighbors,
+        int i, int j, int k, int atom1,
+        far_neighbor_data * const far_nbr_list, int max_far )
 {
-    int i, j, k, l, m, itr;
-    int x, y, z;
-    int atom1, atom2, max;
-    int num_far, count, flag_oom, ret;
+    int m, itr, x, y, z, atom2, max, num_far;
     int *nbr_atoms;
     ivec *nbrs;
     rvec *nbrs_cp;
     grid const * const g = &system->g;
+
+    num_far = 0;
+    nbrs = g->nbrs[i][j][k];
+    nbrs_cp = g->nbrs_cp[i][j][k];
+    itr = 0;
+
+    /* for each of the neighboring grid cells within
+     * the Verlet list cutoff distance */
+    while ( nbrs[itr][0] >= 0 )
+    {
+        /* if the Verlet list cutoff covers the closest point
+         * in the neighboring grid cell, then search through the cell's atoms */
+        if ( DistSqr_to_CP( nbrs_cp[itr], system->x[atom1] )
+                <= SQR(control->vlist_cut) )
+        {
+            x = nbrs[itr][0];
+            y = nbrs[itr][1];
+            z = nbrs[itr][2];
+            nbr_atoms = g->atoms[x][y][z];
+            max = g->top[x][y][z];
+
+            /* pick up another atom from the neighbor cell;
+             * we have to compare atom1 with its own periodic images as well
+             * in the case of periodic boundary conditions,
+             * hence the equality in the if stmt below */
+            for ( m = 0; m < max; ++m )
+            {
+                atom2 = nbr_atoms[m];
+
+                if ( atom1 >= atom2 )
+                {
+                    num_far += Find_Far_Neighbors( system->x[atom1],
+                            system->x[atom2], atom1, atom2,
+                            &system->box, control->vlist_cut,
+                            &far_nbr_list[MIN( num_far, max_far )],
+                            max_far - num_far );
+                }
+            }
+        }
+
+        ++itr;
+    }
+
+    return num_far;
+}
+
+
+/* Generate the far neighbor list
+ *
+ * With multiple threads, the neighbors of each atom are first counted in parallel,
+ * then the atoms are assigned offsets into the list by a prefix sum in the same
+ * order as the serial traversal of the grid cells, and finally the neighbors are
+ * written in parallel.  The resulting list is identical to the serial one. */
+int Generate_Neighbor_Lists( reax_system * const system,
+        control_params const * const control, simulation_data * const data,
+        static_storage * const workspace, reax_list ** const lists )
+{
+    int i, j, k, l;
+    int atom1, num_far, count, ret;
+    grid const * const g = &system->g;
     reax_list *far_nbrs;
     find_far_neighbors_function Find_Far_Neighbors;
     real t_start, t_elapsed;
@@ -232,7 +301,6 @@ int Generate_Neighbor_Lists( reax_system * const system,
     t_start = Get_Time( );
     num_far = 0;
     far_nbrs = lists[FAR_NBRS];
-    flag_oom = FALSE;
     ret = SUCCESS;
 
     Choose_Neighbor_Finder( system, control, &Find_Far_Neighbors );
@@ -243,84 +311,113 @@ int Generate_Neighbor_Lists( reax_system * const system,
         Set_End_Index( i, 0, far_nbrs );
     }
 
-    /* for each cell in the grid along the 3
-     * Cartesian directions: (i, j, k) => (x, y, z) */
-    for ( i = 0; i < g->ncell[0]; i++ )
+    if ( control->num_threads > 1 )
     {
-        for ( j = 0; j < g->ncell[1]; j++ )
+        /* count the far neighbors of each atom, temporarily stored as its end index */
+#if defined(_OPENMP)
+        #pragma omp parallel for collapse(3) default(shared) \
+            private(i, j, k, l, atom1) schedule(dynamic)
+#endif
+        for ( i = 0; i < g->ncell[0]; i++ )
         {
-            for ( k = 0; k < g->ncell[2]; k++ )
+            for ( j = 0; j < g->ncell[1]; j++ )
             {
-                nbrs = g->nbrs[i][j][k];
-                nbrs_cp = g->nbrs_cp[i][j][k];
-
-                /* for each atom in the current cell */
-                for ( l = 0; l < g->top[i][j][k]; ++l )
+                for ( k = 0; k < g->ncell[2]; k++ )
                 {
-                    atom1 = g->atoms[i][j][k][l];
-                    Set_Start_Index( atom1, num_far, far_nbrs );
-                    itr = 0;
-
-                    /* for each of the neighboring grid cells within
-                     * the Verlet list cutoff distance */
-                    while ( nbrs[itr][0] >= 0 )
+                    for ( l = 0; l < g->top[i][j][k]; ++l )
                     {
-                        /* if the Verlet list cutoff covers the closest point
-                         * in the neighboring grid cell, then search through the cell's atoms */
-                        if ( DistSqr_to_CP( nbrs_cp[itr], system->atoms[atom1].x )
-                                <= SQR(control->vlist_cut) )
-                        {
-                            x = nbrs[itr][0];
-                            y = nbrs[itr][1];
-                            z = nbrs[itr][2];
-                            nbr_atoms = g->atoms[x][y][z];
-                            max = g->top[x][y][z];
+                        atom1 = g->atoms[i][j][k][l];
 
-                            /* pick up another atom from the neighbor cell;
-                             * we have to compare atom1 with its own periodic images as well
-                             * in the case of periodic boundary conditions,
-                             * hence the equality in the if stmt below */
-                            for ( m = 0; m < max; ++m )
-                            {
-                                atom2 = nbr_atoms[m];
+                        Set_End_Index( atom1, Find_Atom_Far_Neighbors( system, control,
+                                    Find_Far_Neighbors, i, j, k, atom1,
+                                    far_nbrs->far_nbr_list, 0 ), far_nbrs );
+                    }
+                }
+            }
+        }
 
-                                if ( atom1 >= atom2 )
-                                {
-                                    count = Find_Far_Neighbors( system->atoms[atom1].x,
-                                            system->atoms[atom2].x, atom1, atom2,
-                                            &system->box, control->vlist_cut,
-                                            &far_nbrs->far_nbr_list[num_far],
-                                            far_nbrs->total_intrs - num_far );
+        /* prefix sum over the atoms in the order of the serial traversal */
+        for ( i = 0; i < g->ncell[0]; i++ )
+        {
+            for ( j = 0; j < g->ncell[1]; j++ )
+            {
+                for ( k = 0; k < g->ncell[2]; k++ )
+                {
+                    for ( l = 0; l < g->top[i][j][k]; ++l )
+                    {
+                        atom1 = g->atoms[i][j][k][l];
+                        count = End_Index( atom1, far_nbrs );
 
-                                    num_far += count;
+                        Set_Start_Index( atom1, num_far, far_nbrs );
+                        num_far += count;
+                        Set_End_Index( atom1, num_far, far_nbrs );
+                    }
+                }
+            }
+        }
 
-                                    if ( num_far >= far_nbrs->total_intrs )
-                                    {
-                                        goto OUT_OF_MEMORY;
-                                    }
-                                }
-                            }
-                        }
+        if ( num_far < far_nbrs->total_intrs )
+        {
+#if defined(_OPENMP)
+            #pragma omp parallel for collapse(3) default(shared) \
+                private(i, j, k, l, atom1) schedule(dynamic)
+#endif
+            for ( i = 0; i < g->ncell[0]; i++ )
+            {
+                for ( j = 0; j < g->ncell[1]; j++ )
+                {
+                    for ( k = 0; k < g->ncell[2]; k++ )
+                    {
+                        for ( l = 0; l < g->top[i][j][k]; ++l )
+                        {
+                            atom1 = g->atoms[i][j][k][l];
 
-                        ++itr;
+                            Find_Atom_Far_Neighbors( system, control, Find_Far_Neighbors,
+                                    i, j, k, atom1,
+                                    &far_nbrs->far_nbr_list[Start_Index( atom1, far_nbrs )],
+                                    Num_Entries( atom1, far_nbrs ) );
+                        }
+                    }
+                }
+            }
+        }
+    }
+    else
+    {
+        /* for each cell in the grid along the 3
+         * Cartesian directions: (i, j, k) => (x, y, z) */
+        for ( i = 0; i < g->ncell[0] && num_far < far_nbrs->total_intrs; i++ )
+        {
+            for ( j = 0; j < g->ncell[1] && num_far < far_nbrs->total_intrs; j++ )
+            {
+                for ( k = 0; k < g->ncell[2] && num_far < far_nbrs->total_intrs; k++ )
+                {
+                    /* for each atom in the current cell */
+                    for ( l = 0; l < g->top[i][j][k] && num_far < far_nbrs->total_intrs; ++l )
+                    {
+                        atom1 = g->atoms[i][j][k][l];
+
+                        Set_Start_Index( atom1, num_far, far_nbrs );
+                        num_far += Find_Atom_Far_Neighbors( system, control,
+                                Find_Far_Neighbors, i, j, k, atom1,
+                                &far_nbrs->far_nbr_list[num_far],
+                                far_nbrs->total_intrs - num_far );
+                        Set_End_Index( atom1, num_far, far_nbrs );
                     }
-
-                    Set_End_Index( atom1, num_far, far_nbrs );
                 }
             }
         }
     }
 
-    //TODO: conditionally perform these assignments if periodic boundary conditions are enabled
-    for ( i = 0; i < system->N; i++ )
+    if ( num_far >= far_nbrs->total_intrs )
     {
-        ivec_MakeZero( system->atoms[i].rel_map );
+        ret = FAILURE;
     }
 
-    if ( flag_oom == TRUE )
+    //TODO: conditionally perform these assignments if periodic boundary conditions are enabled
+    for ( i = 0; i < system->N; i++ )
     {
-        OUT_OF_MEMORY:
-            ret = FAILURE;
+        ivec_MakeZero( system->atoms[i].rel_map );
     }
 
 #if defined(DEBUG_FOCUS)
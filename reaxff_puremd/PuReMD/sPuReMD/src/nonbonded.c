@@ -24,6 +24,7 @@
 #include "bond_orders.h"
 #include "list.h"
 #include "lookup.h"
+#include "tool_box.h"
 #include "vector.h"
 
 
@@ -49,8 +50,8 @@ static void Compute_Polarization_Energy( reax_system* system,
             if ( system->atoms[i].qmmm_mask == TRUE )
             {
 #endif
-            q = system->atoms[i].q;
-            type_i = system->atoms[i].type;
+            q = system->q[i];
+            type_i = system->type[i];
 
             e_pol += KCALpMOL_to_EV * (system->reax_param.sbp[ type_i ].chi * q
                     + (system->reax_param.sbp[ type_i ].eta / 2.0) * SQR( q ));
@@ -71,15 +72,15 @@ static void Compute_Polarization_Energy( reax_system* system,
             if ( system->atoms[i].qmmm_mask == TRUE )
             {
 #endif
-            q = system->atoms[i].q;
-            type_i = system->atoms[i].type;
+            q = system->q[i];
+            type_i = system->type[i];
 
             /* energy due to first and second order EE parameters */
             e_pol += KCALpMOL_to_EV * (system->reax_param.sbp[ type_i ].chi * q
                     + (system->reax_param.sbp[ type_i ].eta / 2.0) * SQR( q ));
 
             /* energy due to coupling with kinetic energy potential */
-            e_pol += KCALpMOL_to_EV * system->atoms[i].q * workspace->s[0][ system->N + i ];
+            e_pol += KCALpMOL_to_EV * system->q[i] * workspace->s[0][ system->N + i ];
 #if defined(QMMM)
             }
 #endif
@@ -143,7 +144,7 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     || control->ensemble == aNPT || control->compute_pressure == TRUE )
             {
                 rvec_iMultiply( x_i, system->atoms[i].rel_map, system->box.box_norms );
-                rvec_Add( x_i, system->atoms[i].x );
+                rvec_Add( x_i, system->x[i] );
             }
 
             for ( pj = start_i; pj < end_i; ++pj )
@@ -154,8 +155,8 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     j = nbr_pj->nbr;
 
                     r_ij = nbr_pj->d;
-                    twbp = &system->reax_param.tbp[ system->atoms[i].type ]
-                             [ system->atoms[j].type ];
+                    twbp = &system->reax_param.tbp[ system->type[i] ]
+                             [ system->type[j] ];
                     /* i == j: self-interaction from periodic image,
                      * important for supporting small boxes! */
                     self_coef = (i == j) ? 0.5 : 1.0;
@@ -267,11 +268,11 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
 #endif
                     dr3gamij_1 = r_ij * r_ij * r_ij + POW( twbp->gamma, -3.0 );
                     dr3gamij_3 = POW( dr3gamij_1 , 1.0 / 3.0 );
-                    e_clb = C_ELE * (system->atoms[i].q * system->atoms[j].q) / dr3gamij_3;
+                    e_clb = C_ELE * (system->q[i] * system->q[j]) / dr3gamij_3;
                     e_ele = self_coef * (e_clb * Tap);
                     e_ele_total += e_ele;
 
-                    de_clb = -C_ELE * (system->atoms[i].q * system->atoms[j].q)
+                    de_clb = -C_ELE * (system->q[i] * system->q[j])
                             * (r_ij * r_ij) / POW( dr3gamij_1, 4.0 / 3.0);
                     CEclmb = self_coef * (de_clb * Tap + e_clb * dTap);
 #if defined(QMMM)
@@ -385,7 +386,7 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     fprintf( out_control->ecou, "%6d%6d%24.15e%24.15e%24.15e%24.15e\n",
                              MIN( workspace->orig_id[i], workspace->orig_id[j] ),
                              MAX( workspace->orig_id[i], workspace->orig_id[j] ),
-                             r_ij, system->atoms[i].q, system->atoms[j].q,
+                             r_ij, system->q[i], system->q[j],
                              e_ele/*, e_ele_total*/ );
 #endif
 
@@ -418,7 +419,7 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
                         || control->ensemble == aNPT || control->compute_pressure == TRUE )
                 {
                     rvec_iMultiply( x_i, system->atoms[i].rel_map, system->box.box_norms );
-                    rvec_Add( x_i, system->atoms[i].x );
+                    rvec_Add( x_i, system->x[i] );
                 }
 
                 for ( pj = Start_Index(i, far_nbrs); pj < End_Index(i, far_nbrs); ++pj )
@@ -427,8 +428,8 @@ void vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     j = nbr_pj->nbr;
 
                     /* kinetic energy terms */
-                    xcut = 0.5 * ( system->reax_param.sbp[ system->atoms[i].type ].b_s_acks2
-                            + system->reax_param.sbp[ system->atoms[j].type ].b_s_acks2 );
+                    xcut = 0.5 * ( system->reax_param.sbp[ system->type[i] ].b_s_acks2
+                            + system->reax_param.sbp[ system->type[j] ].b_s_acks2 );
 
                     if ( far_nbrs->far_nbr_list[pj].d < xcut )
                     {
@@ -536,7 +537,7 @@ void Tabulated_vdW_Coulomb_Energy( reax_system *system, control_params *control,
         simulation_data *data, static_storage *workspace, reax_list **lists,
         output_controls *out_control )
 {
-    int steps, update_freq, update_energies;
+    int i, steps, update_freq, update_energies, max_nbrs;
     reax_list *far_nbrs;
     real e_vdW_total, e_ele_total;
 
@@ -547,41 +548,86 @@ void Tabulated_vdW_Coulomb_Energy( reax_system *system, control_params *control,
     e_vdW_total = 0.0;
     e_ele_total = 0.0;
 
+    /* the per-thread buffers hold the neighbors of one atom at a time */
+    max_nbrs = 0;
+    for ( i = 0; i < system->N; ++i )
+    {
+        max_nbrs = MAX( max_nbrs, End_Index(i, far_nbrs) - Start_Index(i, far_nbrs) );
+    }
+
+    if ( workspace->LR_nbr_size < max_nbrs )
+    {
+        workspace->LR_nbr_size = max_nbrs;
+        workspace->LR_nbr = srealloc( workspace->LR_nbr,
+                sizeof(int) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_idx = srealloc( workspace->LR_idx,
+                sizeof(int) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_dif = srealloc( workspace->LR_dif,
+                sizeof(real) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_s_vdW = srealloc( workspace->LR_s_vdW,
+                sizeof(real) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_s_ele = srealloc( workspace->LR_s_ele,
+                sizeof(real) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_CEvd = srealloc( workspace->LR_CEvd,
+                sizeof(real) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+        workspace->LR_CEclmb = srealloc( workspace->LR_CEclmb,
+                sizeof(real) * control->num_threads * max_nbrs, __FILE__, __LINE__ );
+    }
+
 #if defined(_OPENMP)
     #pragma omp parallel default(shared) reduction(+: e_vdW_total, e_ele_total)
 #endif
     {
-        int i, j, pj, r;
+        int i, j, k, pj, r, num_nbrs;
         int type_i, type_j, tmin, tmax;
         int start_i, end_i;
-        real r_ij, self_coef, base, dif;
-        real e_vdW, e_ele;
+        int *nbr, *idx;
+        real r_ij, self_coef, CE;
+        real *dif, *s_vdW, *s_ele, *CEvd, *CEclmb;
         real d, xcut, bond_softness, d_bond_softness, effpot_diff;
-        real CEvd, CEclmb;
+        real e_ele;
+#if defined(TEST_ENERGY)
+        real e_vdW;
+#endif
         rvec force;
         rtensor press;
         far_neighbor_data *nbr_pj;
         LR_lookup_table *t;
-#if defined(_OPENMP)
+        const real *c;
         int tid;
 
+#if defined(_OPENMP)
         tid = omp_get_thread_num( );
+#else
+        tid = 0;
+#endif
+        nbr = &workspace->LR_nbr[tid * workspace->LR_nbr_size];
+        idx = &workspace->LR_idx[tid * workspace->LR_nbr_size];
+        dif = &workspace->LR_dif[tid * workspace->LR_nbr_size];
+        s_vdW = &workspace->LR_s_vdW[tid * workspace->LR_nbr_size];
+        s_ele = &workspace->LR_s_ele[tid * workspace->LR_nbr_size];
+        CEvd = &workspace->LR_CEvd[tid * workspace->LR_nbr_size];
+        CEclmb = &workspace->LR_CEclmb[tid * workspace->LR_nbr_size];
 
+#if defined(_OPENMP)
         #pragma omp for schedule(guided)
 #endif
         for ( i = 0; i < system->N; ++i )
         {
-            type_i = system->atoms[i].type;
+            type_i = system->type[i];
             start_i = Start_Index(i, far_nbrs);
             end_i = End_Index(i, far_nbrs);
+            num_nbrs = 0;
 
+            /* gather the neighbors within the cutoff along with the
+             * spline intervals containing their distances */
             for ( pj = start_i; pj < end_i; ++pj )
             {
                 if ( far_nbrs->far_nbr_list[pj].d <= control->nonb_cut )
                 {
                     nbr_pj = &far_nbrs->far_nbr_list[pj];
                     j = nbr_pj->nbr;
-                    type_j = system->atoms[j].type;
+                    type_j = system->type[j];
                     r_ij = nbr_pj->d;
                     self_coef = (i == j) ? 0.5 : 1.0;
                     tmin = MIN( type_i, type_j );
@@ -594,92 +640,123 @@ void Tabulated_vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     {
                         ++r;
                     }
-                    base = (real) (r + 1) * t->dx;
-                    dif = r_ij - base;
 
-#if defined(DEBUG_FOCUS)
-                    fprintf( stderr, "[INFO] r: %f, i: %d, base: %f, dif: %f\n", r, i, base, dif );
-#endif
-
-                    if ( update_energies )
+                    nbr[num_nbrs] = pj;
+                    idx[num_nbrs] = t->offset + r;
+                    dif[num_nbrs] = r_ij - (real) (r + 1) * t->dx;
+                    s_vdW[num_nbrs] = self_coef;
+                    s_ele[num_nbrs] = self_coef * system->q[i] * system->q[j];
+#if defined(QMMM)
+                    /* same QM/MM exclusions as vdW_Coulomb_Energy */
+                    if ( system->atoms[i].qmmm_mask == FALSE
+                            || system->atoms[j].qmmm_mask == FALSE )
                     {
-                        e_vdW = ((t->vdW[r].d * dif + t->vdW[r].c) * dif + t->vdW[r].b)
-                            * dif + t->vdW[r].a;
-                        e_vdW *= self_coef;
-
-                        e_ele = ((t->ele[r].d * dif + t->ele[r].c) * dif + t->ele[r].b)
-                            * dif + t->ele[r].a;
-                        e_ele *= self_coef * system->atoms[i].q * system->atoms[j].q;
-
-                        e_vdW_total += e_vdW;
-                        e_ele_total += e_ele;
+                        s_vdW[num_nbrs] = 0.0;
+                    }
+                    if ( system->atoms[i].qmmm_mask == FALSE
+                            && system->atoms[j].qmmm_mask == FALSE )
+                    {
+                        s_ele[num_nbrs] = 0.0;
                     }
+#endif
+                    ++num_nbrs;
+                }
+            }
 
-                    CEvd = ((t->CEvd[r].d * dif + t->CEvd[r].c) * dif + t->CEvd[r].b)
-                        * dif + t->CEvd[r].a;
-                    CEvd *= self_coef;
+            /* evaluate the splines of all gathered neighbors */
+            if ( update_energies )
+            {
+#if defined(_OPENMP)
+                #pragma omp simd private(c) reduction(+: e_vdW_total, e_ele_total)
+#endif
+                for ( k = 0; k < num_nbrs; ++k )
+                {
+                    c = &workspace->LR_packed.e[8 * idx[k]];
+                    e_vdW_total += s_vdW[k]
+                        * (((c[3] * dif[k] + c[2]) * dif[k] + c[1]) * dif[k] + c[0]);
+                    e_ele_total += s_ele[k]
+                        * (((c[7] * dif[k] + c[6]) * dif[k] + c[5]) * dif[k] + c[4]);
+                }
+            }
 
-                    CEclmb = ((t->CEclmb[r].d * dif + t->CEclmb[r].c) * dif + t->CEclmb[r].b)
-                        * dif + t->CEclmb[r].a;
-                    CEclmb *= self_coef * system->atoms[i].q * system->atoms[j].q;
+#if defined(_OPENMP)
+            #pragma omp simd private(c)
+#endif
+            for ( k = 0; k < num_nbrs; ++k )
+            {
+                c = &workspace->LR_packed.CE[8 * idx[k]];
+                CEvd[k] = s_vdW[k]
+                    * (((c[3] * dif[k] + c[2]) * dif[k] + c[1]) * dif[k] + c[0]);
+                CEclmb[k] = s_ele[k]
+                    * (((c[7] * dif[k] + c[6]) * dif[k] + c[5]) * dif[k] + c[4]);
+            }
 
-                    if ( control->compute_pressure == FALSE &&
-                            (control->ensemble == NVE || control->ensemble == nhNVT
-                             || control->ensemble == bNVT) )
-                    {
+            /* scatter the forces */
+            for ( k = 0; k < num_nbrs; ++k )
+            {
+                nbr_pj = &far_nbrs->far_nbr_list[nbr[k]];
+                j = nbr_pj->nbr;
+                r_ij = nbr_pj->d;
+                CE = (CEvd[k] + CEclmb[k]) / r_ij;
+
+                if ( control->compute_pressure == FALSE &&
+                        (control->ensemble == NVE || control->ensemble == nhNVT
+                         || control->ensemble == bNVT) )
+                {
 #if !defined(_OPENMP)
-                        rvec_ScaledAdd( system->atoms[i].f,
-                                -(CEvd + CEclmb) / r_ij, nbr_pj->dvec );
-                        rvec_ScaledAdd( system->atoms[j].f,
-                                (CEvd + CEclmb) / r_ij, nbr_pj->dvec );
+                    rvec_ScaledAdd( system->atoms[i].f, -CE, nbr_pj->dvec );
+                    rvec_ScaledAdd( system->atoms[j].f, CE, nbr_pj->dvec );
 #else
-                        rvec_ScaledAdd( workspace->f_local[tid * system->N + i],
-                                -(CEvd + CEclmb) / r_ij, nbr_pj->dvec );
-                        rvec_ScaledAdd( workspace->f_local[tid * system->N + j],
-                                (CEvd + CEclmb) / r_ij, nbr_pj->dvec );
+                    rvec_ScaledAdd( workspace->f_local[tid * system->N + i],
+                            -CE, nbr_pj->dvec );
+                    rvec_ScaledAdd( workspace->f_local[tid * system->N + j],
+                            CE, nbr_pj->dvec );
 #endif
-                    }
-                    else if ( control->ensemble == sNPT || control->ensemble == iNPT
-                            || control->ensemble == aNPT || control->compute_pressure == TRUE )
-                    {
-                        /* for pressure coupling, terms not related to bond order
-                           derivatives are added directly into pressure vector/tensor */
-                        rvec_Scale( force, (CEvd + CEclmb) / r_ij, nbr_pj->dvec );
+                }
+                else if ( control->ensemble == sNPT || control->ensemble == iNPT
+                        || control->ensemble == aNPT || control->compute_pressure == TRUE )
+                {
+                    /* for pressure coupling, terms not related to bond order
+                       derivatives are added directly into pressure vector/tensor */
+                    rvec_Scale( force, CE, nbr_pj->dvec );
 #if !defined(_OPENMP)
-                        rvec_ScaledAdd( system->atoms[i].f, -1.0, force );
-                        rvec_Add( system->atoms[j].f, force );
+                    rvec_ScaledAdd( system->atoms[i].f, -1.0, force );
+                    rvec_Add( system->atoms[j].f, force );
 #else
-                        rvec_ScaledAdd( workspace->f_local[tid * system->N + i], -1.0, force );
-                        rvec_Add( workspace->f_local[tid * system->N + j], force );
+                    rvec_ScaledAdd( workspace->f_local[tid * system->N + i], -1.0, force );
+                    rvec_Add( workspace->f_local[tid * system->N + j], force );
 #endif
 
-                        /* pressure */
-                        rvec_Scale( force, -1.0, force );
-                        rvec_OuterProduct( press, force, nbr_pj->dvec );
+                    /* pressure, with positions relative to atom i */
+                    rvec_OuterProduct( press, force, nbr_pj->dvec );
 #if !defined(_OPENMP)
-                        rtensor_Add( data->press, press );
+                    rtensor_Add( data->press, press );
 #else
-                        rtensor_Add( data->press_local[tid], press );
+                    rtensor_Add( data->press_local[tid], press );
 #endif
-                    }
+                }
 
 #if defined(TEST_ENERGY)
-                    fprintf( out_control->evdw, "%6d%6d%24.15e%24.15e%24.15e\n",
-                            workspace->orig_id[i], workspace->orig_id[j],
-                            r_ij, e_vdW, data->E_vdW );
-                    fprintf( out_control->ecou, "%6d%6d%24.15e%24.15e%24.15e%24.15e%24.15e\n",
-                            workspace->orig_id[i], workspace->orig_id[j],
-                            r_ij, system->atoms[i].q, system->atoms[j].q,
-                            e_ele, data->E_Ele );
+                c = &workspace->LR_packed.e[8 * idx[k]];
+                e_vdW = s_vdW[k]
+                    * (((c[3] * dif[k] + c[2]) * dif[k] + c[1]) * dif[k] + c[0]);
+                e_ele = s_ele[k]
+                    * (((c[7] * dif[k] + c[6]) * dif[k] + c[5]) * dif[k] + c[4]);
+                fprintf( out_control->evdw, "%6d%6d%24.15e%24.15e%24.15e\n",
+                        workspace->orig_id[i], workspace->orig_id[j],
+                        r_ij, e_vdW, data->E_vdW );
+                fprintf( out_control->ecou, "%6d%6d%24.15e%24.15e%24.15e%24.15e%24.15e\n",
+                        workspace->orig_id[i], workspace->orig_id[j],
+                        r_ij, system->q[i], system->q[j],
+                        e_ele, data->E_Ele );
 #endif
 
 #if defined(TEST_FORCES)
-                    rvec_ScaledAdd( workspace->f_vdw[i], -CEvd, nbr_pj->dvec );
-                    rvec_ScaledAdd( workspace->f_vdw[j], +CEvd, nbr_pj->dvec );
-                    rvec_ScaledAdd( workspace->f_ele[i], -CEclmb, nbr_pj->dvec );
-                    rvec_ScaledAdd( workspace->f_ele[j], +CEclmb, nbr_pj->dvec );
+                rvec_ScaledAdd( workspace->f_vdw[i], -CEvd[k], nbr_pj->dvec );
+                rvec_ScaledAdd( workspace->f_vdw[j], +CEvd[k], nbr_pj->dvec );
+                rvec_ScaledAdd( workspace->f_ele[i], -CEclmb[k], nbr_pj->dvec );
+                rvec_ScaledAdd( workspace->f_ele[j], +CEclmb[k], nbr_pj->dvec );
 #endif
-                }
             }
         }
 
@@ -704,8 +781,8 @@ void Tabulated_vdW_Coulomb_Energy( reax_system *system, control_params *control,
                     j = nbr_pj->nbr;
 
                     /* kinetic energy terms */
-                    xcut = 0.5 * ( system->reax_param.sbp[ system->atoms[i].type ].b_s_acks2
-                            + system->reax_param.sbp[ system->atoms[j].type ].b_s_acks2 );
+                    xcut = 0.5 * ( system->reax_param.sbp[ system->type[i] ].b_s_acks2
+                            + system->reax_param.sbp[ system->type[j] ].b_s_acks2 );
 
                     if ( far_nbrs->far_nbr_list[pj].d < xcut )
                     {
@@ -48,7 +48,8 @@
 //#define USE_REF_FORTRAN_EREAXFF_CONSTANTS
 /* constants defined in LAMMPS ReaxFF code (useful for comparisons) */
 //#define USE_LAMMPS_REAXFF_CONSTANTS
-/* enables reordering atoms after neighbor list generation for improved cache performance */
+/* enables reordering atoms after neighbor list generation for improved cache performance
+ * (also defined by configuring with --enable-reorder-atoms) */
 //#define REORDER_ATOMS
 /* enables support for small simulation boxes (i.e. a simulation box with any
  * dimension less than twice the Verlet list cutoff distance, vlist_cut),
@@ -347,6 +348,10 @@ enum solver
     CG_S = 2,
     SDM_S = 3,
     BiCGStab_S = 4,
+    /* CG on the QEq s and t systems together; EE and ACKS2 have a single
+     * right-hand side and fall back to CG, and QEq is not available in
+     * QM/MM builds (--enable-qmmm), so there this is the same as CG_S */
+    DUAL_CG_S = 5,
 };
 
 /* initial guess type for the linear solver
@@ -382,6 +387,18 @@ enum pre_app
 };
 
 
+/* strategy used by threads to accumulate the bond order and Delta
+ * derivative coefficients in the bonded interactions (torsion, hydrogen bonds) */
+enum bonded_reduction_type
+{
+    /* update the shared coefficients using atomic operations */
+    ATOMIC_REDUCTION = 0,
+    /* accumulate coefficients not owned by a thread into thread-local
+     * buffers, which are summed after the interactions are computed */
+    THREAD_LOCAL_REDUCTION = 1,
+};
+
+
 /* atom types as pertains to hydrogen bonding */
 enum hydrogen_bonding_atom_types
 {
@@ -430,6 +447,7 @@ typedef struct reallocate_data reallocate_data;
 typedef struct LR_data LR_data;
 typedef struct cubic_spline_coef cubic_spline_coef;
 typedef struct LR_lookup_table LR_lookup_table;
+typedef struct LR_lookup_table_packed LR_lookup_table_packed;
 typedef struct static_storage static_storage;
 typedef struct reax_list reax_list;
 typedef struct output_controls output_controls;
@@ -877,6 +895,9 @@ struct reax_system
     int prealloc_allocated;
     /* 0 if struct members are NOT allocated, 1 otherwise */
     int ffield_params_allocated;
+    /* TRUE if reax_param is shared with other systems through the force field cache
+     * (see Read_Force_Field_String), FALSE otherwise */
+    int ffield_params_shared;
     /* FALSE if struct members are NOT allocated, TRUE otherwise */
     int allocated;
     /* number of local (non-periodic image) atoms for the current simulation */
@@ -930,6 +951,13 @@ struct reax_system
     grid g;
     /* collection of atomic info. */
     reax_atom *atoms;
+    /* structure-of-arrays copies of the atom positions, charges, and types
+     * read in the force kernels, kept in the same (cell) order as atoms */
+    rvec *x;
+    /* */
+    real *q;
+    /* */
+    int *type;
     /* num. bonds per atom */
     int *bonds;
     /* num. hydrogen bonds per atom */
@@ -979,6 +1007,10 @@ struct control_params
      * >0 = use a lookup table (computed using splines), where
      * the positive integer value controls number of entries in the table */
     int tabulate;
+    /* directory in which long-range lookup tables are stored, so that they
+     * are only computed once for a set of force field parameters, cutoffs,
+     * and table size (empty string: tables are not stored) */
+    char tabulate_cache_dir[MAX_STR];
     /* simulation time step length (in ps) */
     real dt;
     /* number of simulation steps to elapse before
@@ -1066,6 +1098,15 @@ struct control_params
     /* error tolerance of solution produced by charge distribution
      * sparse iterative linear solver */
     real cm_solver_q_err;
+    /* TRUE if the charge solver stores the matrix and preconditioner
+     * factors in single precision and uses iterative refinement
+     * to reach cm_solver_q_err, FALSE otherwise */
+    unsigned int cm_solver_mixed_precision;
+    /* TRUE if the charge solver stores the column indices of the
+     * charge matrix as 16-bit deltas for its SpMV's, FALSE otherwise
+     * (this reduces memory traffic only, as the storage for the
+     * full column indices is kept for rebuilding the matrix) */
+    unsigned int cm_solver_compressed_matrix;
     /* ratio used in computing sparser charge matrix,
      * between 0.0 and 1.0 */
     real cm_domain_sparsity;
@@ -1088,9 +1129,13 @@ struct control_params
     unsigned int cm_init_guess_win_size;
     /* preconditioner type for linear solver */
     unsigned int cm_solver_pre_comp_type;
-    /* frequency (in terms of simulation time steps) at which to recompute
+    /* frequency (in terms of charge solves) at which to recompute
      * incomplete factorizations */
     unsigned int cm_solver_pre_comp_refactor;
+    /* ratio of solver iterations to those of the first solve using the current
+     * preconditioner above which the preconditioner is recomputed early,
+     * disabled if not positive */
+    real cm_solver_pre_comp_iters_thres;
     /* drop tolerance of incomplete factorization schemes (ILUT, ICHOLT, etc.)
      * used for preconditioning the iterative linear solver used in charge distribution */
     real cm_solver_pre_comp_droptol;
@@ -1124,6 +1169,9 @@ struct control_params
     int num_threads;
     /* TRUE if the num. OpenMP has bet set, FALSE otherwise */
     int num_threads_set;
+    /* strategy for accumulating bond order derivative coefficients across threads,
+     * see enum bonded_reduction_type */
+    int bonded_reduction_type;
     /* function pointers for bonded interactions */
     interaction_function intr_funcs[NUM_INTRS];
     /* function pointer for computing pairwise atom distance */
@@ -1209,6 +1257,10 @@ struct reax_timing
     real cm_solver_pre_app;
     /* num. of steps in iterative linear solver for charge distribution */
     int cm_solver_iters;
+    /* max. relative residual norm at exit of iterative linear solver for charge distribution */
+    real cm_solver_residual;
+    /* num. of preconditioner computations for charge distribution */
+    int cm_num_pre_comps;
     /**/
     real cm_solver_spmv;
     /**/
@@ -1316,6 +1368,9 @@ struct simulation_data
 #endif
     /* virial contribution to pressure */
     rtensor press;
+    /* virial of the interatomic forces (sum over atoms of the outer product
+     * of the force and the position), in kcal / mol */
+    rtensor force_virial;
     /* kinetic energy contribution to pressure */
     rtensor kin_press;
     /* total pressure */
@@ -1469,10 +1524,23 @@ struct sparse_matrix
     unsigned int m;
     /* row pointer (last element contains ACTUAL NNZ) */
     unsigned int *start;
-    /* column index for corresponding matrix entry */
+    /* column index for corresponding matrix entry, or if compressed is TRUE,
+     * the column of each entry as a 16-bit delta (short) from the column of the
+     * previous entry in its row (the row index for the first entry), where
+     * CM_DELTA_ESCAPE marks an entry whose full column index is stored in j_escape */
     unsigned int *j;
     /* matrix entry */
     real *val;
+    /* single precision copy of the matrix entries, used by the
+     * mixed precision charge solver (NULL if not in use) */
+    float *val_float;
+    /* TRUE if the column indices in j are compressed (see Compress_Matrix_Columns),
+     * reset to FALSE when the matrix is rebuilt */
+    int compressed;
+    /* full column indices of the escaped entries of a compressed matrix */
+    unsigned int *j_escape;
+    /* position of the first escaped entry of each row in j_escape */
+    unsigned int *escape_start;
 };
 
 
@@ -1545,6 +1613,23 @@ struct LR_lookup_table
     cubic_spline_coef *CEvd;
     cubic_spline_coef *ele;
     cubic_spline_coef *CEclmb;
+    /* position of the first entry of this table in LR_lookup_table_packed */
+    int offset;
+};
+
+
+/* cubic spline coefficients of all long-range lookup tables, packed so
+ * that the coefficients needed to evaluate one spline interval are
+ * contiguous, where entries [offset, offset + n) belong to the table
+ * with that offset */
+struct LR_lookup_table_packed
+{
+    /* num. of entries across all tables */
+    int n;
+    /* force coefficients, 8 per entry: a, b, c, d of CEvd then of CEclmb */
+    real *CE;
+    /* energy coefficients, 8 per entry: a, b, c, d of vdW then of ele */
+    real *e;
 };
 
 
@@ -1602,6 +1687,16 @@ struct static_storage
     /* initial guesses for solutions to the linear systems, in Coulombs */
     real **s;
     real **t;
+    /* num. of previous solutions held in s and t (at most 5),
+     * which limits the order of spline extrapolation for the initial guesses */
+    int cm_hist_size;
+    /* num. of charge solves performed using the current preconditioner,
+     * zero if no preconditioner has been computed for the current atoms */
+    int cm_pre_comp_age;
+    /* num. of solver iterations in the first solve using the current preconditioner */
+    int cm_pre_comp_iters;
+    /* num. of solver iterations in the most recent solve */
+    int cm_last_solver_iters;
 
     /* GMRES related storage */
     real *y;
@@ -1621,6 +1716,15 @@ struct static_storage
     real *q_hat;
     real *p;
 
+    /* dual CG related storage (second right-hand side) */
+    real *r2;
+    real *d2;
+    real *q2;
+    real *p2;
+
+    /* mixed precision CG related storage (refinement correction) */
+    real *e;
+
     /* SpMV related storage */
 #if defined(_OPENMP)
     real *b_local;
@@ -1682,6 +1786,9 @@ struct static_storage
     int *mark;
     int *old_mark;  // storage for analysis
     rvec *x_old;
+    /* atom positions at the time of the last far neighbor list generation,
+     * used to decide whether the list can be reused (see Reinitialize) */
+    rvec *x_vlist;
 
     /* storage space for bond restrictions */
     int *map_serials;
@@ -1692,6 +1799,13 @@ struct static_storage
 #if defined(_OPENMP)
     /* local forces per thread */
     rvec *f_local;
+    /* local Delta derivative coefficients per thread */
+    real *CdDelta_local;
+    /* local bond order derivative coefficients per thread,
+     * indexed by position in the bond list */
+    real *Cdbo_local;
+    /* num. of entries per thread allocated for Cdbo_local */
+    int Cdbo_local_size;
 #endif
     unsigned int temp_int_omp;
     real temp_real_omp;
@@ -1699,6 +1813,24 @@ struct static_storage
     reallocate_data realloc;
 
     LR_lookup_table **LR;
+    LR_lookup_table_packed LR_packed;
+    /* per-thread storage for the far neighbors of one atom within the
+     * nonbonded cutoff, used by the tabulated nonbonded interactions */
+    /* position of the neighbor in the far neighbor list */
+    int *LR_nbr;
+    /* entry of the neighbor's spline interval in LR_packed */
+    int *LR_idx;
+    /* offset of the pair distance within its spline interval */
+    real *LR_dif;
+    /* scaling of the van der Waals terms */
+    real *LR_s_vdW;
+    /* scaling of the Coulomb terms (includes the charges) */
+    real *LR_s_ele;
+    /* van der Waals and Coulomb force coefficients */
+    real *LR_CEvd;
+    real *LR_CEclmb;
+    /* num. of entries per thread allocated for the above */
+    int LR_nbr_size;
 
 #if defined(TEST_FORCES)
     /* Calculated on the fly in bond_orders.c */
@@ -1868,8 +2000,27 @@ struct spuremd_handle
     /* TRUE if reallocation is required due to num. atoms increasing
      * (this includes first simulation run), FALSE otherwise */
     int realloc;
+    /* TRUE if only atom positions, (fixed) charges, and the simulation box
+     * have changed since the last simulation (see update_qmmm), in which case
+     * the next simulation performs a lightweight re-initialization, FALSE otherwise */
+    int reinit;
+    /* TRUE if the simulation box has changed since the last simulation, FALSE otherwise */
+    int box_changed;
+    /* num. of simulations for which the far neighbor list was generated */
+    int num_nbr_list_builds;
+    /* num. of simulations for which the far neighbor list from a previous simulation was reused */
+    int num_nbr_list_reuses;
     /* Callback for getting simulation state at the end of each time step */
     callback_function callback;
+    /* charge solver history to restore at the start of the next simulation
+     * (see set_charge_history), as in workspace->s and workspace->t with the
+     * previous solutions stored consecutively, NULL if there is none */
+    real *cm_hist_s;
+    real *cm_hist_t;
+    /* num. of previous solutions held in cm_hist_s and cm_hist_t */
+    int cm_hist_size;
+    /* length of each solution held in cm_hist_s and cm_hist_t */
+    int cm_hist_n;
 };
 
 
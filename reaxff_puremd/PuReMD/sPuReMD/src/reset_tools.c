@@ -34,6 +34,7 @@ void Reset_Pressures( control_params *control, simulation_data *data )
     rtensor_MakeZero( data->flex_bar.P );
     data->iso_bar.P = 0.0;
     rtensor_MakeZero( data->press );
+    rtensor_MakeZero( data->force_virial );
 #if defined(_OPENMP)
     if ( control->ensemble == sNPT || control->ensemble == iNPT
             || control->ensemble == aNPT || control->compute_pressure == TRUE )
@@ -119,6 +120,21 @@ void Reset_Atomic_Forces( reax_system* system )
 }
 
 
+/* Copy the atom fields read in the force kernels into
+ * the structure-of-arrays storage of the system */
+void Reset_Atom_Arrays( reax_system *system )
+{
+    int i;
+
+    for ( i = 0; i < system->N; ++i )
+    {
+        rvec_Copy( system->x[i], system->atoms[i].x );
+        system->q[i] = system->atoms[i].q;
+        system->type[i] = system->atoms[i].type;
+    }
+}
+
+
 void Reset_Energies( simulation_data* data )
 {
     data->E_Tot = 0.0;
@@ -183,6 +199,8 @@ void Reset( reax_system *system, control_params *control,
 {
     Reset_Atomic_Forces( system );
 
+    Reset_Atom_Arrays( system );
+
     Reset_Energies( data );
 
     if ( control->ensemble == sNPT || control->ensemble == iNPT
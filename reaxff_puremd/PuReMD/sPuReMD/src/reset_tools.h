@@ -29,6 +29,8 @@ void Reset_Pressures( control_params *, simulation_data * );
 
 void Reset_Atomic_Forces( reax_system* );
 
+void Reset_Atom_Arrays( reax_system* );
+
 void Reset_Energies( simulation_data* );
 
 void Reset_Workspace( reax_system*, static_storage* );
@@ -181,13 +181,22 @@ static void Initialize_Top_Level_Structs( spuremd_handle * handle )
     /* top-level initializations */
     handle->output_enabled = TRUE;
     handle->realloc = TRUE;
+    handle->reinit = FALSE;
+    handle->box_changed = FALSE;
+    handle->num_nbr_list_builds = 0;
+    handle->num_nbr_list_reuses = 0;
     handle->callback = NULL;
+    handle->cm_hist_s = NULL;
+    handle->cm_hist_t = NULL;
+    handle->cm_hist_size = 0;
+    handle->cm_hist_n = 0;
     handle->data->sim_id = 0;
 
     /* second-level initializations */
     handle->system->prealloc_allocated = FALSE;
     handle->system->allocated = FALSE;
     handle->system->ffield_params_allocated = FALSE;
+    handle->system->ffield_params_shared = FALSE;
     handle->system->g.allocated = FALSE;
     handle->system->N_max = 0;
     handle->system->max_num_molec_charge_constraints = 0;
@@ -207,6 +216,7 @@ static void Initialize_Top_Level_Structs( spuremd_handle * handle )
     handle->workspace->H_app_inv.allocated = FALSE;
     handle->workspace->L.allocated = FALSE;
     handle->workspace->U.allocated = FALSE;
+    handle->workspace->LR = NULL;
 
     for ( i = 0; i < LIST_N; ++i )
     {
@@ -243,38 +253,24 @@ void * setup( const char * const geo_file, const char * const ffield_file,
 }
 
 
-/* Allocate top-level data structures and parse input files
- * for the first simulation
+/* Set the atoms and simulation box of a simulation from the caller's arrays,
+ * after the force field parameters have been read
  *
+ * handle: pointer to wrapper struct with top-level data structures
  * num_atoms: num. atoms in this simulation
  * types: integer representation of atom element (type)
  *  NOTE: must match the 0-based index from section 2 in the ReaxFF parameter file
+ * pos: coordinates of atom positions (consecutively arranged), in Angstroms
  * sim_box_info: simulation box information, where the entries are
  *  - box length per dimension (3 entries)
  *  - angles per dimension (3 entries)
- * pos: coordinates of atom positions (consecutively arranged), in Angstroms
- * ffield_file: file containing force field parameters
- * control_file: file containing simulation parameters
  */
-void * setup2( int num_atoms, const int * const atom_type,
-        const double * const pos, const double * const sim_box_info,
-        const char * const ffield_file, const char * const control_file )
+static void Setup_Atoms( spuremd_handle * const spmd_handle, int num_atoms,
+        const int * const atom_type, const double * const pos,
+        const double * const sim_box_info )
 {
     int i;
-//    char atom_name[9];
     rvec x;
-    spuremd_handle *spmd_handle;
-
-    Allocate_Top_Level_Structs( &spmd_handle );
-    Initialize_Top_Level_Structs( spmd_handle );
-
-    /* override default */
-    spmd_handle->output_enabled = FALSE;
-
-    Read_Input_Files( NULL, ffield_file, control_file,
-            spmd_handle->system, spmd_handle->control,
-            spmd_handle->data, spmd_handle->workspace,
-            spmd_handle->out_control, FALSE );
 
     spmd_handle->system->N = num_atoms;
 
@@ -319,6 +315,40 @@ void * setup2( int num_atoms, const int * const atom_type,
     }
 
     spmd_handle->system->N_max = (int) CEIL( SAFE_ZONE * spmd_handle->system->N );
+}
+
+
+/* Allocate top-level data structures and parse input files
+ * for the first simulation
+ *
+ * num_atoms: num. atoms in this simulation
+ * types: integer representation of atom element (type)
+ *  NOTE: must match the 0-based index from section 2 in the ReaxFF parameter file
+ * sim_box_info: simulation box information, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ * pos: coordinates of atom positions (consecutively arranged), in Angstroms
+ * ffield_file: file containing force field parameters
+ * control_file: file containing simulation parameters
+ */
+void * setup2( int num_atoms, const int * const atom_type,
+        const double * const pos, const double * const sim_box_info,
+        const char * const ffield_file, const char * const control_file )
+{
+    spuremd_handle *spmd_handle;
+
+    Allocate_Top_Level_Structs( &spmd_handle );
+    Initialize_Top_Level_Structs( spmd_handle );
+
+    /* override default */
+    spmd_handle->output_enabled = FALSE;
+
+    Read_Input_Files( NULL, ffield_file, control_file,
+            spmd_handle->system, spmd_handle->control,
+            spmd_handle->data, spmd_handle->workspace,
+            spmd_handle->out_control, FALSE );
+
+    Setup_Atoms( spmd_handle, num_atoms, atom_type, pos, sim_box_info );
 
     return (void *) spmd_handle;
 }
@@ -350,6 +380,40 @@ int setup_callback( const void * const handle, const callback_function callback
 }
 
 
+/* Restore the charge solver history passed to set_charge_history,
+ * if it matches the charge matrix dimension of the simulation about to run
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ */
+static void Restore_Charge_History( spuremd_handle * handle )
+{
+    int i, j, n;
+
+    n = handle->cm_hist_n;
+
+    if ( n == handle->system->N_cm )
+    {
+        for ( j = 0; j < handle->cm_hist_size; ++j )
+        {
+            for ( i = 0; i < n; ++i )
+            {
+                handle->workspace->s[j][i] = handle->cm_hist_s[j * n + i];
+                handle->workspace->t[j][i] = handle->cm_hist_t[j * n + i];
+            }
+        }
+
+        handle->workspace->cm_hist_size = handle->cm_hist_size;
+    }
+
+    sfree( handle->cm_hist_s, __FILE__, __LINE__ );
+    sfree( handle->cm_hist_t, __FILE__, __LINE__ );
+    handle->cm_hist_s = NULL;
+    handle->cm_hist_t = NULL;
+    handle->cm_hist_size = 0;
+    handle->cm_hist_n = 0;
+}
+
+
 /* Run the simulation according to the prescribed parameters
  *
  * handle: pointer to wrapper struct with top-level data structures
@@ -368,11 +432,34 @@ int simulate( const void * const handle )
     {
         spmd_handle = (spuremd_handle*) handle;
 
-        Initialize( spmd_handle->system, spmd_handle->control, spmd_handle->data,
-                spmd_handle->workspace, spmd_handle->lists,
-                spmd_handle->out_control, &Evolve,
-                spmd_handle->output_enabled,
-                spmd_handle->realloc );
+        if ( spmd_handle->reinit == TRUE && spmd_handle->realloc == FALSE )
+        {
+            if ( Reinitialize( spmd_handle->system, spmd_handle->control, spmd_handle->data,
+                    spmd_handle->workspace, spmd_handle->lists, &Evolve,
+                    spmd_handle->box_changed ) == TRUE )
+            {
+                ++spmd_handle->num_nbr_list_builds;
+            }
+            else
+            {
+                ++spmd_handle->num_nbr_list_reuses;
+            }
+        }
+        else
+        {
+            Initialize( spmd_handle->system, spmd_handle->control, spmd_handle->data,
+                    spmd_handle->workspace, spmd_handle->lists,
+                    spmd_handle->out_control, &Evolve,
+                    spmd_handle->output_enabled,
+                    spmd_handle->realloc );
+
+            ++spmd_handle->num_nbr_list_builds;
+        }
+
+        if ( spmd_handle->cm_hist_s != NULL )
+        {
+            Restore_Charge_History( spmd_handle );
+        }
 
         /* compute f_0 */
         //if( control.restart == FALSE ) {
@@ -525,6 +612,8 @@ int simulate( const void * const handle )
         }
 
         spmd_handle->realloc = FALSE;
+        spmd_handle->reinit = FALSE;
+        spmd_handle->box_changed = FALSE;
         ret = SPUREMD_SUCCESS;
     }
 
@@ -553,6 +642,12 @@ int cleanup( const void * const handle )
                 spmd_handle->workspace, spmd_handle->lists, spmd_handle->out_control,
                 spmd_handle->output_enabled, FALSE );
 
+        if ( spmd_handle->cm_hist_s != NULL )
+        {
+            sfree( spmd_handle->cm_hist_s, __FILE__, __LINE__ );
+            sfree( spmd_handle->cm_hist_t, __FILE__, __LINE__ );
+        }
+
         sfree( spmd_handle->out_control, __FILE__, __LINE__ );
         for ( i = 0; i < LIST_N; ++i )
         {
@@ -603,6 +698,7 @@ int reset( const void * const handle, const char * const geo_file,
         }
 
         spmd_handle->realloc = FALSE;
+        spmd_handle->reinit = FALSE;
         spmd_handle->data->sim_id++;
 
         Read_Input_Files( geo_file, ffield_file, control_file,
@@ -671,6 +767,7 @@ int reset2( const void * const handle, int num_atoms,
         }
 
         spmd_handle->realloc = FALSE;
+        spmd_handle->reinit = FALSE;
         spmd_handle->data->sim_id++;
 
         Read_Input_Files( NULL, ffield_file, control_file,
@@ -936,21 +1033,37 @@ int get_system_info( const void * const handle, double * const e_pot,
 }
 
 
-/* Getter for total energy
+/* Getter for far neighbor list statistics
  *
  * handle: pointer to wrapper struct with top-level data structures
- * e_tot: system total energy, in kcal / mol (reference from caller)
+ * num_builds: num. simulations for which the far neighbor list was generated (reference from caller)
+ * num_reuses: num. simulations for which the far neighbor list
+ *  from the previous simulation was reused (reference from caller)
  *
  * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
  */
-int get_total_energy( const void * const handle, double * const e_tot )
+int get_nbr_list_info( const void * const handle, int * const num_builds,
+        int * const num_reuses )
 {
     int ret;
+    spuremd_handle *spmd_handle;
 
-    ret = get_system_info( handle, e_tot, NULL, NULL, NULL, NULL, NULL );
+    ret = SPUREMD_FAILURE;
 
-    if ( ret == SUCCESS )
+    if ( handle != NULL )
     {
+        spmd_handle = (spuremd_handle*) handle;
+
+        if ( num_builds != NULL )
+        {
+            *num_builds = spmd_handle->num_nbr_list_builds;
+        }
+
+        if ( num_reuses != NULL )
+        {
+            *num_reuses = spmd_handle->num_nbr_list_reuses;
+        }
+
         ret = SPUREMD_SUCCESS;
     }
 
@@ -958,14 +1071,26 @@ int get_total_energy( const void * const handle, double * const e_tot )
 }
 
 
-/* Setter for writing output to files
+/* Getter for timing and charge solver statistics of the last simulation
  *
  * handle: pointer to wrapper struct with top-level data structures
- * enabled: TRUE enables writing output to files, FALSE otherwise
+ * nbrs: time spent generating the far neighbor list, in seconds (reference from caller)
+ * init_forces: time spent generating the bond, hydrogen bond, and charge matrix lists,
+ *  in seconds (reference from caller)
+ * bonded: time spent computing bonded interactions, in seconds (reference from caller)
+ * cm: time spent computing the atomic charges, in seconds (reference from caller)
+ * nonb: time spent computing non-bonded interactions, in seconds (reference from caller)
+ * cm_solver_iters: num. of iterations of the linear solver(s) for the atomic charges (reference from caller)
+ * cm_solver_residual: max. relative residual norm at exit of the linear solver(s)
+ *  for the atomic charges (reference from caller)
+ * cm_num_pre_comps: num. of preconditioner computations for the atomic charges (reference from caller)
  *
  * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
  */
-int set_output_enabled( const void * const handle, const int enabled )
+int get_timing_info( const void * const handle, double * const nbrs,
+        double * const init_forces, double * const bonded, double * const cm,
+        double * const nonb, int * const cm_solver_iters,
+        double * const cm_solver_residual, int * const cm_num_pre_comps )
 {
     int ret;
     spuremd_handle *spmd_handle;
@@ -975,7 +1100,47 @@ int set_output_enabled( const void * const handle, const int enabled )
     if ( handle != NULL )
     {
         spmd_handle = (spuremd_handle*) handle;
-        spmd_handle->output_enabled = enabled;
+
+        if ( nbrs != NULL )
+        {
+            *nbrs = spmd_handle->data->timing.nbrs;
+        }
+
+        if ( init_forces != NULL )
+        {
+            *init_forces = spmd_handle->data->timing.init_forces;
+        }
+
+        if ( bonded != NULL )
+        {
+            *bonded = spmd_handle->data->timing.bonded;
+        }
+
+        if ( cm != NULL )
+        {
+            *cm = spmd_handle->data->timing.cm;
+        }
+
+        if ( nonb != NULL )
+        {
+            *nonb = spmd_handle->data->timing.nonb;
+        }
+
+        if ( cm_solver_iters != NULL )
+        {
+            *cm_solver_iters = spmd_handle->data->timing.cm_solver_iters;
+        }
+
+        if ( cm_solver_residual != NULL )
+        {
+            *cm_solver_residual = spmd_handle->data->timing.cm_solver_residual;
+        }
+
+        if ( cm_num_pre_comps != NULL )
+        {
+            *cm_num_pre_comps = spmd_handle->data->timing.cm_num_pre_comps;
+        }
+
         ret = SPUREMD_SUCCESS;
     }
 
@@ -983,31 +1148,41 @@ int set_output_enabled( const void * const handle, const int enabled )
 }
 
 
-/* Setter for simulation parameter values as defined in the input control file
+/* Getter for the virial of the interatomic forces
+ *
+ * The virial is only accumulated when pressure is computed, i.e., for the NPT
+ * ensembles or when the compute_pressure control parameter is enabled
  *
  * handle: pointer to wrapper struct with top-level data structures
- * control_keyword: keyword from the control file to set the value for
- * control_value: value to set
+ * virial: virial tensor (sum over atoms of the outer product of the force
+ *  and the position), in kcal / mol, stored row by row (9 entries, allocated by caller)
  *
  * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
  */
-int set_control_parameter( const void * const handle, const char * const keyword,
-       const char ** const values )
+int get_system_virial( const void * const handle, double * const virial )
 {
-    int ret, ret_;
+    int i, j, ret;
     spuremd_handle *spmd_handle;
 
     ret = SPUREMD_FAILURE;
 
-    if ( handle != NULL )
+    if ( handle != NULL && virial != NULL )
     {
         spmd_handle = (spuremd_handle*) handle;
 
-        ret_ = Set_Control_Parameter( keyword, values, spmd_handle->control,
-                spmd_handle->out_control );
-
-        if ( ret_ == SUCCESS )
+        if ( spmd_handle->control->compute_pressure == TRUE
+                || spmd_handle->control->ensemble == sNPT
+                || spmd_handle->control->ensemble == iNPT
+                || spmd_handle->control->ensemble == aNPT )
         {
+            for ( i = 0; i < 3; ++i )
+            {
+                for ( j = 0; j < 3; ++j )
+                {
+                    virial[3 * i + j] = spmd_handle->data->force_virial[i][j];
+                }
+            }
+
             ret = SPUREMD_SUCCESS;
         }
     }
@@ -1016,65 +1191,56 @@ int set_control_parameter( const void * const handle, const char * const keyword
 }
 
 
-/* Setter for contiguous charge constraints
+/* Getter for the charge solver history, i.e., the solutions of the most recent
+ * charge solves, which are extrapolated to get the initial guesses of the next solve;
+ * call first with NULL arrays to query the sizes
  *
  * handle: pointer to wrapper struct with top-level data structures
- * num_charge_constraint_contig: num. of contiguous charge constraints for charge model
- * charge_constraint_contig_start: starting atom num. (1-based) of atom group for a charge constraint
- * charge_constraint_contig_end: ending atom num. (1-based) of atom group for a charge constraint
- * charge_constraint_contig_value: charge constraint value for atom group
+ * hist_size: num. of previous solutions held, at most 5 (reference from caller)
+ * n: length of each solution (reference from caller)
+ * s: previous solutions of the first linear system, most recent first and
+ *  stored consecutively, hist_size * n entries (allocated by caller)
+ * t: previous solutions of the second linear system, in the same layout
+ *  as s (allocated by caller)
  *
  * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
  */
-int set_contiguous_charge_constraints( const void * const handle,
-        int num_charge_constraint_contig, const int * const charge_constraint_contig_start,
-        const int * const charge_constraint_contig_end,
-        const double * const charge_constraint_contig_value )
+int get_charge_history( const void * const handle, int * const hist_size,
+        int * const n, double * const s, double * const t )
 {
-    int i, ret;
+    int i, j, ret;
     spuremd_handle *spmd_handle;
 
     ret = SPUREMD_FAILURE;
 
-    if ( handle != NULL )
+    if ( handle != NULL && hist_size != NULL && n != NULL )
     {
         spmd_handle = (spuremd_handle*) handle;
 
-        spmd_handle->system->num_molec_charge_constraints = num_charge_constraint_contig;
-
-        if ( spmd_handle->system->num_molec_charge_constraints
-                > spmd_handle->system->max_num_molec_charge_constraints )
+        /* no charges have been solved for yet */
+        if ( spmd_handle->workspace->allocated == FALSE )
         {
-            if ( spmd_handle->system->max_num_molec_charge_constraints > 0 )
-            {
-                sfree( spmd_handle->system->molec_charge_constraints,
-                        __FILE__, __LINE__ );
-                sfree( spmd_handle->system->molec_charge_constraint_ranges,
-                        __FILE__, __LINE__ );
-            }
-
-            spmd_handle->system->molec_charge_constraints = smalloc(
-                    sizeof(real) * spmd_handle->system->num_molec_charge_constraints,
-                    __FILE__, __LINE__ );
-            spmd_handle->system->molec_charge_constraint_ranges = smalloc(
-                    sizeof(int) * 2 * spmd_handle->system->num_molec_charge_constraints,
-                    __FILE__, __LINE__ );
-
-            spmd_handle->system->max_num_molec_charge_constraints
-                = spmd_handle->system->num_molec_charge_constraints;
+            *hist_size = 0;
+            *n = 0;
         }
-
-        if ( spmd_handle->system->num_molec_charge_constraints > 0 )
+        else
         {
-            for ( i = 0; i < spmd_handle->system->num_molec_charge_constraints; ++i )
-            {
-                spmd_handle->system->molec_charge_constraint_ranges[2 * i] = charge_constraint_contig_start[i];
-                spmd_handle->system->molec_charge_constraint_ranges[2 * i + 1] = charge_constraint_contig_end[i];
-            }
+            *hist_size = spmd_handle->workspace->cm_hist_size;
+            *n = spmd_handle->system->N_cm;
 
-            for ( i = 0; i < spmd_handle->system->num_molec_charge_constraints; ++i )
+            for ( j = 0; j < *hist_size; ++j )
             {
-                spmd_handle->system->molec_charge_constraints[i] = charge_constraint_contig_value[i];
+                for ( i = 0; i < *n; ++i )
+                {
+                    if ( s != NULL )
+                    {
+                        s[j * *n + i] = spmd_handle->workspace->s[j][i];
+                    }
+                    if ( t != NULL )
+                    {
+                        t[j * *n + i] = spmd_handle->workspace->t[j][i];
+                    }
+                }
             }
         }
 
@@ -1085,125 +1251,569 @@ int set_contiguous_charge_constraints( const void * const handle,
 }
 
 
-/* Setter for custom charge constraints
+/* Setter for the charge solver history (see get_charge_history), e.g., to
+ * continue from a checkpoint without losing the quality of the initial guesses;
+ * the history is restored at the start of the next simulation if its length
+ * matches the charge matrix dimension of that simulation, and is discarded otherwise
  *
  * handle: pointer to wrapper struct with top-level data structures
- * num_charge_constraint_custom: num. of custom charge constraints for charge model
- * charge_constraint_custom_count: counts for each custom charge constraint
- * charge_constraint_custom_atom_index: atom indices (1-based) for custom charge constraints
- * charge_constraint_custom_coeff: coefficients for custom charge constraints
- * charge_constraint_custom_rhs: right-hand side (RHS) constants for custom charge constraints
+ * hist_size: num. of previous solutions, at most 5
+ * n: length of each solution
+ * s: previous solutions of the first linear system, most recent first and
+ *  stored consecutively, hist_size * n entries
+ * t: previous solutions of the second linear system, in the same layout as s
  *
  * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
  */
-int set_custom_charge_constraints( const void * const handle,
-        int num_charge_constraint_custom,
-        const int * const charge_constraint_custom_count,
-        const int * const charge_constraint_custom_atom_index,
-        const double * const charge_constraint_custom_coeff,
-        const double * const charge_constraint_custom_rhs )
+int set_charge_history( const void * const handle, int hist_size, int n,
+        const double * const s, const double * const t )
 {
     int i, ret;
     spuremd_handle *spmd_handle;
 
     ret = SPUREMD_FAILURE;
 
-    if ( handle != NULL )
+    if ( handle != NULL && hist_size >= 0 && hist_size <= 5 && n >= 0
+            && (hist_size == 0 || (s != NULL && t != NULL)) )
     {
         spmd_handle = (spuremd_handle*) handle;
 
-        spmd_handle->system->num_custom_charge_constraints = num_charge_constraint_custom;
-
-        if ( spmd_handle->system->num_custom_charge_constraints
-                > spmd_handle->system->max_num_custom_charge_constraints )
+        if ( spmd_handle->cm_hist_s != NULL )
         {
-            if ( spmd_handle->system->max_num_custom_charge_constraints > 0 )
-            {
-                sfree( spmd_handle->system->custom_charge_constraint_count,
-                        __FILE__, __LINE__ );
-                sfree( spmd_handle->system->custom_charge_constraint_start,
-                        __FILE__, __LINE__ );
-                sfree( spmd_handle->system->custom_charge_constraint_rhs,
-                        __FILE__, __LINE__ );
-            }
-
-            spmd_handle->system->custom_charge_constraint_count = smalloc(
-                    sizeof(int) * spmd_handle->system->num_custom_charge_constraints,
-                    __FILE__, __LINE__ );
-            spmd_handle->system->custom_charge_constraint_start = smalloc(
-                    sizeof(int) * (spmd_handle->system->num_custom_charge_constraints + 1),
-                    __FILE__, __LINE__ );
-            spmd_handle->system->custom_charge_constraint_rhs = smalloc(
-                    sizeof(real) * spmd_handle->system->num_custom_charge_constraints,
-                    __FILE__, __LINE__ );
-
-            spmd_handle->system->max_num_custom_charge_constraints
-                = spmd_handle->system->num_custom_charge_constraints;
+            sfree( spmd_handle->cm_hist_s, __FILE__, __LINE__ );
+            sfree( spmd_handle->cm_hist_t, __FILE__, __LINE__ );
         }
 
-        spmd_handle->system->num_custom_charge_constraint_entries = 0;
+        spmd_handle->cm_hist_s = smalloc( sizeof(real) * MAX( hist_size * n, 1 ),
+                __FILE__, __LINE__ );
+        spmd_handle->cm_hist_t = smalloc( sizeof(real) * MAX( hist_size * n, 1 ),
+                __FILE__, __LINE__ );
 
-        if ( spmd_handle->system->num_custom_charge_constraints > 0 )
+        for ( i = 0; i < hist_size * n; ++i )
         {
-            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraints; ++i )
-            {
-                spmd_handle->system->custom_charge_constraint_count[i] = charge_constraint_custom_count[i];
-                spmd_handle->system->custom_charge_constraint_start[i] = (i == 0 ? 0 :
-                        spmd_handle->system->custom_charge_constraint_start[i - 1] + charge_constraint_custom_count[i - 1]);
-                spmd_handle->system->num_custom_charge_constraint_entries += charge_constraint_custom_count[i];
-                spmd_handle->system->custom_charge_constraint_rhs[i] = charge_constraint_custom_rhs[i];
-            }
-            spmd_handle->system->custom_charge_constraint_start[spmd_handle->system->num_custom_charge_constraints]
-                = spmd_handle->system->custom_charge_constraint_start[spmd_handle->system->num_custom_charge_constraints - 1]
-                + charge_constraint_custom_count[spmd_handle->system->num_custom_charge_constraints - 1];
+            spmd_handle->cm_hist_s[i] = s[i];
+            spmd_handle->cm_hist_t[i] = t[i];
         }
 
-        if ( spmd_handle->system->num_custom_charge_constraint_entries
-                > spmd_handle->system->max_num_custom_charge_constraint_entries )
+        spmd_handle->cm_hist_size = hist_size;
+        spmd_handle->cm_hist_n = n;
+
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
+/* Getter for total energy
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * e_tot: system total energy, in kcal / mol (reference from caller)
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int get_total_energy( const void * const handle, double * const e_tot )
+{
+    int ret;
+
+    ret = get_system_info( handle, e_tot, NULL, NULL, NULL, NULL, NULL );
+
+    if ( ret == SUCCESS )
+    {
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
+/* Setter for writing output to files
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * enabled: TRUE enables writing output to files, FALSE otherwise
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int set_output_enabled( const void * const handle, const int enabled )
+{
+    int ret;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+        spmd_handle->output_enabled = enabled;
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
+/* Setter for simulation parameter values as defined in the input control file
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * control_keyword: keyword from the control file to set the value for
+ * control_value: value to set
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int set_control_parameter( const void * const handle, const char * const keyword,
+       const char ** const values )
+{
+    int ret, ret_;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        ret_ = Set_Control_Parameter( keyword, values, spmd_handle->control,
+                spmd_handle->out_control );
+
+        if ( ret_ == SUCCESS )
+        {
+            ret = SPUREMD_SUCCESS;
+        }
+    }
+
+    return ret;
+}
+
+
+/* Setter for contiguous charge constraints
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * num_charge_constraint_contig: num. of contiguous charge constraints for charge model
+ * charge_constraint_contig_start: starting atom num. (1-based) of atom group for a charge constraint
+ * charge_constraint_contig_end: ending atom num. (1-based) of atom group for a charge constraint
+ * charge_constraint_contig_value: charge constraint value for atom group
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int set_contiguous_charge_constraints( const void * const handle,
+        int num_charge_constraint_contig, const int * const charge_constraint_contig_start,
+        const int * const charge_constraint_contig_end,
+        const double * const charge_constraint_contig_value )
+{
+    int i, ret;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        spmd_handle->system->num_molec_charge_constraints = num_charge_constraint_contig;
+
+        if ( spmd_handle->system->num_molec_charge_constraints
+                > spmd_handle->system->max_num_molec_charge_constraints )
+        {
+            if ( spmd_handle->system->max_num_molec_charge_constraints > 0 )
+            {
+                sfree( spmd_handle->system->molec_charge_constraints,
+                        __FILE__, __LINE__ );
+                sfree( spmd_handle->system->molec_charge_constraint_ranges,
+                        __FILE__, __LINE__ );
+            }
+
+            spmd_handle->system->molec_charge_constraints = smalloc(
+                    sizeof(real) * spmd_handle->system->num_molec_charge_constraints,
+                    __FILE__, __LINE__ );
+            spmd_handle->system->molec_charge_constraint_ranges = smalloc(
+                    sizeof(int) * 2 * spmd_handle->system->num_molec_charge_constraints,
+                    __FILE__, __LINE__ );
+
+            spmd_handle->system->max_num_molec_charge_constraints
+                = spmd_handle->system->num_molec_charge_constraints;
+        }
+
+        if ( spmd_handle->system->num_molec_charge_constraints > 0 )
+        {
+            for ( i = 0; i < spmd_handle->system->num_molec_charge_constraints; ++i )
+            {
+                spmd_handle->system->molec_charge_constraint_ranges[2 * i] = charge_constraint_contig_start[i];
+                spmd_handle->system->molec_charge_constraint_ranges[2 * i + 1] = charge_constraint_contig_end[i];
+            }
+
+            for ( i = 0; i < spmd_handle->system->num_molec_charge_constraints; ++i )
+            {
+                spmd_handle->system->molec_charge_constraints[i] = charge_constraint_contig_value[i];
+            }
+        }
+
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
+/* Setter for custom charge constraints
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * num_charge_constraint_custom: num. of custom charge constraints for charge model
+ * charge_constraint_custom_count: counts for each custom charge constraint
+ * charge_constraint_custom_atom_index: atom indices (1-based) for custom charge constraints
+ * charge_constraint_custom_coeff: coefficients for custom charge constraints
+ * charge_constraint_custom_rhs: right-hand side (RHS) constants for custom charge constraints
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int set_custom_charge_constraints( const void * const handle,
+        int num_charge_constraint_custom,
+        const int * const charge_constraint_custom_count,
+        const int * const charge_constraint_custom_atom_index,
+        const double * const charge_constraint_custom_coeff,
+        const double * const charge_constraint_custom_rhs )
+{
+    int i, ret;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        spmd_handle->system->num_custom_charge_constraints = num_charge_constraint_custom;
+
+        if ( spmd_handle->system->num_custom_charge_constraints
+                > spmd_handle->system->max_num_custom_charge_constraints )
+        {
+            if ( spmd_handle->system->max_num_custom_charge_constraints > 0 )
+            {
+                sfree( spmd_handle->system->custom_charge_constraint_count,
+                        __FILE__, __LINE__ );
+                sfree( spmd_handle->system->custom_charge_constraint_start,
+                        __FILE__, __LINE__ );
+                sfree( spmd_handle->system->custom_charge_constraint_rhs,
+                        __FILE__, __LINE__ );
+            }
+
+            spmd_handle->system->custom_charge_constraint_count = smalloc(
+                    sizeof(int) * spmd_handle->system->num_custom_charge_constraints,
+                    __FILE__, __LINE__ );
+            spmd_handle->system->custom_charge_constraint_start = smalloc(
+                    sizeof(int) * (spmd_handle->system->num_custom_charge_constraints + 1),
+                    __FILE__, __LINE__ );
+            spmd_handle->system->custom_charge_constraint_rhs = smalloc(
+                    sizeof(real) * spmd_handle->system->num_custom_charge_constraints,
+                    __FILE__, __LINE__ );
+
+            spmd_handle->system->max_num_custom_charge_constraints
+                = spmd_handle->system->num_custom_charge_constraints;
+        }
+
+        spmd_handle->system->num_custom_charge_constraint_entries = 0;
+
+        if ( spmd_handle->system->num_custom_charge_constraints > 0 )
+        {
+            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraints; ++i )
+            {
+                spmd_handle->system->custom_charge_constraint_count[i] = charge_constraint_custom_count[i];
+                spmd_handle->system->custom_charge_constraint_start[i] = (i == 0 ? 0 :
+                        spmd_handle->system->custom_charge_constraint_start[i - 1] + charge_constraint_custom_count[i - 1]);
+                spmd_handle->system->num_custom_charge_constraint_entries += charge_constraint_custom_count[i];
+                spmd_handle->system->custom_charge_constraint_rhs[i] = charge_constraint_custom_rhs[i];
+            }
+            spmd_handle->system->custom_charge_constraint_start[spmd_handle->system->num_custom_charge_constraints]
+                = spmd_handle->system->custom_charge_constraint_start[spmd_handle->system->num_custom_charge_constraints - 1]
+                + charge_constraint_custom_count[spmd_handle->system->num_custom_charge_constraints - 1];
+        }
+
+        if ( spmd_handle->system->num_custom_charge_constraint_entries
+                > spmd_handle->system->max_num_custom_charge_constraint_entries )
+        {
+            if ( spmd_handle->system->max_num_custom_charge_constraint_entries > 0 )
+            {
+                sfree( spmd_handle->system->custom_charge_constraint_atom_index,
+                        __FILE__, __LINE__ );
+                sfree( spmd_handle->system->custom_charge_constraint_coeff,
+                        __FILE__, __LINE__ );
+            }
+
+            spmd_handle->system->custom_charge_constraint_atom_index = smalloc(
+                    sizeof(int) * spmd_handle->system->num_custom_charge_constraint_entries,
+                    __FILE__, __LINE__ );
+            spmd_handle->system->custom_charge_constraint_coeff = smalloc(
+                    sizeof(real) * spmd_handle->system->num_custom_charge_constraint_entries,
+                    __FILE__, __LINE__ );
+
+            spmd_handle->system->max_num_custom_charge_constraint_entries
+                = spmd_handle->system->num_custom_charge_constraint_entries;
+        }
+
+        if ( spmd_handle->system->num_custom_charge_constraint_entries > 0 )
+        {
+            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraint_entries; ++i )
+            {
+                spmd_handle->system->custom_charge_constraint_atom_index[i] = charge_constraint_custom_atom_index[i];
+            }
+
+            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraint_entries; ++i )
+            {
+                spmd_handle->system->custom_charge_constraint_coeff[i] = charge_constraint_custom_coeff[i];
+            }
+        }
+
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
+/* Compute the energies, forces, and charges of many independent configurations
+ * of the same atoms, e.g., conformers or training set structures
+ *
+ * The force field is parsed once and its parameters are shared (read-only) by
+ * all OpenMP threads (see Read_Force_Field_String). The configurations are
+ * distributed across the threads, where each thread evaluates its configurations
+ * one after another on a single handle (reusing its lookup tables and allocations)
+ * using one thread per evaluation. Each evaluation starts from a new neighbor list
+ * and a zero initial guess for the charges, so the results do not depend on
+ * which configurations were evaluated before it on the same thread.
+ *
+ * num_configs: num. configurations
+ * num_atoms: num. atoms in each configuration
+ * atom_type: integer representation of atom element (type), shared by all configurations
+ *  NOTE: must match the 0-based index from section 2 in the ReaxFF parameter file
+ * pos: coordinates of atom positions (consecutively arranged, configuration after configuration),
+ *  in Angstroms (3 * num_atoms entries per configuration)
+ * sim_box_info: simulation box information of each configuration, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ * ffield_file: file containing force field parameters
+ * control_file: file containing simulation parameters
+ * e_pot: potential energy of each configuration, in kcal / mol (allocated by caller)
+ * f: atom forces of each configuration, in Angstroms * Daltons / ps^2
+ *  (3 * num_atoms entries per configuration, allocated by caller, or NULL to skip)
+ * q: atom charges of each configuration, in Coulombs
+ *  (num_atoms entries per configuration, allocated by caller, or NULL to skip)
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int simulate_batch( int num_configs, int num_atoms, const int * const atom_type,
+        const double * const pos, const double * const sim_box_info,
+        const char * const ffield_file, const char * const control_file,
+        double * const e_pot, double * const f, double * const q )
+{
+    int c, ret;
+    char *ffield_str, *control_str;
+    reax_system *ffield_owner;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_SUCCESS;
+
+    ffield_str = sfread_file( ffield_file, __FILE__, __LINE__ );
+    control_str = NULL;
+    if ( control_file != NULL )
+    {
+        control_str = sfread_file( control_file, __FILE__, __LINE__ );
+    }
+
+    /* parse the force field once, and hold a reference to the parsed
+     * parameters in the force field cache until all threads are done */
+    ffield_owner = smalloc( sizeof(reax_system), __FILE__, __LINE__ );
+    ffield_owner->ffield_params_allocated = FALSE;
+    ffield_owner->ffield_params_shared = FALSE;
+    Read_Force_Field_String( ffield_str, ffield_owner, &ffield_owner->reax_param );
+
+#if defined(_OPENMP)
+    #pragma omp parallel default(none) private(c, spmd_handle) \
+        shared(num_configs, num_atoms, atom_type, pos, sim_box_info, \
+                ffield_str, control_str, e_pot, f, q, ret)
+#endif
+    {
+        spmd_handle = NULL;
+
+#if defined(_OPENMP)
+        #pragma omp for schedule(static)
+#endif
+        for ( c = 0; c < num_configs; ++c )
+        {
+            if ( spmd_handle == NULL )
+            {
+                Allocate_Top_Level_Structs( &spmd_handle );
+                Initialize_Top_Level_Structs( spmd_handle );
+
+                /* override default */
+                spmd_handle->output_enabled = FALSE;
+
+                Read_Force_Field_String( ffield_str, spmd_handle->system,
+                        &spmd_handle->system->reax_param );
+
+                Set_Control_Defaults( spmd_handle->system, spmd_handle->control,
+                        spmd_handle->out_control );
+
+                if ( control_str != NULL )
+                {
+                    Read_Control_String( control_str, spmd_handle->system,
+                            spmd_handle->control, spmd_handle->out_control );
+                }
+
+                Set_Control_Derived_Values( spmd_handle->system, spmd_handle->control );
+
+                /* single point evaluations, each on one thread */
+                spmd_handle->control->nsteps = 0;
+                spmd_handle->control->num_threads = 1;
+                spmd_handle->control->num_threads_set = TRUE;
+
+                Setup_Atoms( spmd_handle, num_atoms, atom_type,
+                        &pos[3 * num_atoms * c], &sim_box_info[6 * c] );
+            }
+            else
+            {
+                /* full re-initialization (new neighbor list) with the allocations
+                 * of the previous configuration, and without its charges */
+                reset2( spmd_handle, num_atoms, atom_type, &pos[3 * num_atoms * c],
+                        &sim_box_info[6 * c], NULL, NULL );
+                spmd_handle->workspace->cm_hist_size = 0;
+            }
+
+            if ( simulate( spmd_handle ) != SPUREMD_SUCCESS )
+            {
+#if defined(_OPENMP)
+                #pragma omp atomic write
+#endif
+                ret = SPUREMD_FAILURE;
+            }
+
+            e_pot[c] = spmd_handle->data->E_Pot;
+
+            if ( f != NULL )
+            {
+                get_atom_forces( spmd_handle, &f[3 * num_atoms * c] );
+            }
+
+            if ( q != NULL )
+            {
+                get_atom_charges( spmd_handle, &q[num_atoms * c] );
+            }
+        }
+
+        if ( spmd_handle != NULL )
+        {
+            cleanup( spmd_handle );
+        }
+    }
+
+    Release_Force_Field( ffield_owner, &ffield_owner->reax_param );
+    sfree( ffield_owner, __FILE__, __LINE__ );
+    if ( control_str != NULL )
+    {
+        sfree( control_str, __FILE__, __LINE__ );
+    }
+    sfree( ffield_str, __FILE__, __LINE__ );
+
+    return ret;
+}
+
+
+#if defined(QMMM)
+/* Move an atom to a new position for a subsequent simulation
+ * (see update_qmmm)
+ *
+ * If the far neighbor list may be reused by the next simulation,
+ * the atom is displaced by the minimum image displacement to its new position
+ * such that its periodic image flags (rel_map) remain consistent
+ * with the neighbor list, otherwise the new position is fit
+ * to the simulation box as usual
+ *
+ * NOTE: the minimum image displacement is only valid for orthorhombic boxes,
+ * so Set_Box never allows the neighbor list to be reused for triclinic boxes
+ *
+ * spmd_handle: wrapper struct with top-level data structures
+ * i: atom index
+ * x: new atom position, in Angstroms (modified)
+ */
+static void Move_Atom( spuremd_handle * const spmd_handle, int i, rvec x )
+{
+    int d;
+    rvec dx;
+    simulation_box *box;
+
+    box = &spmd_handle->system->box;
+
+    if ( spmd_handle->box_changed == FALSE && spmd_handle->realloc == FALSE )
+    {
+        rvec_ScaledSum( dx, 1.0, x, -1.0, spmd_handle->system->atoms[i].x );
+
+        if ( spmd_handle->control->periodic_boundaries == TRUE )
         {
-            if ( spmd_handle->system->max_num_custom_charge_constraint_entries > 0 )
+            for ( d = 0; d < 3; ++d )
             {
-                sfree( spmd_handle->system->custom_charge_constraint_atom_index,
-                        __FILE__, __LINE__ );
-                sfree( spmd_handle->system->custom_charge_constraint_coeff,
-                        __FILE__, __LINE__ );
+                dx[d] -= box->box_norms[d] * FLOOR( dx[d] / box->box_norms[d] + 0.5 );
             }
+        }
 
-            spmd_handle->system->custom_charge_constraint_atom_index = smalloc(
-                    sizeof(int) * spmd_handle->system->num_custom_charge_constraint_entries,
-                    __FILE__, __LINE__ );
-            spmd_handle->system->custom_charge_constraint_coeff = smalloc(
-                    sizeof(real) * spmd_handle->system->num_custom_charge_constraint_entries,
-                    __FILE__, __LINE__ );
+        spmd_handle->control->update_atom_position( spmd_handle->system->atoms[i].x,
+                dx, spmd_handle->system->atoms[i].rel_map, box );
+    }
+    else
+    {
+        Fit_to_Periodic_Box( box, x );
 
-            spmd_handle->system->max_num_custom_charge_constraint_entries
-                = spmd_handle->system->num_custom_charge_constraint_entries;
-        }
+        rvec_Copy( spmd_handle->system->atoms[i].x, x );
+    }
+}
 
-        if ( spmd_handle->system->num_custom_charge_constraint_entries > 0 )
+
+/* Set the simulation box for a subsequent simulation,
+ * flagging whether it differs from the box of the previous simulation
+ *
+ * Triclinic boxes are always flagged as changed, since the displacement
+ * tracking used to reuse the far neighbor list (see Move_Atom and Reinitialize)
+ * assumes an orthorhombic box
+ *
+ * spmd_handle: wrapper struct with top-level data structures
+ * sim_box_info: simulation box information, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ */
+static void Set_Box( spuremd_handle * const spmd_handle,
+        const double * const sim_box_info )
+{
+    int j, k;
+    rtensor old_box;
+
+    rtensor_Copy( old_box, spmd_handle->system->box.box );
+
+    Setup_Box( sim_box_info[0], sim_box_info[1], sim_box_info[2],
+            sim_box_info[3], sim_box_info[4], sim_box_info[5],
+            &spmd_handle->system->box );
+
+    for ( j = 0; j < 3; ++j )
+    {
+        for ( k = 0; k < 3; ++k )
         {
-            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraint_entries; ++i )
+            if ( old_box[j][k] != spmd_handle->system->box.box[j][k] )
             {
-                spmd_handle->system->custom_charge_constraint_atom_index[i] = charge_constraint_custom_atom_index[i];
+                spmd_handle->box_changed = TRUE;
             }
 
-            for ( i = 0; i < spmd_handle->system->num_custom_charge_constraint_entries; ++i )
+            /* off-diagonal entries of an orthorhombic box are only rounding errors
+             * from the cosines of right angles in Setup_Box */
+            if ( j != k && FABS( spmd_handle->system->box.box[j][k] )
+                    > 1.0e-8 * spmd_handle->system->box.box_norms[j] )
             {
-                spmd_handle->system->custom_charge_constraint_coeff[i] = charge_constraint_custom_coeff[i];
+                spmd_handle->box_changed = TRUE;
             }
         }
-
-        ret = SPUREMD_SUCCESS;
     }
-
-    return ret;
 }
 
 
-#if defined(QMMM)
-/* Allocate top-level data structures and parse input files
- * for the first simulation
+/* Set the QM and MM atoms and the simulation box for the first simulation,
+ * after the force field and control parameters have been parsed
  *
+ * spmd_handle: wrapper struct with top-level data structures
  * qm_num_atoms: num. atoms in the QM region
  * qm_symbols: element types for QM atoms
  * qm_pos: coordinates of QM atom positions (consecutively arranged), in Angstroms
@@ -1213,29 +1823,15 @@ int set_custom_charge_constraints( const void * const handle,
  * sim_box_info: simulation box information, where the entries are
  *  - box length per dimension (3 entries)
  *  - angles per dimension (3 entries)
- * ffield_file: file containing force field parameters
- * control_file: file containing simulation parameters
  */
-void * setup_qmmm( int qm_num_atoms, const char * const qm_symbols,
-        const double * const qm_pos, int mm_num_atoms, const char * const mm_symbols,
-        const double * const mm_pos_q, const double * const sim_box_info,
-        const char * const ffield_file, const char * const control_file )
+static void Setup_QMMM_Atoms( spuremd_handle * const spmd_handle, int qm_num_atoms,
+        const char * const qm_symbols, const double * const qm_pos,
+        int mm_num_atoms, const char * const mm_symbols,
+        const double * const mm_pos_q, const double * const sim_box_info )
 {
     int i;
     char element[3];
     rvec x;
-    spuremd_handle *spmd_handle;
-
-    Allocate_Top_Level_Structs( &spmd_handle );
-    Initialize_Top_Level_Structs( spmd_handle );
-
-    /* override default */
-    spmd_handle->output_enabled = FALSE;
-
-    Read_Input_Files( NULL, ffield_file, control_file,
-            spmd_handle->system, spmd_handle->control,
-            spmd_handle->data, spmd_handle->workspace,
-            spmd_handle->out_control, FALSE );
 
     spmd_handle->system->N_qm = qm_num_atoms;
     spmd_handle->system->N_mm = mm_num_atoms;
@@ -1321,6 +1917,95 @@ void * setup_qmmm( int qm_num_atoms, const char * const qm_symbols,
     }
 
     spmd_handle->system->N_max = (int) CEIL( SAFE_ZONE * spmd_handle->system->N );
+}
+
+
+/* Allocate top-level data structures and parse input files
+ * for the first simulation
+ *
+ * qm_num_atoms: num. atoms in the QM region
+ * qm_symbols: element types for QM atoms
+ * qm_pos: coordinates of QM atom positions (consecutively arranged), in Angstroms
+ * mm_num_atoms: num. atoms in the MM region
+ * mm_symbols: element types for MM atoms
+ * mm_pos_q: coordinates and charges of MM atom positions (consecutively arranged), in Angstroms / Coulombs
+ * sim_box_info: simulation box information, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ * ffield_file: file containing force field parameters
+ * control_file: file containing simulation parameters
+ */
+void * setup_qmmm( int qm_num_atoms, const char * const qm_symbols,
+        const double * const qm_pos, int mm_num_atoms, const char * const mm_symbols,
+        const double * const mm_pos_q, const double * const sim_box_info,
+        const char * const ffield_file, const char * const control_file )
+{
+    spuremd_handle *spmd_handle;
+
+    Allocate_Top_Level_Structs( &spmd_handle );
+    Initialize_Top_Level_Structs( spmd_handle );
+
+    /* override default */
+    spmd_handle->output_enabled = FALSE;
+
+    Read_Input_Files( NULL, ffield_file, control_file,
+            spmd_handle->system, spmd_handle->control,
+            spmd_handle->data, spmd_handle->workspace,
+            spmd_handle->out_control, FALSE );
+
+    Setup_QMMM_Atoms( spmd_handle, qm_num_atoms, qm_symbols, qm_pos,
+            mm_num_atoms, mm_symbols, mm_pos_q, sim_box_info );
+
+    return (void *) spmd_handle;
+}
+
+
+/* Allocate top-level data structures and parse the in-memory contents
+ * of the input files for the first simulation.  The parsed force field
+ * parameters are shared between all handles created from identical
+ * force field contents.
+ *
+ * qm_num_atoms: num. atoms in the QM region
+ * qm_symbols: element types for QM atoms
+ * qm_pos: coordinates of QM atom positions (consecutively arranged), in Angstroms
+ * mm_num_atoms: num. atoms in the MM region
+ * mm_symbols: element types for MM atoms
+ * mm_pos_q: coordinates and charges of MM atom positions (consecutively arranged), in Angstroms / Coulombs
+ * sim_box_info: simulation box information, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ * ffield_str: contents of the force field file
+ * control_str: contents of the control file (NULL for the default control parameters)
+ */
+void * setup_qmmm_from_strings( int qm_num_atoms, const char * const qm_symbols,
+        const double * const qm_pos, int mm_num_atoms, const char * const mm_symbols,
+        const double * const mm_pos_q, const double * const sim_box_info,
+        const char * const ffield_str, const char * const control_str )
+{
+    spuremd_handle *spmd_handle;
+
+    Allocate_Top_Level_Structs( &spmd_handle );
+    Initialize_Top_Level_Structs( spmd_handle );
+
+    /* override default */
+    spmd_handle->output_enabled = FALSE;
+
+    Read_Force_Field_String( ffield_str, spmd_handle->system,
+            &spmd_handle->system->reax_param );
+
+    Set_Control_Defaults( spmd_handle->system, spmd_handle->control,
+            spmd_handle->out_control );
+
+    if ( control_str != NULL )
+    {
+        Read_Control_String( control_str, spmd_handle->system,
+                spmd_handle->control, spmd_handle->out_control );
+    }
+
+    Set_Control_Derived_Values( spmd_handle->system, spmd_handle->control );
+
+    Setup_QMMM_Atoms( spmd_handle, qm_num_atoms, qm_symbols, qm_pos,
+            mm_num_atoms, mm_symbols, mm_pos_q, sim_box_info );
 
     return (void *) spmd_handle;
 }
@@ -1369,6 +2054,7 @@ int reset_qmmm( const void * const handle, int qm_num_atoms,
         }
 
         spmd_handle->realloc = FALSE;
+        spmd_handle->reinit = FALSE;
         spmd_handle->data->sim_id++;
 
         Read_Input_Files( NULL, ffield_file, control_file,
@@ -1379,6 +2065,9 @@ int reset_qmmm( const void * const handle, int qm_num_atoms,
         spmd_handle->system->N_qm = qm_num_atoms;
         spmd_handle->system->N_mm = mm_num_atoms;
         spmd_handle->system->N = spmd_handle->system->N_qm + spmd_handle->system->N_mm;
+        /* atoms may differ from the previous simulation,
+         * so charges from previous solves are not a useful initial guess */
+        spmd_handle->workspace->cm_hist_size = 0;
         spmd_handle->system->num_molec_charge_constraints = 0;
         spmd_handle->system->num_custom_charge_constraints = 0;
         spmd_handle->system->num_custom_charge_constraint_entries = 0;
@@ -1486,6 +2175,80 @@ int reset_qmmm( const void * const handle, int qm_num_atoms,
 }
 
 
+/* Update atom positions, MM atom charges, and the simulation box
+ * for the next simulation, retaining all other state from the previous simulation
+ * (parsed force field and control parameters, lookup tables, grid, and allocations)
+ *
+ * NOTE: the number of QM and MM atoms and their element types must be unchanged
+ * since the last call to setup_qmmm or reset_qmmm
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * qm_num_atoms: num. atoms in the QM region
+ * qm_pos: coordinates of QM atom positions (consecutively arranged), in Angstroms
+ * mm_num_atoms: num. atoms in the MM region
+ * mm_pos_q: coordinates and charges of MM atom positions (consecutively arranged), in Angstroms / Coulombs
+ * sim_box_info: simulation box information, where the entries are
+ *  - box length per dimension (3 entries)
+ *  - angles per dimension (3 entries)
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int update_qmmm( const void * const handle, int qm_num_atoms,
+        const double * const qm_pos, int mm_num_atoms,
+        const double * const mm_pos_q, const double * const sim_box_info )
+{
+    int i, ret;
+    rvec x;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        if ( qm_num_atoms != spmd_handle->system->N_qm
+                || mm_num_atoms != spmd_handle->system->N_mm )
+        {
+            return ret;
+        }
+
+        Set_Box( spmd_handle, sim_box_info );
+
+        for ( i = 0; i < spmd_handle->system->N_qm; ++i )
+        {
+            x[0] = qm_pos[3 * i];
+            x[1] = qm_pos[3 * i + 1];
+            x[2] = qm_pos[3 * i + 2];
+
+            Move_Atom( spmd_handle, i, x );
+            rvec_MakeZero( spmd_handle->system->atoms[i].v );
+            rvec_MakeZero( spmd_handle->system->atoms[i].f );
+        }
+
+        for ( i = spmd_handle->system->N_qm; i < spmd_handle->system->N; ++i )
+        {
+            x[0] = mm_pos_q[4 * (i - spmd_handle->system->N_qm)];
+            x[1] = mm_pos_q[4 * (i - spmd_handle->system->N_qm) + 1];
+            x[2] = mm_pos_q[4 * (i - spmd_handle->system->N_qm) + 2];
+
+            Move_Atom( spmd_handle, i, x );
+            rvec_MakeZero( spmd_handle->system->atoms[i].v );
+            rvec_MakeZero( spmd_handle->system->atoms[i].f );
+            spmd_handle->system->atoms[i].q = mm_pos_q[4 * (i - spmd_handle->system->N_qm) + 3];
+            spmd_handle->system->atoms[i].q_init = mm_pos_q[4 * (i - spmd_handle->system->N_qm) + 3];
+        }
+
+        spmd_handle->reinit = TRUE;
+        spmd_handle->data->sim_id++;
+
+        ret = SPUREMD_SUCCESS;
+    }
+
+    return ret;
+}
+
+
 /* Getter for atom positions in QMMM mode
  *
  * handle: pointer to wrapper struct with top-level data structures
@@ -1668,4 +2431,96 @@ int get_atom_charges_qmmm( const void * const handle, double * const qm_q,
 
     return ret;
 }
+
+
+/* Getter for the bonds between QM atoms in QMMM mode
+ *
+ * Reports each bond of the most recent simulation with bond order
+ * at least bo_cut once; call first with NULL arrays to query the number of bonds
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * bo_cut: bond order cutoff
+ * num_bonds: num. bonds found (reference from caller)
+ * bond_atoms: QM atom index pairs of bonds, 2 * num_bonds entries (allocated by caller)
+ * bond_orders: bond orders of bonds, num_bonds entries (allocated by caller)
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int get_bonds_qmmm( const void * const handle, double bo_cut,
+        int * const num_bonds, int * const bond_atoms,
+        double * const bond_orders )
+{
+    int ret, n;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL && num_bonds != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        if ( spmd_handle->lists[BONDS]->allocated == TRUE
+                && spmd_handle->lists[BONDS]->n >= spmd_handle->system->N_qm )
+        {
+            n = Get_Bonds( spmd_handle->lists[BONDS], spmd_handle->system->N_qm,
+                    bo_cut, bond_atoms, bond_orders );
+
+            if ( bond_atoms == NULL && bond_orders == NULL )
+            {
+                *num_bonds = n;
+                ret = SPUREMD_SUCCESS;
+            }
+            /* arrays must be sized by a prior query */
+            else if ( n == *num_bonds )
+            {
+                ret = SPUREMD_SUCCESS;
+            }
+        }
+    }
+
+    return ret;
+}
+
+
+/* Getter for the fragments (bonded clusters) of QM atoms in QMMM mode
+ *
+ * Fragments are connected through bonds of the most recent simulation with
+ * bond order at least bo_cut and are numbered in order of their lowest QM atom index
+ *
+ * handle: pointer to wrapper struct with top-level data structures
+ * bo_cut: bond order cutoff
+ * num_fragments: num. fragments found (reference from caller)
+ * qm_fragment: fragment index of each QM atom (allocated by caller)
+ *
+ * returns: SPUREMD_SUCCESS upon success, SPUREMD_FAILURE otherwise
+ */
+int get_fragments_qmmm( const void * const handle, double bo_cut,
+        int * const num_fragments, int * const qm_fragment )
+{
+    int ret, n;
+    spuremd_handle *spmd_handle;
+
+    ret = SPUREMD_FAILURE;
+
+    if ( handle != NULL && qm_fragment != NULL )
+    {
+        spmd_handle = (spuremd_handle*) handle;
+
+        if ( spmd_handle->lists[BONDS]->allocated == TRUE
+                && spmd_handle->lists[BONDS]->n >= spmd_handle->system->N_qm )
+        {
+            n = Get_Fragments( spmd_handle->lists[BONDS], spmd_handle->system->N_qm,
+                    bo_cut, qm_fragment );
+
+            if ( num_fragments != NULL )
+            {
+                *num_fragments = n;
+            }
+
+            ret = SPUREMD_SUCCESS;
+        }
+    }
+
+    return ret;
+}
 #endif
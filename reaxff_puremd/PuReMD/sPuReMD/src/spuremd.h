@@ -65,6 +65,20 @@ int get_system_info( const void * const, double * const,
         double * const, double * const, double * const,
         double * const, double * const );
 
+int get_nbr_list_info( const void * const, int * const, int * const );
+
+int get_timing_info( const void * const, double * const, double * const,
+        double * const, double * const, double * const, int * const,
+        double * const, int * const );
+
+int get_system_virial( const void * const, double * const );
+
+int get_charge_history( const void * const, int * const, int * const,
+        double * const, double * const );
+
+int set_charge_history( const void * const, int, int,
+        const double * const, const double * const );
+
 int get_total_energy( const void * const, double * const );
 
 int set_output_enabled( const void * const, const int );
@@ -79,17 +93,30 @@ int set_custom_charge_constraints( const void * const,
         int, const int * const, const int * const,
         const double * const, const double * const );
 
+int simulate_batch( int, int, const int * const,
+        const double * const, const double * const,
+        const char * const, const char * const,
+        double * const, double * const, double * const );
+
 #if defined(QMMM)
 void * setup_qmmm( int, const char * const,
         const double * const, int, const char * const,
         const double * const, const double * const,
         const char * const, const char * const );
 
+void * setup_qmmm_from_strings( int, const char * const,
+        const double * const, int, const char * const,
+        const double * const, const double * const,
+        const char * const, const char * const );
+
 int reset_qmmm( const void * const, int, const char * const,
         const double * const, int, const char * const,
         const double * const, const double * const,
         const char * const, const char * const);
 
+int update_qmmm( const void * const, int, const double * const,
+        int, const double * const, const double * const );
+
 int get_atom_positions_qmmm( const void * const, double * const,
         double * const );
 
@@ -100,6 +127,12 @@ int get_atom_forces_qmmm( const void * const, double * const,
         double * const );
 
 int get_atom_charges_qmmm( const void * const, double * const, double * const );
+
+int get_bonds_qmmm( const void * const, double, int * const,
+        int * const, double * const );
+
+int get_fragments_qmmm( const void * const, double, int * const,
+        int * const );
 #endif
 
 #if defined(__cplusplus)
@@ -282,6 +282,7 @@ void Compute_Pressure_Isotropic( reax_system* system, control_params *control,
     }
 #endif
     rtensor_Scale( data->press, -1.0, data->press );
+    rtensor_Copy( data->force_virial, data->press );
 
 #if defined(DEBUG_FOCUS)
     fprintf( stderr, "[INFO] ke = (%12.6f, %12.6f, %12.6f), virial = (%12.6f, %12.6f, %12.6f)\n",
@@ -571,6 +571,64 @@ FILE * sfopen( const char * fname, const char * mode,
 }
 
 
+/* Safe wrapper around libc fmemopen, for reading the contents of
+ * an input file which is held in memory; where fmemopen is not available
+ * (e.g., Windows, macOS before 10.13), the contents are written to
+ * an anonymous temporary file instead
+ *
+ * buf: null-terminated contents of the file
+ * filename: source filename of caller
+ * line: source line of caller
+ * */
+FILE * sfmemopen( const char * buf, const char * const filename, int line )
+{
+    FILE * ptr;
+#if !defined(HAVE_FMEMOPEN)
+    size_t len;
+#endif
+
+    if ( buf == NULL || buf[0] == '\0' )
+    {
+        fprintf( stderr, "[ERROR] trying to open in-memory file\n" );
+        fprintf( stderr, "    [INFO] At line %d in file %.*s\n",
+                line, (int) strlen(filename), filename );
+        fprintf( stderr, "  [INFO] NULL or empty buffer\n" );
+        exit( INVALID_INPUT );
+    }
+
+#if defined(HAVE_FMEMOPEN)
+    ptr = fmemopen( (void *) buf, strlen( buf ), "r" );
+#else
+    ptr = tmpfile( );
+
+    if ( ptr != NULL )
+    {
+        len = strlen( buf );
+
+        if ( fwrite( buf, sizeof(char), len, ptr ) != len )
+        {
+            fclose( ptr );
+            ptr = NULL;
+        }
+        else
+        {
+            rewind( ptr );
+        }
+    }
+#endif
+
+    if ( ptr == NULL )
+    {
+        fprintf( stderr, "[ERROR] failed to open in-memory file\n" );
+        fprintf( stderr, "    [INFO] At line %d in file %.*s\n",
+                line, (int) strlen(filename), filename );
+        exit( INVALID_INPUT );
+    }
+
+    return ptr;
+}
+
+
 /* Safe wrapper around libc fclose
  *
  * fp: pointer to file to close
@@ -601,6 +659,47 @@ void sfclose( FILE * fp, const char * const filename, int line )
 }
 
 
+/* Read the entire contents of a file into memory
+ *
+ * fname: name of the file to read
+ * filename: source filename of caller
+ * line: source line of caller
+ *
+ * returns: null-terminated contents of the file (freed by caller with sfree)
+ * */
+char * sfread_file( const char * const fname, const char * const filename, int line )
+{
+    size_t size, len;
+    char *buf;
+    FILE *fp;
+
+    fp = sfopen( fname, "r", filename, line );
+
+    size = 4096;
+    len = 0;
+    buf = smalloc( sizeof(char) * size, filename, line );
+
+    while ( (len += fread( buf + len, sizeof(char), size - len - 1, fp )) == size - 1 )
+    {
+        size *= 2;
+        buf = srealloc( buf, sizeof(char) * size, filename, line );
+    }
+
+    if ( ferror( fp ) != 0 )
+    {
+        fprintf( stderr, "[ERROR] failed to read file %s\n", fname );
+        fprintf( stderr, "    [INFO] At line %d in file %.*s\n",
+                line, (int) strlen(filename), filename );
+        exit( INVALID_INPUT );
+    }
+    buf[len] = '\0';
+
+    sfclose( fp, filename, line );
+
+    return buf;
+}
+
+
 /* Safe wrapper around strtol
  *
  * str: string to be converted
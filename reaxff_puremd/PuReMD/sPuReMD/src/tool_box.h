@@ -73,8 +73,12 @@ void sfree( void *, const char * const, int );
 
 FILE * sfopen( const char *, const char *, const char * const, int );
 
+FILE * sfmemopen( const char *, const char * const, int );
+
 void sfclose( FILE *, const char * const, int );
 
+char * sfread_file( const char * const, const char * const, int );
+
 int sstrtol( const char * const, const char * const, int );
 
 double sstrtod( const char * const, const char * const, int );
@@ -25,6 +25,7 @@
 #include "box.h"
 #include "list.h"
 #include "lookup.h"
+#include "tool_box.h"
 #include "vector.h"
 
 #define MIN_SINE (1.0e-10)
@@ -163,6 +164,17 @@ void Torsion_Angles( reax_system *system, control_params *control,
     num_frb_intrs = 0;
 #endif
 
+#if defined(_OPENMP)
+    if ( control->bonded_reduction_type == THREAD_LOCAL_REDUCTION
+            && workspace->Cdbo_local_size < bonds->total_intrs )
+    {
+        workspace->Cdbo_local_size = bonds->total_intrs;
+        workspace->Cdbo_local = srealloc( workspace->Cdbo_local,
+                sizeof(real) * control->num_threads * workspace->Cdbo_local_size,
+                __FILE__, __LINE__ );
+    }
+#endif
+
 #if defined(_OPENMP)
     #pragma omp parallel default(shared) reduction(+: e_tor_total, e_con_total)
 #endif
@@ -201,6 +213,31 @@ void Torsion_Angles( reax_system *system, control_params *control,
         rvec *f_i, *f_j, *f_k, *f_l;
 #if defined(_OPENMP)
         int tid = omp_get_thread_num( );
+        real *Cdbo_local, *CdDelta_local;
+
+        /* with thread-local reduction, the coefficients of the bonds and atoms
+         * owned by this thread's central atoms j (bonds i-j and j-k, Delta_j)
+         * are updated in place, as no other thread writes them directly;
+         * those owned by k (bond k-l, Delta_k) are accumulated locally */
+        if ( control->bonded_reduction_type == THREAD_LOCAL_REDUCTION )
+        {
+            Cdbo_local = &workspace->Cdbo_local[tid * workspace->Cdbo_local_size];
+            CdDelta_local = &workspace->CdDelta_local[tid * system->N];
+
+            for ( i = 0; i < bonds->total_intrs; ++i )
+            {
+                Cdbo_local[i] = 0.0;
+            }
+            for ( i = 0; i < system->N; ++i )
+            {
+                CdDelta_local[i] = 0.0;
+            }
+        }
+        else
+        {
+            Cdbo_local = NULL;
+            CdDelta_local = NULL;
+        }
 
         #pragma omp for schedule(static)
 #endif
@@ -505,29 +542,38 @@ void Torsion_Angles( reax_system *system, control_params *control,
 
                                         /* forces */
 #if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
+                                        if ( control->bonded_reduction_type == THREAD_LOCAL_REDUCTION )
+                                        {
+                                            bo_jk->Cdbopi += CEtors2;
+                                            workspace->CdDelta[j] += CEtors3;
+                                            CdDelta_local[k] += CEtors3;
+                                            bo_ij->Cdbo += (CEtors4 + CEconj1);
+                                            bo_jk->Cdbo += (CEtors5 + CEconj2);
+                                            Cdbo_local[plk] += (CEtors6 + CEconj3);
+                                        }
+                                        else
+                                        {
+                                            #pragma omp atomic
+                                            bo_jk->Cdbopi += CEtors2;
+                                            #pragma omp atomic
+                                            workspace->CdDelta[j] += CEtors3;
+                                            #pragma omp atomic
+                                            workspace->CdDelta[k] += CEtors3;
+                                            #pragma omp atomic
+                                            bo_ij->Cdbo += (CEtors4 + CEconj1);
+                                            #pragma omp atomic
+                                            bo_jk->Cdbo += (CEtors5 + CEconj2);
+                                            #pragma omp atomic
+                                            bo_kl->Cdbo += (CEtors6 + CEconj3);
+                                        }
+#else
                                         bo_jk->Cdbopi += CEtors2;
-#if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
                                         workspace->CdDelta[j] += CEtors3;
-#if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
                                         workspace->CdDelta[k] += CEtors3;
-#if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
                                         bo_ij->Cdbo += (CEtors4 + CEconj1);
-#if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
                                         bo_jk->Cdbo += (CEtors5 + CEconj2);
-#if defined(_OPENMP)
-                                        #pragma omp atomic
-#endif
                                         bo_kl->Cdbo += (CEtors6 + CEconj3);
+#endif
 
                                         if ( control->compute_pressure == FALSE &&
                                                 (control->ensemble == NVE || control->ensemble == nhNVT
@@ -787,6 +833,30 @@ void Torsion_Angles( reax_system *system, control_params *control,
             }
 #endif
         } // j loop
+
+#if defined(_OPENMP)
+        if ( control->bonded_reduction_type == THREAD_LOCAL_REDUCTION )
+        {
+            /* reduction (sum) on thread-local coefficients */
+            #pragma omp for schedule(static)
+            for ( i = 0; i < system->N; ++i )
+            {
+                for ( k = 0; k < control->num_threads; ++k )
+                {
+                    workspace->CdDelta[i] += workspace->CdDelta_local[k * system->N + i];
+                }
+
+                for ( pk = Start_Index(i, bonds); pk < End_Index(i, bonds); ++pk )
+                {
+                    for ( k = 0; k < control->num_threads; ++k )
+                    {
+                        bonds->bond_list[pk].bo_data.Cdbo +=
+                            workspace->Cdbo_local[k * workspace->Cdbo_local_size + pk];
+                    }
+                }
+            }
+        }
+#endif
     }
 
      data->E_Tor += e_tor_total;
@@ -27,7 +27,10 @@
 #include "random.h"
 
 
-/* file scope to make OpenMP shared (Vector_isZero) */
+/* file scope to make OpenMP shared (Vector_isZero)
+ * NOTE: as these are also shared between unrelated teams (e.g., the
+ * independent evaluations in simulate_batch), they are only used
+ * for reductions across teams of more than one thread */
 static unsigned int ret_omp;
 /* file scope to make OpenMP shared (Dot, Norm) */
 static real ret2_omp;
@@ -43,6 +46,19 @@ static inline int Vector_isZero( const real * const v, const unsigned int k )
     unsigned int i;
 
 #if defined(_OPENMP)
+    if ( omp_get_num_threads( ) == 1 )
+    {
+        for ( i = 0; i < k; ++i )
+        {
+            if ( FABS( v[i] ) > ALMOST_ZERO )
+            {
+                return FALSE;
+            }
+        }
+
+        return TRUE;
+    }
+
     #pragma omp single
 #endif
     {
@@ -158,8 +174,22 @@ static inline real Dot( const real * const v1, const real * const v2,
         const unsigned int k )
 {
     unsigned int i;
-
 #if defined(_OPENMP)
+    real ret;
+
+    if ( omp_get_num_threads( ) == 1 )
+    {
+        ret = 0.0;
+
+        #pragma omp simd reduction(+: ret)
+        for ( i = 0; i < k; ++i )
+        {
+            ret += v1[i] * v2[i];
+        }
+
+        return ret;
+    }
+
     #pragma omp single
 #endif
     {
@@ -181,8 +211,22 @@ static inline real Dot( const real * const v1, const real * const v2,
 static inline real Norm( const real * const v1, const unsigned int k )
 {
     unsigned int i;
-
 #if defined(_OPENMP)
+    real ret;
+
+    if ( omp_get_num_threads( ) == 1 )
+    {
+        ret = 0.0;
+
+        #pragma omp simd reduction(+: ret)
+        for ( i = 0; i < k; ++i )
+        {
+            ret += SQR( v1[i] );
+        }
+
+        return SQRT( ret );
+    }
+
     #pragma omp single
 #endif
     {
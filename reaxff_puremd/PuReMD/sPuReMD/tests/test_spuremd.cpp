@@ -1,10 +1,197 @@
 #include <gtest/gtest.h>
 
+#include <algorithm>
+#include <cmath>
+#include <cstdlib>
+#include <fstream>
+#include <random>
+#include <sstream>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include <unistd.h>
+
 #include "spuremd.h"
 
+extern "C"
+{
+#include "grid.h"
+#include "nonbonded.h"
+}
+
 
 namespace
 {
+    const char ffield_file[] = "../../tests/ffield.reaxff";
+    const char control_file[] = "../../tests/control";
+
+    typedef std::vector< std::pair<const char *, const char *> > control_list;
+
+
+    /* water molecules on a cubic lattice with n^3 sites, stored in
+     * lattice order, or in random order if seed is nonzero */
+    void water_lattice( int n, double spacing, unsigned int seed,
+            std::vector<int> &atom_type, std::vector<double> &pos,
+            double * const sim_box_info )
+    {
+        const int num_molecules = n * n * n;
+        std::vector<int> order( num_molecules );
+
+        for ( int i = 0; i < num_molecules; ++i )
+        {
+            order[i] = i;
+        }
+        if ( seed != 0 )
+        {
+            std::shuffle( order.begin( ), order.end( ), std::mt19937( seed ) );
+        }
+
+        atom_type.resize( 3 * num_molecules );
+        pos.resize( 9 * num_molecules );
+
+        for ( int m = 0; m < num_molecules; ++m )
+        {
+            const int i = order[m];
+            double * const x = &pos[9 * m];
+
+            x[0] = spacing * (i % n) + 0.2;
+            x[1] = spacing * ((i / n) % n) + 0.2;
+            x[2] = spacing * (i / (n * n)) + 0.2;
+            x[3] = x[0] + 0.957;
+            x[4] = x[1];
+            x[5] = x[2];
+            x[6] = x[0] - 0.24;
+            x[7] = x[1] + 0.927;
+            x[8] = x[2];
+
+            atom_type[3 * m] = 2;
+            atom_type[3 * m + 1] = 1;
+            atom_type[3 * m + 2] = 1;
+        }
+
+        for ( int d = 0; d < 3; ++d )
+        {
+            sim_box_info[d] = spacing * n;
+            sim_box_info[3 + d] = 90.0;
+        }
+    }
+
+
+    /* beta-cristobalite with n^3 cubic unit cells (Si on a diamond lattice,
+     * O at the Si-Si bond midpoints), with the atoms randomly displaced
+     * by up to 0.1 Angstrom in each direction if seed is nonzero */
+    void silica_lattice( int n, unsigned int seed, std::vector<int> &atom_type,
+            std::vector<double> &pos, double * const sim_box_info )
+    {
+        const double a = 7.16;
+        const double fcc[4][3] = { { 0.0, 0.0, 0.0 }, { 0.0, 0.5, 0.5 },
+            { 0.5, 0.0, 0.5 }, { 0.5, 0.5, 0.0 } };
+        /* Si-Si bonds from an fcc site, in units of a / 4 */
+        const double bond[4][3] = { { 1.0, 1.0, 1.0 }, { 1.0, -1.0, -1.0 },
+            { -1.0, 1.0, -1.0 }, { -1.0, -1.0, 1.0 } };
+        std::mt19937 gen( seed );
+        std::uniform_real_distribution<double> shift( -0.1, 0.1 );
+
+        atom_type.clear( );
+        pos.clear( );
+
+        /* atom of the given type at fractional coordinates x (wrapped into the box) */
+        auto add_atom = [&]( int type, const double * const x )
+        {
+            for ( int d = 0; d < 3; ++d )
+            {
+                pos.push_back( std::fmod( a * x[d] + a * n, a * n )
+                        + (seed != 0 ? shift( gen ) : 0.0) );
+            }
+            atom_type.push_back( type );
+        };
+
+        for ( int c = 0; c < n * n * n; ++c )
+        {
+            const int cell[3] = { c % n, (c / n) % n, c / (n * n) };
+
+            for ( int s = 0; s < 4; ++s )
+            {
+                double x[3];
+
+                for ( int d = 0; d < 3; ++d )
+                {
+                    x[d] = cell[d] + fcc[s][d];
+                }
+                add_atom( 5, x );
+
+                for ( int d = 0; d < 3; ++d )
+                {
+                    x[d] = cell[d] + fcc[s][d] + 0.25 * bond[0][d];
+                }
+                add_atom( 5, x );
+
+                for ( int b = 0; b < 4; ++b )
+                {
+                    for ( int d = 0; d < 3; ++d )
+                    {
+                        x[d] = cell[d] + fcc[s][d] + 0.125 * bond[b][d];
+                    }
+                    add_atom( 2, x );
+                }
+            }
+        }
+
+        for ( int d = 0; d < 3; ++d )
+        {
+            sim_box_info[d] = a * n;
+            sim_box_info[3 + d] = 90.0;
+        }
+    }
+
+
+    /* copy of the force field file with the given ACKS2 bond softness
+     * cut-off (line 3 of each atom entry) for all atom types,
+     * returns the name of the copy (removed by the caller) */
+    std::string ffield_with_bond_softness( double b_s_acks2 )
+    {
+        std::ifstream in( ffield_file );
+        std::vector<std::string> lines;
+        std::string line;
+        char fname[] = "ffield_acks2_XXXXXX";
+        int fd, num_gp, num_types;
+
+        while ( std::getline( in, line ) )
+        {
+            lines.push_back( line );
+        }
+
+        /* header, general parameters, and 4 header lines of the atom section */
+        num_gp = std::atoi( lines[1].c_str( ) );
+        num_types = std::atoi( lines[2 + num_gp].c_str( ) );
+
+        for ( int i = 0; i < num_types; ++i )
+        {
+            std::istringstream tokens( lines[2 + num_gp + 4 + 4 * i + 2] );
+            std::ostringstream entry;
+            std::string token;
+
+            for ( int k = 0; tokens >> token; ++k )
+            {
+                entry << " " << (k == 6 ? std::to_string( b_s_acks2 ) : token);
+            }
+            lines[2 + num_gp + 4 + 4 * i + 2] = entry.str( );
+        }
+
+        fd = mkstemp( fname );
+        close( fd );
+
+        std::ofstream out( fname );
+        for ( const std::string &l : lines )
+        {
+            out << l << "\n";
+        }
+
+        return std::string( fname );
+    }
+
+
     class SPuReMDTest : public ::testing::Test
     {
         protected:
@@ -20,6 +207,96 @@ namespace
 
             virtual void SetUp( )
             {
+                handle = NULL;
+            }
+
+            /* single point evaluation (nsteps 0) with the given control parameters */
+            void single_point( const std::vector<int> &atom_type,
+                    const std::vector<double> &pos, const double * const sim_box_info,
+                    const char * const ffield, const control_list &params,
+                    double &e_pot, std::vector<double> &f, std::vector<double> &q )
+            {
+                const char *nsteps[] = { "0" };
+
+                handle = setup2( atom_type.size( ), atom_type.data( ), pos.data( ),
+                        sim_box_info, ffield, control_file );
+                ASSERT_NE( handle, (void *) NULL );
+
+                ASSERT_EQ( set_control_parameter( handle, "nsteps", nsteps ), SPUREMD_SUCCESS );
+                for ( const auto &p : params )
+                {
+                    const char *value[] = { p.second };
+
+                    ASSERT_EQ( set_control_parameter( handle, p.first, value ), SPUREMD_SUCCESS );
+                }
+
+                f.resize( 3 * atom_type.size( ) );
+                q.resize( atom_type.size( ) );
+
+                ASSERT_EQ( simulate( handle ), SPUREMD_SUCCESS );
+                ASSERT_EQ( get_system_info( handle, &e_pot, NULL, NULL, NULL, NULL, NULL ),
+                        SPUREMD_SUCCESS );
+                ASSERT_EQ( get_atom_forces( handle, f.data( ) ), SPUREMD_SUCCESS );
+                ASSERT_EQ( get_atom_charges( handle, q.data( ) ), SPUREMD_SUCCESS );
+
+                cleanup( handle );
+                handle = NULL;
+            }
+
+            /* compare single point evaluations with and without
+             * the compressed charge matrix */
+            void compare_compressed_matrix( const std::vector<int> &atom_type,
+                    const std::vector<double> &pos, const double * const sim_box_info,
+                    const char * const ffield, const char * const charge_method )
+            {
+                double e_pot[2];
+                std::vector<double> f[2], q[2];
+
+                for ( int c = 0; c < 2; ++c )
+                {
+                    single_point( atom_type, pos, sim_box_info, ffield,
+                            { { "charge_method", charge_method },
+                              { "cm_solver_type", "0" },
+                              { "cm_solver_compressed_matrix", c == 0 ? "0" : "1" } },
+                            e_pot[c], f[c], q[c] );
+                }
+
+                EXPECT_NEAR( e_pot[1], e_pot[0], 1.0e-6 * std::abs( e_pot[0] ) );
+                for ( size_t i = 0; i < q[0].size( ); ++i )
+                {
+                    ASSERT_NEAR( q[1][i], q[0][i], 1.0e-8 );
+                }
+                for ( size_t i = 0; i < f[0].size( ); ++i )
+                {
+                    ASSERT_NEAR( f[1][i], f[0][i], 1.0e-6 );
+                }
+            }
+
+            /* compare single point evaluations with atomic updates and with
+             * thread-local accumulation of the bond order derivatives */
+            void compare_bonded_reduction( const std::vector<int> &atom_type,
+                    const std::vector<double> &pos, const double * const sim_box_info )
+            {
+                double e_pot[2];
+                std::vector<double> f[2], q[2];
+
+                for ( int c = 0; c < 2; ++c )
+                {
+                    single_point( atom_type, pos, sim_box_info, ffield_file,
+                            { { "num_threads", "3" },
+                              { "bonded_reduction_type", c == 0 ? "0" : "1" } },
+                            e_pot[c], f[c], q[c] );
+                }
+
+                EXPECT_NEAR( e_pot[1], e_pot[0], 1.0e-8 * std::abs( e_pot[0] ) );
+                for ( size_t i = 0; i < q[0].size( ); ++i )
+                {
+                    ASSERT_NEAR( q[1][i], q[0][i], 1.0e-8 );
+                }
+                for ( size_t i = 0; i < f[0].size( ); ++i )
+                {
+                    ASSERT_NEAR( f[1][i], f[0][i], 1.0e-8 );
+                }
             }
 
             virtual void TearDown( )
@@ -54,6 +331,556 @@ namespace
 
         //TODO: check energy after evolving system, e.g., 100 steps
     }
+
+
+    TEST_F(SPuReMDTest, water_batch)
+    {
+        const int num_molecules = 27, num_atoms = 3 * num_molecules, num_configs = 4;
+        const char *nsteps[] = { "0" };
+        int atom_type[num_atoms];
+        double pos[num_configs * 3 * num_atoms], sim_box_info[num_configs * 6];
+        double e_pot[num_configs], f[num_configs * 3 * num_atoms], q[num_configs * num_atoms];
+        double e_pot_ref, f_ref[3 * num_atoms], q_ref[num_atoms];
+
+        /* water molecules on a lattice, displaced differently in each configuration */
+        for ( int c = 0; c < num_configs; ++c )
+        {
+            for ( int i = 0; i < num_molecules; ++i )
+            {
+                double *x = &pos[3 * num_atoms * c + 9 * i];
+
+                x[0] = 3.1 * (i % 3) + 0.1 * c;
+                x[1] = 3.1 * ((i / 3) % 3) + 0.05 * c * (i % 2);
+                x[2] = 3.1 * (i / 9) + 0.2;
+                x[3] = x[0] + 0.957;
+                x[4] = x[1];
+                x[5] = x[2];
+                x[6] = x[0] - 0.24;
+                x[7] = x[1] + 0.927;
+                x[8] = x[2];
+
+                atom_type[3 * i] = 2;
+                atom_type[3 * i + 1] = 1;
+                atom_type[3 * i + 2] = 1;
+            }
+
+            for ( int d = 0; d < 3; ++d )
+            {
+                sim_box_info[6 * c + d] = 9.3;
+                sim_box_info[6 * c + 3 + d] = 90.0;
+            }
+        }
+
+        handle = NULL;
+
+        ASSERT_EQ( simulate_batch( num_configs, num_atoms, atom_type, pos, sim_box_info,
+                    ffield_file, control_file, e_pot, f, q ), SPUREMD_SUCCESS );
+
+        /* each configuration must match a separate single point evaluation */
+        for ( int c = 0; c < num_configs; ++c )
+        {
+            handle = setup2( num_atoms, atom_type, &pos[3 * num_atoms * c],
+                    &sim_box_info[6 * c], ffield_file, control_file );
+
+            ASSERT_EQ( set_control_parameter( handle, "nsteps", nsteps ), SPUREMD_SUCCESS );
+            ASSERT_EQ( simulate( handle ), SPUREMD_SUCCESS );
+            ASSERT_EQ( get_system_info( handle, &e_pot_ref, NULL, NULL, NULL, NULL, NULL ),
+                    SPUREMD_SUCCESS );
+            ASSERT_EQ( get_atom_forces( handle, f_ref ), SPUREMD_SUCCESS );
+            ASSERT_EQ( get_atom_charges( handle, q_ref ), SPUREMD_SUCCESS );
+
+            EXPECT_NEAR( e_pot[c], e_pot_ref, 1.0e-6 );
+            for ( int i = 0; i < 3 * num_atoms; ++i )
+            {
+                EXPECT_NEAR( f[3 * num_atoms * c + i], f_ref[i], 1.0e-6 );
+            }
+            for ( int i = 0; i < num_atoms; ++i )
+            {
+                EXPECT_NEAR( q[num_atoms * c + i], q_ref[i], 1.0e-8 );
+            }
+
+            cleanup( handle );
+            handle = NULL;
+        }
+    }
+
+
+    /* each configuration of a batch must give the same result
+     * regardless of the configurations evaluated before it */
+    TEST_F(SPuReMDTest, water_batch_order)
+    {
+        const int num_configs = 4;
+        std::vector<int> atom_type;
+        std::vector<double> lattice, pos[2];
+        double sim_box_info[num_configs * 6];
+        int num_atoms;
+
+        water_lattice( 3, 3.1, 0, atom_type, lattice, sim_box_info );
+        num_atoms = atom_type.size( );
+
+        /* configurations in order (pos[0]) and in reverse order (pos[1]) */
+        pos[0].resize( num_configs * 3 * num_atoms );
+        pos[1].resize( num_configs * 3 * num_atoms );
+        for ( int c = 0; c < num_configs; ++c )
+        {
+            for ( int i = 0; i < 3 * num_atoms; ++i )
+            {
+                pos[0][3 * num_atoms * c + i] = lattice[i] + 0.15 * c * ((i % 7) - 3) / 3.0;
+                pos[1][3 * num_atoms * (num_configs - 1 - c) + i] = pos[0][3 * num_atoms * c + i];
+            }
+
+            for ( int d = 0; d < 6; ++d )
+            {
+                sim_box_info[6 * c + d] = sim_box_info[d];
+            }
+        }
+
+        std::vector<double> e_pot[2], f[2], q[2];
+
+        for ( int k = 0; k < 2; ++k )
+        {
+            e_pot[k].resize( num_configs );
+            f[k].resize( num_configs * 3 * num_atoms );
+            q[k].resize( num_configs * num_atoms );
+
+            ASSERT_EQ( simulate_batch( num_configs, num_atoms, atom_type.data( ), pos[k].data( ),
+                        sim_box_info, ffield_file, control_file, e_pot[k].data( ),
+                        f[k].data( ), q[k].data( ) ), SPUREMD_SUCCESS );
+        }
+
+        for ( int c = 0; c < num_configs; ++c )
+        {
+            const int r = num_configs - 1 - c;
+
+            EXPECT_DOUBLE_EQ( e_pot[1][r], e_pot[0][c] );
+            for ( int i = 0; i < 3 * num_atoms; ++i )
+            {
+                EXPECT_DOUBLE_EQ( f[1][3 * num_atoms * r + i], f[0][3 * num_atoms * c + i] );
+            }
+            for ( int i = 0; i < num_atoms; ++i )
+            {
+                EXPECT_DOUBLE_EQ( q[1][num_atoms * r + i], q[0][num_atoms * c + i] );
+            }
+        }
+    }
+
+
+    /* the far neighbor list built with several threads must be identical
+     * to the one built with a single thread, and so must the results up to
+     * the summation order of the threaded force and charge reductions */
+    TEST_F(SPuReMDTest, parallel_nbr_list)
+    {
+        const char *nsteps[] = { "0" };
+        const char *num_threads[][1] = { { "1" }, { "3" } };
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6], e_pot[2];
+        std::vector<double> f[2], q[2];
+        void *handles[2];
+
+        water_lattice( 8, 3.1, 1, atom_type, pos, sim_box_info );
+
+        for ( int k = 0; k < 2; ++k )
+        {
+            handles[k] = setup2( atom_type.size( ), atom_type.data( ), pos.data( ),
+                    sim_box_info, ffield_file, control_file );
+            ASSERT_NE( handles[k], (void *) NULL );
+
+            ASSERT_EQ( set_control_parameter( handles[k], "nsteps", nsteps ), SPUREMD_SUCCESS );
+            ASSERT_EQ( set_control_parameter( handles[k], "num_threads", num_threads[k] ),
+                    SPUREMD_SUCCESS );
+
+            f[k].resize( 3 * atom_type.size( ) );
+            q[k].resize( atom_type.size( ) );
+
+            ASSERT_EQ( simulate( handles[k] ), SPUREMD_SUCCESS );
+            ASSERT_EQ( get_system_info( handles[k], &e_pot[k], NULL, NULL, NULL, NULL, NULL ),
+                    SPUREMD_SUCCESS );
+            ASSERT_EQ( get_atom_forces( handles[k], f[k].data( ) ), SPUREMD_SUCCESS );
+            ASSERT_EQ( get_atom_charges( handles[k], q[k].data( ) ), SPUREMD_SUCCESS );
+        }
+
+        const reax_list * const far_nbrs[2] = {
+            ((spuremd_handle *) handles[0])->lists[FAR_NBRS],
+            ((spuremd_handle *) handles[1])->lists[FAR_NBRS] };
+
+        ASSERT_EQ( far_nbrs[1]->n, far_nbrs[0]->n );
+        for ( int i = 0; i < far_nbrs[0]->n; ++i )
+        {
+            ASSERT_EQ( far_nbrs[1]->index[i], far_nbrs[0]->index[i] );
+            ASSERT_EQ( far_nbrs[1]->end_index[i], far_nbrs[0]->end_index[i] );
+
+            for ( int pj = far_nbrs[0]->index[i]; pj < far_nbrs[0]->end_index[i]; ++pj )
+            {
+                const far_neighbor_data * const nbr[2] = {
+                    &far_nbrs[0]->far_nbr_list[pj], &far_nbrs[1]->far_nbr_list[pj] };
+
+                ASSERT_EQ( nbr[1]->nbr, nbr[0]->nbr );
+                ASSERT_EQ( nbr[1]->d, nbr[0]->d );
+                for ( int d = 0; d < 3; ++d )
+                {
+                    ASSERT_EQ( nbr[1]->rel_box[d], nbr[0]->rel_box[d] );
+                    ASSERT_EQ( nbr[1]->dvec[d], nbr[0]->dvec[d] );
+                }
+            }
+        }
+
+        cleanup( handles[0] );
+        cleanup( handles[1] );
+
+        EXPECT_NEAR( e_pot[1], e_pot[0], 1.0e-6 * std::abs( e_pot[0] ) );
+        for ( size_t i = 0; i < q[0].size( ); ++i )
+        {
+            ASSERT_NEAR( q[1][i], q[0][i], 1.0e-8 );
+        }
+        for ( size_t i = 0; i < f[0].size( ); ++i )
+        {
+            ASSERT_NEAR( f[1][i], f[0][i], 1.0e-6 );
+        }
+    }
+
+
+    /* hydrogen bond kernel */
+    TEST_F(SPuReMDTest, bonded_reduction_water)
+    {
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        water_lattice( 6, 3.1, 1, atom_type, pos, sim_box_info );
+
+        compare_bonded_reduction( atom_type, pos, sim_box_info );
+    }
+
+
+    /* torsion kernel */
+    TEST_F(SPuReMDTest, bonded_reduction_silica)
+    {
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        silica_lattice( 3, 1, atom_type, pos, sim_box_info );
+
+        compare_bonded_reduction( atom_type, pos, sim_box_info );
+    }
+
+
+    /* the tabulated nonbonded kernel reads the spline coefficients from the
+     * packed tables, so compare it with an evaluation over the per-pair
+     * lookup tables (array of structures), as the kernel used to do */
+    TEST_F(SPuReMDTest, tabulated_packed_tables)
+    {
+        const char *nsteps[] = { "0" };
+        const char *tabulate[] = { "10000" };
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        water_lattice( 6, 3.1, 1, atom_type, pos, sim_box_info );
+
+        handle = setup2( atom_type.size( ), atom_type.data( ), pos.data( ),
+                sim_box_info, ffield_file, control_file );
+        ASSERT_NE( handle, (void *) NULL );
+        ASSERT_EQ( set_control_parameter( handle, "nsteps", nsteps ), SPUREMD_SUCCESS );
+        ASSERT_EQ( set_control_parameter( handle, "tabulate_long_range", tabulate ),
+                SPUREMD_SUCCESS );
+        ASSERT_EQ( simulate( handle ), SPUREMD_SUCCESS );
+
+        spuremd_handle * const spmd_handle = (spuremd_handle *) handle;
+        reax_system * const system = spmd_handle->system;
+        const control_params * const control = spmd_handle->control;
+        static_storage * const workspace = spmd_handle->workspace;
+        const reax_list * const far_nbrs = spmd_handle->lists[FAR_NBRS];
+        double e_vdW_ref = 0.0, e_ele_ref = 0.0;
+        std::vector<double> f_ref( 3 * system->N, 0.0 ), f( 3 * system->N, 0.0 );
+
+        for ( int i = 0; i < system->N; ++i )
+        {
+            for ( int pj = far_nbrs->index[i]; pj < far_nbrs->end_index[i]; ++pj )
+            {
+                const far_neighbor_data * const nbr_pj = &far_nbrs->far_nbr_list[pj];
+                const int j = nbr_pj->nbr;
+                const int type_i = system->atoms[i].type, type_j = system->atoms[j].type;
+                const LR_lookup_table * const t =
+                    &workspace->LR[std::min( type_i, type_j )][std::max( type_i, type_j )];
+                double s_vdW, s_ele, CE;
+
+                if ( nbr_pj->d > control->nonb_cut )
+                {
+                    continue;
+                }
+
+                const int r = std::max( (int) (nbr_pj->d * t->inv_dx), 1 );
+                const double dif = nbr_pj->d - (r + 1) * t->dx;
+
+                s_vdW = (i == j) ? 0.5 : 1.0;
+                s_ele = s_vdW * system->atoms[i].q * system->atoms[j].q;
+#if defined(QMMM)
+                if ( system->atoms[i].qmmm_mask == FALSE || system->atoms[j].qmmm_mask == FALSE )
+                {
+                    s_vdW = 0.0;
+                }
+                if ( system->atoms[i].qmmm_mask == FALSE && system->atoms[j].qmmm_mask == FALSE )
+                {
+                    s_ele = 0.0;
+                }
+#endif
+
+                e_vdW_ref += s_vdW * (((t->vdW[r].d * dif + t->vdW[r].c) * dif
+                            + t->vdW[r].b) * dif + t->vdW[r].a);
+                e_ele_ref += s_ele * (((t->ele[r].d * dif + t->ele[r].c) * dif
+                            + t->ele[r].b) * dif + t->ele[r].a);
+                CE = s_vdW * (((t->CEvd[r].d * dif + t->CEvd[r].c) * dif
+                            + t->CEvd[r].b) * dif + t->CEvd[r].a)
+                    + s_ele * (((t->CEclmb[r].d * dif + t->CEclmb[r].c) * dif
+                            + t->CEclmb[r].b) * dif + t->CEclmb[r].a);
+
+                for ( int d = 0; d < 3; ++d )
+                {
+                    f_ref[3 * i + d] -= CE / nbr_pj->d * nbr_pj->dvec[d];
+                    f_ref[3 * j + d] += CE / nbr_pj->d * nbr_pj->dvec[d];
+                }
+            }
+        }
+
+        /* re-run the packed kernel alone on the final state of the simulation */
+        spmd_handle->data->E_vdW = 0.0;
+        spmd_handle->data->E_Ele = 0.0;
+        for ( int i = 0; i < system->N; ++i )
+        {
+            for ( int d = 0; d < 3; ++d )
+            {
+                system->atoms[i].f[d] = 0.0;
+            }
+        }
+#if defined(_OPENMP)
+        for ( int i = 0; i < control->num_threads * system->N; ++i )
+        {
+            for ( int d = 0; d < 3; ++d )
+            {
+                workspace->f_local[i][d] = 0.0;
+            }
+        }
+#endif
+
+        Tabulated_vdW_Coulomb_Energy( system, spmd_handle->control, spmd_handle->data,
+                workspace, spmd_handle->lists, spmd_handle->out_control );
+
+        for ( int i = 0; i < system->N; ++i )
+        {
+            for ( int d = 0; d < 3; ++d )
+            {
+                f[3 * i + d] = system->atoms[i].f[d];
+#if defined(_OPENMP)
+                for ( int k = 0; k < control->num_threads; ++k )
+                {
+                    f[3 * i + d] += workspace->f_local[k * system->N + i][d];
+                }
+#endif
+            }
+        }
+
+        EXPECT_NEAR( spmd_handle->data->E_vdW, e_vdW_ref, 1.0e-10 * std::abs( e_vdW_ref ) );
+        EXPECT_NEAR( spmd_handle->data->E_Ele, e_ele_ref, 1.0e-10 * std::abs( e_ele_ref ) );
+        for ( size_t i = 0; i < f.size( ); ++i )
+        {
+            ASSERT_NEAR( f[i], f_ref[i], 1.0e-8 );
+        }
+    }
+
+
+    /* the structure-of-arrays copies of the positions, charges and types
+     * must follow the atoms when they are reordered by grid cell */
+    TEST_F(SPuReMDTest, reorder_atoms_soa)
+    {
+        const char *nsteps[] = { "0" };
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        water_lattice( 6, 3.1, 1, atom_type, pos, sim_box_info );
+
+        handle = setup2( atom_type.size( ), atom_type.data( ), pos.data( ),
+                sim_box_info, ffield_file, control_file );
+        ASSERT_NE( handle, (void *) NULL );
+        ASSERT_EQ( set_control_parameter( handle, "nsteps", nsteps ), SPUREMD_SUCCESS );
+        ASSERT_EQ( simulate( handle ), SPUREMD_SUCCESS );
+
+        spuremd_handle * const spmd_handle = (spuremd_handle *) handle;
+        reax_system * const system = spmd_handle->system;
+        std::vector<double> x_old( 3 * system->N );
+        int num_moved;
+
+        for ( int k = 0; k < 2; ++k )
+        {
+            if ( k == 1 )
+            {
+                for ( int i = 0; i < system->N; ++i )
+                {
+                    for ( int d = 0; d < 3; ++d )
+                    {
+                        x_old[3 * i + d] = system->atoms[i].x[d];
+                    }
+                }
+
+                Bin_Atoms( system, spmd_handle->workspace );
+                Reorder_Atoms( system, spmd_handle->workspace, spmd_handle->control );
+
+                /* the random molecule order is far from the cell order,
+                 * unless the simulation has already reordered the atoms */
+                num_moved = 0;
+                for ( int i = 0; i < system->N; ++i )
+                {
+                    for ( int d = 0; d < 3; ++d )
+                    {
+                        if ( system->atoms[i].x[d] != x_old[3 * i + d] )
+                        {
+                            ++num_moved;
+                            break;
+                        }
+                    }
+                }
+#if defined(REORDER_ATOMS)
+                ASSERT_EQ( num_moved, 0 );
+#else
+                ASSERT_GT( num_moved, system->N / 2 );
+#endif
+
+                /* the grid cells refer to the new atom indices */
+                const grid * const g = &system->g;
+                for ( int c = 0; c < g->ncell[0] * g->ncell[1] * g->ncell[2]; ++c )
+                {
+                    const int i = c / (g->ncell[1] * g->ncell[2]);
+                    const int j = (c / g->ncell[2]) % g->ncell[1];
+                    const int l = c % g->ncell[2];
+
+                    for ( int a = 0; a < g->top[i][j][l]; ++a )
+                    {
+                        ASSERT_EQ( g->atoms[i][j][l][a], g->start[i][j][l] + a );
+                    }
+                }
+            }
+
+            for ( int i = 0; i < system->N; ++i )
+            {
+                ASSERT_EQ( system->type[i], system->atoms[i].type );
+                ASSERT_EQ( system->q[i], system->atoms[i].q );
+                for ( int d = 0; d < 3; ++d )
+                {
+                    ASSERT_EQ( system->x[i][d], system->atoms[i].x[d] );
+                }
+            }
+        }
+    }
+
+
+#if !defined(QMMM)
+    /* more than 32768 atoms in random order, so the column deltas of many
+     * charge matrix entries do not fit in 16 bits and are escaped */
+    TEST_F(SPuReMDTest, compressed_matrix_escape_qeq)
+    {
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        water_lattice( 23, 6.0, 1, atom_type, pos, sim_box_info );
+        ASSERT_GT( atom_type.size( ), 32768u );
+
+        compare_compressed_matrix( atom_type, pos, sim_box_info, ffield_file, "0" );
+    }
+#endif
+
+
+    /* as above, including the charge constraint row of EE */
+    TEST_F(SPuReMDTest, compressed_matrix_escape_ee)
+    {
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+
+        water_lattice( 23, 6.0, 1, atom_type, pos, sim_box_info );
+
+        compare_compressed_matrix( atom_type, pos, sim_box_info, ffield_file, "1" );
+    }
+
+
+    TEST_F(SPuReMDTest, compressed_matrix_acks2)
+    {
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6];
+        const std::string ffield = ffield_with_bond_softness( 4.0 );
+
+        water_lattice( 23, 6.0, 1, atom_type, pos, sim_box_info );
+
+        compare_compressed_matrix( atom_type, pos, sim_box_info, ffield.c_str( ), "2" );
+
+        std::remove( ffield.c_str( ) );
+    }
+
+
+#if !defined(QMMM)
+    /* QEq charges from the dual CG solver must match those from
+     * GMRES and from CG solving the s and t systems one after the other */
+    TEST_F(SPuReMDTest, dual_cg_qeq)
+    {
+        const char *solvers[] = { "0", "2", "5" };
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6], e_pot[3];
+        std::vector<double> f[3], q[3];
+
+        water_lattice( 6, 3.1, 1, atom_type, pos, sim_box_info );
+
+        for ( int k = 0; k < 3; ++k )
+        {
+            single_point( atom_type, pos, sim_box_info, ffield_file,
+                    { { "charge_method", "0" }, { "cm_solver_type", solvers[k] } },
+                    e_pot[k], f[k], q[k] );
+        }
+
+        for ( int k = 0; k < 2; ++k )
+        {
+            EXPECT_NEAR( e_pot[2], e_pot[k], 1.0e-6 * std::abs( e_pot[k] ) );
+            for ( size_t i = 0; i < q[k].size( ); ++i )
+            {
+                ASSERT_NEAR( q[2][i], q[k][i], 1.0e-8 );
+            }
+            for ( size_t i = 0; i < f[k].size( ); ++i )
+            {
+                ASSERT_NEAR( f[2][i], f[k][i], 1.0e-6 );
+            }
+        }
+    }
+#endif
+
+
+    /* EE has a single right-hand side, so the dual CG solver is plain CG
+     * (equal up to the summation order of the threaded reductions) */
+    TEST_F(SPuReMDTest, dual_cg_ee)
+    {
+        const char *solvers[] = { "2", "5" };
+        std::vector<int> atom_type;
+        std::vector<double> pos;
+        double sim_box_info[6], e_pot[2];
+        std::vector<double> f[2], q[2];
+
+        water_lattice( 6, 3.1, 1, atom_type, pos, sim_box_info );
+
+        for ( int k = 0; k < 2; ++k )
+        {
+            single_point( atom_type, pos, sim_box_info, ffield_file,
+                    { { "charge_method", "1" }, { "cm_solver_type", solvers[k] } },
+                    e_pot[k], f[k], q[k] );
+        }
+
+        EXPECT_NEAR( e_pot[1], e_pot[0], 1.0e-6 * std::abs( e_pot[0] ) );
+        for ( size_t i = 0; i < q[0].size( ); ++i )
+        {
+            ASSERT_NEAR( q[1][i], q[0][i], 1.0e-8 );
+        }
+    }
 }
 
 
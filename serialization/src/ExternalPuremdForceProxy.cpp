@@ -0,0 +1,117 @@
+/* -------------------------------------------------------------------------- *
+ *                                   OpenMM                                   *
+ * -------------------------------------------------------------------------- *
+ * This is part of the OpenMM molecular simulation toolkit originating from   *
+ * Simbios, the NIH National Center for Physics-Based Simulation of           *
+ * Biological Structures at Stanford, funded under the NIH Roadmap for        *
+ * Medical Research, grant U54 GM072970. See https://simtk.org.               *
+ *                                                                            *
+ * Portions copyright (c) 2024 Stanford University and the Authors.           *
+ * Authors: Peter Eastman                                                     *
+ * Contributors:                                                              *
+ *                                                                            *
+ * Permission is hereby granted, free of charge, to any person obtaining a    *
+ * copy of this software and associated documentation files (the "Software"), *
+ * to deal in the Software without restriction, including without limitation  *
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,   *
+ * and/or sell copies of the Software, and to permit persons to whom the      *
+ * Software is furnished to do so, subject to the following conditions:       *
+ *                                                                            *
+ * The above copyright notice and this permission notice shall be included in *
+ * all copies or substantial portions of the Software.                        *
+ *                                                                            *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR *
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,   *
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL    *
+ * THE AUTHORS, CONTRIBUTORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,    *
+ * DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR      *
+ * OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE  *
+ * USE OR OTHER DEALINGS IN THE SOFTWARE.                                     *
+ * -------------------------------------------------------------------------- */
+
+#include "openmm/serialization/ExternalPuremdForceProxy.h"
+#include "openmm/serialization/SerializationNode.h"
+#include "openmm/Force.h"
+#include "openmm/ExternalPuremdForce.h"
+#include <sstream>
+
+using namespace OpenMM;
+using namespace std;
+
+ExternalPuremdForceProxy::ExternalPuremdForceProxy() : SerializationProxy("ExternalPuremdForce") {
+}
+
+void ExternalPuremdForceProxy::serialize(const void* object, SerializationNode& node) const {
+    node.setIntProperty("version", 1);
+    const ExternalPuremdForce& force = *reinterpret_cast<const ExternalPuremdForce*>(object);
+    node.setIntProperty("forceGroup", force.getForceGroup());
+    node.setStringProperty("name", force.getName());
+    string ffieldFile, controlFile;
+    force.getFileNames(ffieldFile, controlFile);
+    node.setStringProperty("ffieldFile", ffieldFile);
+    node.setStringProperty("controlFile", controlFile);
+    node.setStringProperty("ffieldContents", force.getForceFieldContents());
+    node.setStringProperty("controlContents", force.getControlContents());
+    double cutoff, skin;
+    force.getEmbeddingCutoff(cutoff, skin);
+    node.setDoubleProperty("embeddingCutoff", cutoff);
+    node.setDoubleProperty("embeddingSkin", skin);
+    vector<int> centerAtoms;
+    int frequency;
+    force.getAdaptiveQMRegion(centerAtoms, cutoff, frequency);
+    node.setDoubleProperty("adaptiveCutoff", cutoff);
+    node.setIntProperty("adaptiveFrequency", frequency);
+    node.setBoolProperty("computeVirial", force.getComputeVirial());
+    SerializationNode& parametersNode = node.createChildNode("ControlParameters");
+    for (int i = 0; i < force.getNumControlParameters(); i++) {
+        string keyword, value;
+        force.getControlParameter(i, keyword, value);
+        parametersNode.createChildNode("Parameter").setStringProperty("keyword", keyword).setStringProperty("value", value);
+    }
+    SerializationNode& centersNode = node.createChildNode("CenterAtoms");
+    for (int atom : centerAtoms)
+        centersNode.createChildNode("Atom").setIntProperty("index", atom);
+    SerializationNode& atomsNode = node.createChildNode("Atoms");
+    for (int i = 0; i < force.getNumAtoms(); i++) {
+        int particle, isQM;
+        char symbol1, symbol2;
+        force.getParticleParameters(i, particle, symbol1, symbol2, isQM);
+        string symbol(1, symbol1);
+        if (symbol2 != '\0')
+            symbol += symbol2;
+        atomsNode.createChildNode("Atom").setIntProperty("particle", particle).setStringProperty("symbol", symbol).setIntProperty("isQM", isQM);
+    }
+}
+
+void* ExternalPuremdForceProxy::deserialize(const SerializationNode& node) const {
+    int version = node.getIntProperty("version");
+    if (version < 0 || version > 1)
+        throw OpenMMException("Unsupported version number");
+    ExternalPuremdForce* force = NULL;
+    try {
+        force = new ExternalPuremdForce(node.getStringProperty("ffieldFile"), node.getStringProperty("controlFile"));
+        force->setForceGroup(node.getIntProperty("forceGroup", 0));
+        force->setName(node.getStringProperty("name", force->getName()));
+        force->setForceFieldContents(node.getStringProperty("ffieldContents"));
+        force->setControlContents(node.getStringProperty("controlContents"));
+        force->setEmbeddingCutoff(node.getDoubleProperty("embeddingCutoff"), node.getDoubleProperty("embeddingSkin"));
+        if (version > 0)
+            force->setComputeVirial(node.getBoolProperty("computeVirial"));
+        for (auto& parameter : node.getChildNode("ControlParameters").getChildren())
+            force->setControlParameter(parameter.getStringProperty("keyword"), parameter.getStringProperty("value"));
+        for (auto& atom : node.getChildNode("Atoms").getChildren()) {
+            string symbol = atom.getStringProperty("symbol");
+            force->addAtom(atom.getIntProperty("particle"), &symbol[0], atom.getIntProperty("isQM") != 0);
+        }
+        vector<int> centerAtoms;
+        for (auto& atom : node.getChildNode("CenterAtoms").getChildren())
+            centerAtoms.push_back(atom.getIntProperty("index"));
+        force->setAdaptiveQMRegion(centerAtoms, node.getDoubleProperty("adaptiveCutoff"), node.getIntProperty("adaptiveFrequency"));
+        return force;
+    }
+    catch (...) {
+        if (force != NULL)
+            delete force;
+        throw;
+    }
+}
@@ -0,0 +1,122 @@
+/* -------------------------------------------------------------------------- *
+ *                                   OpenMM                                   *
+ * -------------------------------------------------------------------------- *
+ * This is part of the OpenMM molecular simulation toolkit originating from   *
+ * Simbios, the NIH National Center for Physics-Based Simulation of           *
+ * Biological Structures at Stanford, funded under the NIH Roadmap for        *
+ * Medical Research, grant U54 GM072970. See https://simtk.org.               *
+ *                                                                            *
+ * Portions copyright (c) 2024 Stanford University and the Authors.            *
+ * Authors: Peter Eastman                                                     *
+ * Contributors:                                                              *
+ *                                                                            *
+ * Permission is hereby granted, free of charge, to any person obtaining a    *
+ * copy of this software and associated documentation files (the "Software"), *
+ * to deal in the Software without restriction, including without limitation  *
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,   *
+ * and/or sell copies of the Software, and to permit persons to whom the      *
+ * Software is furnished to do so, subject to the following conditions:       *
+ *                                                                            *
+ * The above copyright notice and this permission notice shall be included in *
+ * all copies or substantial portions of the Software.                        *
+ *                                                                            *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR *
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,   *
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL    *
+ * THE AUTHORS, CONTRIBUTORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,    *
+ * DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR      *
+ * OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE  *
+ * USE OR OTHER DEALINGS IN THE SOFTWARE.                                     *
+ * -------------------------------------------------------------------------- */
+
+#include "openmm/internal/AssertionUtilities.h"
+#include "openmm/ExternalPuremdForce.h"
+#include "openmm/serialization/XmlSerializer.h"
+#include <iostream>
+#include <sstream>
+
+using namespace OpenMM;
+using namespace std;
+
+void testSerialization() {
+    // Create a Force.
+
+    ExternalPuremdForce force("ffield.reaxff", "control");
+    force.setForceGroup(3);
+    force.setName("custom name");
+    force.setForceFieldContents("force field\ncontents\n");
+    force.setControlContents("nsteps 0\n");
+    force.setControlParameter("charge_method", "1");
+    force.setControlParameter("cm_solver_q_err", "1.0e-10");
+    char o[] = "O", h[] = "H", zn[] = "Zn";
+    force.addAtom(0, o, true);
+    force.addAtom(1, h, true);
+    force.addAtom(3, zn, false);
+    force.setAdaptiveQMRegion({0}, 0.5, 10);
+    force.setEmbeddingCutoff(1.2, 0.1);
+    force.setComputeVirial(true);
+
+    // Serialize and then deserialize it.
+
+    stringstream buffer;
+    XmlSerializer::serialize<ExternalPuremdForce>(&force, "Force", buffer);
+    ExternalPuremdForce* copy = XmlSerializer::deserialize<ExternalPuremdForce>(buffer);
+
+    // Compare the two forces to see if they are identical.
+
+    ExternalPuremdForce& force2 = *copy;
+    ASSERT_EQUAL(force.getForceGroup(), force2.getForceGroup());
+    ASSERT_EQUAL(force.getName(), force2.getName());
+    string ffield1, control1, ffield2, control2;
+    force.getFileNames(ffield1, control1);
+    force2.getFileNames(ffield2, control2);
+    ASSERT_EQUAL(ffield1, ffield2);
+    ASSERT_EQUAL(control1, control2);
+    ASSERT_EQUAL(force.getForceFieldContents(), force2.getForceFieldContents());
+    ASSERT_EQUAL(force.getControlContents(), force2.getControlContents());
+    ASSERT_EQUAL(force.getNumControlParameters(), force2.getNumControlParameters());
+    for (int i = 0; i < force.getNumControlParameters(); i++) {
+        string keyword1, value1, keyword2, value2;
+        force.getControlParameter(i, keyword1, value1);
+        force2.getControlParameter(i, keyword2, value2);
+        ASSERT_EQUAL(keyword1, keyword2);
+        ASSERT_EQUAL(value1, value2);
+    }
+    ASSERT_EQUAL(force.getNumAtoms(), force2.getNumAtoms());
+    for (int i = 0; i < force.getNumAtoms(); i++) {
+        int particle1, particle2, isQM1, isQM2;
+        char symbol1a, symbol1b, symbol2a, symbol2b;
+        force.getParticleParameters(i, particle1, symbol1a, symbol1b, isQM1);
+        force2.getParticleParameters(i, particle2, symbol2a, symbol2b, isQM2);
+        ASSERT_EQUAL(particle1, particle2);
+        ASSERT_EQUAL(symbol1a, symbol2a);
+        ASSERT_EQUAL(symbol1b, symbol2b);
+        ASSERT_EQUAL(isQM1, isQM2);
+    }
+    vector<int> centers1, centers2;
+    double cutoff1, cutoff2, skin1, skin2;
+    int frequency1, frequency2;
+    force.getAdaptiveQMRegion(centers1, cutoff1, frequency1);
+    force2.getAdaptiveQMRegion(centers2, cutoff2, frequency2);
+    ASSERT_EQUAL_CONTAINERS(centers1, centers2);
+    ASSERT_EQUAL(cutoff1, cutoff2);
+    ASSERT_EQUAL(frequency1, frequency2);
+    force.getEmbeddingCutoff(cutoff1, skin1);
+    force2.getEmbeddingCutoff(cutoff2, skin2);
+    ASSERT_EQUAL(cutoff1, cutoff2);
+    ASSERT_EQUAL(skin1, skin2);
+    ASSERT_EQUAL(force.getComputeVirial(), force2.getComputeVirial());
+    delete copy;
+}
+
+int main() {
+    try {
+        testSerialization();
+    }
+    catch(const exception& e) {
+        cout << "exception: " << e.what() << endl;
+        return 1;
+    }
+    cout << "Done" << endl;
+    return 0;
+}
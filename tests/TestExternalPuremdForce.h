@@ -0,0 +1,963 @@
+/* -------------------------------------------------------------------------- *
+ *                                   OpenMM                                   *
+ * -------------------------------------------------------------------------- *
+ * This is part of the OpenMM molecular simulation toolkit originating from   *
+ * Simbios, the NIH National Center for Physics-Based Simulation of           *
+ * Biological Structures at Stanford, funded under the NIH Roadmap for        *
+ * Medical Research, grant U54 GM072970. See https://simtk.org.               *
+ *                                                                            *
+ * Portions copyright (c) 2026 Stanford University and the Authors.      *
+ * Authors: Peter Eastman                                                     *
+ * Contributors:                                                              *
+ *                                                                            *
+ * Permission is hereby granted, free of charge, to any person obtaining a    *
+ * copy of this software and associated documentation files (the "Software"), *
+ * to deal in the Software without restriction, including without limitation  *
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,   *
+ * and/or sell copies of the Software, and to permit persons to whom the      *
+ * Software is furnished to do so, subject to the following conditions:       *
+ *                                                                            *
+ * The above copyright notice and this permission notice shall be included in *
+ * all copies or substantial portions of the Software.                        *
+ *                                                                            *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR *
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,   *
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL    *
+ * THE AUTHORS, CONTRIBUTORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,    *
+ * DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR      *
+ * OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE  *
+ * USE OR OTHER DEALINGS IN THE SOFTWARE.                                     *
+ * -------------------------------------------------------------------------- */
+
+#include "openmm/internal/AssertionUtilities.h"
+#include "openmm/CMMotionRemover.h"
+#include "openmm/Context.h"
+#include "openmm/ExternalPuremdForce.h"
+#include "openmm/NonbondedForce.h"
+#include "openmm/System.h"
+#include "openmm/VerletIntegrator.h"
+#include "sfmt/SFMT.h"
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+using namespace OpenMM;
+using namespace std;
+
+const string ffieldFile = string(OPENMM_TEST_DATA_DIR)+"/ffield.reaxff";
+const string controlFile = string(OPENMM_TEST_DATA_DIR)+"/control_qmmm";
+const string refactorControlFile = string(OPENMM_TEST_DATA_DIR)+"/control_qmmm_refactor";
+const string refactorIlutControlFile = string(OPENMM_TEST_DATA_DIR)+"/control_qmmm_refactor_ilut";
+const string mixedControlFile = string(OPENMM_TEST_DATA_DIR)+"/control_qmmm_mixed";
+const string compressedControlFile = string(OPENMM_TEST_DATA_DIR)+"/control_qmmm_compressed";
+
+/**
+ * Build a system of four water molecules.  The first numQM of them are reactive, and
+ * the rest are treated as point charges.
+ */
+ExternalPuremdForce* createWaterSystem(System& system, vector<Vec3>& positions, int numQM=1, const string& control=controlFile) {
+    const int numMolecules = 4;
+    const double boxSize = 2.5;
+    system.setDefaultPeriodicBoxVectors(Vec3(boxSize, 0, 0), Vec3(0, boxSize, 0), Vec3(0, 0, boxSize));
+    ExternalPuremdForce* force = new ExternalPuremdForce(ffieldFile, control);
+    NonbondedForce* nonbonded = new NonbondedForce();
+    nonbonded->setNonbondedMethod(NonbondedForce::CutoffPeriodic);
+    char oxygen[] = "O";
+    char hydrogen[] = "H";
+    for (int i = 0; i < numMolecules; i++) {
+        Vec3 center(0.9+0.35*(i%2), 0.9+0.35*((i/2)%2), 1.0+0.1*i);
+        positions.push_back(center);
+        positions.push_back(center+Vec3(0.0957, 0, 0));
+        positions.push_back(center+Vec3(-0.024, 0.0927, 0));
+        system.addParticle(15.999);
+        system.addParticle(1.008);
+        system.addParticle(1.008);
+        nonbonded->addParticle(-0.834, 0.315, 0.636);
+        nonbonded->addParticle(0.417, 1.0, 0.0);
+        nonbonded->addParticle(0.417, 1.0, 0.0);
+        force->addAtom(3*i, oxygen, i < numQM);
+        force->addAtom(3*i+1, hydrogen, i < numQM);
+        force->addAtom(3*i+2, hydrogen, i < numQM);
+    }
+    nonbonded->setForceGroup(1);
+    system.addForce(nonbonded);
+    system.addForce(force);
+    return force;
+}
+
+void testForcesMatchEnergy() {
+    // PuReMD's QM/MM forces on the point charges are not the exact derivative of the
+    // energy, so only check a system that is entirely reactive.  Even then, ReaxFF forces
+    // only match the energy to about a percent.
+
+    System system;
+    vector<Vec3> positions;
+    createWaterSystem(system, positions, 4);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    State state = context.getState(State::Forces | State::Energy, false, 1);
+    ASSERT(state.getPotentialEnergy() != 0.0);
+
+    // Take a small step in the direction of the energy gradient and see whether the potential energy changes by the expected amount.
+
+    const vector<Vec3>& forces = state.getForces();
+    double norm = 0.0;
+    for (int i = 0; i < (int) forces.size(); ++i)
+        norm += forces[i].dot(forces[i]);
+    norm = std::sqrt(norm);
+    const double stepSize = 1e-4;
+    double step = 0.5*stepSize/norm;
+    vector<Vec3> positions2(positions.size()), positions3(positions.size());
+    for (int i = 0; i < (int) positions.size(); ++i) {
+        positions2[i] = positions[i]-forces[i]*step;
+        positions3[i] = positions[i]+forces[i]*step;
+    }
+    context.setPositions(positions2);
+    State state2 = context.getState(State::Energy, false, 1);
+    context.setPositions(positions3);
+    State state3 = context.getState(State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(norm, (state2.getPotentialEnergy()-state3.getPotentialEnergy())/stepSize, 3e-2);
+}
+
+void testPeriodicImages() {
+    System system;
+    vector<Vec3> positions;
+    createWaterSystem(system, positions);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    State state1 = context.getState(State::Forces | State::Energy, false, 1);
+
+    // Translating every atom by a box vector should not change anything.
+
+    Vec3 a, b, c;
+    system.getDefaultPeriodicBoxVectors(a, b, c);
+    for (int i = 0; i < (int) positions.size(); i++)
+        positions[i] += a-c;
+    context.setPositions(positions);
+    State state2 = context.getState(State::Forces | State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-5);
+    for (int i = 0; i < (int) positions.size(); i++)
+        ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-4);
+}
+
+void testRepeatedEvaluation() {
+    System system;
+    vector<Vec3> positions;
+    createWaterSystem(system, positions);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    context.getState(State::Forces | State::Energy, false, 1);
+
+    // Later evaluations reuse the PuReMD session from the first one.  Move the atoms and
+    // resize the box, and make sure the results agree with a freshly created Context.
+
+    OpenMM_SFMT::SFMT sfmt;
+    init_gen_rand(0, sfmt);
+    for (int i = 0; i < (int) positions.size(); i++)
+        positions[i] += Vec3(genrand_real2(sfmt)-0.5, genrand_real2(sfmt)-0.5, genrand_real2(sfmt)-0.5)*0.01;
+    Vec3 a(2.6, 0, 0), b(0, 2.5, 0), c(0, 0, 2.5);
+    context.setPositions(positions);
+    context.setPeriodicBoxVectors(a, b, c);
+    State state1 = context.getState(State::Forces | State::Energy, false, 1);
+    VerletIntegrator integrator2(0.001);
+    Context context2(system, integrator2, platform);
+    context2.setPositions(positions);
+    context2.setPeriodicBoxVectors(a, b, c);
+    State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-5);
+    for (int i = 0; i < (int) positions.size(); i++)
+        ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-4);
+}
+
+void testNeighborListReuse() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    context.getState(State::Forces | State::Energy, false, 1);
+    int numBuilds, numReuses;
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(1, numBuilds);
+    ASSERT_EQUAL(0, numReuses);
+
+    // Small displacements stay within the Verlet list buffer, so the neighbor list should be
+    // reused.  Shifting a molecule by a whole box length should not count as a displacement.
+
+    VerletIntegrator integrator2(0.001);
+    Context context2(system, integrator2, platform);
+    for (int step = 0; step < 3; step++) {
+        for (int i = 0; i < 3; i++)
+            positions[3+i][0] -= 2.5;
+        positions[0][1] += 0.005;
+        context.setPositions(positions);
+        State state1 = context.getState(State::Forces | State::Energy, false, 1);
+        context2.reinitialize();
+        context2.setPositions(positions);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-5);
+        for (int i = 0; i < (int) positions.size(); i++)
+            ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-4);
+    }
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(1, numBuilds);
+    ASSERT_EQUAL(3, numReuses);
+
+    // A large displacement requires the list to be rebuilt.
+
+    positions[0][2] += 0.2;
+    context.setPositions(positions);
+    context.getState(State::Forces | State::Energy, false, 1);
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(2, numBuilds);
+    ASSERT_EQUAL(3, numReuses);
+}
+
+void testTriclinicNeighborList() {
+    // Displacements in a triclinic box cannot be tracked with the minimum image convention of
+    // an orthorhombic box, so the neighbor list should be rebuilt for every evaluation.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    system.setDefaultPeriodicBoxVectors(Vec3(2.5, 0, 0), Vec3(0.5, 2.5, 0), Vec3(0, 0, 2.5));
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    VerletIntegrator integrator2(0.001);
+    Context context2(system, integrator2, platform);
+    for (int step = 0; step < 3; step++) {
+        positions[0][1] += 0.005;
+        context.setPositions(positions);
+        State state1 = context.getState(State::Forces | State::Energy, false, 1);
+        context2.reinitialize();
+        context2.setPositions(positions);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-5);
+        for (int i = 0; i < (int) positions.size(); i++)
+            ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-4);
+    }
+    int numBuilds, numReuses;
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(3, numBuilds);
+    ASSERT_EQUAL(0, numReuses);
+}
+
+void testCachedEvaluation() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    force->setForceGroup(2);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    State state1 = context.getState(State::Forces | State::Energy, false, 1<<2);
+    int numBuilds, numReuses;
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(1, numBuilds+numReuses);
+
+    // Asking again for the same positions, or for groups that do not include the force, should not run PuReMD.
+
+    State state2 = context.getState(State::Energy, false, 1<<2);
+    context.getState(State::Forces | State::Energy, false, 1<<1);
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(1, numBuilds+numReuses);
+    ASSERT_EQUAL(state1.getPotentialEnergy(), state2.getPotentialEnergy());
+
+    // Moving an atom invalidates the cached results.
+
+    positions[0][0] += 0.01;
+    context.setPositions(positions);
+    State state3 = context.getState(State::Forces | State::Energy, false, 1<<2);
+    force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+    ASSERT_EQUAL(2, numBuilds+numReuses);
+    ASSERT(state1.getPotentialEnergy() != state3.getPotentialEnergy());
+}
+
+void compareToFixedRegion(Context& context, ExternalPuremdForce* force, const vector<Vec3>& positions, const vector<int>& expectedQM) {
+    State state1 = context.getState(State::Forces | State::Energy, false, 1);
+    vector<int> qmAtoms;
+    force->getQMAtomsInContext(context, qmAtoms);
+    ASSERT_EQUAL_CONTAINERS(expectedQM, qmAtoms);
+
+    // Build the same reactive region with fixed isQM flags and make sure the results agree.
+
+    System system;
+    vector<Vec3> positions2;
+    ExternalPuremdForce* force2 = createWaterSystem(system, positions2, 0);
+    for (int atom : expectedQM) {
+        int particle, isQM;
+        char symbol[3] = {0, 0, 0};
+        force2->getParticleParameters(atom, particle, symbol[0], symbol[1], isQM);
+        force2->setParticleParameters(atom, particle, symbol, true);
+    }
+    VerletIntegrator integrator(0.001);
+    Context context2(system, integrator, platform);
+    context2.setPositions(positions);
+    State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-5);
+    for (int i = 0; i < (int) positions.size(); i++)
+        ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-4);
+}
+
+void testAdaptiveQMRegion() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 0);
+    force->setAdaptiveQMRegion({0}, 0.2, 1);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    compareToFixedRegion(context, force, positions, {0, 1, 2});
+
+    // Enlarge the region so it takes in part of the next molecule.
+
+    force->setAdaptiveQMRegion({0}, 0.4, 1);
+    force->updateParametersInContext(context);
+    compareToFixedRegion(context, force, positions, {0, 1, 2, 3, 5});
+
+    // Move the center atom's molecule away, so the region shrinks again.
+
+    for (int i = 0; i < 3; i++)
+        positions[i] -= Vec3(0.2, 0, 0);
+    context.setPositions(positions);
+    compareToFixedRegion(context, force, positions, {0, 1, 2});
+}
+
+void testAdaptiveQMFrequency() {
+    // The region is reassigned every second evaluation.  Asking for the same positions again returns the
+    // cached results, so it should not count as an evaluation.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 0);
+    force->setAdaptiveQMRegion({0}, 0.4, 2);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    context.getState(State::Energy);
+    context.getState(State::Forces);
+    vector<int> qmAtoms;
+    force->getQMAtomsInContext(context, qmAtoms);
+    ASSERT_EQUAL_CONTAINERS(vector<int>({0, 1, 2, 3, 5}), qmAtoms);
+
+    // Moving the center atom's molecule away should not shrink the region until the next reassignment.
+
+    for (int i = 0; i < 3; i++)
+        positions[i] -= Vec3(0.2, 0, 0);
+    context.setPositions(positions);
+    context.getState(State::Energy);
+    force->getQMAtomsInContext(context, qmAtoms);
+    ASSERT_EQUAL_CONTAINERS(vector<int>({0, 1, 2, 3, 5}), qmAtoms);
+    positions[10] += Vec3(0.001, 0, 0);
+    context.setPositions(positions);
+    context.getState(State::Energy);
+    force->getQMAtomsInContext(context, qmAtoms);
+    ASSERT_EQUAL_CONTAINERS(vector<int>({0, 1, 2}), qmAtoms);
+    vector<double> times;
+    int numEvaluations;
+    force->getTimingInfoInContext(context, times, numEvaluations);
+    ASSERT_EQUAL(3, numEvaluations);
+}
+
+void compareToEmbeddedSubset(Context& context, const vector<Vec3>& positions, double cutoff) {
+    // Find the MM atoms within the cutoff of any QM atom, and build a force that contains only them.
+
+    System system;
+    vector<Vec3> positions2;
+    ExternalPuremdForce* fullForce = createWaterSystem(system, positions2);
+    ExternalPuremdForce* force = new ExternalPuremdForce(ffieldFile, controlFile);
+    for (int i = 0; i < fullForce->getNumAtoms(); i++) {
+        int particle, isQM;
+        char symbol[3] = {0, 0, 0};
+        fullForce->getParticleParameters(i, particle, symbol[0], symbol[1], isQM);
+        bool include = isQM;
+        for (int j = 0; j < 3; j++) {
+            Vec3 delta = positions[particle]-positions[j];
+            if (sqrt(delta.dot(delta)) <= cutoff)
+                include = true;
+        }
+        if (include)
+            force->addAtom(particle, symbol, isQM);
+    }
+    ASSERT(force->getNumAtoms() > 3);
+    ASSERT(force->getNumAtoms() < fullForce->getNumAtoms());
+    system.removeForce(system.getNumForces()-1);
+    system.addForce(force);
+    VerletIntegrator integrator(0.001);
+    Context context2(system, integrator, platform);
+    context2.setPositions(positions);
+    State state1 = context.getState(State::Forces | State::Energy, false, 1);
+    State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(state2.getPotentialEnergy(), state1.getPotentialEnergy(), 1e-5);
+    for (int i = 0; i < (int) positions.size(); i++)
+        ASSERT_EQUAL_VEC(state2.getForces()[i], state1.getForces()[i], 1e-4);
+}
+
+void testEmbeddingCutoff() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    force->setEmbeddingCutoff(0.25, 0.05);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    compareToEmbeddedSubset(context, positions, 0.3);
+
+    // Move the QM molecule far enough that a different set of MM atoms is selected.
+
+    for (int i = 0; i < 3; i++)
+        positions[i] += Vec3(0, 0, 0.15);
+    context.setPositions(positions);
+    compareToEmbeddedSubset(context, positions, 0.3);
+}
+
+void testEmbeddingKeepsChargeHistory() {
+    // Selecting a different set of MM atoms should not discard the charge history of the QM atoms, so the
+    // charge solver should need fewer iterations than a new Context, which has no history.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    force->setEmbeddingCutoff(0.25, 0.004);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    context.getState(State::Energy);
+    int totalIterations, numPreconditionerComputations, numBuilds, numReuses;
+    double residual;
+    force->getChargeSolverInfoInContext(context, totalIterations, residual, numPreconditionerComputations);
+    int step = 0, lastIterations;
+    do {
+        lastIterations = totalIterations;
+        for (int i = 0; i < 3; i++)
+            positions[i] += Vec3(0, 0, 0.001);
+        context.setPositions(positions);
+        context.getState(State::Energy);
+        force->getChargeSolverInfoInContext(context, totalIterations, residual, numPreconditionerComputations);
+        force->getNeighborListInfoInContext(context, numBuilds, numReuses);
+        ASSERT(++step < 150);
+    } while (numBuilds == 1);
+    int warmIterations = totalIterations-lastIterations;
+    VerletIntegrator integrator2(0.001);
+    Context context2(system, integrator2, platform);
+    context2.setPositions(positions);
+    context2.getState(State::Energy);
+    int coldIterations;
+    force->getChargeSolverInfoInContext(context2, coldIterations, residual, numPreconditionerComputations);
+    ASSERT(warmIterations < coldIterations);
+    ASSERT_EQUAL_TOL(context2.getState(State::Energy).getPotentialEnergy(), context.getState(State::Energy).getPotentialEnergy(), 1e-5);
+}
+
+void testTimingInfo() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    vector<double> times;
+    int numEvaluations;
+    force->getTimingInfoInContext(context, times, numEvaluations);
+    ASSERT_EQUAL(ExternalPuremdForce::TotalTime+1, times.size());
+    ASSERT_EQUAL(0, numEvaluations);
+    for (int step = 0; step < 3; step++) {
+        positions[0][1] += 0.005;
+        context.setPositions(positions);
+        context.getState(State::Forces | State::Energy, false, 1);
+    }
+
+    // Repeating the last evaluation returns cached results without running PuReMD.
+
+    context.getState(State::Energy, false, 1);
+    force->getTimingInfoInContext(context, times, numEvaluations);
+    ASSERT_EQUAL(3, numEvaluations);
+    double sum = 0.0;
+    for (int i = 0; i < ExternalPuremdForce::TotalTime; i++) {
+        ASSERT(times[i] >= 0.0);
+        sum += times[i];
+    }
+    ASSERT(times[ExternalPuremdForce::ChargeTime] > 0.0);
+    ASSERT(times[ExternalPuremdForce::TotalTime] >= sum);
+    int numIterations, numPreconditionerComputations;
+    double residual;
+    force->getChargeSolverInfoInContext(context, numIterations, residual, numPreconditionerComputations);
+    ASSERT(numIterations > 0);
+    ASSERT(residual < 1e-10);
+    ASSERT(numPreconditionerComputations > 0 && numPreconditionerComputations <= 3);
+}
+
+void testPreconditionerReuse(const string& control) {
+    // The control file asks for the preconditioner to be recomputed every 5 charge solves.  It should
+    // be carried across evaluations rather than recomputed every time PuReMD is run, without
+    // affecting the results.
+
+    System system1, system2;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force1 = createWaterSystem(system1, positions);
+    positions.clear();
+    ExternalPuremdForce* force2 = createWaterSystem(system2, positions, 1, control);
+    VerletIntegrator integrator1(0.001), integrator2(0.001);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    for (int step = 0; step < 6; step++) {
+        positions[0][1] += 0.005;
+        positions[4][0] -= 0.003;
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-6);
+        for (int i = 0; i < system1.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-6);
+    }
+    int numIterations, numPreconditionerComputations;
+    double residual;
+    force1->getChargeSolverInfoInContext(context1, numIterations, residual, numPreconditionerComputations);
+    ASSERT_EQUAL(6, numPreconditionerComputations);
+    force2->getChargeSolverInfoInContext(context2, numIterations, residual, numPreconditionerComputations);
+    ASSERT_EQUAL(2, numPreconditionerComputations);
+}
+
+void testMixedPrecisionSolver() {
+    // Storing the charge matrix in single precision should not change the results, since the solution
+    // is refined until it reaches the same tolerance as the double precision solver.
+
+    System system1, system2;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force1 = createWaterSystem(system1, positions);
+    positions.clear();
+    ExternalPuremdForce* force2 = createWaterSystem(system2, positions, 1, mixedControlFile);
+    VerletIntegrator integrator1(0.001), integrator2(0.001);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    for (int step = 0; step < 3; step++) {
+        positions[0][1] += 0.005;
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-6);
+        for (int i = 0; i < system1.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-6);
+    }
+    int numIterations, numPreconditionerComputations;
+    double residual;
+    force2->getChargeSolverInfoInContext(context2, numIterations, residual, numPreconditionerComputations);
+    ASSERT(numIterations > 0);
+    ASSERT(residual < 1e-10);
+}
+
+void testCompressedChargeMatrix() {
+    // Compressing the column indices of the charge matrix only changes how they are stored, so the
+    // results should be identical to the uncompressed solver.
+
+    System system1, system2;
+    vector<Vec3> positions;
+    createWaterSystem(system1, positions);
+    positions.clear();
+    createWaterSystem(system2, positions, 1, compressedControlFile);
+    VerletIntegrator integrator1(0.001), integrator2(0.001);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    for (int step = 0; step < 3; step++) {
+        positions[0][1] += 0.005;
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-10);
+        for (int i = 0; i < system1.getNumParticles(); i++)
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-10);
+    }
+}
+
+string readFile(const string& filename) {
+    ifstream file(filename);
+    stringstream contents;
+    contents << file.rdbuf();
+    return contents.str();
+}
+
+void testInMemoryParameters() {
+    // Passing the force field and control parameters in memory should give the same results as reading
+    // them from files, and a single parameter set in memory should override the control file.
+
+    System system1, system2, system3, system4;
+    vector<Vec3> positions;
+    createWaterSystem(system1, positions, 1, mixedControlFile);
+    positions.clear();
+    ExternalPuremdForce* force2 = createWaterSystem(system2, positions, 1, "");
+    force2->setForceFieldContents(readFile(ffieldFile));
+    force2->setControlContents(readFile(mixedControlFile));
+    positions.clear();
+    ExternalPuremdForce* force3 = createWaterSystem(system3, positions, 1, "");
+    force3->setForceFieldContents(readFile(ffieldFile));
+    force3->setControlContents(readFile(mixedControlFile));
+    positions.clear();
+    ExternalPuremdForce* force4 = createWaterSystem(system4, positions);
+    force4->setControlParameter("cm_solver_mixed_precision", "0");
+    force4->setControlParameter("cm_solver_mixed_precision", "1");
+    ASSERT_EQUAL(1, force4->getNumControlParameters());
+    VerletIntegrator integrator1(0.001), integrator2(0.001), integrator3(0.001), integrator4(0.001);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    Context context3(system3, integrator3, platform);
+    Context context4(system4, integrator4, platform);
+    for (int step = 0; step < 2; step++) {
+        positions[0][1] += 0.005;
+        context1.setPositions(positions);
+        context2.setPositions(positions);
+        context3.setPositions(positions);
+        context4.setPositions(positions);
+        State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+        State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+        State state3 = context3.getState(State::Forces | State::Energy, false, 1);
+        State state4 = context4.getState(State::Forces | State::Energy, false, 1);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-10);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state3.getPotentialEnergy(), 1e-10);
+        ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state4.getPotentialEnergy(), 1e-10);
+        for (int i = 0; i < system1.getNumParticles(); i++) {
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-10);
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state3.getForces()[i], 1e-10);
+            ASSERT_EQUAL_VEC(state1.getForces()[i], state4.getForces()[i], 1e-10);
+        }
+    }
+}
+
+void testTabulatedLongRange() {
+    // Contexts with the same force field and table size share one set of long-range lookup tables,
+    // whose energies should closely reproduce the untabulated interactions.
+
+    System system1, system2, system3;
+    vector<Vec3> positions;
+    createWaterSystem(system1, positions);
+    positions.clear();
+    ExternalPuremdForce* force2 = createWaterSystem(system2, positions);
+    force2->setControlParameter("tabulate_long_range", "10000");
+    positions.clear();
+    ExternalPuremdForce* force3 = createWaterSystem(system3, positions);
+    force3->setControlParameter("tabulate_long_range", "10000");
+    VerletIntegrator integrator1(0.001), integrator2(0.001), integrator3(0.001);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    Context context3(system3, integrator3, platform);
+    context1.setPositions(positions);
+    context2.setPositions(positions);
+    context3.setPositions(positions);
+    State state1 = context1.getState(State::Forces | State::Energy, false, 1);
+    State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+    State state3 = context3.getState(State::Forces | State::Energy, false, 1);
+    ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-4);
+    ASSERT_EQUAL(state2.getPotentialEnergy(), state3.getPotentialEnergy());
+    for (int i = 0; i < system1.getNumParticles(); i++)
+        ASSERT_EQUAL_VEC(state2.getForces()[i], state3.getForces()[i], 0.0);
+}
+
+void testVirial() {
+    // The virial should be consistent with the forces, and its trace should give the change in
+    // energy when the box and all positions are scaled together.  Only check a system that is
+    // entirely reactive, since only then are the forces the derivative of the energy.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 4);
+    force->setComputeVirial(true);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    State state = context.getState(State::Forces, false, 1);
+    Vec3 virial[3];
+    force->getVirialInContext(context, virial[0], virial[1], virial[2]);
+    double trace = virial[0][0]+virial[1][1]+virial[2][2];
+    double sum = 0.0;
+    for (int i = 0; i < (int) positions.size(); i++)
+        sum += state.getForces()[i].dot(positions[i]);
+    ASSERT_EQUAL_TOL(sum, trace, 1e-4);
+
+    // Scaling the box is seen by PuReMD, so the energy changes by the expected amount.
+
+    Vec3 a, b, c;
+    system.getDefaultPeriodicBoxVectors(a, b, c);
+    const double delta = 1e-4;
+    double energy[2];
+    for (int i = 0; i < 2; i++) {
+        double scale = (i == 0 ? 1+delta : 1-delta);
+        vector<Vec3> scaledPositions;
+        for (const Vec3& pos : positions)
+            scaledPositions.push_back(pos*scale);
+        context.setPeriodicBoxVectors(a*scale, b*scale, c*scale);
+        context.setPositions(scaledPositions);
+        energy[i] = context.getState(State::Energy, false, 1).getPotentialEnergy();
+    }
+    ASSERT_EQUAL_TOL(-trace, (energy[0]-energy[1])/(2*delta), 3e-2);
+}
+
+void testBondsAndFragments() {
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 3);
+    VerletIntegrator integrator(0.001);
+    Context context(system, integrator, platform);
+    context.setPositions(positions);
+    vector<int> bondAtoms, fragments;
+    vector<double> bondOrders;
+
+    // Nothing is available until the forces have been computed.
+
+    force->getBondsInContext(context, 0.3, bondAtoms, bondOrders);
+    ASSERT_EQUAL(0, bondAtoms.size());
+    context.getState(State::Energy);
+
+    // Every reactive molecule should have its two O-H bonds, and no bonds should involve the point charges.
+
+    force->getBondsInContext(context, 0.3, bondAtoms, bondOrders);
+    ASSERT_EQUAL(2*bondOrders.size(), bondAtoms.size());
+    vector<int> numBonds(3, 0);
+    for (int i = 0; i < (int) bondOrders.size(); i++) {
+        int atom1 = bondAtoms[2*i], atom2 = bondAtoms[2*i+1];
+        ASSERT(atom1 < 9 && atom2 < 9);
+        ASSERT(bondOrders[i] >= 0.3);
+        if (atom1/3 == atom2/3 && atom1%3 == 0) {
+            ASSERT(bondOrders[i] > 0.5);
+            numBonds[atom1/3]++;
+        }
+    }
+    for (int i = 0; i < 3; i++)
+        ASSERT_EQUAL(2, numBonds[i]);
+
+    // Each reactive molecule is a fragment of its own.
+
+    force->getFragmentsInContext(context, 0.3, fragments);
+    ASSERT_EQUAL(force->getNumAtoms(), fragments.size());
+    for (int i = 0; i < 9; i++)
+        ASSERT_EQUAL(i/3, fragments[i]);
+    for (int i = 9; i < force->getNumAtoms(); i++)
+        ASSERT_EQUAL(-1, fragments[i]);
+
+    // With a threshold no bond can reach, every reactive atom is a separate fragment.
+
+    force->getBondsInContext(context, 10.0, bondAtoms, bondOrders);
+    ASSERT_EQUAL(0, bondAtoms.size());
+    force->getFragmentsInContext(context, 10.0, fragments);
+    for (int i = 0; i < 9; i++)
+        ASSERT_EQUAL(i, fragments[i]);
+}
+
+void testCheckpoint() {
+    // A Context loading a checkpoint should continue with the same reactive region and warm-started charges.
+
+    System system;
+    vector<Vec3> positions;
+    ExternalPuremdForce* force = createWaterSystem(system, positions, 0);
+    force->setAdaptiveQMRegion({0}, 0.4, 100);
+    VerletIntegrator integrator1(0.0005);
+    Context context1(system, integrator1, platform);
+    context1.setPositions(positions);
+    integrator1.step(10);
+    stringstream checkpoint;
+    context1.createCheckpoint(checkpoint);
+    int iterations0, preconditionerComputations;
+    double residual1, residual2;
+    force->getChargeSolverInfoInContext(context1, iterations0, residual1, preconditionerComputations);
+    State state1 = context1.getState(State::Positions | State::Forces | State::Energy, false, 1);
+    vector<int> qmAtoms1;
+    force->getQMAtomsInContext(context1, qmAtoms1);
+
+    VerletIntegrator integrator2(0.0005);
+    Context context2(system, integrator2, platform);
+    context2.loadCheckpoint(checkpoint);
+    State state2 = context2.getState(State::Forces | State::Energy, false, 1);
+    vector<int> qmAtoms2;
+    force->getQMAtomsInContext(context2, qmAtoms2);
+    ASSERT_EQUAL_CONTAINERS(qmAtoms1, qmAtoms2);
+    ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-5);
+    for (int i = 0; i < (int) positions.size(); i++)
+        ASSERT_EQUAL_VEC(state1.getForces()[i], state2.getForces()[i], 1e-4);
+
+    // Both Contexts started the last charge solve from the same history, so it should have taken
+    // exactly the same path.
+
+    int iterations1, iterations2;
+    force->getChargeSolverInfoInContext(context1, iterations1, residual1, preconditionerComputations);
+    force->getChargeSolverInfoInContext(context2, iterations2, residual2, preconditionerComputations);
+    ASSERT_EQUAL(iterations1-iterations0, iterations2);
+    ASSERT_EQUAL_TOL(residual1, residual2, 1e-6);
+
+    // A checkpoint of a Context that has just loaded one, before it does any evaluations, should
+    // contain exactly the same data.
+
+    VerletIntegrator integrator3(0.0005);
+    Context context3(system, integrator3, platform);
+    checkpoint.clear();
+    checkpoint.seekg(0);
+    context3.loadCheckpoint(checkpoint);
+    stringstream checkpoint3;
+    context3.createCheckpoint(checkpoint3);
+    ASSERT(checkpoint.str() == checkpoint3.str());
+}
+
+void testCheckpointInLargerStream() {
+    // A checkpoint embedded in a larger stream should only consume its own data.
+
+    System system;
+    vector<Vec3> positions;
+    createWaterSystem(system, positions, 0);
+    VerletIntegrator integrator1(0.0005);
+    Context context1(system, integrator1, platform);
+    context1.setPositions(positions);
+    integrator1.step(2);
+    stringstream stream;
+    stream << "header ";
+    context1.createCheckpoint(stream);
+    stream << " trailer";
+    VerletIntegrator integrator2(0.0005);
+    Context context2(system, integrator2, platform);
+    string header;
+    stream >> header;
+    stream.get();
+    context2.loadCheckpoint(stream);
+    string trailer;
+    stream >> trailer;
+    ASSERT_EQUAL("header", header);
+    ASSERT_EQUAL("trailer", trailer);
+    State state1 = context1.getState(State::Energy);
+    State state2 = context2.getState(State::Energy);
+    ASSERT_EQUAL_TOL(state1.getPotentialEnergy(), state2.getPotentialEnergy(), 1e-5);
+}
+
+void testCheckpointFormat() {
+    // A checkpoint only uses the version 2 format if some force has data to save, so checkpoints of other
+    // Systems can still be read by any version of OpenMM.
+
+    System system1, system2;
+    vector<Vec3> positions;
+    createWaterSystem(system1, positions);
+    system2.addParticle(1.0);
+    VerletIntegrator integrator1(0.0005), integrator2(0.0005);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    context1.setPositions(positions);
+    context2.setPositions(vector<Vec3>(1));
+    stringstream checkpoint1, checkpoint2;
+    context1.createCheckpoint(checkpoint1);
+    context2.createCheckpoint(checkpoint2);
+    ASSERT_EQUAL(0, checkpoint1.str().compare(0, 25, "OpenMM Binary Chkpoint 2\n"));
+    ASSERT_EQUAL(0, checkpoint2.str().compare(0, 25, "OpenMM Binary Checkpoint\n"));
+
+    // Loading a checkpoint into a System with a different set of forces should fail.
+
+    System system3;
+    positions.clear();
+    createWaterSystem(system3, positions);
+    system3.addForce(new CMMotionRemover());
+    VerletIntegrator integrator3(0.0005);
+    Context context3(system3, integrator3, platform);
+    bool threwException = false;
+    try {
+        context3.loadCheckpoint(checkpoint1);
+    }
+    catch (const OpenMMException& e) {
+        threwException = true;
+    }
+    ASSERT(threwException);
+}
+
+void testInvalidCheckpoint() {
+    // Corrupting the sizes or atom indices in the ExternalPuremdForce data of a checkpoint should make loading
+    // it fail cleanly.  Without that force, the checkpoint has the same state data and no force section, so its
+    // length tells where the ExternalPuremdForce data starts: it follows the number of forces and the empty
+    // section of the NonbondedForce.
+
+    System system1, system2;
+    vector<Vec3> positions;
+    createWaterSystem(system1, positions);
+    positions.clear();
+    createWaterSystem(system2, positions);
+    system2.removeForce(1);
+    VerletIntegrator integrator1(0.0005), integrator2(0.0005);
+    Context context1(system1, integrator1, platform);
+    Context context2(system2, integrator2, platform);
+    context1.setPositions(positions);
+    context2.setPositions(positions);
+    integrator1.step(2);
+    stringstream checkpoint1, checkpoint2;
+    context1.createCheckpoint(checkpoint1);
+    context2.createCheckpoint(checkpoint2);
+    const int numAtoms = positions.size();
+    const int forceStart = checkpoint2.str().size()+3*sizeof(int);
+    const int embeddedStart = forceStart+(numAtoms+2)*sizeof(int);
+    int numEmbedded;
+    memcpy(&numEmbedded, &checkpoint1.str()[embeddedStart-sizeof(int)], sizeof(int));
+    ASSERT_EQUAL(numAtoms-3, numEmbedded);
+    const int historyStart = embeddedStart+(numEmbedded+2)*sizeof(int)+3*sizeof(Vec3);
+    vector<pair<int, int> > corruptions = {{embeddedStart-(int) sizeof(int), 1000000}, {embeddedStart-(int) sizeof(int), -1},
+                                           {embeddedStart, numAtoms}, {embeddedStart, 0},
+                                           {embeddedStart+(int) sizeof(int)*numEmbedded, 5},
+                                           {historyStart, 6}, {historyStart+(int) sizeof(int), numAtoms+2}};
+    for (auto corruption : corruptions) {
+        string data = checkpoint1.str();
+        memcpy(&data[corruption.first], &corruption.second, sizeof(int));
+        stringstream stream(data);
+        VerletIntegrator integrator3(0.0005);
+        Context context3(system1, integrator3, platform);
+        bool threwException = false;
+        try {
+            context3.loadCheckpoint(stream);
+        }
+        catch (const OpenMMException& e) {
+            threwException = true;
+        }
+        ASSERT(threwException);
+    }
+
+    // The unmodified checkpoint should still load.
+
+    VerletIntegrator integrator3(0.0005);
+    Context context3(system1, integrator3, platform);
+    context3.loadCheckpoint(checkpoint1);
+    ASSERT_EQUAL_TOL(context1.getState(State::Energy).getPotentialEnergy(), context3.getState(State::Energy).getPotentialEnergy(), 1e-5);
+}
+
+void runPlatformTests();
+
+int main(int argc, char* argv[]) {
+    try {
+        initializeTests(argc, argv);
+        testForcesMatchEnergy();
+        testPeriodicImages();
+        testRepeatedEvaluation();
+        testNeighborListReuse();
+        testTriclinicNeighborList();
+        testCachedEvaluation();
+        testAdaptiveQMRegion();
+        testAdaptiveQMFrequency();
+        testEmbeddingCutoff();
+        testEmbeddingKeepsChargeHistory();
+        testTimingInfo();
+        testPreconditionerReuse(refactorControlFile);
+        testPreconditionerReuse(refactorIlutControlFile);
+        testMixedPrecisionSolver();
+        testCompressedChargeMatrix();
+        testInMemoryParameters();
+        testTabulatedLongRange();
+        testVirial();
+        testBondsAndFragments();
+        testCheckpoint();
+        testCheckpointInLargerStream();
+        testCheckpointFormat();
+        testInvalidCheckpoint();
+        runPlatformTests();
+    }
+    catch(const exception& e) {
+        cout << "exception: " << e.what() << endl;
+        return 1;
+    }
+    cout << "Done" << endl;
+    return 0;
+}
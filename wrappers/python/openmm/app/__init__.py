@@ -31,6 +31,7 @@ from .statedatareporter import StateDataReporter
 from .element import Element
 from .desmonddmsfile import DesmondDMSFile
 from .checkpointreporter import CheckpointReporter
+from .puremdreporter import PuremdTimingReporter, PuremdBondReporter
 from .charmmcrdfiles import CharmmCrdFile, CharmmRstFile
 from .charmmparameterset import CharmmParameterSet
 from .charmmpsffile import CharmmPsfFile, CharmmPSFWarning
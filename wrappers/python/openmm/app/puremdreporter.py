@@ -0,0 +1,287 @@
+"""
+puremdreporter.py: Outputs timing and charge solver statistics, bond orders and fragments for an ExternalPuremdForce
+
+This is part of the OpenMM molecular simulation toolkit originating from
+Simbios, the NIH National Center for Physics-Based Simulation of
+Biological Structures at Stanford, funded under the NIH Roadmap for
+Medical Research, grant U54 GM072970. See https://simtk.org.
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS, CONTRIBUTORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE
+USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import openmm as mm
+import openmm.unit as unit
+import struct
+
+__all__ = ['PuremdTimingReporter', 'PuremdBondReporter']
+
+
+class PuremdTimingReporter(object):
+    """PuremdTimingReporter outputs where the time goes when evaluating an ExternalPuremdForce, along with
+    statistics on how PuReMD solved for the atomic charges.
+
+    To use it, create a PuremdTimingReporter, then add it to the Simulation's list of reporters.  Each line
+    of the output describes the force evaluations since the previous report: the number of times PuReMD was
+    run, the average wall clock time (in ms) of each phase per evaluation, the average number of charge
+    solver iterations per evaluation, the relative residual of the solver in the most recent evaluation, and
+    how many times the preconditioner was recomputed.  The data is written in comma-separated-value (CSV)
+    format by default.
+    """
+
+    _phases = [('Gather', mm.ExternalPuremdForce.GatherTime),
+               ('Setup', mm.ExternalPuremdForce.SetupTime),
+               ('Neighbor List', mm.ExternalPuremdForce.NeighborListTime),
+               ('Init Forces', mm.ExternalPuremdForce.InitForcesTime),
+               ('Bonded', mm.ExternalPuremdForce.BondedTime),
+               ('Charges', mm.ExternalPuremdForce.ChargeTime),
+               ('Nonbonded', mm.ExternalPuremdForce.NonbondedTime),
+               ('Scatter', mm.ExternalPuremdForce.ScatterTime),
+               ('Total', mm.ExternalPuremdForce.TotalTime)]
+
+    def __init__(self, file, reportInterval, force=None, separator=','):
+        """Create a PuremdTimingReporter.
+
+        Parameters
+        ----------
+        file : string or file
+            The file to write to, specified as a file name or file object
+        reportInterval : int
+            The interval (in time steps) at which to write reports
+        force : ExternalPuremdForce=None
+            The force to report on.  If None, the first ExternalPuremdForce in the System is used.
+        separator : string=','
+            The separator to use between columns in the file
+        """
+        self._reportInterval = reportInterval
+        self._openedFile = isinstance(file, str)
+        if self._openedFile:
+            self._out = open(file, 'w')
+        else:
+            self._out = file
+        self._force = force
+        self._separator = separator
+        self._hasInitialized = False
+
+    def describeNextReport(self, simulation):
+        """Get information about the next report this object will generate.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The Simulation to generate a report for
+
+        Returns
+        -------
+        dict
+            A dictionary describing the required information for the next report
+        """
+        steps = self._reportInterval - simulation.currentStep%self._reportInterval
+        return {'steps':steps, 'periodic':None, 'include':[]}
+
+    def report(self, simulation, state):
+        """Generate a report.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The Simulation to generate a report for
+        state : State
+            The current state of the simulation
+        """
+        if not self._hasInitialized:
+            if self._force is None:
+                for force in simulation.system.getForces():
+                    if isinstance(force, mm.ExternalPuremdForce):
+                        self._force = force
+                        break
+                if self._force is None:
+                    raise ValueError('The System does not contain an ExternalPuremdForce')
+            headers = ['Step', 'Evaluations']+['%s (ms)' % name for name, phase in self._phases]
+            headers += ['Solver Iterations', 'Solver Residual', 'Preconditioner Computations']
+            print('#"%s"' % ('"'+self._separator+'"').join(headers), file=self._out)
+            self._lastTimes = [0.0]*len(self._phases)
+            self._lastEvaluations = 0
+            self._lastIterations = 0
+            self._lastPreconditionerComputations = 0
+            self._hasInitialized = True
+
+        times, evaluations = self._force.getTimingInfoInContext(simulation.context)
+        iterations, residual, preconditionerComputations = self._force.getChargeSolverInfoInContext(simulation.context)
+        numEvaluations = evaluations-self._lastEvaluations
+        scale = 1.0/max(numEvaluations, 1)
+        values = [simulation.currentStep, numEvaluations]
+        values += [1000.0*(times[phase]-self._lastTimes[phase])*scale for name, phase in self._phases]
+        values += [(iterations-self._lastIterations)*scale, residual, preconditionerComputations-self._lastPreconditionerComputations]
+        print(self._separator.join(str(v) for v in values), file=self._out)
+        try:
+            self._out.flush()
+        except AttributeError:
+            pass
+        self._lastTimes = list(times)
+        self._lastEvaluations = evaluations
+        self._lastIterations = iterations
+        self._lastPreconditionerComputations = preconditionerComputations
+
+    def __del__(self):
+        if self._openedFile:
+            self._out.close()
+
+
+class PuremdBondReporter(object):
+    """PuremdBondReporter records the bonds between reactive atoms computed by an ExternalPuremdForce, and the
+    fragments (molecules or reaction intermediates) they connect, so that reactions in a QM/MM simulation can be
+    analyzed afterward.
+
+    To use it, create a PuremdBondReporter, then add it to the Simulation's list of reporters.  The data is written
+    to a compact binary file.  All values are little-endian.  The file begins with a header consisting of the
+    8 bytes b'PMDBONDS', the format version (int32) and the number of atoms in the force (int32).  It is followed by
+    one record for each report, consisting of
+
+    - the step (int64) and time in ps (float64)
+    - the number of bonds (int32) and number of fragments (int32)
+    - the indices of the two atoms of each bond (2 int32 per bond), as returned by ExternalPuremdForce.addAtom()
+    - the bond order of each bond (float32 per bond)
+    - the fragment containing each atom (int32 per atom), or -1 for atoms that are not reactive
+
+    Use readFrames() to read the file back.
+    """
+
+    _magic = b'PMDBONDS'
+    _version = 1
+
+    def __init__(self, file, reportInterval, force=None, threshold=0.3):
+        """Create a PuremdBondReporter.
+
+        Parameters
+        ----------
+        file : string or file
+            The file to write to, specified as a file name or a file object opened in binary mode
+        reportInterval : int
+            The interval (in time steps) at which to write reports
+        force : ExternalPuremdForce=None
+            The force to report on.  If None, the first ExternalPuremdForce in the System is used.
+        threshold : float=0.3
+            The minimum bond order of the bonds to record and of the bonds connecting a fragment
+        """
+        self._reportInterval = reportInterval
+        self._openedFile = isinstance(file, str)
+        if self._openedFile:
+            self._out = open(file, 'wb')
+        else:
+            self._out = file
+        self._force = force
+        self._threshold = threshold
+        self._hasInitialized = False
+
+    def describeNextReport(self, simulation):
+        """Get information about the next report this object will generate.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The Simulation to generate a report for
+
+        Returns
+        -------
+        dict
+            A dictionary describing the required information for the next report
+        """
+        steps = self._reportInterval - simulation.currentStep%self._reportInterval
+        # Requesting the forces makes PuReMD see the current positions.  The next step reuses the cached
+        # result of that evaluation, so this costs nothing extra.
+        return {'steps':steps, 'periodic':None, 'include':['forces']}
+
+    def report(self, simulation, state):
+        """Generate a report.
+
+        Parameters
+        ----------
+        simulation : Simulation
+            The Simulation to generate a report for
+        state : State
+            The current state of the simulation
+        """
+        if not self._hasInitialized:
+            if self._force is None:
+                for force in simulation.system.getForces():
+                    if isinstance(force, mm.ExternalPuremdForce):
+                        self._force = force
+                        break
+                if self._force is None:
+                    raise ValueError('The System does not contain an ExternalPuremdForce')
+            self._numAtoms = self._force.getNumAtoms()
+            self._out.write(self._magic+struct.pack('<ii', self._version, self._numAtoms))
+            self._hasInitialized = True
+
+        bondAtoms, bondOrders = self._force.getBondsInContext(simulation.context, self._threshold)
+        fragments = self._force.getFragmentsInContext(simulation.context, self._threshold)
+        if len(fragments) != self._numAtoms:
+            fragments = [-1]*self._numAtoms
+        numBonds = len(bondOrders)
+        time = state.getTime().value_in_unit(unit.picoseconds)
+        self._out.write(struct.pack('<qdii', simulation.currentStep, time, numBonds, max(fragments)+1))
+        self._out.write(struct.pack('<%di' % (2*numBonds), *bondAtoms))
+        self._out.write(struct.pack('<%df' % numBonds, *bondOrders))
+        self._out.write(struct.pack('<%di' % self._numAtoms, *fragments))
+        try:
+            self._out.flush()
+        except AttributeError:
+            pass
+
+    @staticmethod
+    def readFrames(file):
+        """Read a file written by a PuremdBondReporter.
+
+        Parameters
+        ----------
+        file : string or file
+            The file to read, specified as a file name or a file object opened in binary mode
+
+        Returns
+        -------
+        generator
+            A generator that yields a tuple (step, time, bondAtoms, bondOrders, fragments) for each report, where
+            time is in ps, bondAtoms is a list of (atom1, atom2) tuples, and bondOrders and fragments are lists.
+        """
+        if isinstance(file, str):
+            with open(file, 'rb') as input:
+                for frame in PuremdBondReporter.readFrames(input):
+                    yield frame
+            return
+        header = file.read(16)
+        if len(header) < 16 or header[:8] != PuremdBondReporter._magic:
+            raise ValueError('Not a PuremdBondReporter file')
+        version, numAtoms = struct.unpack('<ii', header[8:])
+        if version != PuremdBondReporter._version:
+            raise ValueError('Unsupported PuremdBondReporter file version: %d' % version)
+        while True:
+            data = file.read(24)
+            if len(data) < 24:
+                return
+            step, time, numBonds, numFragments = struct.unpack('<qdii', data)
+            atoms = struct.unpack('<%di' % (2*numBonds), file.read(8*numBonds))
+            bondOrders = list(struct.unpack('<%df' % numBonds, file.read(4*numBonds)))
+            fragments = list(struct.unpack('<%di' % numAtoms, file.read(4*numAtoms)))
+            yield (step, time, list(zip(atoms[::2], atoms[1::2])), bondOrders, fragments)
+
+    def __del__(self):
+        if self._openedFile:
+            self._out.close()
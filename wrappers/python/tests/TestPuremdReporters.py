@@ -0,0 +1,188 @@
+import os
+import io
+import unittest
+import tempfile
+from openmm import app
+import openmm as mm
+from openmm import unit
+
+
+def createWaterSystem(numQM):
+    """Build a system of four water molecules.  The first numQM of them are reactive, and the rest are
+    treated as point charges."""
+    system = mm.System()
+    boxSize = 2.5
+    system.setDefaultPeriodicBoxVectors(mm.Vec3(boxSize, 0, 0), mm.Vec3(0, boxSize, 0), mm.Vec3(0, 0, boxSize))
+    force = mm.ExternalPuremdForce('systems/water.reaxff', 'systems/water-qmmm.control')
+    nonbonded = mm.NonbondedForce()
+    nonbonded.setNonbondedMethod(mm.NonbondedForce.CutoffPeriodic)
+    topology = app.Topology()
+    chain = topology.addChain()
+    positions = []
+    for i in range(4):
+        center = mm.Vec3(0.9+0.35*(i%2), 0.9+0.35*((i//2)%2), 1.0+0.1*i)
+        positions += [center, center+mm.Vec3(0.0957, 0, 0), center+mm.Vec3(-0.024, 0.0927, 0)]
+        residue = topology.addResidue('HOH', chain)
+        topology.addAtom('O', app.element.oxygen, residue)
+        topology.addAtom('H1', app.element.hydrogen, residue)
+        topology.addAtom('H2', app.element.hydrogen, residue)
+        system.addParticle(15.999)
+        system.addParticle(1.008)
+        system.addParticle(1.008)
+        nonbonded.addParticle(-0.834, 0.315, 0.636)
+        nonbonded.addParticle(0.417, 1.0, 0.0)
+        nonbonded.addParticle(0.417, 1.0, 0.0)
+        force.addAtom(3*i, 'O', i < numQM)
+        force.addAtom(3*i+1, 'H', i < numQM)
+        force.addAtom(3*i+2, 'H', i < numQM)
+    topology.setPeriodicBoxVectors(system.getDefaultPeriodicBoxVectors())
+    nonbonded.setForceGroup(1)
+    system.addForce(nonbonded)
+    system.addForce(force)
+    return system, topology, positions, force
+
+
+class TestPuremdReporters(unittest.TestCase):
+    def setUp(self):
+        self.system, self.topology, self.positions, self.force = createWaterSystem(3)
+        self.simulation = app.Simulation(self.topology, self.system, mm.VerletIntegrator(0.0005*unit.picoseconds), mm.Platform.getPlatformByName('Reference'))
+        self.simulation.context.setPositions(self.positions)
+
+    def testTimingAndChargeSolverInfo(self):
+        """Test getting the timing and charge solver statistics from a Context."""
+        context = self.simulation.context
+        times, numEvaluations = self.force.getTimingInfoInContext(context)
+        self.assertEqual(mm.ExternalPuremdForce.TotalTime+1, len(times))
+        self.assertEqual(0, numEvaluations)
+        context.getState(getForces=True)
+        context.getState(getEnergy=True)
+        times, numEvaluations = self.force.getTimingInfoInContext(context)
+        self.assertEqual(1, numEvaluations)
+        for t in times:
+            self.assertTrue(t >= 0.0)
+        self.assertTrue(times[mm.ExternalPuremdForce.ChargeTime] > 0.0)
+        self.assertTrue(times[mm.ExternalPuremdForce.TotalTime] >= sum(times[:mm.ExternalPuremdForce.TotalTime]))
+        numIterations, residual, numPreconditionerComputations = self.force.getChargeSolverInfoInContext(context)
+        self.assertTrue(numIterations > 0)
+        self.assertTrue(residual < 1e-10)
+        self.assertEqual(1, numPreconditionerComputations)
+
+    def testBondsAndFragments(self):
+        """Test getting the bonds and fragments of the reactive region from a Context."""
+        context = self.simulation.context
+        bondAtoms, bondOrders = self.force.getBondsInContext(context, 0.3)
+        self.assertEqual(0, len(bondAtoms))
+        self.assertEqual(0, len(bondOrders))
+        context.getState(getEnergy=True)
+
+        # Every reactive molecule should have its two O-H bonds, and no bonds should involve the point charges.
+
+        bondAtoms, bondOrders = self.force.getBondsInContext(context, 0.3)
+        self.assertEqual(2*len(bondOrders), len(bondAtoms))
+        waterBonds = set()
+        for atom1, atom2, order in zip(bondAtoms[::2], bondAtoms[1::2], bondOrders):
+            self.assertTrue(atom1 < 9 and atom2 < 9)
+            self.assertTrue(order >= 0.3)
+            if atom1//3 == atom2//3 and atom1%3 == 0:
+                self.assertTrue(order > 0.5)
+                waterBonds.add((atom1, atom2))
+        self.assertEqual(set([(0, 1), (0, 2), (3, 4), (3, 5), (6, 7), (6, 8)]), waterBonds)
+        fragments = self.force.getFragmentsInContext(context, 0.3)
+        self.assertEqual([0, 0, 0, 1, 1, 1, 2, 2, 2, -1, -1, -1], list(fragments))
+
+        # With a threshold no bond can reach, every reactive atom is a separate fragment.
+
+        bondAtoms, bondOrders = self.force.getBondsInContext(context, 10.0)
+        self.assertEqual(0, len(bondAtoms))
+        fragments = self.force.getFragmentsInContext(context, 10.0)
+        self.assertEqual(list(range(9))+[-1, -1, -1], list(fragments))
+
+    def testTimingReporter(self):
+        """Test PuremdTimingReporter."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, 'timing.csv')
+            reporter = app.PuremdTimingReporter(filename, 2)
+            self.simulation.reporters.append(reporter)
+            self.simulation.step(4)
+            del self.simulation
+            del reporter
+            with open(filename) as f:
+                lines = f.read().splitlines()
+        headers = lines[0][2:-1].split('","')
+        self.assertTrue(lines[0].startswith('#"'))
+        self.assertEqual(['Step', 'Evaluations', 'Gather (ms)'], headers[:3])
+        self.assertEqual(['Total (ms)', 'Solver Iterations', 'Solver Residual', 'Preconditioner Computations'], headers[-4:])
+        self.assertEqual(3, len(lines))
+
+        # Every step evaluates the forces at new positions, so PuReMD is run once per step.
+
+        for i, line in enumerate(lines[1:]):
+            values = [float(v) for v in line.split(',')]
+            self.assertEqual(len(headers), len(values))
+            self.assertEqual(2*(i+1), values[0])
+            self.assertEqual(2, values[1])
+            for t in values[2:-3]:
+                self.assertTrue(t >= 0.0)
+            self.assertTrue(values[headers.index('Total (ms)')] > 0.0)
+            self.assertTrue(values[-3] > 0)
+            self.assertTrue(values[-2] < 1e-10)
+            self.assertTrue(0 < values[-1] <= 2)
+
+    def testBondReporter(self):
+        """Test writing bonds and fragments with PuremdBondReporter and reading them back."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, 'bonds.dat')
+            reporter = app.PuremdBondReporter(filename, 2)
+            self.simulation.reporters.append(reporter)
+            self.simulation.step(4)
+            bondAtoms, bondOrders = self.force.getBondsInContext(self.simulation.context, 0.3)
+            fragments = self.force.getFragmentsInContext(self.simulation.context, 0.3)
+            del self.simulation
+            del reporter
+            frames = list(app.PuremdBondReporter.readFrames(filename))
+            with open(filename, 'rb') as f:
+                self.assertEqual(frames, list(app.PuremdBondReporter.readFrames(f)))
+        self.assertEqual(2, len(frames))
+        for i, (step, time, frameAtoms, frameOrders, frameFragments) in enumerate(frames):
+            self.assertEqual(2*(i+1), step)
+            self.assertAlmostEqual(0.001*(i+1), time)
+            self.assertEqual(len(frameAtoms), len(frameOrders))
+            self.assertEqual([0, 0, 0, 1, 1, 1, 2, 2, 2, -1, -1, -1], frameFragments)
+
+        # The last report was written at the current positions, so it should match what the force returns,
+        # except that the bond orders are stored in single precision.
+
+        self.assertEqual(list(zip(bondAtoms[::2], bondAtoms[1::2])), frameAtoms)
+        for order1, order2 in zip(bondOrders, frameOrders):
+            self.assertAlmostEqual(order1, order2, places=6)
+        self.assertEqual(list(fragments), frameFragments)
+
+    def testBondReporterFileObject(self):
+        """Test PuremdBondReporter with a file object, and that readFrames() rejects other files."""
+        output = io.BytesIO()
+        self.simulation.reporters.append(app.PuremdBondReporter(output, 1))
+        self.simulation.step(3)
+        output.seek(0)
+        frames = list(app.PuremdBondReporter.readFrames(output))
+        self.assertEqual([1, 2, 3], [frame[0] for frame in frames])
+        with self.assertRaises(ValueError):
+            list(app.PuremdBondReporter.readFrames(io.BytesIO(b'not a bond file')))
+
+    def testMissingForce(self):
+        """Test that the reporters require an ExternalPuremdForce."""
+        system = mm.System()
+        for i in range(self.system.getNumParticles()):
+            system.addParticle(self.system.getParticleMass(i))
+        simulation = app.Simulation(self.topology, system, mm.VerletIntegrator(0.0005*unit.picoseconds), mm.Platform.getPlatformByName('Reference'))
+        simulation.context.setPositions(self.positions)
+        with tempfile.TemporaryDirectory() as tempdir:
+            reporter = app.PuremdTimingReporter(os.path.join(tempdir, 'timing.csv'), 1)
+            simulation.reporters.append(reporter)
+            with self.assertRaises(ValueError):
+                simulation.step(1)
+            del simulation
+            del reporter
+
+
+if __name__ == '__main__':
+    unittest.main()